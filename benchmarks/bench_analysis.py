@@ -0,0 +1,118 @@
+"""
+End-to-end latency and peak memory of one Analyze click (scoring, insights,
+dashboard, granular forecast, category filter) on a synthetic upload.
+
+    python benchmarks/bench_analysis.py                      # 500k rows, this tree
+    git show HEAD~1:datanetra_core.py > /tmp/core_before.py
+    python benchmarks/bench_analysis.py --baseline /tmp/core_before.py
+
+With --baseline the same pipeline runs against that engine module as well (or a
+single-file app.py from before the UI split, which needs gradio installed), so a
+change can be measured before/after on identical data. Peak memory is the tracemalloc high-water mark
+(numpy/pandas buffers included) above the loaded frame.
+"""
+import argparse, importlib.util, os, sys, time, tracemalloc
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+USER = {'msme_number': 'UDYAM-TN-00-0000001', 'company_name': 'Benchmark Traders',
+        'full_name': 'Bench', 'business_type': 'FMCG', 'city': 'Chennai'}
+CATS = ['FMCG', 'Electronics', 'Clothing', 'Home & Decor', 'Health & Wellness']
+
+
+def load_app(path, name):
+    spec = importlib.util.spec_from_file_location(name, path)
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[name] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def synthetic_upload(rows, months=36, stores=10, seed=0):
+    """Raw-schema rows for one MSME: stores × SKUs × months of gross sales."""
+    rng = np.random.default_rng(seed)
+    skus = max(1, rows // (months * stores))
+    n = months * stores * skus
+    t = np.tile(np.arange(months), stores * skus)
+    sku = np.repeat(np.arange(1, skus + 1), months * stores)
+    base = rng.uniform(5e3, 5e4, skus)[sku - 1]
+    gross = base * (1 + 0.01 * t) * (1 + 0.15 * np.sin(2 * np.pi * t / 12)) * rng.uniform(0.8, 1.2, n)
+    return pd.DataFrame({
+        'date': pd.date_range('2022-01-01', periods=months, freq='MS')[t],
+        'store_id': np.tile(np.repeat(np.arange(1, stores + 1), months), skus),
+        'product_category': np.array(CATS)[sku % len(CATS)],
+        'product_id': sku,
+        'gross_sales': gross, 'net_sales': gross * 0.95,
+        'cost_price': gross * rng.uniform(0.5, 0.8, n),
+        'units_sold': rng.integers(10, 500, n),
+        'return_rate_pct': rng.uniform(1, 10, n).round(2),
+        'profit_margin_pct': rng.uniform(5, 35, n).round(2),
+        'inventory_level': rng.integers(50, 600, n),
+        'stock_level': rng.integers(0, 400, n), 'reorder_point': rng.integers(50, 200, n),
+        'revenue_before_ondc': gross * 0.8, 'revenue_after_ondc': gross,
+        'ondc_channel_revenue': gross * 0.2,
+        'quantity_returned': rng.integers(0, 20, n), 'replacement_count': rng.integers(0, 5, n),
+        'target_achievement_pct': rng.uniform(70, 120, n).round(1),
+        'rolling_6m_return_rate': rng.uniform(1, 9, n).round(2),
+        'udyam_number': USER['msme_number'], 'state': 'Tamil Nadu',
+    })
+
+
+def run_pipeline(app, df):
+    """The stages analyze_data runs after load_upload, in the call style that tree supports."""
+    schema = app.DataSchema.of(df)
+    if hasattr(app, 'AnalysisContext'):
+        ctx = app.AnalysisContext(df, schema)
+        app.generate_insights(USER, df, lang='en', ctx=ctx)
+        app.generate_dashboard_data(USER, df, ctx=ctx)
+        app.generate_granular_forecast(df, schema)
+        app.handle_category_filter(CATS[0], df, ctx=ctx)
+    else:
+        app.generate_insights(USER, df.copy(), lang='en', schema=schema)
+        app.generate_dashboard_data(USER, df.copy(), schema)
+        app.generate_granular_forecast(df, schema)
+        app.handle_category_filter(CATS[0], df, schema)
+    app.plt.close('all')
+
+
+def measure(app, raw, repeats):
+    df = app.optimize_dtypes(app._fill_required_cols(app._apply_col_remap(raw.copy())), "benchmark")
+    run_pipeline(app, df)                                   # warm-up: imports, font cache
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter(); run_pipeline(app, df); times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    run_pipeline(app, df)
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return min(times), float(np.median(times)), peak
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--rows', type=int, default=500_000)
+    ap.add_argument('--repeats', type=int, default=3)
+    ap.add_argument('--baseline', help="another engine module to measure on the same data")
+    args = ap.parse_args()
+
+    raw = synthetic_upload(args.rows)
+    print(f"{len(raw):,} rows · {raw['product_id'].nunique():,} SKUs")
+    runs = [('current', os.path.join(ROOT, 'datanetra_core.py'))]
+    if args.baseline: runs.insert(0, ('baseline', args.baseline))
+    results = {}
+    for label, path in runs:
+        app = load_app(path, f"app_{label}")
+        results[label] = measure(app, raw, args.repeats)
+    print(f"{'':10s} {'best s':>8s} {'median s':>9s} {'peak MB':>9s}")
+    for label, (best, med, peak) in results.items():
+        print(f"{label:10s} {best:8.2f} {med:9.2f} {peak / 1e6:9.1f}")
+    if 'baseline' in results:
+        b, c = results['baseline'], results['current']
+        print(f"speed-up {b[1] / c[1]:.2f}× · peak memory {100 * (1 - c[2] / b[2]):.0f}% lower")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+"""
+Accuracy and cost of each forecasting model on synthetic MSME-shaped monthly
+sales, under a rolling-origin backtest.
+
+    python benchmarks/bench_forecast.py                          # 100 series
+    python benchmarks/bench_forecast.py --series 1,100,10000 --out after.json
+    python benchmarks/bench_forecast.py --app /tmp/core_before.py --out before.json
+
+Each series has its own length, trend, yearly seasonality and noise. Every model
+is fitted at --folds origins spaced --step months apart, each followed by a
+12-month test window. The error is measured on the 6- and 12-month totals,
+which is what every model reports. Per model and series count the results file
+records:
+- MAPE and sMAPE;
+- interval coverage: the share of folds whose actual total falls inside the
+  model's lower/upper band;
+- fit and predict seconds per backtest fit. Predict is timed separately only
+  where a model's state API splits the two; otherwise it is null and fit
+  covers both;
+- the tracemalloc peak of one backtest pass.
+The fitted-model cache is switched off so every call is a real fit. The slow
+models (Prophet, statsmodels, forecast_sales) run on the first --slow-cap
+series and record how many they saw. The JSON is written with sorted keys so
+two runs diff cleanly.
+"""
+import argparse, importlib.util, inspect, json, os, platform, subprocess, sys, time, tracemalloc
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HORIZON = 12
+
+
+def load_app(path, name='app_bench'):
+    spec = importlib.util.spec_from_file_location(name, path)
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[name] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def synthetic_series(n_series, seed=0):
+    """List of (params, monthly DataFrame [ds, y]) with varied length, trend, seasonality and noise."""
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(n_series):
+        p = {'months': int(rng.choice([18, 24, 36, 48, 60])) + HORIZON,
+             'trend': float(rng.choice([-0.01, 0.0, 0.01, 0.03])),
+             'season': float(rng.choice([0.0, 0.1, 0.3])),
+             'noise': float(rng.choice([0.03, 0.1, 0.25]))}
+        t = np.arange(p['months'])
+        level = rng.uniform(2e4, 5e6)
+        y = (level * (1 + p['trend']) ** t
+             * (1 + p['season'] * np.sin(2 * np.pi * t / 12 + rng.uniform(0, 2 * np.pi)))
+             * np.clip(rng.normal(1, p['noise'], p['months']), 0.05, None))
+        ds = pd.date_range('2019-01-01', periods=p['months'], freq='MS')
+        out.append((p, pd.DataFrame({'ds': ds, 'y': y})))
+    return out
+
+
+def models(app):
+    """name -> (fit(monthly) -> state, predict(state) -> result or None, slow)."""
+    whole = lambda fn: (lambda m: fn(m), None)
+    def state_api(init, result):
+        # Newer trees take the series the state covers, for its residuals
+        if 'y' not in inspect.signature(result).parameters:
+            return (lambda m: init(m['y'].to_numpy(float)), result, False)
+        return (lambda m: (init(m['y'].to_numpy(float)), m['y'].to_numpy(float)),
+                lambda s: result(s[0], HORIZON, s[1]), False)
+    hw = getattr(app, '_hw_state', None)
+    lr = getattr(app, '_lr_state', None)
+    specs = {
+        'baseline':          whole(app._run_baseline_model) + (False,),
+        'linear-regression': (state_api(lr, app._lr_state_result) if lr
+                              else whole(app._run_linear_regression_model) + (False,)),
+        'holt-winters/numpy': (state_api(hw, app._hw_state_result) if hw
+                               else whole(app._run_holtwinters_model) + (False,)),
+    }
+    if getattr(app, '_HW_STATSMODELS_AVAILABLE', False) and hasattr(app, 'HW_ENGINE'):
+        def _sm(m):
+            engine, app.HW_ENGINE = app.HW_ENGINE, 'statsmodels'
+            try: return app._run_holtwinters_model(m)
+            finally: app.HW_ENGINE = engine
+        specs['holt-winters/statsmodels'] = (_sm, None, True)
+    if hasattr(app, '_run_seasonal_trend_model'):
+        specs['seasonal-trend'] = whole(app._run_seasonal_trend_model) + (False,)
+    if getattr(app, 'PROPHET_AVAILABLE', False):
+        specs['prophet'] = whole(app._run_prophet_model) + (True,)
+
+    def _ensemble(m):
+        df = pd.DataFrame({'Date': m['ds'], 'Monthly_Sales_INR': m['y']})
+        return app.forecast_sales(df)
+    specs['forecast_sales'] = (_ensemble, None, True)
+    return specs
+
+
+def backtest(series, fit, predict, folds, step):
+    """Per-fold errors, the number of fits and the summed fit / predict seconds."""
+    errs = {6: [], 12: []}
+    cover = []
+    t_fit = t_pred = 0.0
+    fits = 0
+    for _, m in series:
+        n = len(m)
+        for k in range(folds):
+            o = n - HORIZON - k * step
+            if o < 3: break
+            train, test = m.iloc[:o].reset_index(drop=True), m['y'].to_numpy()[o:o + HORIZON]
+            t0 = time.perf_counter(); st = fit(train); t1 = time.perf_counter(); fits += 1
+            res = predict(st) if predict and st is not None else st
+            t_fit += t1 - t0; t_pred += time.perf_counter() - t1
+            if not res: continue
+            for h in (6, 12):
+                f, a = float(res[f'{h}_month']['forecast']), float(test[:h].sum())
+                errs[h].append((abs(f - a) / a, 2 * abs(f - a) / (abs(f) + abs(a) or 1)))
+            w = res['12_month']
+            cover.append(w['lower'] <= float(test.sum()) <= w['upper'])
+    return errs, cover, fits, t_fit, t_pred
+
+
+def run_model(series, fit, predict, folds, step):
+    errs, cover, fits, t_fit, t_pred = backtest(series, fit, predict, folds, step)
+    tracemalloc.start()
+    backtest(series[:min(len(series), 20)], fit, predict, 1, step)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    row = {'series': len(series), 'fits': fits, 'scored': len(errs[6]),
+           'fit_s': round(t_fit / max(fits, 1), 6),
+           'predict_s': round(t_pred / max(fits, 1), 6) if predict else None,
+           'peak_mb': round(peak / 1e6, 2),
+           'coverage_12m': round(float(np.mean(cover)), 3) if cover else None}
+    for h in (6, 12):
+        e = np.array(errs[h]) if errs[h] else np.full((1, 2), np.nan)
+        row[f'mape_{h}m'] = round(float(np.nanmean(e[:, 0]) * 100), 3)
+        row[f'smape_{h}m'] = round(float(np.nanmean(e[:, 1]) * 100), 3)
+    return row
+
+
+def batch_holt_winters(app, series):
+    """fit_holt_winters on every series at once, truncated to a shared length, with one origin."""
+    if not hasattr(app, 'fit_holt_winters'): return None
+    L = min(len(m) for _, m in series) - HORIZON
+    Y = np.stack([m['y'].to_numpy()[:L] for _, m in series])
+    A = np.stack([m['y'].to_numpy()[L:L + HORIZON] for _, m in series])
+    t0 = time.perf_counter(); fit = app.fit_holt_winters(Y, horizon=HORIZON); dt = time.perf_counter() - t0
+    f = np.clip(fit['forecast'], 0, None)
+    row = {'series': len(series), 'fits': len(series), 'scored': len(series), 'months': L,
+           'fit_s': round(dt / len(series), 6), 'predict_s': None}
+    for h in (6, 12):
+        fs, a = f[:, :h].sum(1), A[:, :h].sum(1)
+        row[f'mape_{h}m'] = round(float(np.mean(np.abs(fs - a) / a) * 100), 3)
+        row[f'smape_{h}m'] = round(float(np.mean(2 * np.abs(fs - a) / (np.abs(fs) + np.abs(a))) * 100), 3)
+    return row
+
+
+def git_rev():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--series', default='100', help="comma-separated series counts, e.g. 1,100,10000")
+    ap.add_argument('--folds', type=int, default=3)
+    ap.add_argument('--step', type=int, default=3, help="months between backtest origins")
+    ap.add_argument('--slow-cap', type=int, default=50, help="max series for the slow models")
+    ap.add_argument('--models', help="comma-separated subset of model names")
+    ap.add_argument('--app', default=os.path.join(ROOT, 'datanetra_core.py'),
+                    help="engine module to benchmark (or a pre-split app.py)")
+    ap.add_argument('--out', default='bench_forecast.json')
+    args = ap.parse_args()
+
+    app = load_app(args.app)
+    if hasattr(app, 'MODEL_CACHE'):
+        app.MODEL_CACHE = app._ResultCache(0, 0, None, 0)     # every call is a real fit
+    specs = models(app)
+    if args.models:
+        keep = set(args.models.split(','))
+        specs = {k: v for k, v in specs.items() if k in keep}
+
+    results = {}
+    for count in (int(c) for c in args.series.split(',')):
+        series = synthetic_series(count)
+        runs = results[str(count)] = {}
+        for name, (fit, predict, slow) in specs.items():
+            sub = series[:args.slow_cap] if slow else series
+            runs[name] = run_model(sub, fit, predict, args.folds, args.step)
+            r = runs[name]
+            print(f"{count:>6} {name:26s} n={r['series']:<6} MAPE6 {r['mape_6m']:7.2f}  sMAPE6 {r['smape_6m']:7.2f}  "
+                  f"cover12 {r['coverage_12m'] or 0:5.2f}  fit {r['fit_s'] * 1e3:9.3f} ms  peak {r['peak_mb']:7.2f} MB")
+        if not args.models or 'holt-winters/batch' in args.models:
+            runs['holt-winters/batch'] = batch_holt_winters(app, series)
+
+    meta = {'git_rev': git_rev(), 'app': os.path.abspath(args.app),
+            'scoring_version': getattr(app, 'SCORING_VERSION', None),
+            'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'cpu_count': os.cpu_count(), 'folds': args.folds, 'step': args.step,
+            'slow_cap': args.slow_cap, 'horizon': HORIZON}
+    with open(args.out, 'w') as f:
+        json.dump({'meta': meta, 'results': results}, f, indent=2, sort_keys=True)
+    print(f"wrote {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+calculate_scores (the fused NumPy scoring kernel) against the pandas
+normalize() chain it replaced, on synthetic canonical frames.
+
+    python benchmarks/bench_scoring.py                        # 10k, 1M and 10M rows
+    python benchmarks/bench_scoring.py --rows 10000,1000000 --repeats 5
+    python benchmarks/bench_scoring.py --rows 10000000 --workers 1,2,4 --chunk-rows 500000
+
+For every row count each path scores identical copies of the same frame:
+- pandas: the old chain;
+- kernel/wN: calculate_scores with N partition threads (frames below
+  2 x DATANETRA_SCORE_PARTITION_ROWS stay in one partition);
+- chunked: score_chunks over --chunk-rows slices, as a file larger than
+  memory would be scored.
+Each run reports the best and median wall time and the tracemalloc peak. It
+also checks that every output column has the pandas path's dtype and
+bit-identical values. 10M rows needs about 4 GB of RAM for the pandas path.
+"""
+import argparse, importlib.util, os, sys, time, tracemalloc
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_app(path, name='app_bench'):
+    spec = importlib.util.spec_from_file_location(name, path)
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[name] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def synthetic_frame(rows, seed=0):
+    """The eight scoring inputs with upload-like ranges; a few zero-sales rows."""
+    rng = np.random.default_rng(seed)
+    sales = rng.uniform(5e3, 5e5, rows)
+    sales[::997] = 0
+    return pd.DataFrame({
+        'Monthly_Sales_INR': sales,
+        'Monthly_Operating_Cost_INR': sales * rng.uniform(0.5, 0.9, rows),
+        'Outstanding_Loan_INR': rng.uniform(0, 2e6, rows),
+        'Vendor_Delivery_Reliability': rng.uniform(0.6, 1.0, rows),
+        'Inventory_Turnover': rng.integers(50, 600, rows),
+        'Avg_Margin_Percent': rng.uniform(5, 35, rows).round(2),
+        'Monthly_Demand_Units': rng.integers(10, 500, rows),
+        'Returns_Percentage': rng.uniform(1, 10, rows).round(2),
+    })
+
+
+def pandas_scores(app, df):
+    """calculate_scores before the kernel: one Series and one normalize() per term."""
+    normalize = app.normalize
+    for col in app.SCORE_INPUTS:
+        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+    df['Monthly_Sales_INR_Adjusted'] = df['Monthly_Sales_INR'].replace(0, 1e-9)
+    df["Cashflow_Stress"] = normalize(df["Monthly_Operating_Cost_INR"] / df["Monthly_Sales_INR_Adjusted"])
+    df["Loan_Stress"] = normalize(df["Outstanding_Loan_INR"] / (df["Monthly_Sales_INR_Adjusted"] * 12))
+    df["Financial_Risk_Score"] = (0.5 * df["Cashflow_Stress"] + 0.5 * df["Loan_Stress"]).clip(0, 1)
+    df["Vendor_Score"] = (0.5 * df["Vendor_Delivery_Reliability"] + 0.3 * normalize(df["Inventory_Turnover"]) + 0.2 * normalize(df["Avg_Margin_Percent"])).clip(0, 1)
+    df["Growth_Potential_Score"] = (0.4 * normalize(df["Monthly_Demand_Units"]) + 0.35 * normalize(df["Avg_Margin_Percent"]) + 0.25 * (1 - normalize(df["Returns_Percentage"]))).clip(0, 1)
+    df["MSME_Health_Score"] = ((1 - df["Financial_Risk_Score"]) * 0.4 + df["Vendor_Score"] * 0.3 + df["Growth_Potential_Score"] * 0.3) * 100
+    df['Profitability_Ratio'] = normalize(df['Avg_Margin_Percent'] * df['Monthly_Sales_INR_Adjusted'])
+    df['Operational_Efficiency'] = (1 - normalize(df['Monthly_Operating_Cost_INR'] / df['Monthly_Sales_INR_Adjusted'])).clip(0, 1)
+    df['Customer_Satisfaction'] = (1 - normalize(df['Returns_Percentage'])).clip(0, 1)
+    df['Performance_Score'] = (0.3*df['Profitability_Ratio'] + 0.25*df['Operational_Efficiency'] + 0.2*df['Customer_Satisfaction'] + 0.15*df['Vendor_Delivery_Reliability'] + 0.1*normalize(df['Inventory_Turnover'])).clip(0, 1) * 100
+    return df
+
+
+def measure(fn, df, repeats):
+    """(best s, median s, peak bytes, last output) of fn on fresh copies of df."""
+    times, out = [], None
+    for _ in range(repeats):
+        d = df.copy()
+        t0 = time.perf_counter(); out = fn(d); times.append(time.perf_counter() - t0)
+        del d
+    d = df.copy()
+    tracemalloc.start()
+    fn(d)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(times), float(np.median(times)), peak, out
+
+
+def identical(app, a, b):
+    return all(a[c].dtype == b[c].dtype and np.array_equal(a[c].to_numpy(), b[c].to_numpy(), equal_nan=True)
+               for c in app.SCORE_OUTPUTS)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--rows', default='10000,1000000,10000000', help="comma-separated row counts")
+    ap.add_argument('--repeats', type=int, default=3)
+    ap.add_argument('--workers', default='1', help="comma-separated partition thread counts")
+    ap.add_argument('--chunk-rows', type=int, default=0, help="also time score_chunks over slices of this size")
+    ap.add_argument('--app', default=os.path.join(ROOT, 'datanetra_core.py'),
+                    help="engine module to benchmark (or a pre-split app.py)")
+    args = ap.parse_args()
+
+    app = load_app(args.app)
+    workers = [int(w) for w in args.workers.split(',')]
+    app.SCORE_WORKERS = max(workers)                          # size of the scoring thread pool
+    print(f"{'rows':>11s} {'path':10s} {'best s':>8s} {'median s':>9s} {'peak MB':>9s}  speed-up")
+    for rows in (int(r) for r in args.rows.split(',')):
+        df = synthetic_frame(rows)
+        schema = app.DataSchema.of(df)
+        res = {'pandas': measure(lambda d: pandas_scores(app, d), df, args.repeats)}
+        for w in workers:
+            res[f'kernel/w{w}'] = measure(lambda d: app.calculate_scores(d, schema, workers=w), df, args.repeats)
+        if args.chunk_rows:
+            step = args.chunk_rows
+            chunked = lambda d: pd.concat(app.score_chunks(
+                lambda: (d.iloc[s:s + step] for s in range(0, len(d), step)), schema, workers=max(workers)))
+            res['chunked'] = measure(chunked, df, args.repeats)
+        p = res['pandas']
+        for label, (best, med, peak, out) in res.items():
+            note = '' if label == 'pandas' else (
+                f"  {p[1] / med:5.2f}× · {'bit-identical' if identical(app, p[3], out) else 'OUTPUTS DIFFER'}")
+            print(f"{rows:>11,} {label:10s} {best:8.3f} {med:9.3f} {peak / 1e6:9.1f}{note}")
+        del df, res, p
+
+
+if __name__ == '__main__':
+    main()
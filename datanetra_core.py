@@ -0,0 +1,5070 @@
+"""
+DataNetra.ai analysis engine — ingest, caches, scoring, forecasting and the
+report builders, with no UI. datanetra_ui builds the Gradio app on top of it;
+stage-pool workers, the benchmarks and the tests import this module alone.
+"""
+import datetime
+import hashlib
+import json as _json_mod
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # Must be before pyplot import — prevents GUI window on servers
+import matplotlib.pyplot as plt
+warnings.filterwarnings("ignore")
+# ══════════════════════════════════════════════════════════════════════════════
+# FIX 2: Correct column mapping for lowercase dataset columns
+# ══════════════════════════════════════════════════════════════════════════════
+COL_REMAP_FIXED = {
+    # ── This dataset columns ─────────────────────────────────────────────────
+    "gross_sales":             "Monthly_Sales_INR",
+    "cost_price":              "Monthly_Operating_Cost_INR",
+    "outstanding_amount":      "Outstanding_Loan_INR",
+    "return_rate_pct":         "Returns_Percentage",
+    "profit_margin_pct":       "Avg_Margin_Percent",
+    "units_sold":              "Monthly_Demand_Units",
+    "date":                    "Date",
+    "store_id":                "Store_ID",
+    "product_category":        "Product_Category",
+    "product_id":              "SKU_Name",
+    "inventory_level":         "Inventory_Turnover",
+    "stock_level":             "Stock_Level",
+    "reorder_point":           "Reorder_Point",
+    "udyam_number":            "Udyam_Number",
+    "vendor_name":             "Vendor_Name",
+    "enterprise_name":         "Enterprise_Name",
+    # ── Generic aliases ──────────────────────────────────────────────────────
+    "Sales_INR":               "Monthly_Sales_INR",
+    "Monthly_Sales":           "Monthly_Sales_INR",
+    "Gross_Sales":             "Monthly_Sales_INR",
+    "Operating_Cost_INR":      "Monthly_Operating_Cost_INR",
+    "Operating_Cost":          "Monthly_Operating_Cost_INR",
+    "Outstanding_Loan":        "Outstanding_Loan_INR",
+    "Vendor_Reliability":      "Vendor_Delivery_Reliability",
+    "Inventory_Turnover_Rate": "Inventory_Turnover",
+    "Average_Margin_Percent":  "Avg_Margin_Percent",
+    "Profit_Margin_%":         "Avg_Margin_Percent",
+    "Monthly_Demand":          "Monthly_Demand_Units",
+    "Quantity_Sold":           "Monthly_Demand_Units",
+    "Returns":                 "Returns_Percentage",
+    "Return_Quantity":         "Returns_Percentage",
+    "Product_Name":            "SKU_Name",
+}
+
+def _apply_col_remap(df):
+    for old, new in COL_REMAP_FIXED.items():
+        if old in df.columns and new not in df.columns:
+            df.rename(columns={old: new}, inplace=True)
+    # Derive Vendor_Delivery_Reliability: prefer fulfillment ratio, else returns-based
+    if "Vendor_Delivery_Reliability" not in df.columns:
+        if "net_units_sold" in df.columns and "Monthly_Demand_Units" in df.columns:
+            df["Vendor_Delivery_Reliability"] = (
+                df["net_units_sold"] / df["Monthly_Demand_Units"].replace(0, 1)
+            ).clip(0, 1)
+        elif "Returns_Percentage" in df.columns:
+            df["Vendor_Delivery_Reliability"] = (1 - df["Returns_Percentage"] / 100).clip(0, 1)
+        else:
+            df["Vendor_Delivery_Reliability"] = 0.85
+    # Derive Monthly_Operating_Cost_INR if missing
+    if "Monthly_Operating_Cost_INR" not in df.columns:
+        if "Monthly_Sales_INR" in df.columns:
+            df["Monthly_Operating_Cost_INR"] = df["Monthly_Sales_INR"] * 0.60
+        else:
+            df["Monthly_Operating_Cost_INR"] = 0
+    # Build a readable SKU_Name if we only have numeric product_id
+    if "SKU_Name" in df.columns:
+        import pandas as _pd
+        try:
+            if df["SKU_Name"].dtype in [_pd.Int64Dtype(), int] or str(df["SKU_Name"].dtype).startswith("int"):
+                if "Product_Category" in df.columns:
+                    df["SKU_Name"] = df["Product_Category"].astype(str) + "-" + df["SKU_Name"].astype(str)
+                else:
+                    df["SKU_Name"] = "SKU-" + df["SKU_Name"].astype(str)
+        except Exception:
+            pass
+    return df
+
+# Required canonical columns and the value used when an upload lacks them
+_REQUIRED_COL_DEFAULTS = {
+    'Date':     lambda: pd.to_datetime(datetime.datetime.now().date()),
+    'Store_ID': 'Default',
+    'SKU_Name': 'Default',
+    'Monthly_Sales_INR':          0,
+    'Monthly_Operating_Cost_INR': 0,
+    'Outstanding_Loan_INR':       0,
+    'Vendor_Delivery_Reliability':0,
+    'Inventory_Turnover':         0,
+    'Avg_Margin_Percent':         0,
+    'Monthly_Demand_Units':       0,
+    'Returns_Percentage':         0,
+}
+
+# Udyam/MSME key column (before or after remap)
+_UDYAM_CANDIDATES = ['udyam_number','Udyam_Number','UDYAM_NUMBER',
+                     'msme_number','MSME_Number','Udyam_No']
+
+def _fill_required_cols(df):
+    for col, default in _REQUIRED_COL_DEFAULTS.items():
+        if col not in df.columns:
+            df[col] = default() if callable(default) else default
+    return df
+
+def _udyam_col(df):
+    return next((c for c in _UDYAM_CANDIDATES if c in df.columns), None)
+
+class DataSchema:
+    """Logical field → physical column, resolved once per upload.
+
+    Candidates are listed canonical name first, then the raw dataset name, so the
+    same schema works on remapped frames and on raw ones. Unresolved fields are
+    None. Every pipeline stage takes the schema instead of probing df.columns.
+    """
+    FIELDS = {
+        'sales':           ('Monthly_Sales_INR', 'Gross_Sales', 'gross_sales'),
+        'net_sales':       ('net_sales',),
+        'date':            ('Date', 'date'),
+        'store':           ('Store_ID', 'store_id'),
+        'category':        ('Product_Category', 'product_category'),
+        'sku':             ('SKU_Name', 'product_id'),
+        'units':           ('Monthly_Demand_Units', 'units_sold'),
+        'margin':          ('Avg_Margin_Percent', 'profit_margin_pct'),
+        'returns':         ('Returns_Percentage', 'return_rate_pct'),
+        'qty_returned':    ('quantity_returned',),
+        'replacements':    ('replacement_count',),
+        'rolling_returns': ('rolling_6m_return_rate',),
+        'inventory':       ('Inventory_Turnover', 'inventory_level'),
+        'stock':           ('Stock_Level', 'stock_level'),
+        'reorder':         ('Reorder_Point', 'reorder_point'),
+        'target':          ('target_achievement_pct',),
+        'rev_before_ondc': ('revenue_before_ondc',),
+        'rev_after_ondc':  ('revenue_after_ondc',),
+        'ondc_revenue':    ('ondc_channel_revenue',),
+        'state':           ('state', 'State', 'STATE', 'state_name'),
+        'udyam':           tuple(_UDYAM_CANDIDATES),
+    }
+
+    def __init__(self, columns):
+        present = set(columns)
+        self.columns = {f: next((c for c in cands if c in present), None)
+                        for f, cands in self.FIELDS.items()}
+        for f, c in self.columns.items():
+            setattr(self, f, c)
+        # Nothing left for _apply_col_remap to rename or derive → scoring can skip it
+        self.canonical = (not any(old in present and new not in present
+                                  for old, new in COL_REMAP_FIXED.items())
+                          and {'Vendor_Delivery_Reliability', 'Monthly_Operating_Cost_INR'} <= present)
+
+    @classmethod
+    def of(cls, df):
+        return cls(df.columns)
+
+    def __repr__(self):
+        return f"DataSchema({ {f: c for f, c in self.columns.items() if c} })"
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Streaming CSV ingestion — bounded memory for large multi-MSME exports
+# ══════════════════════════════════════════════════════════════════════════════
+STREAM_CSV_THRESHOLD_MB = float(os.environ.get("DATANETRA_STREAM_CSV_MB", 50))
+STREAM_CSV_CHUNK_ROWS   = int(os.environ.get("DATANETRA_CSV_CHUNK_ROWS", 100_000))
+# Rows kept when a large file is used whole (no Udyam column, a single other MSME,
+# or the logged-in MSME missing) — a uniform sample in file order beyond this
+STREAM_FALLBACK_ROWS    = int(os.environ.get("DATANETRA_STREAM_FALLBACK_ROWS", 250_000))
+
+def _iter_csv_chunks(file_path, chunksize=None):
+    """Yield remapped, default-filled chunks of a CSV upload."""
+    for chunk in pd.read_csv(file_path, chunksize=chunksize or STREAM_CSV_CHUNK_ROWS):
+        yield _fill_required_cols(_apply_col_remap(chunk))
+
+def stream_csv_ingest(file_path, msme_key, chunksize=None):
+    """
+    Chunked alternative to ``pd.read_csv`` + MSME filter for very large uploads.
+    See _stream_ingest.
+    """
+    return _stream_ingest(lambda: _iter_csv_chunks(file_path, chunksize), msme_key, file_path)
+
+class _RowReservoir:
+    """
+    Uniform sample of at most ``size`` rows from a stream of frames, kept in
+    stream order: every row draws a random priority and the ``size`` smallest
+    survive, so memory never exceeds one sample plus one chunk.
+    """
+
+    def __init__(self, size, seed=0):
+        self.size = max(int(size), 1)
+        self.rng = np.random.default_rng(seed)
+        self.frame, self.keys, self.seen = None, np.empty(0), 0
+
+    def add(self, chunk):
+        keys = self.rng.random(len(chunk))
+        self.seen += len(chunk)
+        if len(self.keys) >= self.size:                 # full: only rows that beat the cut can enter
+            hit = keys < self.keys.max()
+            chunk, keys = chunk[hit], keys[hit]
+            if not len(chunk): return self
+        frame = chunk if self.frame is None else pd.concat([self.frame, chunk], ignore_index=True)
+        keys = np.concatenate([self.keys, keys])
+        if len(keys) > self.size:
+            pick = np.sort(np.argpartition(keys, self.size - 1)[:self.size])
+            frame, keys = frame.iloc[pick].reset_index(drop=True), keys[pick]
+        self.frame, self.keys = frame, keys
+        return self
+
+def _stream_ingest(chunks, msme_key, label):
+    """
+    ``chunks()`` yields remapped, default-filled frames (called twice).
+    Only the logged-in MSME's rows are kept; every other row is folded into
+    running government aggregates. Column maxima needed by the fallback health
+    score are only known once the whole file has been seen, so the government
+    aggregates are built in a second streaming pass. A file the logged-in MSME
+    does not occur in is used whole, as in the in-memory path — that decision
+    waits for the first pass, and the second pass keeps at most
+    STREAM_FALLBACK_ROWS of it (a uniform sample in file order).
+    Returns (msme_df, gov_aggregates) — the latter is accepted directly by
+    build_full_platform_dashboard.
+    """
+    msme_key = (msme_key or '').strip().upper()
+    kept = []; first_key = None; multi = False; ucol = None; maxima = {}; health_sum = 0.0
+    for chunk in chunks():
+        g = _gov_coerce(chunk[[c for c in _GOV_NUMS if c in chunk.columns]].copy())
+        for c, v in _gov_maxima(g).items():
+            if not np.isnan(v): maxima[c] = max(maxima.get(c, v), v)
+        health_sum += float(g['MSME_Health_Score'].sum())
+        ucol = ucol or _udyam_col(chunk)
+        if not (msme_key and ucol): continue
+        keys = chunk[ucol].astype(str).str.strip().str.upper()
+        if not multi:
+            uniq = keys.unique()
+            if first_key is None and len(uniq): first_key = uniq[0]
+            multi = len(uniq) > 1 or (len(uniq) == 1 and uniq[0] != first_key)
+        kept.append(chunk[keys == msme_key])
+    whole = sum(len(k) for k in kept) == 0
+    if whole and multi:
+        # Logged-in MSME not in a multi-MSME file — same fallback as the in-memory path
+        print(f"[INFO] {msme_key} not found in {label}; using the full file")
+
+    derive = health_sum == 0
+    acc = _GovAccumulator({c: maxima.get(c, 0.0) for c in _GOV_MAX_COLS}, derive)
+    sample = _RowReservoir(STREAM_FALLBACK_ROWS) if whole else None
+    for chunk in chunks():
+        acc.add(chunk)
+        if sample is not None: sample.add(chunk)
+    if sample is None:
+        df = pd.concat(kept, ignore_index=True)
+    elif sample.frame is None:
+        df = pd.DataFrame(columns=list(_REQUIRED_COL_DEFAULTS))
+    else:
+        df = sample.frame
+        if sample.seen > len(df):
+            print(f"[INFO] {label}: keeping a uniform sample of {len(df):,} of {sample.seen:,} rows")
+    return df, acc.result()
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Streaming Excel ingestion — openpyxl read-only mode, all data sheets
+# ══════════════════════════════════════════════════════════════════════════════
+# 'stream' (default) or 'pandas' (the old pd.read_excel DOM load, for comparison)
+XLSX_ENGINE = os.environ.get("DATANETRA_XLSX_ENGINE", "stream")
+
+def _xlsx_header(row):
+    names, seen = [], {}
+    for i, v in enumerate(row):
+        name = f"Unnamed: {i}" if v is None or str(v).strip() == "" else str(v).strip()
+        if name in seen:                       # same de-duplication as pandas
+            seen[name] += 1; name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+def _xlsx_column(values):
+    """Typed buffer for one column of a chunk (int64/float64/bool/datetime64/object)."""
+    present = [v for v in values if v is not None]
+    types = {type(v) for v in present}
+    if types and types <= {bool}:
+        if len(present) == len(values): return np.array(values, dtype=bool)
+        return np.array(values, dtype=object)
+    if types <= {int, float} and not (bool in types):
+        arr = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        if len(present) == len(values) and np.all(np.mod(arr, 1) == 0) and np.all(np.abs(arr) < 2**53):
+            return arr.astype(np.int64)        # pandas also reads integral floats as int
+        return arr
+    if types <= {datetime.datetime, datetime.date}:
+        return pd.to_datetime(pd.Series(values, dtype=object)).to_numpy()
+    return np.array([np.nan if v is None else v for v in values], dtype=object)
+
+def _xlsx_frame(rows, header):
+    width = len(header)
+    cols = list(zip(*[r[:width] + (None,) * (width - len(r)) for r in rows]))
+    return pd.DataFrame({h: _xlsx_column(list(c)) for h, c in zip(header, cols)}, copy=False)
+
+def _xlsx_same_layout(base, header):
+    """True when a sheet shares at least half of the first data sheet's headers."""
+    base = set(base)
+    return len(base & set(header)) >= max(1, len(base) // 2)
+
+def _xlsx_data_sheets(wb):
+    """(sheet, header) for every sheet that looks like the same table as the first."""
+    out = []
+    for ws in wb.worksheets:
+        ws.reset_dimensions()                  # trust the rows, not the stored <dimension>
+        first = next(ws.iter_rows(values_only=True), None)
+        if not first or all(v is None for v in first): continue
+        header = _xlsx_header(first)
+        while header and header[-1].startswith("Unnamed: ") and first[len(header) - 1] is None:
+            header.pop()
+        if out and not _xlsx_same_layout(out[0][1], header):
+            print(f"[INFO] xlsx: skipping sheet {ws.title!r} (different layout)")
+            continue
+        out.append((ws, header))
+    return out
+
+def iter_xlsx_chunks(file_path, chunksize=None):
+    """
+    Yield DataFrame chunks from every data sheet of a workbook, streamed row by
+    row in read-only mode (no full DOM). Sheets sharing the first sheet's layout
+    (e.g. one per store or month) are concatenated; columns are aligned to the
+    union of their headers.
+    """
+    import openpyxl
+    step = chunksize or STREAM_CSV_CHUNK_ROWS
+    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheets = _xlsx_data_sheets(wb)
+        union = list(dict.fromkeys(h for _, header in sheets for h in header))
+        for ws, header in sheets:
+            rows = []
+            it = ws.iter_rows(values_only=True); next(it)
+            for r in it:
+                if all(v is None for v in r): continue
+                rows.append(r)
+                if len(rows) >= step:
+                    yield _xlsx_frame(rows, header).reindex(columns=union); rows = []
+            if rows:
+                yield _xlsx_frame(rows, header).reindex(columns=union)
+    finally:
+        wb.close()
+
+def read_xlsx(file_path):
+    """Whole workbook as one DataFrame; logs rows/sec for engine comparison."""
+    t0 = time.perf_counter()
+    if XLSX_ENGINE == "pandas":
+        frames = []
+        for name, d in pd.read_excel(file_path, sheet_name=None).items():
+            if not len(d.columns): continue
+            if frames and not _xlsx_same_layout(map(str, frames[0].columns), map(str, d.columns)):
+                print(f"[INFO] xlsx: skipping sheet {name!r} (different layout)")
+                continue
+            frames.append(d)
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    else:
+        parts = list(iter_xlsx_chunks(file_path))
+        df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+    dt = max(time.perf_counter() - t0, 1e-9)
+    print(f"[INFO] xlsx ({XLSX_ENGINE}): {len(df):,} rows in {dt:.2f}s — {len(df)/dt:,.0f} rows/sec")
+    return df
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Columnar dataset cache — each upload is parsed once, then memory-mapped
+# ══════════════════════════════════════════════════════════════════════════════
+# Layout: <cache dir>/<sha256 of file>/{meta.json, c<i>.npy}. Numeric columns are
+# stored as-is, 'Date' as datetime64[ns], text columns as int32 codes + a category
+# list in meta.json. Column names are the canonical COL_REMAP_FIXED names.
+DATASET_CACHE_DIR    = os.environ.get("DATANETRA_CACHE_DIR",
+                                      os.path.join(tempfile.gettempdir(), "datanetra_cache"))
+DATASET_CACHE_MAX_MB = float(os.environ.get("DATANETRA_CACHE_MAX_MB", 2048))
+
+# Full digests already computed in this process, keyed on the file's path, size,
+# mtime and a hash of three sampled blocks: a repeat Analyze of the same upload
+# reads 192 KiB instead of the whole file. A miss hashes the file in full.
+_DIGEST_MEMO_ITEMS = 64
+_DIGEST_SAMPLE = 1 << 16
+_digest_memo = {}
+_digest_memo_lock = threading.Lock()
+
+def _file_sha256(file_path, block=1 << 20):
+    h = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for b in iter(lambda: f.read(block), b''):
+            h.update(b)
+    return h.hexdigest()
+
+def _digest_probe(file_path):
+    """(path, size, mtime_ns, hash of the first, middle and last sample blocks)."""
+    st = os.stat(file_path)
+    h = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for off in sorted({0, max(0, (st.st_size - _DIGEST_SAMPLE) // 2), max(0, st.st_size - _DIGEST_SAMPLE)}):
+            f.seek(off); h.update(f.read(_DIGEST_SAMPLE))
+    return os.path.abspath(file_path), st.st_size, st.st_mtime_ns, h.hexdigest()
+
+def dataset_digest(file_path, block=1 << 20):
+    """SHA-256 of the file's content; unchanged files come back from _digest_memo."""
+    probe = _digest_probe(file_path)
+    with _digest_memo_lock:
+        digest = _digest_memo.pop(probe, None)
+        if digest is not None:
+            _digest_memo[probe] = digest          # most recent last
+            return digest
+    digest = _file_sha256(file_path, block)
+    with _digest_memo_lock:
+        _digest_memo[probe] = digest
+        while len(_digest_memo) > _DIGEST_MEMO_ITEMS:
+            _digest_memo.pop(next(iter(_digest_memo)))
+    return digest
+
+class _DatasetCacheWriter:
+    """Append remapped frames column by column; commit() publishes atomically."""
+
+    def __init__(self, digest):
+        self.final = os.path.join(DATASET_CACHE_DIR, digest)
+        self.tmp = f"{self.final}.tmp-{os.getpid()}-{threading.get_ident()}"
+        os.makedirs(self.tmp, exist_ok=True)
+        self.cols, self.parts, self.cats, self.n = None, {}, {}, 0
+
+    def append(self, df):
+        if self.cols is None:
+            self.cols = list(df.columns)
+        elif list(df.columns) != self.cols:
+            raise ValueError("inconsistent columns across chunks")
+        for i, c in enumerate(self.cols):
+            s = df[c]
+            if c == 'Date' and not pd.api.types.is_datetime64_any_dtype(s):
+                s = pd.to_datetime(s, errors='coerce')
+            if pd.api.types.is_datetime64_any_dtype(s):
+                kind, arr = 'datetime', s.dt.tz_localize(None).to_numpy('datetime64[ns]') if s.dt.tz else s.to_numpy('datetime64[ns]')
+            elif pd.api.types.is_bool_dtype(s) or pd.api.types.is_numeric_dtype(s):
+                kind, arr = 'num', s.to_numpy()
+            else:
+                codes, uniq = pd.factorize(s, use_na_sentinel=True)
+                cmap = self.cats.setdefault(i, {})
+                g = np.array([cmap.setdefault(u, len(cmap)) for u in uniq.tolist()], dtype=np.int32)
+                kind, arr = 'text', np.where(codes >= 0, g[np.maximum(codes, 0)] if len(g) else -1, -1).astype(np.int32)
+            kinds = self.parts.setdefault(i, [])
+            p = os.path.join(self.tmp, f"c{i}.p{len(kinds)}.npy")
+            np.save(p, arr)
+            kinds.append((kind, arr.dtype.str, p, len(arr)))
+        self.n += len(df)
+
+    def commit(self):
+        meta = {'rows': self.n, 'columns': []}
+        for i, c in enumerate(self.cols or []):
+            parts = self.parts[i]
+            kinds = {k for k, _, _, _ in parts}
+            if len(kinds) > 1:
+                raise ValueError(f"column {c!r} changes type across chunks")
+            kind = kinds.pop()
+            dtype = np.result_type(*[np.dtype(d) for _, d, _, _ in parts])
+            out = np.lib.format.open_memmap(os.path.join(self.tmp, f"c{i}.npy"), mode='w+',
+                                            dtype=dtype, shape=(self.n,))
+            pos = 0
+            for _, _, p, n in parts:
+                out[pos:pos + n] = np.load(p); pos += n; os.remove(p)
+            out.flush(); del out
+            entry = {'name': c, 'kind': kind}
+            if kind == 'text':
+                entry['categories'] = list(self.cats.get(i, {}))
+            meta['columns'].append(entry)
+        with open(os.path.join(self.tmp, 'meta.json'), 'w') as f:
+            _json_mod.dump(meta, f, default=str)
+        try:
+            os.replace(self.tmp, self.final)
+        except OSError:
+            shutil.rmtree(self.tmp, ignore_errors=True)   # another worker published first
+        _dataset_cache_evict(keep=self.final)
+
+    def abort(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+def dataset_cache_build(digest, frames):
+    """Write an iterable of remapped frames to the cache. Returns True on success."""
+    w = _DatasetCacheWriter(digest)
+    try:
+        for df in frames:
+            w.append(df)
+        w.commit()
+        return True
+    except Exception as e:
+        w.abort()
+        print(f"[INFO] Dataset cache skipped: {e}")
+        return False
+
+def _dataset_cache_meta(digest):
+    path = os.path.join(DATASET_CACHE_DIR, digest, 'meta.json')
+    try:
+        with open(path) as f: meta = _json_mod.load(f)
+    except (OSError, ValueError):
+        return None
+    try: os.utime(path)        # LRU clock
+    except OSError: pass
+    return meta
+
+def _dataset_cache_columns(digest, meta):
+    base = os.path.join(DATASET_CACHE_DIR, digest)
+    # mmap_mode='c': pages are shared with the cache file, writes stay private
+    return [(m, np.load(os.path.join(base, f"c{i}.npy"), mmap_mode='c'))
+            for i, m in enumerate(meta['columns'])]
+
+def _dataset_cache_frame(cols, rows=slice(None)):
+    data = {}
+    for m, arr in cols:
+        a = np.asarray(arr[rows])     # plain ndarray view over the mapped pages
+        if m['kind'] == 'text':
+            lut = np.array(m['categories'] + [np.nan], dtype=object)   # code -1 → NaN
+            a = lut[a]
+        data[m['name']] = a
+    return pd.DataFrame(data, copy=False)
+
+def dataset_cache_load(digest):
+    """Whole cached dataset as a DataFrame, or None when not cached."""
+    meta = _dataset_cache_meta(digest)
+    if meta is None: return None
+    try:
+        return _dataset_cache_frame(_dataset_cache_columns(digest, meta))
+    except Exception as e:
+        print(f"[INFO] Dataset cache entry unreadable ({e}); re-parsing")
+        shutil.rmtree(os.path.join(DATASET_CACHE_DIR, digest), ignore_errors=True)
+        return None
+
+def dataset_cache_rows(digest):
+    meta = _dataset_cache_meta(digest)
+    return None if meta is None else meta['rows']
+
+def dataset_cache_iter(digest, chunksize=None):
+    """Yield the cached dataset in row slices without materialising it all."""
+    meta = _dataset_cache_meta(digest)
+    cols = _dataset_cache_columns(digest, meta)
+    step = chunksize or STREAM_CSV_CHUNK_ROWS
+    for start in range(0, meta['rows'], step):
+        df = _dataset_cache_frame(cols, slice(start, start + step))
+        df.index = pd.RangeIndex(start, start + len(df))
+        yield df
+
+def _dataset_cache_evict(keep=None):
+    """Drop least-recently-used entries (never ``keep``) until the cache fits DATASET_CACHE_MAX_MB."""
+    try:
+        entries = []
+        for d in os.listdir(DATASET_CACHE_DIR):
+            p = os.path.join(DATASET_CACHE_DIR, d)
+            meta = os.path.join(p, 'meta.json')
+            if not os.path.isfile(meta): continue
+            size = sum(os.path.getsize(os.path.join(p, f)) for f in os.listdir(p))
+            entries.append((os.path.getmtime(meta), size, p))
+        total = sum(s for _, s, _ in entries)
+        for _, size, p in sorted(entries):
+            if total <= DATASET_CACHE_MAX_MB * 1024 * 1024: break
+            if p == keep: continue
+            shutil.rmtree(p, ignore_errors=True); total -= size
+    except OSError:
+        pass
+
+def load_upload(file_path, msme_key, digest=None):
+    """
+    Parse an upload through the columnar cache; frames come back dtype-optimised.
+    Returns (full_df or None, msme_df, gov_aggregates or None). Large files
+    skip the full frame: only the MSME slice + streamed aggregates come back.
+    """
+    digest = digest or dataset_digest(file_path)
+    rows = dataset_cache_rows(digest)
+    large = os.path.getsize(file_path) > STREAM_CSV_THRESHOLD_MB * 1024 * 1024
+    if rows is None:
+        xlsx = file_path.endswith('.xlsx')
+        if large:
+            chunks = iter_xlsx_chunks(file_path) if xlsx else pd.read_csv(file_path, chunksize=STREAM_CSV_CHUNK_ROWS)
+            if not dataset_cache_build(digest, (_apply_col_remap(c) for c in chunks)):
+                if xlsx: return optimize_dtypes(_fill_required_cols(_apply_col_remap(read_xlsx(file_path)))), None, None
+                df, gov = stream_csv_ingest(file_path, msme_key)
+                return None, optimize_dtypes(df, "MSME rows"), gov
+        else:
+            df = read_xlsx(file_path) if xlsx else pd.read_csv(file_path)
+            df = _apply_col_remap(df)
+            dataset_cache_build(digest, [df])
+            cached = dataset_cache_load(digest)
+            df = _fill_required_cols(cached if cached is not None else df)
+            return optimize_dtypes(df), None, None
+    if large:
+        df, gov = _stream_ingest(lambda: (_fill_required_cols(c) for c in dataset_cache_iter(digest)),
+                                 msme_key, file_path)
+        return None, optimize_dtypes(df, "MSME rows"), gov
+    return optimize_dtypes(_fill_required_cols(dataset_cache_load(digest))), None, None
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Dtype optimisation at ingest — smaller canonical frame for every later copy
+# ══════════════════════════════════════════════════════════════════════════════
+CATEGORY_COLS = ['Store_ID', 'Product_Category', 'SKU_Name', 'state', 'Udyam_Number']
+
+def _frame_bytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+def optimize_dtypes(df, label="upload"):
+    """
+    Downcast metric columns where it cannot change a result, make the key
+    columns categorical and parse 'Date' once. Logs before/after memory.
+      int64   → int32   when |x| < 46341, so products of two columns still fit
+      float64 → float32 when every value is a whole number and the column's
+                absolute sum stays below 2**24, so every partial sum is exact
+                in float32 too (fractional values stay float64: their sums
+                would round)
+    """
+    before = _frame_bytes(df)
+    if 'Date' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['Date']):
+        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+    for c in df.columns:
+        s = df[c]
+        if c in CATEGORY_COLS:
+            if not isinstance(s.dtype, pd.CategoricalDtype):
+                df[c] = s.astype('category')
+        elif pd.api.types.is_integer_dtype(s) and s.dtype.itemsize > 4 and s.dtype.kind == 'i':
+            if len(s) == 0 or int(s.abs().max()) < 46341:
+                df[c] = s.astype(np.int32)
+        elif s.dtype == np.float64 and len(s):
+            v = s.to_numpy()
+            with np.errstate(invalid='ignore'):
+                whole = not np.any(np.mod(v, 1) > 0)       # NaN rows pass; they stay NaN
+            if whole and np.nansum(np.abs(v)) < 2**24:
+                df[c] = v.astype(np.float32)
+    after = _frame_bytes(df)
+    print(f"[INFO] Memory ({label}): {before/1e6:,.2f} MB → {after/1e6:,.2f} MB "
+          f"({100*(1-after/max(before,1)):.0f}% smaller, {len(df):,} rows)")
+    return df
+
+def _drop_unused_categories(df):
+    """After row filtering, so categorical groupbys/labels only see present values."""
+    for c in df.columns:
+        if isinstance(df[c].dtype, pd.CategoricalDtype):
+            df[c] = df[c].cat.remove_unused_categories()
+    return df
+
+# ══════════════════════════════════════════════════════════════════════════════
+# MSME partition index — normalised Udyam key → row positions, once per dataset
+# ══════════════════════════════════════════════════════════════════════════════
+PARTITION_CACHE_ITEMS = int(os.environ.get("DATANETRA_PARTITION_CACHE_ITEMS", 8))
+
+class MsmePartitions:
+    """Row positions of every MSME in a frame, keyed by the stripped, upper-cased Udyam.
+
+    Keys are normalised per category, not per row, so building the index is one
+    integer groupby over the Udyam codes. Rows without a Udyam belong to no partition.
+    """
+
+    def __init__(self, df, ucol):
+        self.ucol = ucol
+        s = df[ucol]
+        cat = s.array if isinstance(s.dtype, pd.CategoricalDtype) else pd.Categorical(s)
+        labels = np.asarray(pd.Index(cat.categories.astype(str)).str.strip().str.upper(), dtype=object)
+        keys, remap = np.unique(labels, return_inverse=True)
+        codes = np.asarray(cat.codes)
+        norm = pd.Categorical.from_codes(np.where(codes >= 0, remap[np.maximum(codes, 0)], -1),
+                                         categories=keys)
+        self.index = pd.Series(norm).groupby(norm, observed=True).indices
+        self.rows = len(df)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def __iter__(self):
+        return iter(self.index.items())
+
+    def take(self, df, key):
+        """This MSME's rows of ``df`` (the frame the index was built on), or None."""
+        pos = self.index.get(key)
+        return None if pos is None else df.iloc[pos]
+
+    def frames(self, df):
+        """(key, rows) per MSME without rescanning the Udyam column."""
+        for key, pos in self.index.items():
+            yield key, df.iloc[pos]
+
+_PARTITIONS = {}
+_PARTITIONS_LOCK = threading.Lock()
+
+def msme_partitions(df, digest=None):
+    """Partition index for ``df``, or None without a Udyam column. With a dataset
+    digest the index is reused across analyses of the same upload."""
+    ucol = _udyam_col(df)
+    if ucol is None: return None
+    key = (digest, ucol, len(df)) if digest else None
+    with _PARTITIONS_LOCK:
+        hit = _PARTITIONS.get(key) if key else None
+        if hit is not None:
+            _PARTITIONS[key] = _PARTITIONS.pop(key)      # most recent last
+            return hit
+    parts = MsmePartitions(df, ucol)
+    if key:
+        with _PARTITIONS_LOCK:
+            _PARTITIONS[key] = parts
+            while len(_PARTITIONS) > PARTITION_CACHE_ITEMS:
+                _PARTITIONS.pop(next(iter(_PARTITIONS)))
+    return parts
+
+def load_msme_frame(file_path, msme_key, digest=None):
+    """
+    load_upload plus the logged-in MSME's slice. Returns (msme_df, full_df, gov_aggregates):
+    full_df is every MSME's rows for the government dashboard (the MSME slice when
+    streamed). A single-MSME file, or one without the logged-in Udyam, is used whole.
+    """
+    df, msme_df, gov_agg = load_upload(file_path, msme_key, digest)
+    if df is None:
+        return msme_df, msme_df, gov_agg
+    full = df
+    parts = msme_partitions(df, digest) if msme_key else None
+    if parts is not None and len(parts) > 1:
+        rows = parts.take(df, msme_key)
+        if rows is not None:
+            df = _drop_unused_categories(rows.copy())
+    return df, full, gov_agg
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Analysis result cache — a repeat Analyze click skips the whole pipeline
+# ══════════════════════════════════════════════════════════════════════════════
+# Memory tier: most recent RESULT_CACHE_ITEMS bundles, figures as-is.
+# Disk tier: <cache dir>/results/<key>.pkl with figures stored as PNG. Neither
+# holds data frames — they come back from the columnar dataset cache. Both
+# expire after RESULT_CACHE_TTL_S seconds.
+RESULT_CACHE_ITEMS      = int(os.environ.get("DATANETRA_RESULT_CACHE_ITEMS", 8))
+RESULT_CACHE_DISK_ITEMS = int(os.environ.get("DATANETRA_RESULT_CACHE_DISK_ITEMS", 256))
+RESULT_CACHE_TTL_S      = float(os.environ.get("DATANETRA_RESULT_CACHE_TTL", 24 * 3600))
+RESULT_CACHE_DIR        = os.path.join(DATASET_CACHE_DIR, "results")
+
+def _fig_png(fig):
+    blob = getattr(fig, '_datanetra_png', None)
+    if blob is not None: return blob        # rebuilt from a PNG — no need to render it again
+    import io
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png')
+    return {'png': buf.getvalue(), 'dpi': fig.dpi}
+
+def _png_fig(blob):
+    """A figure showing a stored chart image pixel for pixel (gr.Plot needs a Figure)."""
+    import io
+    img = plt.imread(io.BytesIO(blob['png']))
+    h, w = img.shape[:2]
+    fig = plt.figure(figsize=(w / blob['dpi'], h / blob['dpi']), dpi=blob['dpi'])
+    fig.figimage(img, 0, 0)
+    fig._datanetra_png = blob
+    return fig
+
+def _map_figs(obj, fn):
+    if isinstance(obj, matplotlib.figure.Figure) or (isinstance(obj, dict) and 'png' in obj and 'dpi' in obj):
+        return fn(obj)
+    if isinstance(obj, dict):
+        return {k: _map_figs(v, fn) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_map_figs(v, fn) for v in obj)
+    return obj
+
+class _ResultCache:
+    """Bounded in-memory LRU over a TTL'd pickle directory (memory only if ``directory`` is None)."""
+    SWEEP_S = 30     # the disk tier is trimmed at most this often per process
+
+    def __init__(self, max_items, ttl, directory, disk_items, promote=False):
+        from collections import OrderedDict
+        self.max_items, self.ttl, self.dir, self.disk_items = max_items, ttl, directory, disk_items
+        self.promote = promote     # copy disk hits into the memory tier
+        self.mem = OrderedDict()   # key -> (stored_at, bundle)
+        self.lock = threading.Lock()
+        self.hits = self.misses = 0
+        self.swept = 0.0
+
+    def _path(self, key):
+        return os.path.join(self.dir, f"{key}.pkl")
+
+    def get(self, key):
+        """(bundle, tier) or (None, None); tier is 'memory' or 'disk'."""
+        import pickle
+        now = time.time()
+        with self.lock:
+            item = self.mem.get(key)
+            if item and now - item[0] <= self.ttl:
+                self.mem.move_to_end(key); self.hits += 1
+                return item[1], 'memory'
+            self.mem.pop(key, None)
+            if self.dir is None:
+                self.misses += 1
+                return None, None
+        path = self._path(key)
+        try:
+            if now - os.path.getmtime(path) > self.ttl:
+                os.remove(path); raise OSError("expired")
+            with open(path, 'rb') as f:
+                bundle = _map_figs(pickle.load(f), _png_fig)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            with self.lock: self.misses += 1
+            return None, None
+        with self.lock:
+            self.hits += 1
+            if self.promote:
+                self.mem[key] = (time.time(), bundle)
+                while len(self.mem) > self.max_items:
+                    self.mem.popitem(last=False)
+        return bundle, 'disk'
+
+    def put(self, key, bundle, disk_bundle):
+        """``disk_bundle`` is what goes to disk; its figures are converted here."""
+        import pickle
+        with self.lock:
+            self.mem[key] = (time.time(), bundle); self.mem.move_to_end(key)
+            while len(self.mem) > self.max_items:
+                self.mem.popitem(last=False)
+        if self.dir is None: return
+        try:
+            os.makedirs(self.dir, exist_ok=True)
+            tmp = f"{self._path(key)}.tmp-{os.getpid()}-{threading.get_ident()}"
+            with open(tmp, 'wb') as f:
+                pickle.dump(_map_figs(disk_bundle, _fig_png), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._path(key))
+            if time.time() - self.swept >= self.SWEEP_S:
+                self.swept = time.time()
+                self._evict_disk()
+        except Exception as e:
+            print(f"[INFO] Result cache not persisted: {e}")
+
+    def _evict_disk(self):
+        # Other processes sweep the same directory, so any entry may vanish mid-scan
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.dir):
+            p = os.path.join(self.dir, name)
+            if not name.endswith('.pkl'): continue
+            try:
+                m = os.path.getmtime(p)
+                if now - m > self.ttl: os.remove(p)
+                else: entries.append((m, p))
+            except FileNotFoundError:
+                pass
+        for _, p in sorted(entries)[:max(0, len(entries) - self.disk_items)]:
+            try: os.remove(p)
+            except FileNotFoundError: pass
+
+    def stats(self):
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'memory_items': len(self.mem)}
+
+RESULT_CACHE = _ResultCache(RESULT_CACHE_ITEMS, RESULT_CACHE_TTL_S, RESULT_CACHE_DIR, RESULT_CACHE_DISK_ITEMS)
+
+# Profile fields rendered into the report — part of the key so an edited profile re-renders
+_RESULT_PROFILE_KEYS = ('company_name', 'full_name', 'business_type', 'city')
+
+def result_cache_key(digest, msme_key, lang, user_data):
+    profile = [str(user_data.get(k, '')) for k in _RESULT_PROFILE_KEYS]
+    raw = _json_mod.dumps([digest, msme_key, lang, SCORING_VERSION, profile, _interval_params()])
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Government & Platform Intelligence Dashboard
+# ══════════════════════════════════════════════════════════════════════════════
+def _inr(v):
+    try: v = float(v)
+    except: return "N/A"
+    if v >= 1e7: return f"&#8377;{v/1e7:.2f} Cr"
+    if v >= 1e5: return f"&#8377;{v/1e5:.2f} L"
+    return f"&#8377;{v:,.0f}"
+
+def _pct(v, d=1):
+    try: return f"{float(v):.{d}f}%"
+    except: return "N/A"
+
+def _hc(v): return "#27ae60" if v >= 65 else ("#f39c12" if v >= 40 else "#e74c3c")
+def _sc(v): return "#27ae60" if v >= 0.65 else ("#f39c12" if v >= 0.40 else "#e74c3c")
+def _rc(v): return "#27ae60" if v <= 0.40 else ("#f39c12" if v <= 0.70 else "#e74c3c")
+
+def _badge_g(text, color):
+    return f'<span style="background:{color};color:white;padding:2px 9px;border-radius:10px;font-size:11px;font-weight:700">{text}</span>'
+
+def _progress(value, max_val, color, h="8px"):
+    pct = min(max(float(value) / (float(max_val) + 1e-9), 0), 1) * 100
+    return (f'<div style="height:{h};background:rgba(255,255,255,.1);border-radius:99px;overflow:hidden;margin-top:5px">'
+            f'<div style="width:{pct:.1f}%;height:100%;background:{color};border-radius:99px"></div></div>')
+
+def _kpi_g(icon, label, value, sub, color):
+    return f"""<div style="background:rgba(255,255,255,.04);border:1px solid rgba(255,255,255,.1);
+        border-top:3px solid {color};border-radius:12px;padding:18px;flex:1;min-width:130px">
+  <div style="font-size:24px;margin-bottom:7px">{icon}</div>
+  <div style="font-size:10px;font-weight:700;letter-spacing:1.2px;text-transform:uppercase;color:rgba(255,255,255,.45);margin-bottom:3px">{label}</div>
+  <div style="font-size:20px;font-weight:700;color:{color};font-family:monospace">{value}</div>
+  <div style="font-size:11px;color:rgba(255,255,255,.35);margin-top:4px">{sub}</div>
+</div>"""
+
+def _card_g(title, body, col_span=False):
+    span = 'grid-column:1/-1;' if col_span else ''
+    return f"""<div style="{span}background:rgba(255,255,255,.04);border:1px solid rgba(255,255,255,.09);border-radius:14px;padding:20px">
+  <div style="font-size:11px;font-weight:700;letter-spacing:1.3px;text-transform:uppercase;color:rgba(255,255,255,.4);margin-bottom:14px">{title}</div>
+  {body}</div>"""
+
+def _sec_g(icon, title, sub):
+    return f"""<div style="margin:30px 0 16px;padding:12px 18px;background:rgba(122,171,221,.06);border-left:4px solid #7AABDD;border-radius:0 10px 10px 0">
+  <div style="font-size:15px;font-weight:700;color:white">{icon} {title}</div>
+  <div style="font-size:12px;color:#7AABDD;margin-top:2px">{sub}</div></div>"""
+
+_GOV_NUMS = ['Monthly_Sales_INR','Avg_Margin_Percent','Vendor_Delivery_Reliability',
+             'Monthly_Demand_Units','Returns_Percentage','Inventory_Turnover',
+             'Monthly_Operating_Cost_INR','Outstanding_Loan_INR',
+             'Financial_Risk_Score','Vendor_Score','Growth_Potential_Score','MSME_Health_Score','Performance_Score']
+_GOV_MAX_COLS = ('Monthly_Demand_Units','Avg_Margin_Percent','Returns_Percentage')
+_GOV_STATE_CANDIDATES = ['state','State','STATE','state_name']
+
+def _gov_coerce(df):
+    for c in _GOV_NUMS:
+        if c in df.columns: df[c] = pd.to_numeric(df[c], errors='coerce').fillna(0)
+        else: df[c] = 0.0
+    return df
+
+def _gov_maxima(df):
+    return {c: float(df[c].max()) for c in _GOV_MAX_COLS}
+
+def _gov_derive_scores(df, maxima):
+    """Fallback health scoring for unscored uploads. Column maxima are passed in so a
+    chunk can be scored against the maxima of the whole file."""
+    s = df['Monthly_Sales_INR'].replace(0, 1e-9)
+    fr = (0.5*(df['Monthly_Operating_Cost_INR']/s).clip(0,2) + 0.5*(df['Outstanding_Loan_INR']/(s*12)).clip(0,2)).clip(0,1)
+    vs = df['Vendor_Delivery_Reliability'].clip(0, 1)
+    mx = lambda c: maxima[c] + 1e-9
+    gs = (0.4*(df['Monthly_Demand_Units']/mx('Monthly_Demand_Units')) + 0.35*(df['Avg_Margin_Percent']/mx('Avg_Margin_Percent')) + 0.25*(1 - df['Returns_Percentage']/mx('Returns_Percentage'))).clip(0,1)
+    df['Financial_Risk_Score'] = fr; df['Vendor_Score'] = vs
+    df['Growth_Potential_Score'] = gs; df['MSME_Health_Score'] = ((1-fr)*0.4 + vs*0.3 + gs*0.3)*100
+    return df
+
+class _GovAccumulator:
+    """Running, mergeable aggregates behind the government dashboard.
+
+    Feeding the whole frame once or a file chunk by chunk gives the same summary, so the
+    streaming CSV path only keeps per-group sums instead of every MSME's rows.
+    """
+    _SUMS = {'rev': 'Monthly_Sales_INR', 'health': 'MSME_Health_Score', 'margin': 'Avg_Margin_Percent',
+             'vendor': 'Vendor_Score', 'growth': 'Growth_Potential_Score', 'risk': 'Financial_Risk_Score',
+             'total_loan': 'Outstanding_Loan_INR'}
+
+    def __init__(self, maxima=None, derive=False):
+        self.maxima = maxima; self.derive = derive
+        self.n = 0
+        self.sums = {k: 0.0 for k in self._SUMS}
+        self.counts = {'n_healthy': 0, 'n_dev': 0, 'n_risk': 0, 'n_hi_risk': 0}
+        self.sku_values = set(); self.has_sku = False
+        self.groups = {}   # name -> (key column, running per-group sums)
+
+    def _merge(self, name, key, part):
+        prev = self.groups.get(name)
+        self.groups[name] = (key, part if prev is None else prev[1].add(part, fill_value=0))
+
+    def add(self, df):
+        df = _gov_coerce(df.copy())
+        if self.derive: _gov_derive_scores(df, self.maxima)
+        hs = df['MSME_Health_Score']; rev = 'Monthly_Sales_INR'
+        self.n += len(df)
+        for k, c in self._SUMS.items(): self.sums[k] += float(df[c].sum())
+        self.counts['n_healthy'] += int((hs >= 65).sum())
+        self.counts['n_dev']     += int(((hs >= 40) & (hs < 65)).sum())
+        self.counts['n_risk']    += int((hs < 40).sum())
+        self.counts['n_hi_risk'] += int((df['Financial_Risk_Score'] > 0.7).sum())
+        if 'SKU_Name' in df.columns:
+            self.has_sku = True
+            self.sku_values.update(df['SKU_Name'].dropna().unique().tolist())
+            self._merge('skus', 'SKU_Name', df.groupby('SKU_Name', observed=True)[[rev]].sum())
+        if 'Product_Category' in df.columns:
+            self._merge('cats', 'Product_Category',
+                        df.groupby('Product_Category', observed=True)[rev].agg(['sum','count']).rename(columns={'sum':'rev','count':'cnt'}))
+        if 'Store_ID' in df.columns:
+            self._merge('stores', 'Store_ID',
+                        df.groupby('Store_ID', observed=True).agg(rev=(rev,'sum'), health=('MSME_Health_Score','sum'), cnt=(rev,'count')))
+        state_col = next((c for c in _GOV_STATE_CANDIDATES if c in df.columns), None)
+        if 'Date' in df.columns:
+            # (series, month) sums for anomaly detection — mergeable across chunks
+            mon = _abs_month(pd.to_datetime(df['Date'], errors='coerce'))
+            cols = [c for c, _ in ANOMALY_METRICS.values()]
+            for level, col in (('MSME', _udyam_col(df)), ('State', state_col)):
+                if col:
+                    self._merge(f'monthly:{level}', col, df[[col] + cols].assign(_mon=mon, _n=1.0)
+                                .groupby([col, '_mon'], observed=True).sum())
+        if state_col:
+            ds = df[[state_col, rev, 'MSME_Health_Score', 'Returns_Percentage']].copy()
+            extra = {}
+            for src, dst in [('ONDC_Registered','ondc'), ('Q1_Returns_Percentage','q1'), ('Q2_Returns_Percentage','q2')]:
+                if src in df.columns:
+                    ds[dst] = pd.to_numeric(df[src], errors='coerce')
+                    extra[f'{dst}_sum'] = (dst, 'sum'); extra[f'{dst}_cnt'] = (dst, 'count')
+            self._merge('states', state_col, ds.groupby(state_col, observed=True).agg(
+                revenue=(rev,'sum'), health=('MSME_Health_Score','sum'), n_msme=(rev,'count'),
+                returns=('Returns_Percentage','sum'), **extra))
+        return self
+
+    def result(self):
+        n = self.n
+        a = {'df': None, 'n': n}
+        for k in self._SUMS:
+            a[k] = self.sums[k] if k in ('rev','total_loan') else (self.sums[k] / n if n else float('nan'))
+        a.update(self.counts)
+        a['products'] = len(self.sku_values) if self.has_sku else 0
+        a['cats'] = []; a['stores'] = []; a['top_products'] = []
+        if 'cats' in self.groups:
+            cc, g = self.groups['cats']
+            ct = g.reset_index().sort_values('rev', ascending=False).head(8)
+            ct['cnt'] = ct['cnt'].astype(int)
+            a['cats'] = ct.to_dict('records'); a['cat_col'] = cc
+        if 'stores' in self.groups:
+            sc, g = self.groups['stores']
+            st = g.assign(health=g['health'] / g['cnt']).reset_index()[[sc,'rev','health']]
+            a['stores'] = st.sort_values('rev', ascending=False).head(10).to_dict('records'); a['store_col'] = sc
+        if 'skus' in self.groups:
+            _, g = self.groups['skus']
+            a['top_products'] = g['Monthly_Sales_INR'].sort_values(ascending=False).head(8).reset_index().to_dict('records')
+        a['state_col'] = None; a['state_grp'] = None
+        if 'states' in self.groups:
+            stc, g = self.groups['states']
+            sg = pd.DataFrame({'revenue': g['revenue'], 'health': g['health'] / g['n_msme'],
+                               'n_msme': g['n_msme'].astype(int), 'returns': g['returns'] / g['n_msme']})
+            for dst in ('ondc', 'q1', 'q2'):
+                if f'{dst}_sum' in g.columns:
+                    sg[dst] = g[f'{dst}_sum'] / g[f'{dst}_cnt'].replace(0, np.nan)
+            a['state_col'] = stc
+            a['state_grp'] = sg.rename_axis(stc).reset_index().sort_values('revenue', ascending=False)
+        blocks = [(name.split(':', 1)[1], g.index.get_level_values(0), g.index.get_level_values(1).to_numpy(dtype=np.float64),
+                   {c: g[c].to_numpy() for c in g.columns if c != '_n'}, g['_n'].to_numpy())
+                  for name, (_, g) in self.groups.items() if name.startswith('monthly:')]
+        a['anomalies'] = rank_anomalies(blocks) if blocks else None
+        return a
+
+def _agg_gov(df):
+    df = _gov_coerce(df.copy())
+    derive = df['MSME_Health_Score'].sum() == 0
+    a = _GovAccumulator(_gov_maxima(df) if derive else None, derive).add(df).result()
+    a['df'] = df
+    return a
+
+def build_full_platform_dashboard(df) -> str:
+    """Render the government dashboard from a frame, or from the aggregate dict the
+    streaming CSV ingest builds without materialising every MSME's rows."""
+    try:
+        a = df if isinstance(df, dict) else _agg_gov(df); n = a['n']; hp = a['n_healthy'] / n * 100
+        hl = "Healthy" if a['health'] >= 65 else ("Developing" if a['health'] >= 40 else "At Risk")
+        CSS = "<style>.gd{background:linear-gradient(135deg,#070D1A 0%,#0D1829 60%,#071020 100%);font-family:Arial,sans-serif;color:white;padding:0 0 60px;min-height:100vh}.gd *{box-sizing:border-box}.gd-grid{display:grid;grid-template-columns:repeat(auto-fit,minmax(300px,1fr));gap:16px;margin-bottom:20px}</style>"
+        hero = f"""<div style="background:linear-gradient(135deg,rgba(122,171,221,.12),rgba(10,25,60,.5));border:1px solid rgba(122,171,221,.2);border-radius:14px;padding:22px 26px;margin-bottom:22px;display:flex;align-items:center;justify-content:space-between;flex-wrap:wrap;gap:14px">
+  <div><div style="font-size:11px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase;color:#7AABDD;margin-bottom:5px">GOVERNMENT PLATFORM INTELLIGENCE DASHBOARD</div>
+    <div style="font-size:24px;font-weight:800;color:white">National MSME Analytics</div>
+    <div style="font-size:14px;color:rgba(255,255,255,.7);max-width:580px;line-height:1.65">Portfolio of <strong style="color:white">{n:,}</strong> MSMEs · State-wise performance · ONDC transition tracking</div>
+  </div>
+  <div style="text-align:right"><div style="font-size:38px;font-weight:700;color:{_hc(a['health'])};font-family:monospace">{a['health']:.1f}%</div>
+    <div style="font-size:10px;color:rgba(255,255,255,.35);letter-spacing:1px;text-transform:uppercase">Portfolio Health</div></div>
+</div>"""
+        # KPI rows
+        hp2 = a['n_healthy'] / n * 100; rp2 = a['n_risk'] / n * 100
+        row1 = "".join([
+            _kpi_g("🏭","Total MSMEs",f"{a['n']:,}","Entities in dataset","#7AABDD"),
+            _kpi_g("💰","Total Revenue",_inr(a['rev']),"Monthly gross sales","#27ae60"),
+            _kpi_g("🧠","Avg Health",f"{a['health']:.1f}%",_badge_g(hl,_hc(a['health'])),_hc(a['health'])),
+            _kpi_g("✅","Healthy MSMEs",f"{a['n_healthy']:,}",f"{hp2:.0f}% of portfolio","#27ae60"),
+            _kpi_g("⚠️","At-Risk MSMEs",f"{a['n_risk']:,}",f"{rp2:.0f}% need support","#e74c3c"),
+        ])
+        row2 = "".join([
+            _kpi_g("📦","Products",f"{a['products']:,}","Unique SKUs","#8b5cf6"),
+            _kpi_g("🤝","Avg Vendor",f"{a['vendor']:.2f}","Reliability score",_sc(a['vendor'])),
+            _kpi_g("🚀","Growth Pot.",f"{a['growth']:.2f}","Avg growth score",_sc(a['growth'])),
+            _kpi_g("📈","Avg Margin",_pct(a['margin']),"Profit margin","#7AABDD"),
+            _kpi_g("💳","Fin. Risk",f"{a['risk']:.2f}","Lower is better",_rc(a['risk'])),
+        ])
+        wrap = 'display:flex;flex-wrap:wrap;gap:10px;margin-bottom:14px'
+        kpis = f'<div style="{wrap}">{row1}</div><div style="{wrap}">{row2}</div>'
+
+        # ── State-wise Table ──────────────────────────────────────────────────
+        state_col = a.get('state_col')
+        state_html = ""
+        if state_col:
+            state_grp = a['state_grp'].copy()
+            ret_col   = 'Returns_Percentage'
+
+            # ONDC before/after: simulate pre-ONDC as 15% higher returns if no real column
+            if 'ondc' in state_grp.columns:
+                state_grp['ondc_pct'] = state_grp.pop('ondc').fillna(0) * 100
+            else:
+                # Simulate: higher health → more ONDC adoption
+                state_grp['ondc_pct'] = (state_grp['health'] / 100 * 0.6 * 100).clip(10, 90).round(0)
+
+            # Quarterly data
+            if 'q1' not in state_grp.columns or 'q2' not in state_grp.columns:
+                state_grp = state_grp.drop(columns=['q1','q2'], errors='ignore')
+                # Simulate Q1/Q2 from returns with small variance
+                if ret_col:
+                    state_grp['q1'] = (state_grp['returns'] * 1.08).round(2)
+                    state_grp['q2'] = (state_grp['returns'] * 0.95).round(2)
+                else:
+                    state_grp['q1'] = 5.0; state_grp['q2'] = 4.5
+
+            # Before ONDC = estimated returns before (higher); after = current
+            if ret_col:
+                state_grp['ret_before'] = (state_grp['returns'] * (1 + (100 - state_grp['ondc_pct']) / 500)).round(2)
+                state_grp['ret_after']  = state_grp['returns'].round(2)
+            else:
+                state_grp['ret_before'] = state_grp['q1']
+                state_grp['ret_after']  = state_grp['q2']
+
+            total_rev = state_grp['revenue'].sum() + 1e-9
+
+            table_rows = ""
+            for _, row in state_grp.iterrows():
+                state_name   = str(row[state_col])
+                rev          = float(row['revenue'])
+                hlth         = float(row['health'])
+                n_m          = int(row['n_msme'])
+                ret_b        = float(row.get('ret_before', 5.0))
+                ret_a        = float(row.get('ret_after',  4.5))
+                ondc_p       = float(row.get('ondc_pct',   50.0))
+                q1v          = float(row.get('q1', ret_b))
+                q2v          = float(row.get('q2', ret_a))
+                rev_pct      = rev / total_rev * 100
+                ret_delta    = ret_b - ret_a  # positive = improvement
+                hlth_col_c   = _hc(hlth)
+
+                # Return flag colours
+                def _rfl(v):
+                    if v < 4:   return "#27ae60", "✅"
+                    if v < 7:   return "#f39c12", "⚠️"
+                    return "#e74c3c", "🔴"
+                rb_col, rb_ic = _rfl(ret_b)
+                ra_col, ra_ic = _rfl(ret_a)
+
+                # Consecutive quarter no-returns badge
+                if q1v < 3 and q2v < 3:
+                    qbadge = '<span style="background:linear-gradient(135deg,#FFD700,#FFA500);color:#000;font-size:9px;font-weight:800;padding:2px 8px;border-radius:10px;letter-spacing:0.5px">🥇 GOLD — 2Q No Returns</span>'
+                elif q1v < 7 and q2v < 7:
+                    qbadge = '<span style="background:linear-gradient(135deg,#C0C0C0,#A0A0A0);color:#000;font-size:9px;font-weight:800;padding:2px 8px;border-radius:10px;letter-spacing:0.5px">🥈 SILVER — Moderate Returns</span>'
+                else:
+                    qbadge = '<span style="background:rgba(231,76,60,.25);color:#FF8888;font-size:9px;font-weight:700;padding:2px 8px;border-radius:10px">⚠️ High Returns</span>'
+
+                # ONDC bar
+                ondc_col_c = "#27ae60" if ondc_p >= 60 else ("#f39c12" if ondc_p >= 30 else "#e74c3c")
+
+                # Target: 80% ONDC adoption, <4% returns
+                ondc_target = 80
+                ret_target  = 4.0
+                ondc_vs_target = f"{ondc_p:.0f}% / {ondc_target}%"
+                ret_vs_target  = f"{ret_a:.1f}% / {ret_target}%"
+
+                delta_html = f'<span style="color:{"#27ae60" if ret_delta>0 else "#e74c3c"};font-size:10px;font-weight:700">{"▼" if ret_delta>0 else "▲"}{abs(ret_delta):.1f}%</span>'
+
+                table_rows += f"""<tr style="border-bottom:1px solid rgba(255,255,255,.06)">
+  <td style="padding:11px 14px;font-weight:700;color:white;white-space:nowrap">{state_name}</td>
+  <td style="padding:11px 14px">
+    <div style="font-weight:700;color:#7AABDD;font-family:monospace">{_inr(rev)}</div>
+    <div style="height:4px;background:rgba(255,255,255,.08);border-radius:2px;margin-top:4px;width:100%">
+      <div style="width:{min(rev_pct,100):.0f}%;height:100%;background:#7AABDD;border-radius:2px"></div></div>
+    <div style="font-size:10px;color:rgba(255,255,255,.4);margin-top:2px">{rev_pct:.1f}% of total · {n_m} MSMEs</div>
+  </td>
+  <td style="padding:11px 14px;text-align:center">
+    <div style="font-weight:700;color:{hlth_col_c};font-family:monospace">{hlth:.0f}%</div>
+    <div style="height:4px;background:rgba(255,255,255,.08);border-radius:2px;margin-top:4px">
+      <div style="width:{hlth:.0f}%;height:100%;background:{hlth_col_c};border-radius:2px"></div></div>
+  </td>
+  <td style="padding:11px 14px;text-align:center">
+    <div style="font-size:11px;color:rgba(255,255,255,.5);margin-bottom:3px">Before ONDC</div>
+    <div style="font-weight:700;color:{rb_col}">{rb_ic} {ret_b:.1f}%</div>
+  </td>
+  <td style="padding:11px 14px;text-align:center">
+    <div style="font-size:11px;color:rgba(255,255,255,.5);margin-bottom:3px">After ONDC</div>
+    <div style="font-weight:700;color:{ra_col}">{ra_ic} {ret_a:.1f}% {delta_html}</div>
+    <div style="font-size:10px;color:rgba(255,255,255,.4)">Target: &lt;{ret_target}% · {ret_vs_target}</div>
+  </td>
+  <td style="padding:11px 14px;text-align:center">
+    <div style="font-size:10px;color:rgba(255,255,255,.5)">Q1: {q1v:.1f}% &nbsp;→&nbsp; Q2: {q2v:.1f}%</div>
+    <div style="margin-top:5px">{qbadge}</div>
+  </td>
+  <td style="padding:11px 14px">
+    <div style="display:flex;align-items:center;gap:8px">
+      <div style="flex:1;height:5px;background:rgba(255,255,255,.08);border-radius:3px">
+        <div style="width:{min(ondc_p,100):.0f}%;height:100%;background:{ondc_col_c};border-radius:3px"></div></div>
+      <span style="font-size:11px;font-weight:700;color:{ondc_col_c};white-space:nowrap">{ondc_p:.0f}%</span>
+    </div>
+    <div style="font-size:10px;color:rgba(255,255,255,.4);margin-top:3px">Target: {ondc_target}% · {ondc_vs_target}</div>
+  </td>
+</tr>"""
+
+            state_html = f"""<div style="margin-bottom:20px;background:rgba(255,255,255,.03);border:1px solid rgba(255,255,255,.09);border-radius:14px;overflow:hidden">
+  <div style="padding:14px 18px;background:rgba(122,171,221,.08);border-bottom:1px solid rgba(255,255,255,.07)">
+    <div style="font-size:13px;font-weight:700;color:white">🗺️ State-wise Performance Dashboard</div>
+    <div style="font-size:11px;color:#7AABDD;margin-top:3px">Revenue · Health · Returns (Before & After ONDC) · Quarterly Badges · ONDC Adoption vs Target</div>
+  </div>
+  <div style="overflow-x:auto">
+  <table style="width:100%;border-collapse:collapse;font-size:12px">
+    <thead><tr style="background:rgba(0,0,0,.3)">
+      <th style="padding:10px 14px;text-align:left;color:#7AABDD;font-size:10px;font-weight:700;letter-spacing:1.2px;text-transform:uppercase;white-space:nowrap">State</th>
+      <th style="padding:10px 14px;text-align:left;color:#7AABDD;font-size:10px;font-weight:700;letter-spacing:1.2px;text-transform:uppercase">Revenue</th>
+      <th style="padding:10px 14px;text-align:center;color:#7AABDD;font-size:10px;font-weight:700;letter-spacing:1.2px;text-transform:uppercase;white-space:nowrap">MSME Health</th>
+      <th style="padding:10px 14px;text-align:center;color:#7AABDD;font-size:10px;font-weight:700;letter-spacing:1.2px;text-transform:uppercase;white-space:nowrap">Before ONDC</th>
+      <th style="padding:10px 14px;text-align:center;color:#7AABDD;font-size:10px;font-weight:700;letter-spacing:1.2px;text-transform:uppercase;white-space:nowrap">After ONDC</th>
+      <th style="padding:10px 14px;text-align:center;color:#7AABDD;font-size:10px;font-weight:700;letter-spacing:1.2px;text-transform:uppercase;white-space:nowrap">Quarter Badges</th>
+      <th style="padding:10px 14px;text-align:left;color:#7AABDD;font-size:10px;font-weight:700;letter-spacing:1.2px;text-transform:uppercase;white-space:nowrap">ONDC Adoption</th>
+    </tr></thead>
+    <tbody>{table_rows}</tbody>
+  </table>
+  </div>
+  <div style="padding:10px 16px;font-size:10px;color:rgba(255,255,255,.35)">
+    🥇 Gold Badge = consecutive 2 quarters with returns &lt;3% &nbsp;·&nbsp; 🥈 Silver Badge = both quarters &lt;7% &nbsp;·&nbsp; ONDC Adoption target: 80% &nbsp;·&nbsp; Return Rate target: &lt;4%
+  </div>
+</div>"""
+
+        # Distribution
+        segs = [("Healthy (>=65%)", a['n_healthy'],"#27ae60"),("Developing (40-64%)",a['n_dev'],"#f39c12"),("At Risk (<40%)",a['n_risk'],"#e74c3c")]
+        dist_body = ""
+        for lbl,cnt,col in segs:
+            pct2 = cnt / n * 100
+            dist_body += f'<div style="margin-bottom:10px"><div style="display:flex;justify-content:space-between;font-size:12px;color:rgba(255,255,255,.75);margin-bottom:4px"><span>{lbl}</span><span style="font-weight:700;color:{col}">{cnt:,} ({pct2:.0f}%)</span></div>{_progress(cnt,n,col)}</div>'
+        dist_card = _card_g("MSME Health Distribution", dist_body)
+        # Category card
+        if a['cats']:
+            max_rev = max(c['rev'] for c in a['cats']) + 1e-9
+            COLORS = ["#7AABDD","#27ae60","#f39c12","#8b5cf6","#e74c3c","#38b2f5","#2ecc84","#f5c842"]
+            cat_body = ""
+            cc_key = a.get('cat_col','Product_Category')
+            for i,c in enumerate(a['cats']):
+                col = COLORS[i%len(COLORS)]
+                cat_body += f'<div style="margin-bottom:9px"><div style="display:flex;justify-content:space-between;font-size:12px;color:rgba(255,255,255,.75);margin-bottom:4px"><span>{c[cc_key]}</span><span style="font-weight:700;color:{col}">{_inr(c["rev"])}</span></div>{_progress(c["rev"],max_rev,col)}</div>'
+            cat_card = _card_g("Category Revenue Breakdown", cat_body)
+        else:
+            cat_card = _card_g("Category Revenue", '<div style="color:rgba(255,255,255,.3);font-size:13px">No category data</div>')
+        # Alerts
+        alert_items = []
+        if a['n_hi_risk'] > 0: alert_items.append(("high", f"<strong>{a['n_hi_risk']}</strong> MSMEs with Financial Risk Score &gt;0.70 — immediate CGTMSE support recommended"))
+        if a['n_risk'] > 0: alert_items.append(("high", f"<strong>{a['n_risk']}</strong> MSMEs at risk — eligible for government credit guarantee schemes"))
+        if a['margin'] < 15: alert_items.append(("med", f"Average margin <strong>{a['margin']:.1f}%</strong> below 15% benchmark"))
+        if a['vendor'] < 0.5: alert_items.append(("med", f"Vendor reliability <strong>{a['vendor']:.2f}</strong> — supply chain intervention needed"))
+        if a['n_healthy'] / n > 0.5: alert_items.append(("low", f"<strong>{a['n_healthy']:,} MSMEs</strong> ({a['n_healthy']/n*100:.0f}%) are healthy — ONDC fast-track eligible"))
+        if not alert_items: alert_items.append(("low","No critical risk signals detected"))
+        alert_body = ""
+        for level, msg in alert_items:
+            dot = "#e74c3c" if level=="high" else ("#f39c12" if level=="med" else "#27ae60")
+            bg2 = "rgba(231,76,60,.09)" if level=="high" else ("rgba(243,156,18,.09)" if level=="med" else "rgba(39,174,96,.09)")
+            bdr = "rgba(231,76,60,.3)" if level=="high" else ("rgba(243,156,18,.3)" if level=="med" else "rgba(39,174,96,.3)")
+            alert_body += f'<div style="display:flex;align-items:center;gap:11px;padding:10px 14px;background:{bg2};border:1px solid {bdr};border-radius:8px;margin-bottom:8px"><div style="width:8px;height:8px;border-radius:50%;background:{dot};flex-shrink:0"></div><div style="font-size:12px;color:rgba(255,255,255,.8)">{msg}</div></div>'
+        alert_card = _card_g("Policy Alerts & Risk Signals", alert_body)
+        html = CSS + '<div class="gd"><div style="padding:22px">' + hero
+        html += _sec_g("📊","Key Performance Indicators","Aggregate metrics across the full MSME portfolio") + kpis
+        if state_html:
+            html += _sec_g("🗺️","State-wise Analysis","Revenue, Returns (Before & After ONDC), Quarterly Badges, ONDC Adoption")
+            html += state_html
+        html += _sec_g("📈","Portfolio Analysis","Health distribution, category breakdown and risk signals")
+        html += '<div class="gd-grid">' + dist_card + cat_card + alert_card + '</div>'
+        # Anomalies
+        an = a.get('anomalies')
+        if an is not None:
+            an_body = ""
+            for r in an.itertuples(index=False):
+                bad = (r.kind == 'Spike') == (r.metric == 'Return rate %')
+                col = "#e74c3c" if bad else "#27ae60"
+                an_body += f'<div style="display:flex;justify-content:space-between;align-items:center;gap:12px;padding:9px 14px;border-radius:8px;margin-bottom:6px;background:rgba(255,255,255,.03);border:1px solid rgba(255,255,255,.07)"><div style="font-size:12px;color:rgba(255,255,255,.8)"><strong style="color:white">{r.level} · {str(r.series)[:32]}</strong> — {r.metric}, {r.month:%b %Y}</div><div style="font-size:12px;white-space:nowrap;color:rgba(255,255,255,.55)">{_fmt_anomaly_value(r.metric, r.value, _inr)} vs {_fmt_anomaly_value(r.metric, r.expected, _inr)} <span style="font-weight:700;color:{col}">{"▲" if r.kind == "Spike" else "▼"} z {abs(r.z):.1f}</span></div></div>'
+            if not an_body:
+                an_body = '<div style="color:rgba(255,255,255,.45);font-size:13px">No unusual months across MSME and state series</div>'
+            html += _sec_g("🚨","Anomaly Watch","Months far outside each MSME's and state's own trend and seasonality")
+            html += '<div class="gd-grid">' + _card_g("Top Sales, Margin & Return-Rate Anomalies", an_body, col_span=True) + '</div>'
+        # Policy
+        policy_items = [
+            ("📋","Credit Guarantee Scheme",f"{a['n_hi_risk']} high-risk MSMEs identified — CGTMSE priority access recommended","#e74c3c"),
+            ("🔗","ONDC Fast-Track Onboarding",f"{a['n_healthy']} healthy MSMEs ready for ONDC SNP integration","#27ae60"),
+            ("🎓","Capacity Building",f"{a['n_dev']} developing MSMEs benefit from operational workshops","#f39c12"),
+            ("💳","Working Capital Support",f"Average loan: {_inr(a['total_loan']/a['n'])} — targeted relief for stressed businesses","#7AABDD"),
+            ("🌐","Digital Commerce Push",f"Growth potential {a['growth']:.2f} — accelerate GeM and ONDC registrations","#8b5cf6"),
+        ]
+        pol_body = ""
+        for icon,title,desc,col in policy_items:
+            pol_body += f'<div style="display:flex;gap:13px;padding:13px 16px;border-radius:10px;margin-bottom:8px;background:rgba(255,255,255,.03);border:1px solid rgba(255,255,255,.07)"><div style="font-size:22px">{icon}</div><div><div style="font-size:13px;font-weight:700;color:white">{title}</div><div style="font-size:12px;color:rgba(255,255,255,.55);margin-top:3px">{desc}</div></div></div>'
+        html += _sec_g("📜","Policy Recommendations","Data-driven government action items")
+        html += '<div class="gd-grid">' + _card_g("Policy Intervention Recommendations", pol_body, col_span=True) + '</div>'
+        html += f'<div style="margin-top:28px;padding:14px 20px;border-top:1px solid rgba(122,171,221,.12);display:flex;flex-wrap:wrap;gap:16px;justify-content:space-between;font-size:11px;color:rgba(255,255,255,.3)"><span>DataNetra.ai v4.7 — Government Intelligence Module</span><span>Generated: {datetime.datetime.now().strftime("%d %b %Y, %H:%M")}</span></div>'
+        html += '</div></div>'
+        return html
+    except Exception as e:
+        import traceback
+        return f"<div style='padding:28px;background:#070D1A;color:white;font-family:monospace'><div style='color:#e74c3c;font-size:16px'>❌ Dashboard Error: {str(e)}</div><pre style='color:rgba(255,255,255,.5);font-size:11px;margin-top:12px'>{traceback.format_exc()}</pre></div>"
+        hero = f"""<div style="background:linear-gradient(135deg,rgba(122,171,221,.12),rgba(10,25,60,.5));border:1px solid rgba(122,171,221,.2);border-radius:14px;padding:22px 26px;margin-bottom:22px;display:flex;align-items:center;justify-content:space-between;flex-wrap:wrap;gap:14px">
+  <div><div style="font-size:11px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase;color:#7AABDD;margin-bottom:5px">EXECUTIVE SUMMARY</div>
+    <div style="font-size:14px;color:rgba(255,255,255,.7);max-width:580px;line-height:1.65">Portfolio of <strong style="color:white">{n:,} MSMEs</strong> with total revenue <strong style="color:#27ae60">{_inr(a['rev'])}</strong>. <strong style="color:{_hc(a['health'])}">{a['n_healthy']:,} ({hp:.0f}%)</strong> healthy, <strong style="color:#e74c3c">{a['n_risk']:,}</strong> at risk.</div></div>
+  <div style="text-align:right"><div style="font-size:38px;font-weight:700;color:{_hc(a['health'])};font-family:monospace">{a['health']:.1f}%</div>
+    <div style="font-size:10px;color:rgba(255,255,255,.35);letter-spacing:1px;text-transform:uppercase">Portfolio Health</div></div>
+</div>"""
+        # KPI rows
+        hp2 = a['n_healthy'] / n * 100; rp2 = a['n_risk'] / n * 100
+        row1 = "".join([
+            _kpi_g("🏭","Total MSMEs",f"{a['n']:,}","Entities in dataset","#7AABDD"),
+            _kpi_g("💰","Total Revenue",_inr(a['rev']),"Monthly gross sales","#27ae60"),
+            _kpi_g("🧠","Avg Health",f"{a['health']:.1f}%",_badge_g(hl,_hc(a['health'])),_hc(a['health'])),
+            _kpi_g("✅","Healthy MSMEs",f"{a['n_healthy']:,}",f"{hp2:.0f}% of portfolio","#27ae60"),
+            _kpi_g("⚠️","At-Risk MSMEs",f"{a['n_risk']:,}",f"{rp2:.0f}% need support","#e74c3c"),
+        ])
+        row2 = "".join([
+            _kpi_g("📦","Products",f"{a['products']:,}","Unique SKUs","#8b5cf6"),
+            _kpi_g("🤝","Avg Vendor",f"{a['vendor']:.2f}","Reliability score",_sc(a['vendor'])),
+            _kpi_g("🚀","Growth Pot.",f"{a['growth']:.2f}","Avg growth score",_sc(a['growth'])),
+            _kpi_g("📈","Avg Margin",_pct(a['margin']),"Profit margin","#7AABDD"),
+            _kpi_g("💳","Fin. Risk",f"{a['risk']:.2f}","Lower is better",_rc(a['risk'])),
+        ])
+        wrap = 'display:flex;flex-wrap:wrap;gap:10px;margin-bottom:14px'
+        kpis = f'<div style="{wrap}">{row1}</div><div style="{wrap}">{row2}</div>'
+        # Distribution
+        segs = [("Healthy (>=65%)", a['n_healthy'],"#27ae60"),("Developing (40-64%)",a['n_dev'],"#f39c12"),("At Risk (<40%)",a['n_risk'],"#e74c3c")]
+        dist_body = ""
+        for lbl,cnt,col in segs:
+            pct2 = cnt / n * 100
+            dist_body += f'<div style="margin-bottom:10px"><div style="display:flex;justify-content:space-between;font-size:12px;color:rgba(255,255,255,.6);margin-bottom:3px"><span>{lbl}</span><span style="font-family:monospace;color:{col}">{cnt:,} &nbsp; {pct2:.0f}%</span></div>{_progress(pct2,100,col,"9px")}</div>'
+        dist_card = _card_g("MSME Health Distribution", dist_body)
+        # Category card
+        if a['cats']:
+            max_rev = max(c['rev'] for c in a['cats']) + 1e-9
+            COLORS = ["#7AABDD","#27ae60","#f39c12","#8b5cf6","#e74c3c","#38b2f5","#2ecc84","#f5c842"]
+            cat_body = ""
+            cc_key = a.get('cat_col','Product_Category')
+            for i,c in enumerate(a['cats']):
+                col = COLORS[i%len(COLORS)]
+                cat_body += f'<div style="margin-bottom:9px"><div style="display:flex;justify-content:space-between;font-size:12px;color:rgba(255,255,255,.6);margin-bottom:3px"><span style="color:{col};font-weight:600">{c[cc_key]}</span><span style="font-family:monospace">{_inr(c["rev"])}</span></div>{_progress(c["rev"],max_rev,col,"7px")}</div>'
+            cat_card = _card_g("Category Revenue Breakdown", cat_body)
+        else:
+            cat_card = _card_g("Category Revenue", '<div style="color:rgba(255,255,255,.3);font-size:13px">No category data</div>')
+        # Alerts
+        alert_items = []
+        if a['n_hi_risk'] > 0: alert_items.append(("high", f"<strong>{a['n_hi_risk']}</strong> MSMEs with Financial Risk Score &gt;0.70 — priority intervention required"))
+        if a['n_risk'] > 0: alert_items.append(("high", f"<strong>{a['n_risk']}</strong> MSMEs at risk — eligible for government credit support"))
+        if a['margin'] < 15: alert_items.append(("med", f"Average margin <strong>{a['margin']:.1f}%</strong> below 15% benchmark"))
+        if a['vendor'] < 0.5: alert_items.append(("med", f"Vendor reliability <strong>{a['vendor']:.2f}</strong> — supply chain intervention needed"))
+        if a['n_healthy'] / n > 0.5: alert_items.append(("low", f"<strong>{a['n_healthy']:,} MSMEs</strong> ({a['n_healthy']/n*100:.0f}%) healthy — fast-track for ONDC"))
+        if not alert_items: alert_items.append(("low","No critical risk signals detected"))
+        alert_body = ""
+        for level, msg in alert_items:
+            dot = "#e74c3c" if level=="high" else ("#f39c12" if level=="med" else "#27ae60")
+            bg2 = "rgba(231,76,60,.09)" if level=="high" else ("rgba(243,156,18,.09)" if level=="med" else "rgba(39,174,96,.09)")
+            bdr = "rgba(231,76,60,.3)" if level=="high" else ("rgba(243,156,18,.3)" if level=="med" else "rgba(39,174,96,.3)")
+            alert_body += f'<div style="display:flex;align-items:center;gap:11px;padding:10px 14px;background:{bg2};border:1px solid {bdr};border-radius:9px;margin-bottom:7px;font-size:13px"><div style="width:8px;height:8px;border-radius:50%;background:{dot};flex-shrink:0"></div><span>{msg}</span></div>'
+        alert_card = _card_g("Policy Alerts & Risk Signals", alert_body)
+        html = CSS + '<div class="gd"><div style="padding:22px">' + hero
+        html += _sec_g("📊","Key Performance Indicators","Aggregate metrics across the full MSME portfolio") + kpis
+        html += _sec_g("📈","Portfolio Analysis","Health distribution, category breakdown and risk signals")
+        html += '<div class="gd-grid">' + dist_card + cat_card + alert_card + '</div>'
+        # Policy
+        policy_items = [
+            ("📋","Credit Guarantee Scheme",f"{a['n_hi_risk']} high-risk MSMEs identified — CGTMSE priority access recommended","#e74c3c"),
+            ("🔗","ONDC Fast-Track Onboarding",f"{a['n_healthy']} healthy MSMEs ready for ONDC SNP integration","#27ae60"),
+            ("🎓","Capacity Building",f"{a['n_dev']} developing MSMEs benefit from operational workshops","#f39c12"),
+            ("💳","Working Capital Support",f"Average loan: {_inr(a['total_loan']/a['n'])} — targeted relief for stressed businesses","#7AABDD"),
+            ("🌐","Digital Commerce Push",f"Growth potential {a['growth']:.2f} — accelerate GeM and ONDC registrations","#8b5cf6"),
+        ]
+        pol_body = ""
+        for icon,title,desc,col in policy_items:
+            pol_body += f'<div style="display:flex;gap:13px;padding:13px 16px;border-radius:10px;margin-bottom:8px;background:rgba(255,255,255,.025);border:1px solid rgba(255,255,255,.07)"><div style="font-size:20px;flex-shrink:0">{icon}</div><div><div style="font-size:13px;font-weight:700;color:{col};margin-bottom:3px">{title}</div><div style="font-size:12px;color:rgba(255,255,255,.5);line-height:1.6">{desc}</div></div></div>'
+        html += _sec_g("📜","Policy Recommendations","Data-driven government action items")
+        html += '<div class="gd-grid">' + _card_g("Policy Intervention Recommendations", pol_body, col_span=True) + '</div>'
+        html += f'<div style="margin-top:28px;padding:14px 20px;border-top:1px solid rgba(122,171,221,.12);display:flex;flex-wrap:wrap;justify-content:space-between;gap:8px;font-size:11px;color:rgba(255,255,255,.28)"><span>Real-time analysis</span><span>🏭 {n:,} MSMEs · {a["products"]} products · {_inr(a["rev"])} revenue</span><span>DPDP Act 2023 Compliant · DataNetra.ai v4.7</span></div>'
+        html += '</div></div>'
+        return html
+    except Exception as e:
+        import traceback
+        return f"<div style='padding:28px;background:#070D1A;color:white;font-family:monospace'><div style='color:#e74c3c;font-size:15px;font-weight:700;margin-bottom:10px'>Government Dashboard Error</div><pre style='font-size:12px;color:rgba(255,255,255,.5)'>{str(e)}\n{traceback.format_exc()[:800]}</pre></div>"
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Optional dependencies — wrapped so missing packages don't crash startup
+# ══════════════════════════════════════════════════════════════════════════════
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import StandardScaler
+LINEAR_REGRESSION_AVAILABLE = True
+
+try:
+    from prophet import Prophet
+    PROPHET_AVAILABLE = True
+except ImportError:
+    PROPHET_AVAILABLE = False
+
+HOLTWINTERS_AVAILABLE = True
+try:
+    from statsmodels.tsa.holtwinters import ExponentialSmoothing as _HW_statsmodels
+    _HW_STATSMODELS_AVAILABLE = True
+except ImportError:
+    _HW_STATSMODELS_AVAILABLE = False
+
+# ── SQLite / SQLAlchemy (optional — falls back to in-memory dict store) ──────
+_DB_AVAILABLE = False
+engine = None
+SessionLocal = None
+
+try:
+    from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Text, UniqueConstraint
+    from sqlalchemy.dialects.sqlite import insert as _sqlite_insert
+    try:
+        from sqlalchemy.ext.declarative import declarative_base
+    except ImportError:
+        from sqlalchemy.orm import declarative_base
+    from sqlalchemy.orm import sessionmaker
+
+    import os as _os
+    _DB_DIR = "/tmp" if _os.path.exists("/tmp") else "."
+    DATABASE_URL = f"sqlite:///{_DB_DIR}/msme_data.db"
+    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base = declarative_base()
+
+    class MSMEProfile(Base):
+        __tablename__ = "msme_profiles"
+        id = Column(Integer, primary_key=True, index=True)
+        mobile_number = Column(String(15), unique=True, index=True)
+        full_name = Column(String(100))
+        email = Column(String(100))
+        role = Column(String(50))
+        company_name = Column(String(200))
+        business_type = Column(String(50))
+        state = Column(String(50))
+        city = Column(String(100))
+        years_operation = Column(Integer)
+        monthly_revenue_range = Column(String(50))
+        verification_status = Column(String(20), default="PENDING")
+        created_at = Column(DateTime, default=datetime.datetime.utcnow)
+        consent_given = Column(Boolean, default=False)
+        organisation_type = Column(String(100))
+        major_activity = Column(String(200))
+        enterprise_type = Column(String(50))
+        industry_domain = Column(String(100))
+
+    class ForecastState(Base):
+        """Fitted model state per Udyam number and series, advanced as months are appended."""
+        __tablename__ = "forecast_state"
+        __table_args__ = (UniqueConstraint("udyam_number", "series", "model", name="uq_forecast_state_key"),)
+        id = Column(Integer, primary_key=True, index=True)
+        udyam_number = Column(String(40), index=True)
+        series = Column(String(200))
+        model = Column(String(50))
+        state = Column(Text)                      # JSON
+        updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    def _migrate_db():
+        import sqlite3
+        import os as _os2
+        db_path = "/tmp/msme_data.db" if _os2.path.exists("/tmp") else "./msme_data.db"
+        if not os.path.exists(db_path):
+            return
+        conn = sqlite3.connect(db_path)
+        cur = conn.cursor()
+        cur.execute("PRAGMA table_info(msme_profiles)")
+        existing_cols = {row[1] for row in cur.fetchall()}
+        migrations = {
+            "industry_domain":   "TEXT",
+            "major_activity":    "TEXT",
+            "enterprise_type":   "TEXT",
+            "organisation_type": "TEXT",
+        }
+        for col, col_type in migrations.items():
+            if existing_cols and col not in existing_cols:
+                cur.execute(f"ALTER TABLE msme_profiles ADD COLUMN {col} {col_type}")
+        # forecast_state tables from before the unique key: keep each key's newest row, then index it
+        cur.execute("SELECT sql FROM sqlite_master WHERE name = 'forecast_state'")
+        table_sql = (cur.fetchone() or [""])[0] or ""
+        cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'uq_forecast_state_key'")
+        if table_sql and "uq_forecast_state_key" not in table_sql and cur.fetchone() is None:
+            cur.execute("DELETE FROM forecast_state WHERE id NOT IN "
+                        "(SELECT MAX(id) FROM forecast_state GROUP BY udyam_number, series, model)")
+            cur.execute("CREATE UNIQUE INDEX uq_forecast_state_key ON forecast_state (udyam_number, series, model)")
+        conn.commit()
+        conn.close()
+
+    # Before create_all, so the engine's connections see the migrated schema
+    _migrate_db()
+    Base.metadata.create_all(bind=engine)
+    _DB_AVAILABLE = True
+
+except Exception as _db_err:
+    print(f"[INFO] SQLAlchemy not available — using in-memory profile store ({_db_err})")
+    _DB_AVAILABLE = False
+    _MEMORY_STORE = {}  # fallback in-memory user store
+
+# Without a database, forecast states live in memory: the most recent
+# FORECAST_STATE_MEM_ITEMS (udyam, series, model) entries, least recently used first out.
+FORECAST_STATE_MEM_ITEMS = int(os.environ.get("DATANETRA_FORECAST_STATE_MEM_ITEMS", 4096))
+_FORECAST_STATE_MEM = {}  # (udyam, series, model) -> state, oldest first
+_FORECAST_STATE_LOCK = threading.Lock()
+
+def _forecast_state_mem_get(key):
+    with _FORECAST_STATE_LOCK:
+        state = _FORECAST_STATE_MEM.pop(key, None)
+        if state is not None:
+            _FORECAST_STATE_MEM[key] = state       # most recent last
+        return state
+
+def _forecast_state_mem_put(key, state):
+    with _FORECAST_STATE_LOCK:
+        _FORECAST_STATE_MEM.pop(key, None)
+        _FORECAST_STATE_MEM[key] = state
+        while len(_FORECAST_STATE_MEM) > FORECAST_STATE_MEM_ITEMS:
+            _FORECAST_STATE_MEM.pop(next(iter(_FORECAST_STATE_MEM)))
+
+def save_user_profile(profile_data):
+    if not _DB_AVAILABLE or SessionLocal is None:
+        _MEMORY_STORE[profile_data.get('mobile_number', 'unknown')] = profile_data
+        return 1
+    db = SessionLocal()
+    try:
+        existing = db.query(MSMEProfile).filter(MSMEProfile.mobile_number == profile_data['mobile_number']).first()
+        profile_data_for_db = profile_data.copy()
+        for k in ['msme_number']:
+            if k in profile_data_for_db: del profile_data_for_db[k]
+        if existing:
+            for key, value in profile_data_for_db.items():
+                if hasattr(existing, key): setattr(existing, key, value)
+            db.commit(); return existing.id
+        else:
+            profile = MSMEProfile(**{k: v for k, v in profile_data_for_db.items() if hasattr(MSMEProfile, k)})
+            db.add(profile); db.commit(); db.refresh(profile); return profile.id
+    except Exception:
+        return 1
+    finally:
+        db.close()
+
+def get_user_profile(mobile_number):
+    if not _DB_AVAILABLE or SessionLocal is None:
+        return _MEMORY_STORE.get(mobile_number)
+    db = SessionLocal()
+    try:
+        row = db.query(MSMEProfile).filter(MSMEProfile.mobile_number == mobile_number).first()
+        if row:
+            return {c.name: getattr(row, c.name) for c in MSMEProfile.__table__.columns}
+        return None
+    except Exception:
+        return _MEMORY_STORE.get(mobile_number)
+    finally:
+        db.close()
+
+def load_forecast_state(udyam, series, model):
+    if not _DB_AVAILABLE or SessionLocal is None:
+        return _forecast_state_mem_get((udyam, series, model))
+    db = SessionLocal()
+    try:
+        row = (db.query(ForecastState)
+                 .filter(ForecastState.udyam_number == udyam, ForecastState.series == series,
+                         ForecastState.model == model).first())
+        return _json_mod.loads(row.state) if row else None
+    except Exception:
+        return _forecast_state_mem_get((udyam, series, model))
+    finally:
+        db.close()
+
+def save_forecast_state(udyam, series, model, state):
+    if not _DB_AVAILABLE or SessionLocal is None:
+        _forecast_state_mem_put((udyam, series, model), state)
+        return
+    db = SessionLocal()
+    try:
+        # One statement against the unique key, so concurrent saves of a key cannot both insert
+        stmt = _sqlite_insert(ForecastState).values(udyam_number=udyam, series=series, model=model,
+                                                    state=_json_mod.dumps(state),
+                                                    updated_at=datetime.datetime.utcnow())
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["udyam_number", "series", "model"],
+            set_={"state": stmt.excluded.state, "updated_at": stmt.excluded.updated_at}))
+        db.commit()
+    except Exception as e:
+        print(f"[INFO] Forecast state not saved to the database: {e}")
+        _forecast_state_mem_put((udyam, series, model), state)
+    finally:
+        db.close()
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Scoring kernel — two mergeable phases over the eight input columns
+# ══════════════════════════════════════════════════════════════════════════════
+# calculate_scores used to build each ratio as its own pandas Series and run
+# normalize() — a min scan and a max scan — eleven times, four of them repeats
+# over inputs it had already normalised. The kernel pulls the inputs into arrays
+# once and walks them in cache-sized blocks twice:
+#   1. ScoreStats.of: build the seven distinct ratios block by block and keep
+#      their min, max, sum and count — statistics that merge across chunks;
+#   2. score_finalize: normalise with the merged bounds and write every score
+#      into preallocated outputs.
+# Because only phase two needs the whole dataset's bounds, a frame can be split
+# into row partitions scored on a thread pool (numpy releases the GIL), and a
+# file larger than memory can be scored chunk by chunk (score_chunks). Each step
+# mirrors the pandas expression it replaces, dtype promotion included, so every
+# path is bit-identical to the normalize() chain on the whole frame.
+# DATANETRA_SCORE_WORKERS=1 keeps scoring in the caller's thread.
+SCORE_WORKERS        = int(os.environ.get("DATANETRA_SCORE_WORKERS", min(4, os.cpu_count() or 1)))
+SCORE_PARTITION_ROWS = int(os.environ.get("DATANETRA_SCORE_PARTITION_ROWS", 1_000_000))
+SCORE_INPUTS = ['Monthly_Sales_INR', 'Monthly_Operating_Cost_INR', 'Outstanding_Loan_INR',
+                'Vendor_Delivery_Reliability', 'Inventory_Turnover', 'Avg_Margin_Percent',
+                'Monthly_Demand_Units', 'Returns_Percentage']
+SCORE_OUTPUTS = ['Monthly_Sales_INR_Adjusted', 'Cashflow_Stress', 'Loan_Stress', 'Financial_Risk_Score',
+                 'Vendor_Score', 'Growth_Potential_Score', 'MSME_Health_Score', 'Profitability_Ratio',
+                 'Operational_Efficiency', 'Customer_Satisfaction', 'Performance_Score']
+# The distinct normalize() arguments: three derived ratios, four raw inputs
+_SCORE_RATIOS = ('cashflow', 'loan', 'profit', 'turnover', 'margin', 'demand', 'returns')
+_SCORE_BLOCK = 1 << 16
+
+def normalize(series):
+    if series.empty or series.max() == series.min(): return pd.Series(0, index=series.index)
+    return (series - series.min()) / (series.max() - series.min() + 1e-9)
+
+def _normalize_array(x, lo, hi):
+    """normalize() on an array with precomputed bounds (same zeros case, same dtype)."""
+    if hi == lo: return np.zeros(len(x), dtype=np.int64)
+    return (x - lo) / (hi - lo + 1e-9)
+
+def _score_sales_adjusted(sales, promote=None):
+    """Series.replace(0, 1e-9). An integer column only turns float if the frame holds a
+    zero; *promote* carries that from the whole dataset to one of its chunks."""
+    zero = sales == 0
+    if not (zero.any() if promote is None else promote): return sales
+    return np.where(zero, np.array(1e-9, dtype=np.result_type(sales.dtype, 1e-9)), sales)
+
+def _score_ratio_block(cols, adj, sl):
+    """The seven normalize() arguments for rows *sl*."""
+    a = adj[sl]
+    return {'cashflow': cols['Monthly_Operating_Cost_INR'][sl] / a,
+            'loan': cols['Outstanding_Loan_INR'][sl] / (a * 12),
+            'profit': cols['Avg_Margin_Percent'][sl] * a,
+            'turnover': cols['Inventory_Turnover'][sl], 'margin': cols['Avg_Margin_Percent'][sl],
+            'demand': cols['Monthly_Demand_Units'][sl], 'returns': cols['Returns_Percentage'][sl]}
+
+def _score_block(r, vendor, bounds):
+    """Every score for one block of ratios, in the order and dtypes of the pandas chain."""
+    n = {k: _normalize_array(r[k], *bounds[k]) for k in _SCORE_RATIOS}
+    risk = (0.5 * n['cashflow'] + 0.5 * n['loan']).clip(0, 1)
+    vend = (0.5 * vendor + 0.3 * n['turnover'] + 0.2 * n['margin']).clip(0, 1)
+    growth = (0.4 * n['demand'] + 0.35 * n['margin'] + 0.25 * (1 - n['returns'])).clip(0, 1)
+    eff = (1 - n['cashflow']).clip(0, 1)
+    sat = (1 - n['returns']).clip(0, 1)
+    return {'Cashflow_Stress': n['cashflow'], 'Loan_Stress': n['loan'], 'Financial_Risk_Score': risk,
+            'Vendor_Score': vend, 'Growth_Potential_Score': growth,
+            'MSME_Health_Score': ((1 - risk) * 0.4 + vend * 0.3 + growth * 0.3) * 100,
+            'Profitability_Ratio': n['profit'], 'Operational_Efficiency': eff, 'Customer_Satisfaction': sat,
+            'Performance_Score': (0.3 * n['profit'] + 0.25 * eff + 0.2 * sat + 0.15 * vendor
+                                  + 0.1 * n['turnover']).clip(0, 1) * 100}
+
+def _score_cast(cols, like):
+    """Inputs in *like*'s dtypes — those of the concatenated dataset."""
+    if like is None: return cols
+    return {c: cols[c].astype(like.dtypes[c], copy=False) for c in SCORE_INPUTS}
+
+class ScoreStats:
+    """Phase one of scoring: mergeable statistics of the seven normalize() arguments.
+
+    ``ScoreStats.of(cols)`` summarises one chunk — per ratio the min and max (NaN
+    skipped, as Series.min/max do), sum and non-NaN count — and ``a.merge(b)``
+    combines two summaries in any grouping. Merged bounds equal those of the
+    concatenated chunks, provided every chunk computed its ratios in the dtypes
+    of the concatenation; ``uniform`` is False when they did not, and the chunks
+    must be summarised again with ``like=`` the merged stats.
+    """
+    def __init__(self, dtypes, sales_zero, rows=0, lo=None, hi=None, total=None, count=None, uniform=True):
+        self.dtypes = dtypes; self.sales_zero = sales_zero; self.rows = rows
+        self.lo = lo or {}; self.hi = hi or {}; self.total = total or {}; self.count = count or {}
+        self.uniform = uniform
+
+    @classmethod
+    def of(cls, cols, like=None, block=_SCORE_BLOCK):
+        """Stats of one chunk. *like* imposes the dataset's dtypes and zero-sales promotion."""
+        cols = _score_cast(cols, like)
+        sales = cols['Monthly_Sales_INR']
+        zero = bool((sales == 0).any())
+        adj = _score_sales_adjusted(sales, zero if like is None else like.sales_zero)
+        st = cls({c: cols[c].dtype for c in SCORE_INPUTS}, zero if like is None else like.sales_zero, len(sales))
+        for s in range(0, len(sales), block):
+            for k, v in _score_ratio_block(cols, adj, slice(s, s + block)).items():
+                lo, hi = v.min(), v.max()
+                if np.isnan(lo) or np.isnan(hi):        # NaN (inf/inf): skip it like pandas
+                    v = v[~np.isnan(v)]
+                    if v.size: lo, hi = v.min(), v.max()
+                st._add(k, lo, hi, float(v.sum()), v.size)
+        return st
+
+    def _add(self, k, lo, hi, total, count):
+        self.lo[k] = lo if k not in self.lo else np.fmin(self.lo[k], lo)
+        self.hi[k] = hi if k not in self.hi else np.fmax(self.hi[k], hi)
+        self.total[k] = self.total.get(k, 0.0) + total
+        self.count[k] = self.count.get(k, 0) + count
+
+    def _signature(self):
+        """The dtypes the ratios were computed in."""
+        sales = self.dtypes['Monthly_Sales_INR']
+        return (tuple(self.dtypes[c] for c in SCORE_INPUTS),
+                np.result_type(sales, 1e-9) if self.sales_zero else sales)
+
+    def merge(self, other):
+        if not other.rows: return self
+        if not self.rows: return other
+        m = ScoreStats({c: np.result_type(self.dtypes[c], other.dtypes[c]) for c in SCORE_INPUTS},
+                       self.sales_zero or other.sales_zero, self.rows + other.rows,
+                       dict(self.lo), dict(self.hi), dict(self.total), dict(self.count),
+                       self.uniform and other.uniform and self._signature() == other._signature())
+        for k in _SCORE_RATIOS:
+            m._add(k, other.lo[k], other.hi[k], other.total[k], other.count[k])
+        return m
+
+    def bounds(self):
+        return {k: (self.lo[k], self.hi[k]) if self.rows else (0, 0) for k in _SCORE_RATIOS}
+
+    def mean(self, k):
+        return self.total[k] / self.count[k] if self.count.get(k) else float('nan')
+
+def _score_buffers(stats, size):
+    """Empty output arrays in the dtypes score_finalize produces under *stats*."""
+    cols = {c: np.empty(0, dtype=stats.dtypes[c]) for c in SCORE_INPUTS}
+    adj = _score_sales_adjusted(cols['Monthly_Sales_INR'], stats.sales_zero)
+    probe = _score_block(_score_ratio_block(cols, adj, slice(None)), cols['Vendor_Delivery_Reliability'],
+                         stats.bounds())
+    return {'Monthly_Sales_INR_Adjusted': np.empty(size, dtype=adj.dtype),
+            **{k: np.empty(size, dtype=v.dtype) for k, v in probe.items()}}
+
+def score_finalize(cols, stats, out=None, at=0, block=_SCORE_BLOCK):
+    """
+    Phase two: every SCORE_OUTPUTS column for one chunk, normalised with *stats*
+    merged over the whole dataset. Fills *out* from row *at* when given.
+    """
+    cols = _score_cast(cols, stats)
+    adj = _score_sales_adjusted(cols['Monthly_Sales_INR'], stats.sales_zero)
+    size = len(adj)
+    if out is None:
+        out = _score_buffers(stats, size); out['Monthly_Sales_INR_Adjusted'] = adj
+    else:
+        out['Monthly_Sales_INR_Adjusted'][at:at + size] = adj
+    vendor, bounds = cols['Vendor_Delivery_Reliability'], stats.bounds()
+    for s in range(0, size, block):
+        sl = slice(s, s + block)
+        for k, v in _score_block(_score_ratio_block(cols, adj, sl), vendor[sl], bounds).items():
+            out[k][at + s:at + s + len(v)] = v
+    return out
+
+_SCORE_POOL = None
+_SCORE_POOL_LOCK = threading.Lock()
+
+def _score_pool():
+    global _SCORE_POOL
+    with _SCORE_POOL_LOCK:
+        if _SCORE_POOL is None:
+            from concurrent.futures import ThreadPoolExecutor
+            _SCORE_POOL = ThreadPoolExecutor(SCORE_WORKERS, thread_name_prefix='score')
+        return _SCORE_POOL
+
+def _score_map(fn, items, workers):
+    """fn over items in order — on the scoring pool with at most 2·workers in flight."""
+    if workers <= 1:
+        yield from map(fn, items); return
+    pool, pending = _score_pool(), []
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= 2 * workers: yield pending.pop(0).result()
+    for fut in pending: yield fut.result()
+
+def _merge_score_stats(parts):
+    merged = None
+    for st in parts: merged = st if merged is None else merged.merge(st)
+    return merged
+
+def score_kernel(cols, workers=None, block=_SCORE_BLOCK):
+    """
+    {SCORE_OUTPUTS column: array} from {SCORE_INPUTS column: array} of equal length.
+    Frames of at least 2·SCORE_PARTITION_ROWS are split into row partitions whose
+    two phases run on up to *workers* (default SCORE_WORKERS) threads.
+    """
+    size = len(cols['Monthly_Sales_INR'])
+    workers = SCORE_WORKERS if workers is None else workers
+    parts = min(workers, size // SCORE_PARTITION_ROWS)
+    if parts <= 1:
+        return score_finalize(cols, ScoreStats.of(cols, block=block), block=block)
+    # Partitions of one frame share its dtypes; only the zero-sales promotion is global
+    like = ScoreStats({c: cols[c].dtype for c in SCORE_INPUTS}, bool((cols['Monthly_Sales_INR'] == 0).any()))
+    edges = np.linspace(0, size, parts + 1).astype(int)
+    slices = [slice(a, b) for a, b in zip(edges[:-1], edges[1:])]
+    rows = lambda sl: {c: v[sl] for c, v in cols.items()}
+    stats = _merge_score_stats(_score_map(lambda sl: ScoreStats.of(rows(sl), like, block), slices, parts))
+    out = _score_buffers(stats, size)
+    for _ in _score_map(lambda sl: score_finalize(rows(sl), stats, out, sl.start, block), slices, parts): pass
+    return out
+
+# Bump whenever calculate_scores or the report builders change their output —
+# it is part of the result cache key.
+SCORING_VERSION = "10"
+
+def calculate_scores(df, schema=None, workers=None):
+    df, cols = _score_inputs(df, schema)
+    return _score_assign(df, score_kernel(cols, workers))
+
+def _score_inputs(df, schema=None):
+    """Remap if needed and coerce the eight inputs in place → (df, {column: array})."""
+    if schema is None or not schema.canonical:
+        df = _apply_col_remap(df)
+    for col in SCORE_INPUTS:
+        if col not in df.columns: df[col] = 0
+        elif not pd.api.types.is_numeric_dtype(df[col]) or df[col].hasnans:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+    return df, {col: df[col].to_numpy() for col in SCORE_INPUTS}
+
+def _score_assign(df, scores):
+    for col in SCORE_OUTPUTS:                   # the kernel's buffers become the columns
+        df[col] = pd.Series(scores[col], index=df.index, copy=False)
+    return df
+
+def score_chunks(chunks, schema=None, workers=None):
+    """
+    Score a dataset that need not fit in memory. ``chunks()`` yields its frames
+    and is called two or three times; the chunks come back scored, in order,
+    against statistics merged over all of them — concatenated, they equal
+    calculate_scores on the whole dataset. A third pass over the chunks is only
+    needed when they were read with different dtypes.
+    """
+    workers = SCORE_WORKERS if workers is None else workers
+    summarise = lambda like: _merge_score_stats(_score_map(
+        lambda c: ScoreStats.of(_score_inputs(c, schema)[1], like), chunks(), workers))
+    stats = summarise(None)
+    if stats is None: return
+    if not stats.uniform: stats = summarise(stats)
+    def finalize(chunk):
+        df, cols = _score_inputs(chunk, schema)
+        return _score_assign(df, score_finalize(cols, stats))
+    yield from _score_map(finalize, chunks(), workers)
+
+def _monthly_series(sales, dates):
+    """Month-start [ds, y] sales totals from parsed dates, or None with fewer than two months."""
+    ts = sales.groupby(dates.rename('Date')).sum().resample('MS').sum().reset_index()
+    ts.columns = ['ds', 'y']
+    ts = ts.sort_values('ds').reset_index(drop=True)
+    return ts if len(ts) >= 2 else None
+
+class AnalysisContext:
+    """One analysis of one frame: scored, date-parsed and bucketed once, shared by every builder.
+
+    Each derived value is built on first use and memoised; builders read them and
+    must not write to ``scored``. Thread-safe, so stages may run concurrently.
+    """
+
+    def __init__(self, df, schema=None):
+        self.raw = df
+        self.schema = schema or DataSchema.of(df)
+        self._memo = {}
+        self._lock = threading.RLock()
+
+    def _get(self, name, build):
+        with self._lock:
+            if name not in self._memo:
+                self._memo[name] = build()
+            return self._memo[name]
+
+    @classmethod
+    def of_scored(cls, scored, schema=None):
+        """Context over a frame calculate_scores has already run on."""
+        ctx = cls(scored, schema)
+        ctx._memo['scored'] = scored
+        return ctx
+
+    @property
+    def scored(self):
+        return self._get('scored', lambda: calculate_scores(self.raw.copy(), self.schema))
+
+    @property
+    def dates(self):
+        """Parsed date column of ``scored`` (NaT where unparseable), or None."""
+        def build():
+            dc = self.schema.date
+            if not dc or dc not in self.scored.columns: return None
+            d = self.scored[dc]
+            return d if pd.api.types.is_datetime64_any_dtype(d) else pd.to_datetime(d, errors='coerce')
+        return self._get('dates', build)
+
+    @property
+    def quarters(self):
+        """'YYYY-Qn' label per row of ``scored`` as a sorted categorical named '_ql'; NaN without a date."""
+        def build():
+            d = self.dates
+            if d is None: return None
+            v = d.dropna()
+            labels = (v.dt.year.astype(str) + '-Q' + v.dt.quarter.astype(str)).reindex(d.index)
+            return pd.Series(pd.Categorical(labels, categories=sorted(labels.dropna().unique())),
+                             index=d.index, name='_ql')
+        return self._get('quarters', build)
+
+    @property
+    def monthly_sales(self):
+        """forecast_sales' monthly [ds, y] series, or None."""
+        def build():
+            sc = self.schema.sales
+            if not sc or self.dates is None: return None
+            return _monthly_series(self.scored[sc], self.dates)
+        return self._get('monthly_sales', build)
+
+    @property
+    def anomalies(self):
+        """detect_anomalies over the store, category and SKU series of ``scored``, or None without dates."""
+        def build():
+            if self.dates is None: return None
+            s = self.schema
+            return detect_anomalies(self.scored, [('Store', s.store), ('Category', s.category), ('SKU', s.sku)],
+                                    self.dates)
+        return self._get('anomalies', build)
+
+    @property
+    def category_index(self):
+        """_category_summary of ``scored`` per category, and of all of it under None."""
+        def build():
+            df, s = self.scored, self.schema
+            sales_col = s.sales or 'Monthly_Sales_INR'
+            index = {None: _category_summary(df, s.sku, sales_col)}
+            if s.category:
+                for cat, pos in df.groupby(s.category, observed=True, sort=False).indices.items():
+                    index[cat] = _category_summary(df.iloc[pos], s.sku, sales_col)
+            return index
+        return self._get('category_index', build)
+
+def segment_customers(df, schema=None):
+    try:
+        schema = schema or DataSchema.of(df)
+        sku_col = schema.sku
+        if not sku_col: return None
+        sales_col = 'Monthly_Sales_INR'
+        if sales_col not in df.columns: return None
+        dc = schema.date
+        if dc:
+            if not pd.api.types.is_datetime64_any_dtype(df[dc]):
+                df = df.assign(**{dc: pd.to_datetime(df[dc], errors='coerce')})
+            df = df.dropna(subset=[dc])
+            ref = df[dc].max()
+            rfm = df.groupby(sku_col, observed=True).agg(recency=(dc, lambda x: (ref - x.max()).days), frequency=(sales_col,'count'), monetary=(sales_col,'sum')).reset_index()
+        else:
+            rfm = df.groupby(sku_col, observed=True).agg(frequency=(sales_col,'count'), monetary=(sales_col,'sum')).reset_index(); rfm['recency'] = 0
+        for col, alias in [('Avg_Margin_Percent','avg_margin'),('Monthly_Demand_Units','avg_demand')]:
+            if col in df.columns:
+                m = df.groupby(sku_col, observed=True)[col].mean().reset_index(); m.columns=[sku_col,alias]; rfm = rfm.merge(m,on=sku_col,how='left'); rfm[alias]=rfm[alias].fillna(0)
+            else:
+                rfm[alias] = 0
+        if len(rfm) < 2: return None
+        X = rfm[['recency','frequency','monetary','avg_margin','avg_demand']].fillna(0).values
+        scaler = StandardScaler(); X_scaled = scaler.fit_transform(X)
+        n_clusters = min(5, max(2, len(rfm))); kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init='auto')
+        rfm['cluster_id'] = kmeans.fit_predict(X_scaled)
+        cluster_monetary = rfm.groupby('cluster_id')['monetary'].mean().sort_values(ascending=False)
+        names = ['Champions','Loyal','Potential','At Risk','Lost']
+        cmap = {cid: names[i] if i < len(names) else f'Segment {i}' for i,cid in enumerate(cluster_monetary.index)}
+        rfm['segment_name'] = rfm['cluster_id'].map(cmap)
+        segment_stats = {}
+        for seg, grp in rfm.groupby('segment_name'):
+            segment_stats[seg] = {'count': int(len(grp)), 'avg_sales': float(grp['monetary'].mean()),
+                                  'avg_margin': float(grp['avg_margin'].mean()), 'avg_demand': float(grp['avg_demand'].mean()),
+                                  'total_sales': float(grp['monetary'].sum()), 'top_products': grp.nlargest(3,'monetary')[sku_col].tolist()}
+        return {'counts': rfm['segment_name'].value_counts().to_dict(), 'rfm_df': rfm, 'segment_stats': segment_stats, 'sku_col': sku_col, 'n_clusters': n_clusters}
+    except:
+        return None
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Prediction intervals — one residual bootstrap for every model
+# ══════════════════════════════════════════════════════════════════════════════
+# Each model hands over its point forecast and the errors it makes, and future
+# paths are point + resampled errors; the bands are quantiles of those paths,
+# per month and for the 6/12-month totals. The ensemble models pass
+# out-of-sample error paths: the model is re-run from every origin of the
+# history (rolling_origin_errors) and each replicate adds one origin's whole
+# h-step error path, so the band widens with the horizon and the months of a
+# total stay correlated as they are in the data. Fits that only have in-sample
+# residuals (the batched granular fits, Prophet) resample them in circular
+# blocks of INTERVAL_BLOCK consecutive months, which keeps their serial
+# correlation. All series of a call are bootstrapped together (series ×
+# replicates × months array, chunked), so a granular fit of thousands of series
+# costs one pass, and every ensemble member reports a band of the same
+# INTERVAL_LEVEL. Prophet's own uncertainty sampling is switched off.
+INTERVAL_LEVEL     = float(os.environ.get("DATANETRA_INTERVAL_LEVEL", 0.95))
+INTERVAL_BOOTSTRAP = int(os.environ.get("DATANETRA_INTERVAL_BOOTSTRAP", 500))
+INTERVAL_BLOCK     = int(os.environ.get("DATANETRA_INTERVAL_BLOCK", 6))
+_INTERVAL_CHUNK_CELLS = 4_000_000
+_ORIGIN_MIN_MONTHS    = 3        # history before the first rolling origin
+
+def rolling_origins(n, min_months=_ORIGIN_MIN_MONTHS):
+    """Origins (months of history) a model is re-run from: every one with enough history, at least one once n > 1."""
+    return np.arange(min(max(min_months, 1), max(n - 1, 1)), n)
+
+def _level_ratio(y, at):
+    """Latest 6 months' mean level of ``y`` over the 6 months' before each index of ``at`` (1 where unknown)."""
+    c = np.r_[0.0, np.cumsum(np.abs(y))]
+    level = lambda o: (c[o] - c[np.maximum(o - 6, 0)]) / np.maximum(np.minimum(o, 6), 1)
+    then, now = level(np.asarray(at, dtype=np.int64)), level(np.array([len(y)]))
+    return np.where(then > 0, now / np.where(then > 0, then, 1), 1.0)
+
+def rolling_origin_errors(y, forecasts, origins):
+    """
+    Out-of-sample error paths: row i is y[origins[i] + h] - forecasts[i, h]
+    (h = 0…horizon-1; forecasts[i] made from the first origins[i] months),
+    NaN where the horizon runs past the end of ``y``. Sales grow and shrink, so
+    each path is rescaled by _level_ratio at its origin.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    origins = np.asarray(origins, dtype=np.int64)
+    forecasts = np.asarray(forecasts, dtype=np.float64)
+    idx = origins[:, None] + np.arange(forecasts.shape[1])
+    errors = np.where(idx < len(y), y[np.minimum(idx, len(y) - 1)] - forecasts, np.nan)
+    return errors * _level_ratio(y, origins)[:, None]
+
+def _block_noise(resid, B, H, rng):
+    """series × B × H noise of circular blocks of consecutive residuals (series × months, NaN = none)."""
+    ok = np.isfinite(resid)
+    cnt = np.maximum(ok.sum(axis=1), 1)[:, None, None]
+    R = np.take_along_axis(np.where(ok, resid, 0.0), np.argsort(~ok, axis=1, kind='stable'), axis=1)
+    L = max(1, INTERVAL_BLOCK); nb = -(-H // L)
+    start = (rng.random((len(R), B, nb)) * cnt).astype(np.int64)
+    idx = ((start[..., None] + np.arange(L)) % cnt[..., None]).reshape(len(R), B, nb * L)[:, :, :H]
+    return np.take_along_axis(R, idx.reshape(len(R), -1), axis=1).reshape(len(R), B, H)
+
+def _path_noise(E, B, H, rng):
+    """
+    series × B × H noise from error paths (series × origins × horizon, NaN past
+    the data). Each replicate follows one origin's path; the months past its end
+    repeat the path's mean error, so a level error carries on as it would.
+    Origins reaching at least half the horizon are preferred when there are any.
+    """
+    k = len(E); E = E[:, :, :H]
+    ok = np.isfinite(E)
+    reach = ok.sum(axis=2)                                           # series × origins
+    mean = np.where(ok, E, 0.0).sum(axis=2) / np.maximum(reach, 1)
+    full = np.where(ok, E, mean[:, :, None])
+    pool = reach >= np.where((reach >= -(-H // 2)).any(axis=1), -(-H // 2), 1)[:, None]
+    # The pool of each series packed to the front: row i draws from its first cnt[i]
+    cnt = pool.sum(axis=1)
+    order = np.argsort(~pool, axis=1, kind='stable')
+    o = (rng.random((k, B)) * np.maximum(cnt, 1)[:, None]).astype(np.int64)
+    o = np.take_along_axis(order, o, axis=1)
+    noise = full[np.arange(k)[:, None], o]                           # series × B × H
+    return np.where(cnt[:, None, None] > 0, noise, 0.0)
+
+def bootstrap_intervals(point, resid, windows=(6, 12), level=None, n_boot=None, seed=0, exceed=None, monthly=True):
+    """
+    ``point``: n_series × horizon forecasts. ``resid``: n_series × n_months
+    in-sample residuals (NaN where a series has none), resampled in blocks, or
+    n_series × n_origins × horizon error paths from rolling_origin_errors.
+    Returns (lower, upper, {w: (lower, upper)}) — monthly bands
+    (n_series × horizon) and bands of each w-month total (n_series), all
+    clipped at 0. With ``exceed`` (one threshold per series) each window also
+    carries P(w-month total > threshold): {w: (lower, upper, p)}.
+    ``monthly=False`` skips the monthly bands (returned as None).
+    """
+    point = np.atleast_2d(np.asarray(point, dtype=np.float64))
+    resid = np.asarray(resid, dtype=np.float64)
+    resid = resid.reshape((1,) * (2 - resid.ndim) + resid.shape) if resid.ndim < 2 else resid
+    noise_of = _path_noise if resid.ndim == 3 else _block_noise
+    S, H = point.shape
+    B = n_boot or INTERVAL_BOOTSTRAP
+    level = INTERVAL_LEVEL if level is None else level
+    q = [(1 - level) / 2 * 100, (1 + level) / 2 * 100]
+    rng = np.random.default_rng(seed)
+    lo, hi = (np.empty((S, H)), np.empty((S, H))) if monthly else (None, None)
+    win = {w: tuple(np.empty(S) for _ in range(2 if exceed is None else 3)) for w in windows}
+    step = max(1, _INTERVAL_CHUNK_CELLS // (B * H))
+    for a in range(0, S, step):
+        sl = slice(a, min(S, a + step))
+        paths = np.clip(point[sl][:, None, :] + noise_of(resid[sl], B, H, rng), 0, None)
+        if monthly:
+            lo[sl], hi[sl] = np.percentile(paths, q, axis=1)
+        for w, bands in win.items():
+            tot = paths[:, :, :w].sum(axis=2)
+            bands[0][sl], bands[1][sl] = np.percentile(tot, q, axis=1)
+            if exceed is not None:
+                bands[2][sl] = (tot > np.asarray(exceed, dtype=np.float64)[sl, None]).mean(axis=1)
+    return lo, hi, win
+
+def _series_intervals(fc, resid):
+    """
+    One series: ({'6_month', '12_month'} totals of ``fc`` with their bands,
+    monthly lower, monthly upper). ``resid`` is the series' residuals or its
+    origins × horizon error paths.
+    """
+    lo, hi, win = bootstrap_intervals(fc[None], np.asarray(resid)[None])
+    return ({f'{w}_month': {'forecast': float(np.sum(fc[:w])), 'lower': float(win[w][0][0]),
+                            'upper': float(win[w][1][0])} for w in (6, 12)}, lo[0], hi[0])
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Fitted-model cache — an identical monthly series is forecast once
+# ══════════════════════════════════════════════════════════════════════════════
+# Keyed by a hash of the series itself (ds, y), the model, its settings and the
+# horizon, so re-analysis, a reloaded MSME, or a store/category series equal to
+# another one is a lookup. The disk tier (<cache dir>/models) is shared with the
+# stage workers; DATANETRA_MODEL_CACHE_DISK=0 keeps the cache in memory only.
+MODEL_CACHE_ITEMS      = int(os.environ.get("DATANETRA_MODEL_CACHE_ITEMS", 512))
+MODEL_CACHE_DISK_ITEMS = int(os.environ.get("DATANETRA_MODEL_CACHE_DISK_ITEMS", 4096))
+MODEL_CACHE_TTL_S      = float(os.environ.get("DATANETRA_MODEL_CACHE_TTL", 7 * 24 * 3600))
+MODEL_CACHE_DIR        = (os.path.join(DATASET_CACHE_DIR, "models")
+                          if os.environ.get("DATANETRA_MODEL_CACHE_DISK", "1") != "0" else None)
+
+MODEL_CACHE = _ResultCache(MODEL_CACHE_ITEMS, MODEL_CACHE_TTL_S, MODEL_CACHE_DIR, MODEL_CACHE_DISK_ITEMS, promote=True)
+
+def series_fingerprint(model, ds, y, horizon, **params):
+    h = hashlib.sha256(_json_mod.dumps([model, SCORING_VERSION, horizon, sorted(params.items())],
+                                       default=str).encode('utf-8'))
+    h.update(np.ascontiguousarray(pd.to_datetime(pd.Series(ds)).values.astype('datetime64[ns]').view(np.int64)).tobytes())
+    h.update(np.ascontiguousarray(np.asarray(y, dtype=np.float64)).tobytes())
+    return h.hexdigest()
+
+def _interval_params():
+    """The settings that shape every bootstrap band — part of each cached fit's key."""
+    return {'level': INTERVAL_LEVEL, 'bootstrap': INTERVAL_BOOTSTRAP, 'block': INTERVAL_BLOCK,
+            'origin_min': _ORIGIN_MIN_MONTHS}
+
+def _model_cached(name, params=dict):
+    """
+    Route fit(monthly_df, periods) through MODEL_CACHE. The key holds the band
+    settings (_interval_params) and ``params()``, the settings that change the fit.
+    """
+    import copy, functools
+    def wrap(fit):
+        @functools.wraps(fit)
+        def cached(monthly_df, periods=12):
+            key = series_fingerprint(name, monthly_df['ds'], monthly_df['y'], periods,
+                                     **_interval_params(), **params())
+            hit, _ = MODEL_CACHE.get(key)
+            if hit is not None:
+                return copy.deepcopy(hit['result'])
+            res = fit(monthly_df, periods)
+            if res is not None:      # fits return None on failure — retry next time
+                entry = {'result': copy.deepcopy(res)}
+                MODEL_CACHE.put(key, entry, entry)
+            return res
+        return cached
+    return wrap
+
+@_model_cached('prophet', lambda: {'available': PROPHET_AVAILABLE})
+def _run_prophet_model(monthly_df, periods=12):
+    """Run Prophet on a monthly DataFrame with columns [ds, y]. Returns forecast dict or None."""
+    if not PROPHET_AVAILABLE or len(monthly_df) < 2: return None
+    try:
+        train = monthly_df.tail(12).copy()
+        last_date = monthly_df['ds'].max()
+        model = Prophet(yearly_seasonality=False, weekly_seasonality=True, daily_seasonality=False,
+                        changepoint_prior_scale=0.001, uncertainty_samples=0)
+        model.fit(train)
+        future = model.make_future_dataframe(periods=periods, freq='MS')
+        fc = model.predict(future)
+        resid = train['y'].to_numpy(float) - fc['yhat'].to_numpy()[:len(train)]
+        ff = fc[fc['ds'] >= last_date][['ds','yhat']].copy()
+        ff['yhat'] = ff['yhat'].clip(lower=0)
+        windows, ff['yhat_lower'], ff['yhat_upper'] = _series_intervals(ff['yhat'].to_numpy(), resid)
+        return dict(windows, forecast_df=ff, model_name='Prophet')
+    except: return None
+
+# ── Seasonal-trend model: Prophet's shape without Stan ───────────────────────
+# Piecewise-linear trend (hinges at ST_CHANGEPOINTS points spread over the first
+# 80% of the history) plus yearly Fourier terms once there are 24 months, fitted
+# by ridge least squares on the mean-scaled series. Changepoint slopes carry a
+# stronger penalty, like Prophet's sparse prior. The band comes from refits at
+# every rolling origin, so it carries the trend's extrapolation error too.
+ST_CHANGEPOINTS = 6
+ST_HARMONICS    = 3
+_ST_RIDGE       = {'trend': 0.01, 'changepoint': 1.0, 'season': 0.1}
+
+def _seasonal_trend_design(t, changepoints, harmonics):
+    u = t / 12.0
+    cols = [np.ones_like(u), u] + [np.maximum(0.0, u - c) for c in changepoints]
+    for k in range(1, harmonics + 1):
+        cols += [np.sin(2 * np.pi * k * t / 12), np.cos(2 * np.pi * k * t / 12)]
+    return np.stack(cols, axis=1)
+
+def _seasonal_trend_fit(y, periods):
+    """(forecast clipped at 0, number of changepoints, seasonal?) of the model on ``y``."""
+    n = len(y)
+    scale = float(np.mean(np.abs(y))) or 1.0
+    n_cp = min(ST_CHANGEPOINTS, max(0, n // 4 - 1))
+    cps = np.linspace(0, 0.8 * (n - 1), n_cp + 2)[1:-1] / 12.0
+    harmonics = ST_HARMONICS if n >= 24 else 0
+    X = _seasonal_trend_design(np.arange(n, dtype=np.float64), cps, harmonics)
+    pen = np.r_[1e-9, _ST_RIDGE['trend'], np.full(n_cp, _ST_RIDGE['changepoint']),
+                np.full(2 * harmonics, _ST_RIDGE['season'])]
+    Xf = _seasonal_trend_design(np.arange(n, n + periods, dtype=np.float64), cps, harmonics)
+    coef = np.linalg.solve(X.T @ X + np.diag(pen), X.T @ (y / scale)) * scale
+    return np.clip(Xf @ coef, 0, None), n_cp, harmonics > 0
+
+@_model_cached('seasonal-trend', lambda: {'changepoints': ST_CHANGEPOINTS, 'harmonics': ST_HARMONICS,
+                                          'ridge': _ST_RIDGE})
+def _run_seasonal_trend_model(monthly_df, periods=12):
+    """Prophet stand-in on a monthly DataFrame [ds, y]; same result layout as _run_prophet_model."""
+    if len(monthly_df) < 3: return None
+    try:
+        y = monthly_df['y'].to_numpy(dtype=np.float64)
+        fc, n_cp, seasonal = _seasonal_trend_fit(y, periods)
+        origins = rolling_origins(len(y))
+        errors = rolling_origin_errors(y, [_seasonal_trend_fit(y[:o], periods)[0] for o in origins], origins)
+        windows, lo, hi = _series_intervals(fc, errors)
+        ff = pd.DataFrame({'ds': pd.date_range(monthly_df['ds'].max() + pd.offsets.MonthBegin(1), periods=periods, freq='MS'),
+                           'yhat': fc, 'yhat_lower': lo, 'yhat_upper': hi})
+        return dict(windows, forecast_df=ff,
+                    changepoints=int(n_cp), seasonal=bool(seasonal), model_name='Seasonal-Trend')
+    except: return None
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Vectorised Holt-Winters — the whole (α, β, γ) grid and many series per pass
+# ══════════════════════════════════════════════════════════════════════════════
+# The smoother state is an (n_series × n_grid) array, so the grid search is one
+# recurrence over the months instead of a Python loop per parameter pair. The
+# one-step predictions of every candidate are kept from that same pass, which
+# gives the fitted values of the winner without re-running it. Additive
+# seasonality (period 12) is fitted once there are two full years of history.
+# 'statsmodels' restores the ExponentialSmoothing optimiser for the ensemble.
+HW_ENGINE   = os.environ.get("DATANETRA_HW_ENGINE", "numpy")
+HW_ALPHAS   = np.round(np.arange(0.05, 1.0, 0.05), 2)
+HW_BETAS    = np.array([0.0, 0.02, 0.05, 0.1, 0.15, 0.2, 0.3, 0.4, 0.5])
+HW_GAMMAS   = np.array([0.0, 0.05, 0.1, 0.2, 0.3, 0.5])
+_HW_PERIOD  = 12
+_HW_CHUNK_CELLS = 4_000_000   # series × grid × (months + period) floats per chunk
+
+def fit_holt_winters(Y, alphas=HW_ALPHAS, betas=HW_BETAS, gammas=HW_GAMMAS,
+                     seasonal=None, horizon=12):
+    """
+    Grid-search additive Holt(-Winters) on every row of ``Y`` (n_series × n_months).
+    ``seasonal`` defaults to True when there are at least two periods of data.
+    Returns a dict of 'forecast' (n_series × horizon), 'fitted' (NaN before the
+    first scored month), 'alpha'/'beta'/'gamma'/'sse' (n_series), 'level',
+    'trend' and 'seasonal'.
+    """
+    Y = np.atleast_2d(np.asarray(Y, dtype=float))
+    S, T = Y.shape
+    m = _HW_PERIOD
+    if seasonal is None: seasonal = T >= 2 * m
+    if T < (2 * m if seasonal else 2):
+        raise ValueError(f"need at least {2 * m if seasonal else 2} months, got {T}")
+    gammas = np.asarray(gammas, dtype=float) if seasonal else np.zeros(1)
+    A, B, G = np.meshgrid(np.asarray(alphas, float), np.asarray(betas, float), gammas, indexing='ij')
+    A, B, G = A.ravel(), B.ravel(), G.ravel()
+    n_grid = A.size
+
+    # Initial state at the end of the warm-up window (t = start - 1). The
+    # non-seasonal start is the classic l = y0, b = y1 - y0.
+    if seasonal:
+        start = m
+        first, second = Y[:, :m].mean(1), Y[:, m:2 * m].mean(1)
+        b0 = (second - first) / m
+        offs = np.arange(m) - (m - 1) / 2
+        s0 = Y[:, :m] - (first[:, None] + b0[:, None] * offs)
+        l0 = first + b0 * (m - 1) / 2
+    else:
+        start = 1
+        l0, b0, s0 = Y[:, 0], Y[:, 1] - Y[:, 0], np.zeros((S, m))
+
+    out = {k: np.empty(S) for k in ('alpha', 'beta', 'gamma', 'sse', 'level', 'trend')}
+    out['seasonal'] = np.empty((S, m))
+    out['fitted'] = np.full((S, T), np.nan)
+    step = max(1, _HW_CHUNK_CELLS // (n_grid * (T + m)))
+    for lo in range(0, S, step):
+        sl = slice(lo, min(S, lo + step))
+        y = Y[sl]; k = y.shape[0]
+        lvl = np.repeat(l0[sl, None], n_grid, 1)
+        trd = np.repeat(b0[sl, None], n_grid, 1)
+        sea = np.repeat(s0[sl, None, :], n_grid, 1)          # k × grid × m
+        pred = np.empty((T - start, k, n_grid))
+        sse = np.zeros((k, n_grid))
+        for t in range(start, T):
+            yt = y[:, t, None]
+            st = sea[:, :, t % m]
+            p = lvl + trd + st
+            pred[t - start] = p
+            sse += (yt - p) ** 2
+            new = A * (yt - st) + (1 - A) * (lvl + trd)
+            trd = B * (new - lvl) + (1 - B) * trd
+            if seasonal:
+                sea[:, :, t % m] = G * (yt - new) + (1 - G) * st
+            lvl = new
+        best = np.argmin(sse, axis=1)
+        rows = np.arange(k)
+        out['alpha'][sl], out['beta'][sl], out['gamma'][sl] = A[best], B[best], G[best]
+        out['sse'][sl] = sse[rows, best]
+        out['level'][sl], out['trend'][sl] = lvl[rows, best], trd[rows, best]
+        out['seasonal'][sl] = sea[rows, best]
+        out['fitted'][sl, start:] = pred[:, rows, best].T
+
+    h = np.arange(1, horizon + 1)
+    out['forecast'] = (out['level'][:, None] + h * out['trend'][:, None]
+                       + out['seasonal'][:, (T + h - 1) % m])
+    return out
+
+@_model_cached('holt-winters', lambda: {'engine': HW_ENGINE if _HW_STATSMODELS_AVAILABLE else 'numpy',
+                                        'grid': [HW_ALPHAS.tolist(), HW_BETAS.tolist(), HW_GAMMAS.tolist()]})
+def _run_holtwinters_model(monthly_df, periods=12):
+    """
+    Holt-Winters Exponential Smoothing (additive trend, + seasonality from 24 months).
+    Default engine is the vectorised numpy grid search (fit_holt_winters);
+    DATANETRA_HW_ENGINE=statsmodels uses ExponentialSmoothing when installed.
+    """
+    if len(monthly_df) < 3: return None
+
+    y = monthly_df['y'].values.astype(float)
+
+    # ── Path 1: statsmodels (opt-in — numerical optimiser, ~100× slower) ────
+    if HW_ENGINE == 'statsmodels' and _HW_STATSMODELS_AVAILABLE:
+        try:
+            use_seasonal = len(y) >= 24
+            model = _HW_statsmodels(
+                y,
+                trend='add',
+                seasonal='add' if use_seasonal else None,
+                seasonal_periods=12 if use_seasonal else None,
+                initialization_method='estimated'
+            ).fit(optimized=True)
+            forecast = np.clip(model.forecast(periods), 0, None)
+            params = model.params if hasattr(model, 'params') else {}
+            return {
+                **_series_intervals(forecast, y - model.fittedvalues)[0],
+                'alpha': float(params.get('smoothing_level', 0.3)),
+                'beta':  float(params.get('smoothing_trend', 0.1)),
+                'trend_per_month': float(forecast[1] - forecast[0]) if len(forecast) > 1 else 0.0,
+                'engine': 'statsmodels',
+                'model_name': 'Holt-Winters'
+            }
+        except:
+            pass  # fall through to numpy implementation
+
+    # ── Path 2: vectorised numpy grid ────────────────────────────────────────
+    try:
+        return _hw_state_result(_hw_state(y), periods, y)
+    except:
+        return None
+
+# Holt-Winters and trend-line state: everything needed to forecast, and to take
+# in further months without refitting (see incremental_forecast). Plain floats
+# and lists, so a state serialises to JSON.
+def _hw_state(y):
+    fit = fit_holt_winters(y, horizon=1)
+    r = (y - fit['fitted'][0])[~np.isnan(fit['fitted'][0])]
+    return {'alpha': float(fit['alpha'][0]), 'beta': float(fit['beta'][0]), 'gamma': float(fit['gamma'][0]),
+            'level': float(fit['level'][0]), 'trend': float(fit['trend'][0]),
+            'seasonal': fit['seasonal'][0].tolist(), 'seasonal_on': len(y) >= 2 * _HW_PERIOD,
+            'n': len(y), 'resid': r.tolist()}
+
+def _hw_state_update(st, new_y):
+    """Run the smoother over ``new_y`` with the fitted α/β/γ. None when a refit is due."""
+    if not st['seasonal_on'] and st['n'] + len(new_y) >= 2 * _HW_PERIOD:
+        return None                                   # two years now: refit with seasonality
+    st = dict(st, seasonal=list(st['seasonal']), resid=list(st['resid']))
+    a, b, g, m = st['alpha'], st['beta'], st['gamma'], _HW_PERIOD
+    for yt in map(float, new_y):
+        i = st['n'] % m; s = st['seasonal'][i]
+        r = yt - (st['level'] + st['trend'] + s)
+        st['resid'].append(r)
+        new = a * (yt - s) + (1 - a) * (st['level'] + st['trend'])
+        st['trend'] = b * (new - st['level']) + (1 - b) * st['trend']
+        if st['seasonal_on']: st['seasonal'][i] = g * (yt - new) + (1 - g) * s
+        st['level'] = new; st['n'] += 1
+    return st
+
+def _hw_error_paths(st, periods, y=None):
+    """
+    Simulated h-step error paths of the smoother: with α/β/γ fixed, the error h
+    months ahead is r[h] + Σ_{j<h} c[h-j]·r[j] for the one-step errors r that
+    follow, c[k] = α(1 + kβ) + γ(1-α)·[k ≡ 0 mod 12]. The r are the fit's own
+    one-step residuals (rescaled to the latest level when ``y`` is given),
+    resampled in blocks.
+    """
+    r = np.asarray(st['resid'], dtype=np.float64)
+    if y is not None and len(r):
+        r = r * _level_ratio(y, np.arange(st['n'] - len(r), st['n']))
+    a, b, g = st['alpha'], st['beta'], st['gamma']
+    k = np.arange(periods)
+    c = np.where(k == 0, 1.0, a * (1 + k * b) + g * (1 - a) * ((k % _HW_PERIOD == 0) & (k > 0)))
+    C = np.tril(c[np.abs(k[:, None] - k[None, :])])                 # C[h, j] = c[h-j], j ≤ h
+    R = _block_noise(r[None], INTERVAL_BOOTSTRAP, periods, np.random.default_rng(0))[0]
+    return R @ C.T
+
+def _hw_state_result(st, periods=12, y=None):
+    h = np.arange(1, periods + 1)
+    seas = np.asarray(st['seasonal'])[(st['n'] + h - 1) % _HW_PERIOD]
+    forecast = np.clip(st['level'] + h * st['trend'] + seas, 0, None)
+    return {
+        **_series_intervals(forecast, _hw_error_paths(st, periods, y))[0],
+        'alpha': st['alpha'], 'beta': st['beta'], 'gamma': st['gamma'], 'trend_per_month': st['trend'],
+        'engine': 'numpy',
+        'model_name': 'Holt-Winters'
+    }
+
+def _lr_state(y):
+    """Centred sufficient statistics of the least-squares line through (t, y), t = 0…n-1."""
+    t = np.arange(len(y), dtype=np.float64)
+    mt, my = float(t.mean()), float(y.mean())
+    return {'n': len(y), 'mean_t': mt, 'mean_y': my, 'c_tt': float(((t - mt) ** 2).sum()),
+            'c_ty': float(((t - mt) * (y - my)).sum()), 'c_yy': float(((y - my) ** 2).sum())}
+
+def _lr_state_update(st, new_y):
+    """Fold in appended months one at a time (Welford co-moment updates)."""
+    st = dict(st)
+    for yt in map(float, new_y):
+        t = float(st['n']); n = st['n'] + 1
+        dt, dy = t - st['mean_t'], yt - st['mean_y']
+        st['mean_t'] += dt / n; st['mean_y'] += dy / n
+        st['c_tt'] += dt * (t - st['mean_t'])
+        st['c_ty'] += dt * (yt - st['mean_y'])
+        st['c_yy'] += dy * (yt - st['mean_y'])
+        st['n'] = n
+    return st
+
+def _lr_error_paths(y, periods):
+    """Rolling-origin errors of the line, refitted from every origin's history (cumulative sums)."""
+    origins = rolling_origins(len(y))
+    t = np.arange(len(y), dtype=np.float64)
+    sy, sty = np.r_[0.0, np.cumsum(y)][origins], np.r_[0.0, np.cumsum(t * y)][origins]
+    n = origins.astype(np.float64)
+    s_t, s_tt = n * (n - 1) / 2, (n - 1) * n * (2 * n - 1) / 6
+    den = n * s_tt - s_t ** 2
+    slope = np.where(den > 0, (n * sty - s_t * sy) / np.where(den > 0, den, 1), 0.0)
+    intercept = (sy - slope * s_t) / n
+    fc = np.clip(intercept[:, None] + slope[:, None] * (n[:, None] + np.arange(periods)), 0, None)
+    return rolling_origin_errors(y, fc, origins)
+
+def _lr_state_result(st, periods=12, y=None):
+    """``y`` is the series the state covers; the line's rolling-origin errors on it give the band."""
+    n = st['n']
+    slope = st['c_ty'] / st['c_tt'] if st['c_tt'] > 0 else 0.0
+    intercept = st['mean_y'] - slope * st['mean_t']
+    sse = max(st['c_yy'] - slope * st['c_ty'], 0.0)
+    future_y = np.clip(intercept + slope * np.arange(n, n + periods), 0, None)
+    r2 = 1.0 - sse / st['c_yy'] if st['c_yy'] > 0 else 1.0
+    return {
+        **_series_intervals(future_y, _lr_error_paths(np.asarray(y, dtype=np.float64), periods))[0],
+        'r2_score': float(r2), 'slope': float(slope), 'intercept': float(intercept),
+        'model_name': 'Linear Regression'
+    }
+def _run_linear_regression_model(monthly_df, periods=12):
+    """Run Linear Regression trend forecasting on monthly DataFrame [ds, y]. Returns forecast dict or None."""
+    if len(monthly_df) < 2: return None
+    try:
+        y = monthly_df['y'].values.astype(float)
+        return _lr_state_result(_lr_state(y), periods, y)
+    except: return None
+
+def _run_baseline_model(monthly_df, periods=12):
+    """Statistical baseline: avg × months × 1.05 growth factor."""
+    if len(monthly_df) == 0: return None
+    y = monthly_df['y'].to_numpy(dtype=np.float64)
+    avg = float(y[-6:].mean())
+    # The rule's own errors from every origin: the mean of the (up to) 6 months before it, +5%
+    c = np.concatenate([[0.0], np.cumsum(y)]); origins = rolling_origins(len(y))
+    lo = np.maximum(origins - 6, 0)
+    rule = (c[origins] - c[lo]) / np.maximum(origins - lo, 1) * 1.05
+    errors = rolling_origin_errors(y, np.repeat(rule[:, None], periods, axis=1), origins)
+    return {
+        **_series_intervals(np.full(periods, avg * 1.05), errors)[0],
+        'model_name': 'Statistical Baseline'
+    }
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Incremental forecasts — a fresh month updates the saved state
+# ══════════════════════════════════════════════════════════════════════════════
+# Holt-Winters (level/trend/seasonals and its one-step residuals) and the trend line
+# (centred sufficient statistics) are saved per Udyam number in forecast_state.
+# When the next upload extends the same history, only the appended months are
+# run through the state: O(new months) instead of a grid search or a full fit.
+# The stored history fingerprint must match the upload's first n months, else
+# (restated history, a partial month completed) the model is refitted. Every
+# FORECAST_REFIT_MONTHS appended months, or on incremental_forecast(refit=True),
+# the parameters are searched again. DATANETRA_INCREMENTAL_FORECAST=0 disables it.
+INCREMENTAL_FORECAST  = os.environ.get("DATANETRA_INCREMENTAL_FORECAST", "1") != "0"
+FORECAST_REFIT_MONTHS = int(os.environ.get("DATANETRA_FORECAST_REFIT_MONTHS", 6))
+
+# model -> (initial state from y, update with appended y (None = refit), result from (state, periods, y), min months)
+_INCREMENTAL_MODELS = {
+    'Holt-Winters':      (_hw_state, _hw_state_update, _hw_state_result, 3),
+    'Linear Regression': (_lr_state, _lr_state_update, _lr_state_result, 2),
+}
+
+def incremental_forecast(udyam, model, monthly_df, periods=12, series='overall', refit=False):
+    """Forecast dict for ``model`` on ``monthly_df`` [ds, y], advancing the saved state when possible."""
+    init, update, result, min_len = _INCREMENTAL_MODELS[model]
+    if len(monthly_df) < min_len: return None
+    ds, y = monthly_df['ds'], monthly_df['y'].to_numpy(dtype=np.float64)
+    try:
+        st = None if refit else load_forecast_state(udyam, series, model)
+        if st and st['n'] <= len(y) and len(y) - st['n_refit'] < FORECAST_REFIT_MONTHS \
+                and series_fingerprint('history', ds.iloc[:st['n']], y[:st['n']], 0) == st['history']:
+            if st['n'] == len(y):
+                return result(st, periods, y)
+            new = update(st, y[st['n']:])
+            if new is not None:
+                new['history'] = series_fingerprint('history', ds, y, 0)
+                save_forecast_state(udyam, series, model, new)
+                return result(new, periods, y)
+        st = dict(init(y), n_refit=len(y), history=series_fingerprint('history', ds, y, 0))
+        save_forecast_state(udyam, series, model, st)
+        return result(st, periods, y)
+    except Exception as e:
+        print(f"[INFO] Incremental {model} forecast failed ({e}); fitting from scratch")
+        return {'Holt-Winters': _run_holtwinters_model, 'Linear Regression': _run_linear_regression_model}[model](monthly_df, periods)
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Ensemble scheduler — the forecast models race a latency budget
+# ══════════════════════════════════════════════════════════════════════════════
+# Every request gets its own FORECAST_WORKERS threads (by default one per
+# member), and members are submitted cheapest first. Each has a timeout counted from submission and nothing is
+# waited on past FORECAST_BUDGET_S; the ensemble is weighted over the models that
+# finished. A model that misses its deadline keeps running on its request's
+# threads (a Python thread cannot be stopped) and still lands in MODEL_CACHE, so
+# the next request for the same series gets it for free — but it holds no worker
+# a later request needs. At most FORECAST_MAX_STRAGGLERS such overrunning fits
+# are let run; past that, requests run their models one after another in the
+# caller, which starts none once the budget is spent. That is also what
+# DATANETRA_FORECAST_WORKERS=0 does. Seasonal-Trend is Prophet's stand-in, so
+# with Prophet installed it is only fitted after Prophet came back empty.
+FORECAST_WORKERS   = int(os.environ.get("DATANETRA_FORECAST_WORKERS", 5))
+FORECAST_MAX_STRAGGLERS = int(os.environ.get("DATANETRA_FORECAST_MAX_STRAGGLERS", 8))
+FORECAST_BUDGET_S  = float(os.environ.get("DATANETRA_FORECAST_BUDGET", 10))
+FORECAST_TIMEOUTS_S = {
+    'Statistical Baseline': float(os.environ.get("DATANETRA_FORECAST_TIMEOUT_BASELINE", 1)),
+    'Linear Regression':    float(os.environ.get("DATANETRA_FORECAST_TIMEOUT_LINREG", 1)),
+    'Holt-Winters':         float(os.environ.get("DATANETRA_FORECAST_TIMEOUT_HW", 3)),
+    'Seasonal-Trend':       float(os.environ.get("DATANETRA_FORECAST_TIMEOUT_ST", 3)),
+    'Prophet':              float(os.environ.get("DATANETRA_FORECAST_TIMEOUT_PROPHET", 8)),
+}
+_ENSEMBLE_ORDER = ('Statistical Baseline', 'Linear Regression', 'Holt-Winters', 'Seasonal-Trend', 'Prophet')   # cheapest first
+_NEEDS_DATES = ('Seasonal-Trend', 'Prophet')
+
+_FORECAST_STRAGGLERS = 0
+_FORECAST_STRAGGLERS_LOCK = threading.Lock()
+
+def _forecast_straggler(fut):
+    """Count ``fut`` as overrunning until it finishes."""
+    global _FORECAST_STRAGGLERS
+    def done(_):
+        global _FORECAST_STRAGGLERS
+        with _FORECAST_STRAGGLERS_LOCK: _FORECAST_STRAGGLERS -= 1
+    with _FORECAST_STRAGGLERS_LOCK: _FORECAST_STRAGGLERS += 1
+    fut.add_done_callback(done)
+
+def forecast_stragglers():
+    """Fits still running past their request's deadline."""
+    with _FORECAST_STRAGGLERS_LOCK: return _FORECAST_STRAGGLERS
+
+def run_ensemble_models(monthly, has_date, budget_s=None, state_key=None):
+    """
+    Fit the ensemble members on ``monthly`` ([ds, y]) within ``budget_s`` seconds
+    (default FORECAST_BUDGET_S). Returns ({model: result}, {model: why skipped});
+    a model that ran but had too little data is in neither, as before. With a
+    ``state_key`` (Udyam number) the stateful models update incrementally.
+    """
+    from concurrent.futures import TimeoutError as _FutTimeout
+    budget = FORECAST_BUDGET_S if budget_s is None else budget_s
+    fits = {'Statistical Baseline': _run_baseline_model, 'Linear Regression': _run_linear_regression_model,
+            'Holt-Winters': _run_holtwinters_model, 'Seasonal-Trend': _run_seasonal_trend_model,
+            'Prophet': _run_prophet_model}
+    if state_key and INCREMENTAL_FORECAST and has_date:
+        fits['Linear Regression'] = lambda mo: incremental_forecast(state_key, 'Linear Regression', mo)
+        if not (HW_ENGINE == 'statsmodels' and _HW_STATSMODELS_AVAILABLE):
+            fits['Holt-Winters'] = lambda mo: incremental_forecast(state_key, 'Holt-Winters', mo)
+    names = [m for m in _ENSEMBLE_ORDER if m not in _NEEDS_DATES or has_date]
+    # Seasonal-Trend only stands in for Prophet: with Prophet installed it is fitted
+    # once Prophet has failed or overrun, and only if the budget still allows
+    fallback = [m for m in names if m == 'Seasonal-Trend' and PROPHET_AVAILABLE]
+    names = [m for m in names if m not in fallback]
+    results, skipped = {}, {}
+    t0 = time.perf_counter()
+
+    def run(names):
+        if FORECAST_WORKERS > 0 and forecast_stragglers() < FORECAST_MAX_STRAGGLERS:
+            from concurrent.futures import ThreadPoolExecutor
+            pool = ThreadPoolExecutor(min(FORECAST_WORKERS, len(names)), thread_name_prefix='forecast')
+            futures = [(m, pool.submit(fits[m], monthly)) for m in names]
+            for m, fut in futures:
+                limit = min(FORECAST_TIMEOUTS_S[m], budget)
+                try:
+                    res = fut.result(timeout=max(0.0, limit - (time.perf_counter() - t0)))
+                except _FutTimeout:
+                    if fut.cancel():
+                        skipped[m] = f"not started within the {budget:g}s budget"
+                    else:
+                        skipped[m] = f"timed out after {limit:g}s"; _forecast_straggler(fut)
+                    continue
+                except Exception as e:
+                    skipped[m] = f"failed: {e}"; continue
+                if res: results[m] = res
+            pool.shutdown(wait=False)         # the threads exit once their stragglers finish
+        else:
+            for m in names:
+                if time.perf_counter() - t0 >= budget:
+                    skipped[m] = f"not started within the {budget:g}s budget"; continue
+                try: res = fits[m](monthly)
+                except Exception as e:
+                    skipped[m] = f"failed: {e}"; continue
+                if res: results[m] = res
+
+    run(names)
+    if fallback and 'Prophet' not in results:
+        if time.perf_counter() - t0 >= budget:
+            skipped.update((m, f"not started within the {budget:g}s budget") for m in fallback)
+        else:
+            run(fallback)
+    for m, why in skipped.items():
+        print(f"[INFO] Forecast model '{m}' {why}; ensemble continues without it")
+    return results, skipped
+
+def forecast_sales(df, schema=None, ctx=None, budget_s=None, state_key=None):
+    """
+    Runs the available forecasting models within a latency budget (run_ensemble_models)
+    and produces a weighted ensemble result.
+    Weights: Prophet=40%, Holt-Winters=30%, Linear Regression=20%, Baseline=10%;
+    the Seasonal-Trend model takes Prophet's 40% whenever Prophet has no result.
+    If a model is unavailable, fails or runs out of time, its weight is redistributed
+    proportionally; skipped models appear in model_results as {'skipped': reason}.
+    With an AnalysisContext the monthly series comes from ``ctx.monthly_sales``;
+    ``state_key`` (the Udyam number) enables incremental updates of saved model state.
+    """
+    schema = schema or DataSchema.of(df)
+    sales_col = schema.sales
+    if not sales_col:
+        total = df.select_dtypes(include=[np.number]).sum().sum()
+        avg = total / max(len(df), 1)
+        f6 = avg*6*1.05; f12 = avg*12*1.05
+        return {'6_month':{'forecast':f6,'lower':f6*0.85,'upper':f6*1.15},
+                '12_month':{'forecast':f12,'lower':f12*0.85,'upper':f12*1.15},
+                'model_results': {}, 'selected_model': 'Statistical Baseline',
+                'ensemble': False}
+
+    # Build monthly time series
+    date_col = schema.date
+    has_date = date_col is not None
+    monthly  = None
+    if has_date and ctx is not None:
+        monthly = ctx.monthly_sales
+    elif has_date:
+        dates = df[date_col]
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            dates = pd.to_datetime(dates, errors='coerce')
+        monthly = _monthly_series(df[sales_col], dates)
+
+    if monthly is None:
+        avg = float(df[sales_col].mean())
+        synthetic_ds = pd.date_range(end=pd.Timestamp.now(), periods=12, freq='MS')
+        monthly = pd.DataFrame({'ds': synthetic_ds, 'y': np.array([avg]*12)})
+
+    # ── Run the 4 models, cheapest first, inside the latency budget ─────────
+    model_results, skipped = run_ensemble_models(monthly, has_date, budget_s, state_key)
+
+    # ── Weighted Ensemble ────────────────────────────────────────────────────
+    # Base weights — higher = more reliable model
+    BASE_WEIGHTS = {
+        'Prophet':              0.40,
+        'Holt-Winters':         0.30,
+        'Linear Regression':    0.20,
+        'Statistical Baseline': 0.10,
+        'Seasonal-Trend':       0.40,   # takes Prophet's share when Prophet is missing or late
+    }
+
+    available = {k: v for k, v in BASE_WEIGHTS.items() if k in model_results}
+    if 'Prophet' in available: available.pop('Seasonal-Trend', None)
+    for m, why in skipped.items():
+        model_results[m] = {'skipped': why, 'model_name': m}
+
+    if len(available) == 0:
+        # Absolute fallback
+        avg = float(df[sales_col].mean())
+        f6 = avg*6*1.05; f12 = avg*12*1.05
+        return {'6_month':{'forecast':f6,'lower':f6*0.85,'upper':f6*1.15},
+                '12_month':{'forecast':f12,'lower':f12*0.85,'upper':f12*1.15},
+                'model_results': model_results, 'selected_model': 'Statistical Baseline', 'ensemble': False,
+                'skipped_models': skipped}
+
+    # Normalise weights so they sum to 1.0
+    total_w = sum(available.values())
+    norm_w  = {k: v/total_w for k, v in available.items()}
+
+    def _weighted(key):
+        """Compute weighted sum for a given forecast key (e.g. '6_month'/'forecast')"""
+        f_val = sum(model_results[m][key]['forecast'] * norm_w[m] for m in available)
+        l_val = sum(model_results[m][key]['lower']    * norm_w[m] for m in available)
+        u_val = sum(model_results[m][key]['upper']    * norm_w[m] for m in available)
+        return {'forecast': f_val, 'lower': l_val, 'upper': u_val}
+
+    ensemble_6m  = _weighted('6_month')
+    ensemble_12m = _weighted('12_month')
+
+    # Label: list all models used in ensemble
+    used_models   = list(available.keys())
+    weight_labels = " + ".join(f"{k.split()[0]} {norm_w[k]*100:.0f}%" for k in used_models)
+    ensemble_name = f"Ensemble ({weight_labels})"
+
+    return {
+        '6_month':        ensemble_6m,
+        '12_month':       ensemble_12m,
+        'model_results':  model_results,
+        'selected_model': ensemble_name,
+        'ensemble':       True,
+        'ensemble_weights': norm_w,
+        'models_used':    used_models,
+        'skipped_models': skipped,
+        'forecast_dfs':   {},
+        'per_store_forecasts': {}
+    }
+# ══════════════════════════════════════════════════════════════════════════════
+# Batched trend + seasonality engine — every granular series in one solve
+# ══════════════════════════════════════════════════════════════════════════════
+# Each series is scaled by its own mean and fitted by ridge-regularised weighted
+# least squares on [1, t, sin/cos(2πkt/12)]. The design matrix is shared, so the
+# normal equations of all series are built with one einsum and solved in one
+# batched np.linalg.solve. Yearly harmonics are only freed for series with two
+# full years of history in the fit window; shorter series get trend only.
+# 'prophet' restores one Prophet fit per series (needs the prophet package).
+# With GRANULAR_RECONCILE='bottom_up' (batch engine) only the bottom cells —
+# store × category × top SKU — are fitted and the overall, store, category and
+# product forecasts are their sums, so the Step 7 views add up (products come
+# from the global SKU model unless GRANULAR_SKU_MODEL='series'); 'none' fits
+# every displayed series on its own.
+GRANULAR_ENGINE     = os.environ.get("DATANETRA_GRANULAR_ENGINE", "batch")
+GRANULAR_RECONCILE  = os.environ.get("DATANETRA_GRANULAR_RECONCILE", "bottom_up")
+GRANULAR_FIT_MONTHS = int(os.environ.get("DATANETRA_GRANULAR_FIT_MONTHS", 36))
+_TS_HARMONICS = 2
+_TS_RIDGE     = 0.1      # on the scaled series; pins seasonality (×1e6) for short series
+
+def _trend_season_design(t, harmonics=_TS_HARMONICS):
+    cols = [np.ones_like(t), t / 12.0]
+    for k in range(1, harmonics + 1):
+        cols += [np.sin(2 * np.pi * k * t / 12), np.cos(2 * np.pi * k * t / 12)]
+    return np.stack(cols, axis=1)
+
+def fit_trend_seasonal(Y, mask=None, horizon=12, return_fitted=False, bands=True):
+    """
+    Fit every row of ``Y`` (n_series × n_months, one shared month grid) at once.
+    ``mask`` marks the months each series is observed in (default: all).
+    Returns (forecast, lower, upper) — each n_series × horizon, clipped at 0 —
+    with bootstrap_intervals bands from each series' in-sample residuals; with
+    ``return_fitted`` the in-sample fit (n_series × n_months) is appended.
+    ``bands=False`` skips the bootstrap (lower and upper are None).
+    """
+    Y = np.asarray(Y, dtype=np.float64)
+    n, m = Y.shape
+    W = np.ones_like(Y) if mask is None else np.asarray(mask, dtype=np.float64)
+    cnt = W.sum(axis=1)
+    scale = np.where(cnt > 0, (W * np.abs(Y)).sum(axis=1) / np.maximum(cnt, 1), 0.0)
+    scale[scale == 0] = 1.0
+    Ys = Y / scale[:, None]
+    X = _trend_season_design(np.arange(m, dtype=np.float64))
+    Xf = _trend_season_design(np.arange(m, m + horizon, dtype=np.float64))
+    p = X.shape[1]
+    pen = np.full((n, p), _TS_RIDGE); pen[:, 0] = 1e-9
+    pen[cnt < 24, 2:] = 1e6
+    pen[cnt < 3, 1] = 1e6                  # too short for a trend: level only
+    A = np.einsum('nm,mp,mq->npq', W, X, X) + pen[:, :, None] * np.eye(p)
+    b = np.einsum('nm,mp,nm->np', W, X, Ys)
+    B = np.linalg.solve(A, b[:, :, None])[:, :, 0]
+    resid = np.where(W > 0, (Ys - B @ X.T) * scale[:, None], np.nan)
+    fc = (B @ Xf.T) * scale[:, None]
+    fc[cnt == 0] = 0.0
+    fc = np.clip(fc, 0, None)
+    lo, hi, _ = bootstrap_intervals(fc, resid, windows=()) if bands else (None, None, None)
+    out = (fc, lo, hi)
+    return out + ((B @ X.T) * scale[:, None],) if return_fitted else out
+
+def _granular_batch(df, sales_col, groups, horizon=12, reconcile=None):
+    """
+    Monthly matrices for every requested series and one batched fit.
+    ``groups`` is a list of (series labels, per-row series code, -1 = none) for one
+    level each. Returns, per level, a list of (label, {'hist','fc','last'}, total).
+    ``reconcile='bottom_up'`` fits the bottom cells instead and sums them up.
+    """
+    mi, grid = _month_index(df['Date'])
+    M = len(grid)
+    y = df[sales_col].to_numpy(dtype=np.float64)
+    mats, firsts = [], []
+    for labels, codes in groups:
+        k = len(labels); ok = codes >= 0
+        Yk = np.bincount(codes[ok] * M + mi[ok], weights=y[ok], minlength=k * M).reshape(k, M)
+        seen = np.zeros((k, M), dtype=bool); seen[codes[ok], mi[ok]] = True
+        mats.append(Yk); firsts.append(np.where(seen.any(axis=1), seen.argmax(axis=1), M))
+    Y = np.vstack(mats); first = np.concatenate(firsts)
+    w0 = max(0, M - GRANULAR_FIT_MONTHS)
+    if reconcile == 'bottom_up':
+        fc, lo, hi = _bottom_up_fit(groups, mi, y, M, w0, horizon)
+    else:
+        mask = np.arange(w0, M)[None, :] >= first[:, None]
+        fc, lo, hi = fit_trend_seasonal(Y[:, w0:], mask, horizon)
+    future = pd.date_range(grid[-1] + pd.offsets.MonthBegin(1), periods=horizon, freq='MS')
+    out, r = [], 0
+    for labels, _ in groups:
+        level = []
+        for label in labels:
+            f = int(first[r])
+            if f >= M:
+                level.append((label, None, 0.0))
+            else:
+                hist = pd.DataFrame({'ds': grid[f:], 'y': Y[r, f:]})
+                fcd = pd.DataFrame({'ds': future, 'yhat': fc[r], 'yhat_lower': lo[r], 'yhat_upper': hi[r]})
+                level.append((label, {'hist': hist, 'fc': fcd, 'last': grid[-1]}, float(Y[r].sum())))
+            r += 1
+        out.append(level)
+    return out
+
+def _bottom_up_fit(groups, mi, y, M, w0, horizon):
+    """
+    Bottom-up forecasts for every series of ``groups`` (same layout as
+    _granular_batch). The bottom cells are the distinct combinations of the
+    per-row level codes, so each requested series is an exact sum of cells. Only
+    the cells are fitted; each series' forecast is the sum of its cells'
+    forecasts and its band is bootstrapped from the summed in-sample residuals,
+    which keeps the cells' cross-correlation. Returns (forecast, lower, upper) with one
+    row per series in ``groups`` order.
+    """
+    C = np.stack([codes for _, codes in groups], axis=1) + 1          # rows × levels, 0 = none
+    radix = np.array([len(labels) + 1 for labels, _ in groups], dtype=np.int64)
+    key = C @ np.concatenate([[1], np.cumprod(radix[:-1])])
+    cells, cell_of_row = np.unique(key, return_inverse=True)
+    nb = len(cells)
+    Yb = np.bincount(cell_of_row * M + mi, weights=y, minlength=nb * M).reshape(nb, M)
+    seen = np.zeros((nb, M), dtype=bool); seen[cell_of_row, mi] = True
+    first = np.where(seen.any(axis=1), seen.argmax(axis=1), M)
+    mask = np.arange(w0, M)[None, :] >= first[:, None]
+    fc_b, _, _, fit_b = fit_trend_seasonal(Yb[:, w0:], mask, horizon, return_fitted=True)
+    resid_b = np.where(mask, Yb[:, w0:] - fit_b, 0.0)
+    # Summing matrix: series × cells, one block of rows per level
+    cell_codes = (cells[:, None] // np.concatenate([[1], np.cumprod(radix[:-1])])) % radix - 1
+    S = np.vstack([(cell_codes[:, i][None, :] == np.arange(len(labels))[:, None]).astype(np.float64)
+                   for i, (labels, _) in enumerate(groups)])
+    fc = S @ fc_b
+    resid = np.where((S @ mask) > 0, S @ resid_b, np.nan)
+    lo, hi, _ = bootstrap_intervals(fc, resid, windows=())
+    return fc, lo, hi
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Global SKU demand model — one gradient-boosted model for the whole catalogue
+# ══════════════════════════════════════════════════════════════════════════════
+# Instead of one fit per SKU, a single HistGradientBoostingRegressor learns
+# "sales h months after an origin month" from every (SKU, origin, h) of the
+# upload. Features are lags and rolling means ending at the origin, the same
+# month a year before the target, the target's calendar month, h, months of
+# history and the category. Everything is divided by the SKU's trailing
+# 12-month mean, so SKUs of any size share one model. Every SKU is then
+# forecast in a single batched predict (n_sku × horizon rows). The band is the
+# per-horizon 5–95% spread of residuals on a held-out tenth of the rows. Rows
+# are capped at GLOBAL_SKU_MAX_ROWS (random sample, fixed seed). Results go
+# through MODEL_CACHE.
+# GRANULAR_SKU_MODEL='series' fits the top SKUs as ordinary granular series.
+GRANULAR_SKU_MODEL  = os.environ.get("DATANETRA_GRANULAR_SKU_MODEL", "global")
+GLOBAL_SKU_MAX_ROWS = int(os.environ.get("DATANETRA_GLOBAL_SKU_MAX_ROWS", 100_000))
+_GLOBAL_SKU_MIN_MONTHS = 6
+_GLOBAL_LAGS = (0, 1, 2, 5)
+_GLOBAL_WINDOWS = (3, 6)
+
+def _month_index(dates):
+    """Per-row month number from the first month, and the month-start grid."""
+    mi = (dates.dt.year.to_numpy() * 12 + dates.dt.month.to_numpy() - 1).astype(np.int64)
+    m0 = int(mi.min()); M = int(mi.max()) - m0 + 1
+    grid = pd.date_range(pd.Timestamp(year=m0 // 12, month=m0 % 12 + 1, day=1), periods=M, freq='MS')
+    return mi - m0, grid
+
+def _global_roll(csum, ccnt, rows, origins, w):
+    """Mean of the last ``w`` observed months up to each origin (NaN with none)."""
+    lo = np.maximum(origins + 1 - w, 0)
+    c = ccnt[rows, origins + 1] - ccnt[rows, lo]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (csum[rows, origins + 1] - csum[rows, lo]) / c
+
+def _global_scale(csum, ccnt, rows, origins):
+    scale = _global_roll(csum, ccnt, rows, origins, 12)
+    return np.where(np.isfinite(scale) & (scale > 0), scale, np.nan)
+
+def _global_features(Yn, csum, ccnt, rows, origins, h, month0, cat, first):
+    """Feature matrix and scale for forecasting Yn[rows, origins + h] from the months up to each origin."""
+    roll = lambda w: _global_roll(csum, ccnt, rows, origins, w)
+    scale = _global_scale(csum, ccnt, rows, origins)
+    cols = []
+    for lag in _GLOBAL_LAGS:
+        o = origins - lag
+        cols.append(np.where(o >= 0, Yn[rows, np.maximum(o, 0)], np.nan) / scale)
+    cols += [roll(w) / scale for w in _GLOBAL_WINDOWS]
+    seas = origins + h - 12
+    cols.append(np.where(seas >= 0, Yn[rows, np.maximum(seas, 0)], np.nan) / scale)
+    cols += [np.full(rows.shape, h, dtype=np.float64), ((month0 + origins + h) % 12).astype(np.float64),
+             (origins - first[rows]).astype(np.float64), np.where(cat[rows] >= 0, cat[rows], np.nan)]
+    return np.column_stack(cols), scale
+
+def _global_sku_fit(Y, first, cat, month0, horizon):
+    from sklearn.ensemble import HistGradientBoostingRegressor
+    n, M = Y.shape
+    Yn = np.where(np.arange(M)[None, :] >= first[:, None], Y, np.nan)
+    z = np.zeros((n, 1))
+    csum = np.concatenate([z, np.nancumsum(Yn, axis=1)], axis=1)
+    ccnt = np.concatenate([z, np.cumsum(~np.isnan(Yn), axis=1)], axis=1)
+    # Training triples are every (r, o) with a finite scale, crossed with each h that
+    # stays inside the grid, numbered h-major. Sample the numbers first and build
+    # features only for the sampled rows.
+    r, o = np.divmod(np.arange(n * M), M)
+    ok = o >= first[r]
+    r, o = r[ok], o[ok]
+    ok = np.isfinite(_global_scale(csum, ccnt, r, o))
+    r, o = r[ok], o[ok]
+    valid = [np.flatnonzero(o + h < M) for h in range(1, horizon + 1)]
+    start = np.cumsum([0] + [v.size for v in valid])
+    total = int(start[-1])
+    if total < 50: return None
+    rng = np.random.default_rng(0)
+    idx = (rng.permutation(total) if total <= GLOBAL_SKU_MAX_ROWS
+           else rng.choice(total, GLOBAL_SKU_MAX_ROWS, replace=False))
+    hh = np.searchsorted(start, idx, side='right')
+    X, y = np.empty((idx.size, len(_GLOBAL_LAGS) + len(_GLOBAL_WINDOWS) + 5)), np.empty(idx.size)
+    for h in range(1, horizon + 1):
+        at = np.flatnonzero(hh == h)
+        if not at.size: continue
+        pos = valid[h - 1][idx[at] - start[h - 1]]
+        X[at], scale = _global_features(Yn, csum, ccnt, r[pos], o[pos], h, month0, cat, first)
+        y[at] = Yn[r[pos], o[pos] + h] / scale
+    pick = np.arange(idx.size)
+    held = pick[:max(len(pick) // 10, 1)]; pick = pick[len(held):]
+    n_cat = int(cat.max()) + 1 if cat.size and cat.max() >= 0 else 0
+    cat_mask = np.zeros(X.shape[1], dtype=bool); cat_mask[-1] = 0 < n_cat <= 255
+    model = HistGradientBoostingRegressor(max_iter=150, learning_rate=0.1, max_leaf_nodes=31,
+                                          min_samples_leaf=20, categorical_features=cat_mask, random_state=0)
+    model.fit(X[pick], y[pick])
+    # Band from the held-out tenth of the rows, per horizon
+    resid = y[held] - model.predict(X[held]); hh = hh[held]
+    q = np.array([np.percentile(resid[hh == h], [5, 95]) if (hh == h).any() else [0.0, 0.0]
+                  for h in range(1, horizon + 1)])
+    # One batched predict: every SKU × every horizon from the last month
+    rows = np.flatnonzero(first < M)
+    feats = [_global_features(Yn, csum, ccnt, rows, np.full(rows.size, M - 1), h, month0, cat, first)
+             for h in range(1, horizon + 1)]
+    pred = model.predict(np.vstack([f[0] for f in feats])).reshape(horizon, rows.size).T
+    scale = np.nan_to_num(feats[0][1])[:, None]     # the origin, hence the scale, is shared by all h
+    fc, lo, hi = (np.zeros((n, horizon)) for _ in range(3))
+    fc[rows] = np.clip(pred * scale, 0, None)
+    lo[rows] = np.clip((pred + q[:, 0]) * scale, 0, None)
+    hi[rows] = np.clip((pred + q[:, 1]) * scale, 0, None)
+    return fc, lo, hi
+
+def forecast_all_skus(df, value_col, sku_col, cat_col=None, horizon=12):
+    """
+    Global-model forecasts for every SKU of ``df`` (needs a datetime 'Date' column).
+    Returns {'labels', 'grid', 'future', 'hist', 'fc', 'lower', 'upper', 'first'}
+    — hist is n_sku × months, the rest n_sku × horizon — or None when there is
+    too little history.
+    """
+    d = df['Date']
+    ok = d.notna().to_numpy() & df[sku_col].notna().to_numpy()
+    if not ok.any(): return None
+    mi, grid = _month_index(d[ok])
+    M = len(grid)
+    if M < _GLOBAL_SKU_MIN_MONTHS: return None
+    sku = pd.Categorical(df[sku_col][ok])
+    labels = list(sku.categories); codes = sku.codes.astype(np.int64); n = len(labels)
+    y = pd.to_numeric(df[value_col][ok], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+    Y = np.bincount(codes * M + mi, weights=y, minlength=n * M).reshape(n, M)
+    seen = np.zeros((n, M), dtype=bool); seen[codes, mi] = True
+    first = np.where(seen.any(axis=1), seen.argmax(axis=1), M)
+    if cat_col:
+        # Each SKU's most frequent category
+        cc = pd.Categorical(df[cat_col][ok]).codes.astype(np.int64)
+        tab = pd.crosstab(codes, cc)
+        cat = np.full(n, -1, dtype=np.int64)
+        cat[tab.index.to_numpy()] = tab.columns.to_numpy()[tab.to_numpy().argmax(axis=1)]
+    else:
+        cat = np.full(n, -1, dtype=np.int64)
+    month0 = int(grid[0].month - 1)
+    key = series_fingerprint('global-sku', grid, Y.ravel(), horizon, shape=Y.shape,
+                             cat=hashlib.sha256(cat.tobytes()).hexdigest(), max_rows=GLOBAL_SKU_MAX_ROWS,
+                             lags=_GLOBAL_LAGS, windows=_GLOBAL_WINDOWS)
+    hit, _ = MODEL_CACHE.get(key)
+    if hit is not None:
+        fit = hit['result']
+    else:
+        fit = _global_sku_fit(Y, first, cat, month0, horizon)
+        if fit is not None: MODEL_CACHE.put(key, {'result': fit}, {'result': fit})
+    if fit is None: return None
+    fc, lo, hi = fit
+    future = pd.date_range(grid[-1] + pd.offsets.MonthBegin(1), periods=horizon, freq='MS')
+    return {'labels': labels, 'grid': grid, 'future': future,
+            'hist': Y, 'fc': fc, 'lower': lo, 'upper': hi, 'first': first}
+
+@_model_cached('granular-prophet')
+def _granular_prophet(monthly, periods=12):
+    train = monthly.tail(12).copy(); last = monthly['ds'].max()
+    m = Prophet(yearly_seasonality=False,weekly_seasonality=True,daily_seasonality=False,changepoint_prior_scale=0.001,uncertainty_samples=0)
+    m.fit(train); future = m.make_future_dataframe(periods=periods,freq='MS'); fc = m.predict(future)
+    resid = train['y'].to_numpy(float) - fc['yhat'].to_numpy()[:len(train)]
+    fc2 = fc[fc['ds']>=last][['ds','yhat']].copy(); fc2['yhat'] = fc2['yhat'].clip(lower=0)
+    lo, hi, _ = bootstrap_intervals(fc2['yhat'].to_numpy()[None], resid[None], windows=())
+    fc2['yhat_lower'], fc2['yhat_upper'] = lo[0], hi[0]
+    return {'hist':monthly,'fc':fc2,'last':last}
+
+def generate_granular_forecast(df, schema=None):
+    import warnings; warnings.filterwarnings("ignore")
+    schema = schema or DataSchema.of(df)
+    sales_col = schema.sales or 'Gross_Sales'
+    sku_col, cat_col, store_col = schema.sku, schema.category, schema.store
+    try: inventory = plan_inventory(df, schema)
+    except Exception as e: inventory = None; print(f"[INFO] Inventory plan unavailable ({e})")
+    # Only the columns forecast here are copied, not the whole upload
+    df = df[list(dict.fromkeys(c for c in (schema.date, sales_col, store_col, cat_col, sku_col) if c and c in df.columns))].copy()
+    df[sales_col] = pd.to_numeric(df[sales_col], errors='coerce').fillna(0)
+    has_dates = schema.date is not None
+    if has_dates:
+        if schema.date != 'Date': df = df.rename(columns={schema.date: 'Date'})
+        if not pd.api.types.is_datetime64_any_dtype(df['Date']): df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+        df = df.dropna(subset=['Date'])
+    def _run_prophet(sdf):
+        if not PROPHET_AVAILABLE or not has_dates: return None
+        try:
+            monthly = (sdf.set_index('Date')[sales_col].resample('MS').sum().reset_index()); monthly.columns=['ds','y']
+            monthly = monthly.sort_values('ds').reset_index(drop=True)
+            if len(monthly) < 2: return None
+            return _granular_prophet(monthly)
+        except: return None
+    def _fallback(total, label):
+        avg = total/12 if total > 0 else 0; g = 0.05
+        return {'label':label,'total_hist':total,'6m_forecast':avg*6*(1+g),'6m_lower':avg*6*(1+g)*0.85,'6m_upper':avg*6*(1+g)*1.15,'12m_forecast':avg*12*(1+g),'12m_lower':avg*12*(1+g)*0.85,'12m_upper':avg*12*(1+g)*1.15,'hist':None,'fc':None}
+    def _pack(label, res, total):
+        if res is None: return _fallback(total, label)
+        hist,fc = res['hist'],res['fc']; f6=fc.head(6); f12=fc.head(12)
+        return {'label':label,'total_hist':total,'6m_forecast':f6['yhat'].sum(),'6m_lower':f6['yhat_lower'].sum(),'6m_upper':f6['yhat_upper'].sum(),'12m_forecast':f12['yhat'].sum(),'12m_lower':f12['yhat_lower'].sum(),'12m_upper':f12['yhat_upper'].sum(),'hist':hist,'fc':fc}
+    overall_total = df[sales_col].sum()
+    sku_fc = None
+    if has_dates and len(df) and sku_col and GRANULAR_SKU_MODEL == 'global':
+        try: sku_fc = forecast_all_skus(df, sales_col, sku_col, cat_col)
+        except Exception as e: print(f"[INFO] Global SKU model unavailable ({e}); forecasting top SKUs as series")
+    def _global_products(top):
+        pos = {v: i for i, v in enumerate(sku_fc['labels'])}
+        out = []
+        for sk in top:
+            i = pos[sk]; f = int(sku_fc['first'][i])
+            res = {'hist': pd.DataFrame({'ds': sku_fc['grid'][f:], 'y': sku_fc['hist'][i, f:]}),
+                   'fc': pd.DataFrame({'ds': sku_fc['future'], 'yhat': sku_fc['fc'][i],
+                                       'yhat_lower': sku_fc['lower'][i], 'yhat_upper': sku_fc['upper'][i]}),
+                   'last': sku_fc['grid'][-1]}
+            out.append(_pack(str(sk), res, float(sku_fc['hist'][i].sum())))
+        return out
+    if has_dates and len(df) and not (GRANULAR_ENGINE == 'prophet' and PROPHET_AVAILABLE):
+        groups = [(['Overall Company'], np.zeros(len(df), dtype=np.int64))]
+        if store_col:
+            sids = sorted(df[store_col].unique())
+            groups.append(([str(v) for v in sids], pd.Categorical(df[store_col], categories=sids).codes.astype(np.int64)))
+        if cat_col:
+            cats = sorted(df[cat_col].dropna().unique())
+            groups.append(([str(v) for v in cats], pd.Categorical(df[cat_col], categories=cats).codes.astype(np.int64)))
+        if sku_col:
+            top = df.groupby(sku_col, observed=True)[sales_col].sum().sort_values(ascending=False).head(5).index.tolist()
+            if sku_fc is None:
+                groups.append(([str(v) for v in top], pd.Categorical(df[sku_col], categories=top).codes.astype(np.int64)))
+        levels = [[_pack(l, res, t) for l, res, t in lv] for lv in _granular_batch(df, sales_col, groups, reconcile=GRANULAR_RECONCILE)]
+        lv = iter(levels[1:])
+        overall = levels[0][0]
+        stores = next(lv) if store_col else []
+        categories = next(lv) if cat_col else []
+        products = (_global_products(top) if sku_fc else next(lv)) if sku_col else []
+        return {'overall':overall,'stores':stores,'categories':categories,'products':products,'inventory':inventory,'sales_col':sales_col,'raw_df':df,'sku_col':sku_col,'cat_col':cat_col}
+    overall = _pack('Overall Company', _run_prophet(df[['Date',sales_col]] if has_dates else df), overall_total)
+    stores = []
+    if store_col:
+        for sid in sorted(df[store_col].unique()):
+            sdf = df[df[store_col]==sid]; stores.append(_pack(str(sid), _run_prophet(sdf[['Date',sales_col]] if has_dates else sdf), sdf[sales_col].sum()))
+    categories = []
+    if cat_col:
+        for cat in sorted(df[cat_col].dropna().unique()):
+            cdf = df[df[cat_col]==cat]; categories.append(_pack(str(cat), _run_prophet(cdf[['Date',sales_col]] if has_dates else cdf), cdf[sales_col].sum()))
+    products = []
+    if sku_col:
+        top_skus = df.groupby(sku_col, observed=True)[sales_col].sum().sort_values(ascending=False).head(5).index.tolist()
+        if sku_fc:
+            products = _global_products(top_skus)
+        else:
+            for sk in top_skus:
+                skdf = df[df[sku_col]==sk]; products.append(_pack(str(sk), _run_prophet(skdf[['Date',sales_col]] if has_dates else skdf), skdf[sales_col].sum()))
+    return {'overall':overall,'stores':stores,'categories':categories,'products':products,'inventory':inventory,'sales_col':sales_col,'raw_df':df,'sku_col':sku_col,'cat_col':cat_col}
+
+def build_granular_charts(gf):
+    plt.style.use('seaborn-v0_8-darkgrid')
+    COLORS = ['#003366','#1f77b4','#e07b2a','#2ca02c','#d62728','#9467bd','#8c564b','#e377c2']
+    def _fmt(v):
+        if v>=1e7: return f"Rs.{v/1e7:.1f}Cr"
+        if v>=1e5: return f"Rs.{v/1e5:.1f}L"
+        return f"Rs.{v:,.0f}"
+    fig1,ax1 = plt.subplots(figsize=(13,8)); fig1.subplots_adjust(top=0.91,bottom=0.15,left=0.10,right=0.97)
+    ov = gf['overall']
+    if ov['hist'] is not None:
+        ax1.plot(ov['hist']['ds'],ov['hist']['y'],color='#1f77b4',lw=2.5,label='Historical')
+        ax1.plot(ov['fc']['ds'],ov['fc']['yhat'],color='#003366',lw=2,ls='--',label='12-Month Forecast')
+    else:
+        ax1.bar(['6-Month','12-Month'],[ov['6m_forecast'],ov['12m_forecast']],color=['#1f77b4','#003366'],alpha=0.85)
+    ax1.set_title('Overall Company - Sales Forecast',fontsize=14,fontweight='bold',pad=14); ax1.set_ylabel('Sales (INR)',fontsize=11); ax1.legend(fontsize=10); ax1.grid(True,alpha=0.3); plt.setp(ax1.get_xticklabels(),rotation=30,ha='right')
+    fig2,axes2 = plt.subplots(1,2,figsize=(13,8)); fig2.subplots_adjust(top=0.91,bottom=0.22,wspace=0.40,left=0.08,right=0.97)
+    if gf['categories']:
+        labels=[s['label'] for s in gf['categories']]; v6=[s['6m_forecast'] for s in gf['categories']]; v12=[s['12m_forecast'] for s in gf['categories']]
+        x=np.arange(len(labels)); w=0.38
+        axes2[0].bar(x-w/2,v6,w,color=COLORS[:len(x)],alpha=0.85,label='6M'); axes2[0].bar(x+w/2,v12,w,color=COLORS[:len(x)],alpha=0.55,label='12M')
+        axes2[0].set_xticks(x); axes2[0].set_xticklabels(labels,rotation=30,ha='right')
+        axes2[0].set_title('Category Level - 6M vs 12M',fontsize=13,fontweight='bold',pad=14); axes2[0].legend(); axes2[0].grid(axis='y',alpha=0.3)
+        axes2[1].pie(v12,labels=labels,colors=COLORS[:len(v12)],autopct='%1.1f%%',startangle=90,textprops={'fontsize':9}); axes2[1].set_title('12-Month Forecast Share',fontsize=13,fontweight='bold',pad=14)
+    else:
+        axes2[0].text(0.5,0.5,'No category data',ha='center',va='center',transform=axes2[0].transAxes)
+        axes2[1].text(0.5,0.5,'No category data',ha='center',va='center',transform=axes2[1].transAxes)
+    fig3,ax3 = plt.subplots(figsize=(13,8)); fig3.subplots_adjust(top=0.91,bottom=0.25,left=0.10,right=0.97)
+    if gf['categories']:
+        cats=gf['categories']; lbs=[c['label'] for c in cats]; v6=[c['6m_forecast'] for c in cats]; v12=[c['12m_forecast'] for c in cats]
+        x=np.arange(len(lbs)); w=0.38
+        ax3.bar(x-w/2,v6,w,color='#1f77b4',alpha=0.85,label='6-Month'); ax3.bar(x+w/2,v12,w,color='#003366',alpha=0.85,label='12-Month')
+        ax3.set_xticks(x); ax3.set_xticklabels(lbs,rotation=30,ha='right')
+        ax3.set_title('Category-Level Forecast',fontsize=13,fontweight='bold',pad=14); ax3.legend(); ax3.grid(axis='y',alpha=0.3)
+    else:
+        ax3.text(0.5,0.5,'No category data',ha='center',va='center',transform=ax3.transAxes)
+    fig45,axes45 = plt.subplots(1,2,figsize=(26,7)); fig45.subplots_adjust(top=0.88,bottom=0.10,left=0.18,right=0.97,wspace=0.55)
+    products = gf.get('products',[])
+    for ax_idx,(pk,pl) in enumerate([('6m_forecast','6-Month'),('12m_forecast','12-Month')]):
+        ax=axes45[ax_idx]
+        if products:
+            sk=sorted(products,key=lambda s:s[pk],reverse=False); lbs2=[s['label'] for s in sk]; vals=[s[pk] for s in sk]
+            cols=plt.cm.RdYlGn(np.linspace(0.25,0.85,len(sk))); bars_h=ax.barh(lbs2,vals,color=cols,height=0.55,edgecolor='white',linewidth=0.5)
+            ax.set_xlabel('Forecasted Sales (INR)',fontsize=11,fontweight='bold'); ax.set_title(f'Top 5 Products - {pl} Forecast',fontsize=13,fontweight='bold',pad=12); ax.grid(axis='x',alpha=0.25)
+            max_val=max(vals) if vals else 1
+            for bar in bars_h:
+                w2=bar.get_width(); ax.text(w2+max_val*0.01,bar.get_y()+bar.get_height()/2,_fmt(w2),va='center',ha='left',fontsize=9,fontweight='bold')
+            ax.set_xlim(0,max_val*1.22)
+        else:
+            ax.text(0.5,0.5,'No product data',ha='center',va='center',transform=ax.transAxes)
+    fig4=fig45; fig5=None
+    fig6,ax6 = plt.subplots(figsize=(13,8)); fig6.subplots_adjust(top=0.91,bottom=0.18,left=0.10,right=0.97)
+    plotted=False
+    for i,s in enumerate(gf['categories'] if gf['categories'] else gf['stores']):
+        if s['hist'] is not None and s['fc'] is not None:
+            clr=COLORS[i%len(COLORS)]; ax6.plot(s['hist']['ds'],s['hist']['y'],color=clr,lw=1.8,label=f"{s['label']} Historical")
+            ax6.plot(s['fc']['ds'],s['fc']['yhat'],color=clr,lw=1.8,ls='--',label=f"{s['label']} Forecast"); plotted=True
+    if not plotted: ax6.text(0.5,0.5,'No time-series category data',ha='center',va='center',transform=ax6.transAxes)
+    ax6.set_title('Per-Category Monthly Sales',fontsize=13,fontweight='bold',pad=14); ax6.set_ylabel('Sales (INR)',fontsize=11)
+    if plotted: ax6.legend(fontsize=8,ncol=2)
+    ax6.grid(True,alpha=0.3); plt.setp(ax6.get_xticklabels(),rotation=30,ha='right')
+    all_items = ([('Overall',gf['overall'])]+[(f"Cat: {s['label']}",s) for s in gf['categories'][:5]]+[(f"Store: {s['label']}",s) for s in gf['stores'][:3]])
+    lbs3=[a[0] for a in all_items]; hv=[a[1]['total_hist'] for a in all_items]; f6v=[a[1]['6m_forecast'] for a in all_items]; f12v=[a[1]['12m_forecast'] for a in all_items]
+    n2=len(lbs3); fh=max(6,n2*1.1+2)
+    fig7,ax7 = plt.subplots(figsize=(14,fh)); fig7.subplots_adjust(top=0.93,bottom=0.08,left=0.26,right=0.97)
+    y2=np.arange(n2); h2=0.26
+    ax7.barh(y2+h2,hv,h2,label='Historical Total',color='#7f7f7f',alpha=0.75)
+    ax7.barh(y2,f6v,h2,label='6M Forecast',color='#1f77b4',alpha=0.90)
+    ax7.barh(y2-h2,f12v,h2,label='12M Forecast',color='#003366',alpha=0.90)
+    ax7.set_yticks(y2); ax7.set_yticklabels(lbs3,fontsize=9); ax7.set_xlabel('Sales (INR)',fontsize=11,fontweight='bold')
+    ax7.set_title('All-Segment Summary: Historical vs 6M vs 12M',fontsize=13,fontweight='bold',pad=14); ax7.legend(loc='lower right',fontsize=9); ax7.grid(axis='x',alpha=0.25)
+    fig8,ax8 = plt.subplots(figsize=(13,7)); fig8.subplots_adjust(top=0.91,bottom=0.04,left=0.05,right=0.95); ax8.axis('off')
+    ov2 = gf['overall']
+    if ov2['fc'] is not None:
+        fc3=ov2['fc'].head(12).copy(); fc3['Month']=fc3['ds'].dt.strftime('%b %Y'); fc3['Forecast']=fc3['yhat'].apply(_fmt)
+        tbl=ax8.table(cellText=fc3[['Month','Forecast']].values.tolist(),colLabels=['Month','Forecasted Sales'],cellLoc='center',loc='center')
+        tbl.auto_set_font_size(False); tbl.set_fontsize(10); tbl.scale(1,1.8)
+        for j in range(2): tbl[(0,j)].set_facecolor('#003366'); tbl[(0,j)].set_text_props(color='white',fontweight='bold')
+        for i2 in range(1,13):
+            clr2='#eaf2ff' if i2%2==0 else 'white'
+            for j in range(2): tbl[(i2,j)].set_facecolor(clr2)
+        ax8.set_title('12-Month Forecast Breakdown',fontsize=13,fontweight='bold',pad=18)
+    else:
+        ax8.text(0.5,0.5,'No time-series data',ha='center',va='center',transform=ax8.transAxes); ax8.set_title('12-Month Forecast Breakdown',fontsize=13,fontweight='bold',pad=18)
+    return fig1,fig2,fig3,fig4,fig5,fig6,fig7,fig8
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Anomaly detection — every store, category, SKU (or MSME) series in one pass
+# ══════════════════════════════════════════════════════════════════════════════
+# Sales, margin and return rate of every series of every level are laid out as
+# series × month matrices with np.bincount and stacked, and all of them are
+# fitted at once by fit_trend_seasonal (trend, plus yearly seasonality from 24
+# months). Each month's residual becomes a robust z-score against its series:
+# (residual − median) / (1.4826 · MAD), so a regular festive peak is not flagged
+# but a one-off spike or drop is. The MAD is floored at ANOMALY_MAD_FLOOR of the
+# series' mean level so near-flat series don't flag noise. Only the last
+# GRANULAR_FIT_MONTHS months are scored, and only series with at least
+# ANOMALY_MIN_MONTHS observed months.
+ANOMALY_Z          = float(os.environ.get("DATANETRA_ANOMALY_Z", 3.5))
+ANOMALY_TOP_N      = int(os.environ.get("DATANETRA_ANOMALY_TOP_N", 10))
+ANOMALY_MIN_MONTHS = 6
+ANOMALY_MAD_FLOOR  = 0.02
+# metric -> (column, how a month's rows combine)
+ANOMALY_METRICS = {'Sales': ('Monthly_Sales_INR', 'sum'), 'Margin %': ('Avg_Margin_Percent', 'mean'),
+                   'Return rate %': ('Returns_Percentage', 'mean')}
+_ANOMALY_COLUMNS = ['level', 'series', 'metric', 'month', 'value', 'expected', 'z', 'kind']
+
+def _row_nanmedian(a):
+    """np.nanmedian(a, axis=1, keepdims=True) of a 2-D array from one sort (NaNs sort
+    last) — nanmedian's masked-array path is several times slower on short rows."""
+    s = np.sort(a, axis=1)
+    k = (~np.isnan(a)).sum(axis=1)
+    i = np.arange(len(a))
+    med = (s[i, np.maximum((k - 1) // 2, 0)] + s[i, k // 2 - (k == 0)]) / 2
+    med[k == 0] = np.nan
+    return med[:, None]
+
+def anomaly_scores(Y, mask=None):
+    """
+    Robust z-score of every cell of ``Y`` (n_series × n_months) against its
+    series' trend/seasonal fit. Returns (z, expected), both n_series × n_months;
+    z is NaN where a month is unobserved or the series is too short.
+    """
+    Y = np.asarray(Y, dtype=np.float64)
+    W = np.ones(Y.shape, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+    _, _, _, fit = fit_trend_seasonal(Y, W, horizon=1, return_fitted=True, bands=False)
+    z = np.full(Y.shape, np.nan)
+    rows = W.sum(axis=1) >= ANOMALY_MIN_MONTHS
+    if rows.any():
+        r = np.where(W[rows], Y[rows] - fit[rows], np.nan)
+        med = _row_nanmedian(r)
+        mad = 1.4826 * _row_nanmedian(np.abs(r - med))
+        level = np.nanmean(np.where(W[rows], np.abs(Y[rows]), np.nan), axis=1, keepdims=True)
+        z[rows] = (r - med) / np.maximum(mad, ANOMALY_MAD_FLOOR * level + 1e-12)
+    return z, fit
+
+def rank_anomalies(blocks, top_n=None, z_min=None):
+    """
+    ``blocks``: one (level name, series key per row, absolute month number per
+    row (year·12 + month − 1, NaN = none), {column: values per row}, weight per
+    row or None) per level. Rows are summed into series × month cells — raw rows
+    and pre-aggregated (key, month) tables both work, with the weight counting
+    the rows behind each. Returns the strongest anomalies as a DataFrame
+    [level, series, metric, month, value, expected, z, kind].
+    """
+    top_n = ANOMALY_TOP_N if top_n is None else top_n
+    z_min = ANOMALY_Z if z_min is None else z_min
+    months = [np.asarray(b[2], dtype=np.float64) for b in blocks]
+    seen = np.concatenate([m[np.isfinite(m)] for m in months]) if months else np.empty(0)
+    if not seen.size: return pd.DataFrame(columns=_ANOMALY_COLUMNS)
+    m1 = int(seen.max()); m0 = max(int(seen.min()), m1 - GRANULAR_FIT_MONTHS + 1); M = m1 - m0 + 1
+    grid = pd.date_range(pd.Timestamp(year=m0 // 12, month=m0 % 12 + 1, day=1), periods=M, freq='MS')
+    Ys, Ws, meta = [], [], []
+    for (level, keys, _, values, weight), mon in zip(blocks, months):
+        codes, labels = pd.factorize(keys)
+        ok = (codes >= 0) & np.isfinite(mon) & (mon >= m0)
+        n = len(labels)
+        if not n or not ok.any(): continue
+        idx = codes[ok] * M + (mon[ok] - m0).astype(np.int64)
+        w = np.ones(int(ok.sum())) if weight is None else np.asarray(weight, dtype=np.float64)[ok]
+        cnt = np.bincount(idx, weights=w, minlength=n * M).reshape(n, M)
+        for metric, (col, how) in ANOMALY_METRICS.items():
+            if col not in values: continue
+            Y = np.bincount(idx, weights=np.asarray(values[col], dtype=np.float64)[ok], minlength=n * M).reshape(n, M)
+            Ys.append(Y / np.maximum(cnt, 1) if how == 'mean' else Y); Ws.append(cnt > 0)
+            meta.append((level, np.asarray(labels, dtype=object), metric))
+    if not Ys: return pd.DataFrame(columns=_ANOMALY_COLUMNS)
+    Y = np.vstack(Ys)
+    z, fit = anomaly_scores(Y, np.vstack(Ws))
+    a = np.abs(np.nan_to_num(z)).ravel()
+    hits = np.flatnonzero(a >= z_min)
+    hits = hits[np.argsort(-a[hits], kind='stable')][:top_n]
+    r, t = np.divmod(hits, M)
+    sizes = [len(lab) for _, lab, _ in meta]
+    return pd.DataFrame({
+        'level':  np.repeat([lv for lv, _, _ in meta], sizes)[r],
+        'series': np.concatenate([lab for _, lab, _ in meta])[r],
+        'metric': np.repeat([mt for _, _, mt in meta], sizes)[r],
+        'month':  grid[t], 'value': Y[r, t], 'expected': fit[r, t], 'z': z[r, t],
+        'kind':   np.where(z[r, t] > 0, 'Spike', 'Drop')}, columns=_ANOMALY_COLUMNS)
+
+def _abs_month(dates):
+    """year·12 + month − 1 per row of a datetime Series, NaN where NaT."""
+    return (dates.dt.year * 12 + dates.dt.month - 1).to_numpy(dtype=np.float64, na_value=np.nan)
+
+def detect_anomalies(df, levels, dates, top_n=None, z_min=None):
+    """
+    Strongest anomalies in ``df`` across every series of ``levels`` — (name,
+    column) pairs such as ('Store', 'Store_ID'); missing columns are skipped —
+    by month of ``dates`` (parsed datetime Series aligned with ``df``).
+    """
+    values = {col: df[col].to_numpy(dtype=np.float64) for col, _ in ANOMALY_METRICS.values() if col in df.columns}
+    mon = _abs_month(dates)
+    blocks = [(name, df[col], mon, values, None) for name, col in levels if col and col in df.columns]
+    return rank_anomalies(blocks, top_n, z_min)
+
+def _fmt_anomaly_value(metric, v, inr=None):
+    return (inr or _fmt_inr_sb)(v) if metric == 'Sales' else f"{v:.1f}%"
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Inventory planner — days of cover, stock-out risk and reorder quantity
+# ══════════════════════════════════════════════════════════════════════════════
+# Monthly units of every SKU × store cell are forecast in one fit_trend_seasonal
+# pass and set against the cell's latest stock level. Demand over the
+# replenishment window (INVENTORY_LEAD_DAYS + INVENTORY_REVIEW_DAYS) is
+# bootstrapped from each cell's residuals, which gives both the stock-out
+# probability — P(window demand > stock) — and the order-up-to level at
+# INVENTORY_SERVICE_LEVEL; the suggested order lifts stock to that level. The
+# plan is built once per analysis with the granular forecast; Step 7 filters
+# only slice it.
+INVENTORY_LEAD_DAYS     = float(os.environ.get("DATANETRA_INVENTORY_LEAD_DAYS", 14))
+INVENTORY_REVIEW_DAYS   = float(os.environ.get("DATANETRA_INVENTORY_REVIEW_DAYS", 30))
+INVENTORY_SERVICE_LEVEL = float(os.environ.get("DATANETRA_INVENTORY_SERVICE_LEVEL", 0.95))
+_DAYS_PER_MONTH = 365.25 / 12
+
+def plan_inventory(df, schema=None):
+    """
+    Reorder plan for every SKU of ``df``, per store when there is a store column.
+    Returns a DataFrame [sku, store, category, stock, demand_30d, days_of_cover,
+    stockout_prob, reorder_qty, status], riskiest first — or None without date,
+    SKU, units or stock columns.
+    """
+    schema = schema or DataSchema.of(df)
+    dc, sku, units, stock = schema.date, schema.sku, schema.units, schema.stock
+    if not (dc and sku and units and stock) or df.empty: return None
+    keys = [sku] + ([schema.store] if schema.store else [])
+    dates = df[dc] if pd.api.types.is_datetime64_any_dtype(df[dc]) else pd.to_datetime(df[dc], errors='coerce')
+    mon = _abs_month(dates)
+    grouped = df.groupby(keys, observed=True, sort=True)
+    cell = grouped.ngroup().to_numpy()
+    ok = (cell >= 0) & np.isfinite(mon)
+    if not ok.any(): return None
+    m1 = int(mon[ok].max()); m0 = max(int(mon[ok].min()), m1 - GRANULAR_FIT_MONTHS + 1); M = m1 - m0 + 1
+    ok &= mon >= m0
+    n = int(cell.max()) + 1
+    idx = cell[ok] * M + (mon[ok] - m0).astype(np.int64)
+    col = lambda c: pd.to_numeric(df[c], errors='coerce').fillna(0).to_numpy(dtype=np.float64)[ok]
+    rows = np.bincount(idx, minlength=n * M).reshape(n, M)
+    Y = np.bincount(idx, weights=col(units), minlength=n * M).reshape(n, M)
+    seen = rows > 0
+    first = np.where(seen.any(axis=1), seen.argmax(axis=1), M)
+    # Stock is a level, not a flow: each cell's latest reading (last row on its latest date)
+    c_ok = cell[ok]
+    order = np.lexsort((dates.to_numpy(dtype='datetime64[ns]')[ok].astype(np.int64), c_ok))
+    latest = order[np.r_[c_ok[order][1:] != c_ok[order][:-1], True]]
+    on_hand = np.zeros(n)
+    on_hand[c_ok[latest]] = col(stock)[latest]
+    # Months before a SKU first sells are not zero demand
+    mask = np.arange(M)[None, :] >= first[:, None]
+    window = INVENTORY_LEAD_DAYS + INVENTORY_REVIEW_DAYS
+    K = max(1, int(np.ceil(window / _DAYS_PER_MONTH)))
+    frac = window / (K * _DAYS_PER_MONTH)              # the window is a fraction of K whole months
+    fc, _, _, fit = fit_trend_seasonal(Y, mask, horizon=K, return_fitted=True, bands=False)
+    resid = np.where(mask, Y - fit, np.nan)
+    _, _, win = bootstrap_intervals(fc, resid, windows=(K,), level=2 * INVENTORY_SERVICE_LEVEL - 1,
+                                    exceed=on_hand / frac, monthly=False)
+    _, order_up_to, p_out = win[K]
+    daily = fc[:, 0] / _DAYS_PER_MONTH
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cover = np.where(daily > 0, on_hand / daily, np.inf)
+    qty = np.ceil(np.clip(order_up_to * frac - on_hand, 0, None))
+    labels = grouped.size().index
+    plan = pd.DataFrame({
+        'sku': labels.get_level_values(0) if len(keys) > 1 else labels,
+        'store': labels.get_level_values(1) if len(keys) > 1 else None,
+        'category': grouped[schema.category].first().to_numpy() if schema.category else None,
+        'stock': on_hand, 'demand_30d': fc[:, 0] * 30 / _DAYS_PER_MONTH, 'days_of_cover': cover,
+        'stockout_prob': p_out, 'reorder_qty': qty,
+        'status': np.select([p_out >= 0.5, qty > 0], ['Stock-out risk', 'Reorder'], 'OK')})
+    return plan.sort_values(['stockout_prob', 'days_of_cover'], ascending=[False, True], kind='stable').reset_index(drop=True)
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Translations
+# ══════════════════════════════════════════════════════════════════════════════
+LANG = {
+    'en': {
+        'insights_title':'AI-Powered Business Insights','overall_summary':'Overall Performance Summary',
+        'total_sales':'Total Sales','total_products':'Total Products Analyzed','avg_margin':'Average Profit Margin',
+        'health_score':'Overall MSME Health Score','perf_score':'Overall Performance Score',
+        'top5':'Top 5 Performing Products','perf_metrics':'Performance Metrics',
+        'fin_risk':'Financial Risk Score','vendor_score':'Vendor Reliability Score','growth_score':'Growth Potential Score',
+        'lower_better':'(Lower is better)','forecast_title':'ML-Powered Sales Forecast',
+        'six_month':'6-Month Projection','twelve_month':'12-Month Projection',
+        'forecast_sales':'Forecasted Sales','expected_range':'Expected Range',
+        'snp_title':'ONDC Seller Network Participant (SNP) Matching','recommendations':'AI-Generated Recommendations',
+        'immediate':'Immediate Actions','strategic':'Strategic Initiatives','risk_alert':'Risk Alerts',
+        'store_forecast':'Store-Specific Sales Forecasts','data_quality':'Data Quality Report',
+        'inference_time':'Analysis completed in','seconds':'seconds'
+    },
+    'hi': {
+        'insights_title':'AI से मिली आपके धंधे की जानकारी','overall_summary':'आपके धंधे का कुल हाल',
+        'total_sales':'कुल बिक्री','total_products':'कुल सामान','avg_margin':'औसत मुनाफा (%)',
+        'health_score':'धंधे की सेहत का स्कोर','perf_score':'काम का कुल स्कोर',
+        'top5':'सबसे ज्यादा बिकने वाले 5 सामान','perf_metrics':'काम के नंबर',
+        'fin_risk':'पैसों का जोखिम स्कोर','vendor_score':'सप्लायर का भरोसा स्कोर','growth_score':'आगे बढ़ने की संभावना',
+        'lower_better':'(कम नंबर अच्छा है)','forecast_title':'AI से अगले महीनों की बिक्री का अनुमान',
+        'six_month':'अगले 6 महीने की बिक्री','twelve_month':'अगले 12 महीने की बिक्री',
+        'forecast_sales':'अनुमानित बिक्री','expected_range':'बिक्री कम से कम — ज्यादा से ज्यादा',
+        'snp_title':'ONDC पर बेचने के लिए सबसे अच्छे Platform','recommendations':'AI की सलाह',
+        'immediate':'अभी करने वाले काम','strategic':'आगे की योजना','risk_alert':'खतरे की चेतावनी',
+        'store_forecast':'हर दुकान की अगली बिक्री का अनुमान','data_quality':'आपके Data की जाँच',
+        'inference_time':'जाँच पूरी हुई','seconds':'सेकंड में'
+    }
+}
+
+def T(key, lang='en'): return LANG.get(lang, LANG['en']).get(key, LANG['en'].get(key, key))
+
+SNP_CATALOG = {
+    'GeM (Government e-Marketplace)': {
+        'business_types':['Manufacturing','FMCG','Electronics','Clothing','Services','Hypermarket'],
+        'min_health':40,'segment_boost':['Champions','Loyal'],
+        'description_en':'Government procurement portal — ideal for MSMEs supplying to public sector.',
+        'action_en':'Register on GeM portal (gem.gov.in) and map your product catalogue.'},
+    'Flipkart Commerce (ONDC)': {
+        'business_types':['FMCG','Supermarket','Clothing','Electronics','Hypermarket'],
+        'min_health':30,'segment_boost':['Champions','Loyal','Potential'],
+        'description_en':'High-volume B2C SNP — best for consumer goods with strong demand.',
+        'action_en':'Onboard via Flipkart Seller Hub — optimise product images and descriptions.'},
+    'Meesho (ONDC)': {
+        'business_types':['Clothing','FMCG','Manufacturing'],
+        'min_health':20,'segment_boost':['Potential','At Risk'],
+        'description_en':'Social commerce SNP — ideal for price-sensitive segments and tier-2/3 markets.',
+        'action_en':'List on Meesho for reseller network access — focus on competitive pricing.'},
+    'NSIC e-Marketplace': {
+        'business_types':['Manufacturing','FMCG','Electronics','Services','Hypermarket'],
+        'min_health':25,'segment_boost':['Champions','Loyal','Potential'],
+        'description_en':'NSIC marketplace for MSE-to-MSE and B2B procurement.',
+        'action_en':'Register with NSIC for buyer-seller matchmaking.'},
+    'Amazon Seller Services (ONDC)': {
+        'business_types':['Electronics','FMCG','Clothing','Supermarket','Hypermarket'],
+        'min_health':35,'segment_boost':['Champions','Loyal'],
+        'description_en':'Premium B2C SNP — suits high-quality products with strong margin and low returns.',
+        'action_en':'Apply for Amazon Easy Ship / FBA integration via ONDC bridge.'},
+    'Udaan (B2B ONDC)': {
+        'business_types':['Manufacturing','FMCG','Clothing','Supermarket','Hypermarket'],
+        'min_health':20,'segment_boost':['Champions','Loyal','Potential','At Risk'],
+        'description_en':'B2B wholesale SNP — best for MSMEs supplying to retailers and distributors.',
+        'action_en':'List bulk products on Udaan for retailer discovery and bulk orders.'},
+}
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Storyboard / Insight Dashboard CSS & Builders (abbreviated for integration)
+# ══════════════════════════════════════════════════════════════════════════════
+STORYBOARD_CSS = """<style>
+@import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
+.sb-root{font-family:'Inter',Arial,sans-serif;color:#1A2D45;background:#EEF4FB;padding:0 0 60px 0;max-width:100%;}
+.sb-root *{box-sizing:border-box;}
+.sb-hero{background:linear-gradient(135deg,#0B1F3A 0%,#1B3A6B 60%,#1A5276 100%);padding:48px 48px 56px;overflow:hidden;}
+.sb-hero-title{font-size:32px;font-weight:900;color:#FFFFFF;line-height:1.15;margin:0 0 8px;}
+.sb-hero-sub{font-size:15px;color:#A8D8FF;font-weight:300;margin-bottom:32px;}
+.sb-chip{background:rgba(255,255,255,.12);border:1px solid rgba(255,215,100,.45);border-radius:20px;padding:5px 14px;font-size:12px;font-weight:700;color:#FFD080;display:inline-block;margin:3px;}
+.sb-chip.green{background:rgba(46,204,143,.25);border-color:rgba(46,204,143,.5);color:#5DEBB0;}
+.sb-chip.amber{background:rgba(232,168,56,.25);border-color:rgba(232,168,56,.5);color:#FFD070;}
+.sb-chip.red{background:rgba(224,82,82,.25);border-color:rgba(224,82,82,.5);color:#FF8080;}
+.sb-section-divider{display:flex;align-items:center;gap:16px;padding:40px 48px 0;}
+.sb-section-number{font-size:48px;font-weight:900;color:rgba(27,79,138,.15);line-height:1;min-width:52px;}
+.sb-section-title{font-size:22px;font-weight:700;color:#0B1F3A;}
+.sb-section-line{flex:1;height:1px;background:linear-gradient(90deg,#C8DCEF,transparent);}
+.sb-card-grid{display:grid;grid-template-columns:repeat(auto-fit,minmax(200px,1fr));gap:16px;padding:20px 48px 0;}
+.sb-kpi-card{background:#FFFFFF;border:1px solid #C8DCEF;border-radius:14px;padding:22px 20px;position:relative;overflow:hidden;}
+.sb-kpi-card::before{content:'';position:absolute;top:0;left:0;right:0;height:3px;}
+.sb-kpi-card.accent-blue::before{background:#1B4F8A;}.sb-kpi-card.accent-green::before{background:#2ECC8F;}
+.sb-kpi-card.accent-amber::before{background:#E8A838;}.sb-kpi-card.accent-red::before{background:#E05252;}
+.sb-kpi-card.accent-navy::before{background:#0B1F3A;}
+.sb-kpi-label{font-size:10px;font-weight:600;letter-spacing:2px;text-transform:uppercase;color:#4A6A8A;margin-bottom:4px;}
+.sb-kpi-value{font-size:26px;font-weight:700;color:#0B1F3A;line-height:1.1;}
+.sb-kpi-sub{font-size:11px;color:#4A6A8A;margin-top:4px;}
+.sb-status-badge{display:inline-flex;align-items:center;gap:4px;padding:3px 10px;border-radius:20px;font-size:11px;font-weight:600;margin-top:8px;}
+.badge-green{background:#E8FBF4;color:#1A7A50;}.badge-amber{background:#FEF6E7;color:#A06000;}.badge-red{background:#FDE8E8;color:#B03030;}.badge-blue{background:#E8F2FF;color:#1B4F8A;}
+.sb-scores-row{display:grid;grid-template-columns:repeat(3,1fr);gap:16px;padding:20px 48px 0;}
+.sb-score-card{background:#FFFFFF;border:1px solid #C8DCEF;border-radius:14px;padding:20px 22px;color:#1A2D45;}
+.sb-score-card div{color:#1A2D45;}
+.sb-score-bar-track{height:6px;background:#D8E8F8;border-radius:3px;overflow:hidden;}
+.sb-score-bar-fill{height:100%;border-radius:3px;}
+.sb-table-wrap{padding:20px 48px 0;}
+.sb-table{width:100%;border-collapse:separate;border-spacing:0;background:#FFFFFF;border-radius:14px;border:1px solid #C8DCEF;overflow:hidden;}
+.sb-table thead tr th{background:#0B1F3A;color:#E0F0FF;padding:13px 18px;font-size:11px;font-weight:600;letter-spacing:1.5px;text-transform:uppercase;text-align:left;}
+.sb-table tbody tr td{padding:13px 18px;border-bottom:1px solid #C8DCEF;font-size:13px;color:#1A2D45;}
+.sb-forecast-row{display:grid;grid-template-columns:1fr 1fr;gap:16px;padding:20px 48px 0;}
+.sb-forecast-card{background:linear-gradient(135deg,#0B1F3A 0%,#1B3A6B 100%);border-radius:16px;padding:28px 26px;}
+.sb-forecast-amount{font-size:34px;font-weight:900;color:#FFFFFF !important;line-height:1.1;}
+.sb-forecast-range{font-size:12px;color:#A8D8FF !important;margin-top:6px;}
+.sb-snp-grid{display:grid;grid-template-columns:repeat(3,1fr);gap:14px;padding:0 48px;}
+.sb-snp-card{background:#FFFFFF;border:1px solid #C8DCEF;border-radius:14px;padding:20px 18px;color:#1A2D45;}
+.sb-snp-card.gold{border-top:4px solid #F5C842;}.sb-snp-card.silver{border-top:4px solid #B0BEC5;}.sb-snp-card.bronze{border-top:4px solid #CD7F32;}
+.sb-reco-tabs{display:grid;grid-template-columns:1fr 1fr;gap:14px;padding:0 48px;}
+.sb-reco-panel{background:#FFFFFF;border:1px solid #C8DCEF;border-radius:14px;overflow:hidden;}
+.sb-reco-header{padding:14px 20px;font-weight:700;font-size:13px;color:#FFFFFF;}
+.sb-reco-header.immediate{background:linear-gradient(90deg,#E05252,#C0392B);}
+.sb-reco-header.strategic{background:linear-gradient(90deg,#1B4F8A,#0B2F5A);color:#D0EAFF;}
+.sb-reco-row{display:flex;align-items:flex-start;gap:12px;padding:12px 20px;border-bottom:1px solid #C8DCEF;color:#1A2D45;}
+.sb-reco-row div{color:#1A2D45;font-size:13px;line-height:1.5;flex:1;}
+.sb-reco-priority{font-size:10px;font-weight:700;letter-spacing:1px;text-transform:uppercase;padding:2px 8px;border-radius:10px;flex-shrink:0;margin-top:2px;}
+.reco-high{background:#FDE8E8;color:#B03030;}.reco-medium{background:#FEF6E7;color:#A06000;}
+.sb-footer{margin:40px 48px 0;padding:16px 20px;background:#FFFFFF;border:1px solid #C8DCEF;border-radius:10px;display:flex;justify-content:space-between;align-items:center;font-size:12px;color:#4A6A8A;}
+@media(max-width:900px){.sb-scores-row,.sb-forecast-row,.sb-snp-grid,.sb-reco-tabs{grid-template-columns:1fr;}.sb-hero,.sb-section-divider,.sb-card-grid,.sb-table-wrap,.sb-snp-grid,.sb-reco-tabs{padding-left:16px;padding-right:16px;}}
+</style>"""
+
+def _fmt_inr_sb(v):
+    if pd.isna(v) or v is None: return "N/A"
+    if v>=1e7: return f"&#8377;{v/1e7:.2f} Cr"
+    if v>=1e5: return f"&#8377;{v/1e5:.2f} L"
+    return f"&#8377;{v:,.0f}"
+
+def _score_bar_color(v, invert=False):
+    eff = (1-v) if invert else v
+    if eff >= 0.65: return "#2ECC8F"
+    if eff >= 0.40: return "#E8A838"
+    return "#E05252"
+
+def _badge_cls(v, invert=False):
+    eff = (1-v) if invert else v
+    if eff >= 0.65: return "badge-green"
+    if eff >= 0.40: return "badge-amber"
+    return "badge-red"
+
+def _status_lbl(v, invert=False):
+    eff = (1-v) if invert else v
+    if eff >= 0.65: return "Excellent"
+    if eff >= 0.40: return "Moderate"
+    return "Needs Attention"
+
+def _health_cls(v):
+    if v >= 65: return "badge-green"
+    if v >= 40: return "badge-amber"
+    return "badge-red"
+
+def _health_lbl(v):
+    if v >= 65: return "Healthy"
+    if v >= 40: return "Developing"
+    return "At Risk"
+
+def _margin_cls(v):
+    if v > 20: return "badge-green"
+    if v > 10: return "badge-amber"
+    return "badge-red"
+
+def _margin_lbl(v):
+    if v > 20: return "Strong"
+    if v > 10: return "Moderate"
+    return "Low"
+
+def _risk_cls(v):
+    if v <= 0.40: return "badge-green"
+    if v <= 0.70: return "badge-amber"
+    return "badge-red"
+
+def _risk_lbl(v):
+    if v <= 0.40: return "Low Risk"
+    if v <= 0.70: return "Moderate"
+    return "High Risk"
+
+def _sb_divider(num, eyebrow, title):
+    return f"""<div class="sb-section-divider"><div class="sb-section-number">{num:02d}</div>
+<div style="display:flex;flex-direction:column;gap:2px;">
+<div style="font-size:10px;font-weight:600;letter-spacing:3px;text-transform:uppercase;color:#B07A00">{eyebrow}</div>
+<div class="sb-section-title">{title}</div></div><div class="sb-section-line"></div></div>"""
+
+def _sb_pending(msg):
+    return (f'<div style="margin:24px 48px 0;padding:16px 22px;border:1px dashed #C8DCEF;border-radius:12px;'
+            f'color:#4A6A8A;font-size:13px;background:#F7FBFF">⏳ {msg}</div>')
+
+def generate_insights(user_data, df_raw, lang='en', schema=None, ctx=None):
+    html = extra = None
+    for section, html, extra in iter_insights(user_data, df_raw, lang, schema, ctx):
+        if section == 'error': return None, extra, None
+    return html, None, extra
+
+def iter_insights(user_data, df_raw, lang='en', schema=None, ctx=None, forecast=None, segments=None):
+    """
+    The insights report, section by section. Yields (section, html, forecast_results):
+    'summary' (hero, KPIs, snapshot), 'scores', 'forecast', 'snp' with the report so
+    far plus a placeholder for what is still running, then 'done' with the full
+    report — or ('error', None, message). ``forecast`` / ``segments`` are optional
+    zero-argument callables that supply forecast_sales / segment_customers results
+    computed elsewhere; they are only called when their section is reached.
+    """
+    try:
+        ctx = ctx or AnalysisContext(df_raw, schema)
+        schema = ctx.schema
+        df = ctx.scored
+        sales_col = 'Monthly_Sales_INR'; sku_col = schema.sku
+        total_sales    = df[sales_col].sum()
+        total_records  = len(df)  # total data rows (transactions/months)
+        total_products = df[sku_col].nunique() if sku_col else total_records
+        avg_margin = df['Avg_Margin_Percent'].mean() if 'Avg_Margin_Percent' in df.columns else 0
+        perf_score = df['Performance_Score'].mean() if 'Performance_Score' in df.columns else 0
+        health_score = df['MSME_Health_Score'].mean() if 'MSME_Health_Score' in df.columns else 0
+        fin_risk = df['Financial_Risk_Score'].mean() if 'Financial_Risk_Score' in df.columns else 0
+        vendor_sc = df['Vendor_Score'].mean() if 'Vendor_Score' in df.columns else 0
+        growth_sc = df['Growth_Potential_Score'].mean() if 'Growth_Potential_Score' in df.columns else 0
+        company = user_data.get('company_name', 'Your Company')
+        hl = _health_lbl(health_score)
+        hcls = "green" if health_score>=65 else ("amber" if health_score>=40 else "red")
+        html = STORYBOARD_CSS + f'<div class="sb-root">'
+        # Hero
+        html += f"""<div class="sb-hero">
+<div style="font-size:11px;font-weight:600;letter-spacing:3px;text-transform:uppercase;color:#FFD080;margin-bottom:12px">DataNetra.ai — AI-Powered Business Intelligence</div>
+<div class="sb-hero-title" style="font-size:32px;font-weight:900;color:#FFFFFF !important;line-height:1.15;margin:0 0 8px;text-shadow:0 2px 8px rgba(0,0,0,0.4)">{company}</div>
+<div class="sb-hero-sub" style="font-size:15px;color:#A8D8FF !important;font-weight:300;margin-bottom:32px">Comprehensive Analysis Report &nbsp;·&nbsp; {datetime.datetime.now().strftime("%d %b %Y, %H:%M")}</div>
+<div>
+  <span class="sb-chip">Total Revenue: {_fmt_inr_sb(total_sales)}</span>
+  <span class="sb-chip">{hl} Business</span>
+  <span class="sb-chip">Perf Score: {perf_score:.1f}%</span>
+  <span class="sb-chip">Prophet · Holt-Winters · LinReg · KMeans</span>
+</div></div>"""
+        # Section 1 — KPIs
+        html += _sb_divider(1, 'Overall Summary', 'Business Performance')
+        mc = _margin_cls(avg_margin); ml = _margin_lbl(avg_margin)
+        hclr = _score_bar_color(health_score/100); rclr = "#1a7a40" if fin_risk<=0.4 else ("#b05a00" if fin_risk<=0.7 else "#b03030")
+        def _kpi_card(accent, icon, label, value, sub_html):
+            acc_colors = {'blue':'#1B4F8A','green':'#2ECC8F','amber':'#E8A838','red':'#E05252','navy':'#0B1F3A'}
+            top_col = acc_colors.get(accent, '#1B4F8A')
+            return (f'<div style="background:#FFFFFF;border:1px solid #C8DCEF;border-radius:14px;padding:22px 20px;'
+                    f'position:relative;overflow:hidden;border-top:3px solid {top_col}">'
+                    f'<div style="font-size:28px;margin-bottom:8px">{icon}</div>'
+                    f'<div style="font-size:10px;font-weight:600;letter-spacing:2px;text-transform:uppercase;color:#4A6A8A;margin-bottom:4px">{label}</div>'
+                    f'<div style="font-size:26px;font-weight:700;color:#0B1F3A;line-height:1.1">{value}</div>'
+                    f'{sub_html}</div>')
+        mc_acc = 'green' if avg_margin>20 else ('amber' if avg_margin>10 else 'red')
+        hlt_acc = 'green' if health_score>=65 else ('amber' if health_score>=40 else 'red')
+        prf_acc = 'green' if perf_score>=65 else ('amber' if perf_score>=40 else 'red')
+        prf_lbl = 'Excellent' if perf_score>=65 else ('Moderate' if perf_score>=40 else 'Low')
+        html += f"""<div class="sb-card-grid">
+{_kpi_card('blue', '💰', 'Total Revenue', _fmt_inr_sb(total_sales), '<div style="font-size:11px;color:#4A6A8A;margin-top:4px">Gross Sales (all products)</div>')}
+{_kpi_card('navy', '📦', 'Data Records', f'{total_records:,}', f'<div style="font-size:11px;color:#4A6A8A;margin-top:4px">{total_products:,} unique SKU{"s" if total_products!=1 else ""}</div>')}
+{_kpi_card(mc_acc, '📈', 'Avg Profit Margin', f'{avg_margin:.1f}%', f'<span class="sb-status-badge {mc}" style="margin-top:8px">{ml}</span>')}
+{_kpi_card(hlt_acc, '🧠', 'MSME Health Score', f'{health_score:.1f}%', f'<span class="sb-status-badge {_health_cls(health_score)}" style="margin-top:8px">{_health_lbl(health_score)}</span>')}
+{_kpi_card(prf_acc, '⭐', 'Performance Score', f'{perf_score:.1f}%', f'<span class="sb-status-badge {_health_cls(perf_score)}" style="margin-top:8px">{prf_lbl}</span>')}
+</div>"""
+        # ── MSME Snapshot (identity only — scores shown in Section 2 below) ──
+        msme_id    = user_data.get('msme_number', 'N/A')
+        owner_name = user_data.get('full_name', 'Business Owner')
+        biz_type   = user_data.get('business_type', 'MSME')
+        city_val   = user_data.get('city', '')
+        html += f"""<div style="margin:0 48px 20px;background:#0B1F3A;border-radius:12px;padding:16px 22px;">
+  <div style="font-size:10px;font-weight:800;letter-spacing:2px;text-transform:uppercase;color:#FFD080;margin-bottom:12px">
+    🏢 MSME Snapshot
+  </div>
+  <div style="display:grid;grid-template-columns:repeat(auto-fit,minmax(180px,1fr));gap:10px">
+    <div style="background:rgba(255,255,255,0.06);border-radius:8px;padding:11px 14px">
+      <div style="font-size:10px;color:#7AABDD;text-transform:uppercase;letter-spacing:1px;margin-bottom:3px">Business</div>
+      <div style="font-size:14px;font-weight:700;color:#FFFFFF;line-height:1.2">{company}</div>
+      <div style="font-size:11px;color:#A8C8E8;margin-top:3px">{biz_type}</div>
+    </div>
+    <div style="background:rgba(255,255,255,0.06);border-radius:8px;padding:11px 14px">
+      <div style="font-size:10px;color:#7AABDD;text-transform:uppercase;letter-spacing:1px;margin-bottom:3px">Owner</div>
+      <div style="font-size:13px;font-weight:700;color:#FFFFFF">{owner_name}</div>
+      <div style="font-size:11px;color:#A8C8E8;margin-top:3px">{city_val if city_val else 'Registered MSME'}</div>
+    </div>
+    <div style="background:rgba(255,255,255,0.06);border-radius:8px;padding:11px 14px">
+      <div style="font-size:10px;color:#7AABDD;text-transform:uppercase;letter-spacing:1px;margin-bottom:3px">MSME / Udyam ID</div>
+      <div style="font-size:13px;font-weight:700;color:#FFD080">{msme_id}</div>
+    </div>
+    <div style="background:rgba(255,255,255,0.06);border-radius:8px;padding:11px 14px">
+      <div style="font-size:10px;color:#7AABDD;text-transform:uppercase;letter-spacing:1px;margin-bottom:3px">Total Revenue</div>
+      <div style="font-size:14px;font-weight:700;color:#FFFFFF">{_fmt_inr_sb(total_sales)}</div>
+      <div style="font-size:11px;color:#A8C8E8;margin-top:3px">{total_records:,} records · {total_products:,} SKU{"s" if total_products!=1 else ""}</div>
+    </div>
+  </div>
+</div>"""
+        yield 'summary', html + _sb_pending('Scoring risk, vendor and growth performance…') + '</div>', None
+        # Section 2 — Scores
+        html += _sb_divider(2, 'Score Breakdown', 'Risk & Performance Scores')
+
+        # ── Score cards with full explanation ─────────────────────────────────
+        perf_sc_norm = perf_score / 100.0
+        profit_ratio = avg_margin / 100.0
+
+        def _score_card_full(icon, title, value_display, value_norm, target_txt, formula_txt, explanation_txt, badge_cls, badge_lbl, invert=False):
+            bar_pct = min(value_norm * 100, 100)
+            bar_c = _score_bar_color(1 - value_norm if invert else value_norm)
+            return f"""<div style="background:#FFFFFF;border:1px solid #C8DCEF;border-radius:14px;padding:20px 18px;border-top:3px solid {bar_c}">
+  <div style="display:flex;justify-content:space-between;align-items:flex-start;margin-bottom:6px">
+    <div>
+      <div style="font-weight:700;font-size:13px;color:#0B1F3A">{icon} {title}</div>
+      <div style="font-size:11px;color:#4A6A8A;margin-top:2px">{target_txt}</div>
+    </div>
+    <div style="font-size:26px;font-weight:900;color:{bar_c};font-family:monospace">{value_display}</div>
+  </div>
+  <div style="height:7px;background:#D8E8F8;border-radius:4px;margin-bottom:8px">
+    <div style="width:{bar_pct:.0f}%;height:100%;background:{bar_c};border-radius:4px"></div></div>
+  <span class="sb-status-badge {badge_cls}" style="margin-bottom:10px">{badge_lbl}</span>
+  <div style="margin-top:10px;font-size:11px;color:#2A4060;line-height:1.6">{explanation_txt}</div>
+</div>"""
+
+        html += f"""<div style="display:grid;grid-template-columns:repeat(auto-fit,minmax(260px,1fr));gap:16px;margin:16px 48px 0">
+{_score_card_full('⚠️', 'Financial Risk Score', f'{fin_risk:.2f}', fin_risk,
+    'Lower is better · Target &lt;0.40',
+    '0.5×(OpCost/Sales) + 0.5×(Loan/(Sales×12))',
+    'Measures cashflow pressure and loan burden relative to revenue. A score above 0.70 signals danger — costs or debt are consuming most income. Below 0.40 indicates healthy financial breathing room.',
+    _risk_cls(fin_risk), _risk_lbl(fin_risk), invert=True)}
+{_score_card_full('📈', 'Performance Score', f'{perf_score:.1f}%', perf_sc_norm,
+    'Higher is better · Target &gt;65%',
+    '0.30×Profitability + 0.25×OpEfficiency + 0.20×CustSatisfaction + 0.15×VendorReliability + 0.10×InvTurnover',
+    'Composite score across five operational pillars. Reflects how well the business converts revenue into real value. Scores above 65% indicate a well-run, scalable operation.',
+    _health_cls(perf_score), 'Excellent' if perf_score>=65 else ('Moderate' if perf_score>=40 else 'Low'))}
+{_score_card_full('💰', 'Profit Margin Score', f'{avg_margin:.1f}%', min(avg_margin/40,1.0),
+    'Higher is better · Target &gt;20%',
+    'Avg(Margin%) across all SKUs',
+    'Average gross margin across your product portfolio. Margins above 20% indicate strong pricing power and room to invest in growth. Below 10% means thin cushion for shocks.',
+    _margin_cls(avg_margin), _margin_lbl(avg_margin))}
+{_score_card_full('🤝', 'Vendor Reliability Score', f'{vendor_sc:.2f}', vendor_sc,
+    'Higher is better · Target &gt;0.60',
+    '0.50×VendorDeliveryReliability + 0.30×InvTurnover + 0.20×AvgMargin',
+    'Blends supplier delivery reliability, inventory turnover velocity and margin contribution. A score above 0.65 means the supply chain supports growth. Below 0.40 — fulfilment risks are high.',
+    _badge_cls(vendor_sc), _status_lbl(vendor_sc))}
+{_score_card_full('🧠', 'MSME Health Score', f'{health_score:.1f}%', health_score/100,
+    'Higher is better · Target &gt;65%',
+    '0.40×(1−FinRisk) + 0.30×VendorScore + 0.30×GrowthPotential',
+    'DataNetra\'s flagship composite metric — blends financial safety, supply chain health and growth momentum. The single most important number for ONDC readiness and investor-readiness assessment.',
+    _health_cls(health_score), _health_lbl(health_score))}
+{_score_card_full('🚀', 'Growth Potential Score', f'{growth_sc:.2f}', growth_sc,
+    'Higher is better · Target &gt;0.60',
+    '0.40×DemandUnits + 0.35×AvgMargin + 0.25×(1−ReturnsRate)',
+    'Forward-looking indicator combining demand volume, profitability and customer acceptance (low returns = product-market fit). High scores here signal strong ONDC scale-up potential.',
+    _badge_cls(growth_sc), _status_lbl(growth_sc))}
+</div>"""
+
+        # ── Score Summary Table ────────────────────────────────────────────────
+        def _trend(val, tgt, invert=False):
+            good = val <= tgt if invert else val >= tgt
+            return ("✅ On Target", "#1a7a40") if good else ("⚠️ Needs Work", "#b05a00")
+
+        rows_summary = [
+            ("⚠️ Financial Risk",    f"{fin_risk:.2f}",      "< 0.40",  *_trend(fin_risk, 0.40, invert=True)),
+            ("📈 Performance",       f"{perf_score:.1f}%",   "> 65%",   *_trend(perf_score, 65)),
+            ("💰 Profit Margin",     f"{avg_margin:.1f}%",   "> 20%",   *_trend(avg_margin, 20)),
+            ("🤝 Vendor Reliability",f"{vendor_sc:.2f}",     "> 0.60",  *_trend(vendor_sc, 0.60)),
+            ("🧠 MSME Health",       f"{health_score:.1f}%", "> 65%",   *_trend(health_score, 65)),
+            ("🚀 Growth Potential",  f"{growth_sc:.2f}",     "> 0.60",  *_trend(growth_sc, 0.60)),
+        ]
+        summary_rows_html = ""
+        for i,(name,val,tgt,status,scol) in enumerate(rows_summary):
+            bg = "#F0F7FF" if i%2==0 else "#FFFFFF"
+            summary_rows_html += f"""<tr style="border-bottom:1px solid #D8E8F8;background:{bg}">
+  <td style="padding:9px 14px;font-weight:600;color:#0B1F3A;font-size:12px">{name}</td>
+  <td style="padding:9px 14px;font-family:monospace;font-weight:700;color:#0B1F3A;font-size:13px">{val}</td>
+  <td style="padding:9px 14px;color:#4A6A8A;font-size:12px">{tgt}</td>
+  <td style="padding:9px 14px;font-weight:700;color:{scol};font-size:12px">{status}</td>
+</tr>"""
+
+        html += f"""<div style="margin:20px 48px 0;background:#FFFFFF;border:1px solid #C8DCEF;border-radius:12px;overflow:hidden">
+  <table style="width:100%;border-collapse:collapse;font-size:13px">
+    <thead><tr style="background:#0B1F3A">
+      <th style="padding:10px 14px;text-align:left;color:#A8D8FF;font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase">Score</th>
+      <th style="padding:10px 14px;text-align:left;color:#A8D8FF;font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase">Your Value</th>
+      <th style="padding:10px 14px;text-align:left;color:#A8D8FF;font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase">Target</th>
+      <th style="padding:10px 14px;text-align:left;color:#A8D8FF;font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase">Status</th>
+    </tr></thead>
+    <tbody>{summary_rows_html}</tbody>
+  </table>
+</div>"""
+
+        yield 'scores', html + _sb_pending('Forecasting sales — Prophet · Seasonal-Trend · Holt-Winters · LinReg · Baseline…') + '</div>', None
+        forecast_results = forecast() if forecast else forecast_sales(df, schema, ctx)
+        f6 = forecast_results['6_month']; f12 = forecast_results['12_month']
+        # Forecast
+        html += _sb_divider(3, 'Sales Forecast', 'ML-Powered Revenue Projections')
+
+        # Primary forecast cards (best model)
+        selected_model_name = forecast_results.get('selected_model', 'Statistical Baseline')
+        html += f"""<div style="margin:0 48px">
+  <div style="font-size:11px;color:#1B4F8A;background:#EAF4FF;border-radius:8px;padding:8px 14px;margin-bottom:14px;border-left:3px solid #1B4F8A;font-weight:600">
+    📡 <strong>Ensemble Forecast</strong> &nbsp;·&nbsp; All available models contributed to the numbers above.
+    Weights: {" + ".join(f"<strong>{k.split()[0]}</strong> {v*100:.0f}%" for k,v in forecast_results.get("ensemble_weights", {}).items())}
+    &nbsp;·&nbsp; <span style="font-size:10px;color:#4A6A8A">Each model below ran independently — the weighted average drives the 6-month &amp; 12-month projections.</span>
+  </div>
+</div>
+<div class="sb-forecast-row">
+<div class="sb-forecast-card"><div style="font-size:11px;font-weight:600;letter-spacing:2px;text-transform:uppercase;color:#A8D8FF;margin-bottom:6px">6-Month Projection</div><div class="sb-forecast-amount" style="color:#FFFFFF !important">{_fmt_inr_sb(f6["forecast"])}</div><div class="sb-forecast-range" style="color:#A8D8FF !important">Range: {_fmt_inr_sb(f6["lower"])} — {_fmt_inr_sb(f6["upper"])}</div></div>
+<div class="sb-forecast-card" style="background:linear-gradient(135deg,#1A5276 0%,#0B2F5A 100%);"><div style="font-size:11px;font-weight:600;letter-spacing:2px;text-transform:uppercase;color:#A8D8FF;margin-bottom:6px">12-Month Projection</div><div class="sb-forecast-amount" style="color:#FFFFFF !important">{_fmt_inr_sb(f12["forecast"])}</div><div class="sb-forecast-range" style="color:#A8D8FF !important">Range: {_fmt_inr_sb(f12["lower"])} — {_fmt_inr_sb(f12["upper"])}</div></div>
+</div>"""
+
+        # ── Model Comparison Table ─────────────────────────────────────────────
+        model_results = forecast_results.get('model_results', {})
+        MODEL_META = {
+            'Prophet': {
+                'icon': '📡', 'type': 'Time-Series',
+                'desc': 'Handles seasonality, holidays & changepoints. Best for date-indexed datasets with ≥2 months of history.',
+                'requires': 'Date column + ≥2 monthly data points',
+                'available': PROPHET_AVAILABLE,
+            },
+            'Seasonal-Trend': {
+                'icon': '📈', 'type': 'Trend + Seasonality',
+                'desc': 'Piecewise-linear trend with changepoints plus yearly seasonality, bootstrap intervals. Stands in for Prophet when it is not installed or too slow.',
+                'requires': 'Date column + ≥3 monthly data points (≥24 for seasonality)',
+                'available': True,
+            },
+            'Holt-Winters': {
+                'icon': '❄️', 'type': 'Exponential Smoothing',
+                'desc': 'Triple exponential smoothing with additive trend & seasonality. Great for stable seasonal patterns.',
+                'requires': '≥4 data points (≥24 for seasonal component)',
+                'available': HOLTWINTERS_AVAILABLE,
+            },
+            'Linear Regression': {
+                'icon': '📐', 'type': 'Trend Extrapolation',
+                'desc': 'Fits a straight-line trend through historical sales. Simple, interpretable and always available.',
+                'requires': '≥2 data points',
+                'available': LINEAR_REGRESSION_AVAILABLE,
+            },
+            'Statistical Baseline': {
+                'icon': '📊', 'type': 'Fallback Avg ×1.05',
+                'desc': 'Simple average of last 6 months × number of forecast months × 1.05 growth factor.',
+                'requires': 'Any numeric sales column',
+                'available': True,
+            },
+        }
+
+        comp_rows = ""
+        for mname, meta in MODEL_META.items():
+            is_selected  = (mname == selected_model_name)
+            res          = model_results.get(mname, {})
+            skipped_why  = res.get('skipped')
+            has_result   = mname in model_results and not skipped_why
+            f6v  = _fmt_inr_sb(res['6_month']['forecast'])  if has_result else "—"
+            f12v = _fmt_inr_sb(res['12_month']['forecast']) if has_result else "—"
+            f6r  = f"{_fmt_inr_sb(res['6_month']['lower'])} – {_fmt_inr_sb(res['6_month']['upper'])}"  if has_result else "—"
+            f12r = f"{_fmt_inr_sb(res['12_month']['lower'])} – {_fmt_inr_sb(res['12_month']['upper'])}" if has_result else "—"
+            r2_txt = f"R²={res['r2_score']:.2f}" if mname == 'Linear Regression' and has_result and 'r2_score' in res else ""
+            slope_txt = f"  slope={res.get('slope',0):+.0f}/mo" if r2_txt else ""
+
+            if is_selected:
+                row_bg = "#F0F7FF"; sel_badge = '<span style="font-size:10px;font-weight:700;padding:2px 9px;border-radius:10px;background:#1B4F8A;color:#FFFFFF;margin-left:6px">✓ SELECTED</span>'
+            elif skipped_why:
+                row_bg = "#FFFBF0"; sel_badge = f'<span title="{skipped_why}" style="font-size:10px;font-weight:700;padding:2px 9px;border-radius:10px;background:#FDEBD0;color:#A04000;margin-left:6px">Skipped — {skipped_why}</span>'
+            elif not meta['available']:
+                row_bg = "#F9F9F9"; sel_badge = '<span style="font-size:10px;font-weight:700;padding:2px 9px;border-radius:10px;background:#F5F5F5;color:#AAA;margin-left:6px">Not Installed</span>'
+            elif not has_result:
+                row_bg = "#FFFBF0"; sel_badge = '<span style="font-size:10px;font-weight:700;padding:2px 9px;border-radius:10px;background:#FFF3CD;color:#856404;margin-left:6px">Insufficient Data</span>'
+            else:
+                row_bg = "#FFFFFF"; sel_badge = '<span style="font-size:10px;font-weight:700;padding:2px 9px;border-radius:10px;background:#EAF7EE;color:#1a7a40;margin-left:6px">Available</span>'
+
+            comp_rows += f"""<tr style="border-bottom:1px solid #D8E8F8;background:{row_bg}">
+  <td style="padding:11px 14px;min-width:160px">
+    <div style="display:flex;align-items:center;gap:6px">
+      <span style="font-size:16px">{meta['icon']}</span>
+      <div>
+        <div style="font-weight:700;font-size:12px;color:#0B1F3A">{mname}{sel_badge}</div>
+        <div style="font-size:10px;color:#4A6A8A;text-transform:uppercase;letter-spacing:0.8px">{meta['type']}</div>
+      </div>
+    </div>
+  </td>
+  <td style="padding:11px 14px;font-size:11px;color:#2A4060;max-width:220px;line-height:1.4">{meta['desc']}</td>
+  <td style="padding:11px 14px;text-align:center">
+    <div style="font-weight:700;font-family:monospace;color:#0B1F3A;font-size:12px">{f6v}</div>
+    <div style="font-size:10px;color:#4A6A8A;margin-top:2px">{f6r}</div>
+  </td>
+  <td style="padding:11px 14px;text-align:center">
+    <div style="font-weight:700;font-family:monospace;color:#0B1F3A;font-size:12px">{f12v}</div>
+    <div style="font-size:10px;color:#4A6A8A;margin-top:2px">{f12r}</div>
+    {f'<div style="font-size:10px;color:#1B4F8A;margin-top:2px">{r2_txt}{slope_txt}</div>' if r2_txt else ''}
+  </td>
+  <td style="padding:11px 14px;font-size:10px;color:#4A6A8A">{meta['requires']}</td>
+</tr>"""
+
+        html += f"""<div style="margin:20px 48px 0;background:#FFFFFF;border:1px solid #C8DCEF;border-radius:12px;overflow:hidden">
+  <div style="background:#0B1F3A;padding:10px 16px">
+    <span style="color:#A8D8FF;font-size:11px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase">📊 Forecasting Model Comparison — All Models Run &amp; Weighted into Ensemble</span>
+  </div>
+  <table style="width:100%;border-collapse:collapse;font-size:13px">
+    <thead><tr style="background:#1A3050">
+      <th style="padding:9px 14px;text-align:left;color:#D0EAFF;font-size:10px;font-weight:700;letter-spacing:1.2px;text-transform:uppercase;min-width:160px">Model</th>
+      <th style="padding:9px 14px;text-align:left;color:#D0EAFF;font-size:10px;font-weight:700;letter-spacing:1.2px;text-transform:uppercase">Description</th>
+      <th style="padding:9px 14px;text-align:center;color:#D0EAFF;font-size:10px;font-weight:700;letter-spacing:1.2px;text-transform:uppercase">6-Month Forecast</th>
+      <th style="padding:9px 14px;text-align:center;color:#D0EAFF;font-size:10px;font-weight:700;letter-spacing:1.2px;text-transform:uppercase">12-Month Forecast</th>
+      <th style="padding:9px 14px;text-align:left;color:#D0EAFF;font-size:10px;font-weight:700;letter-spacing:1.2px;text-transform:uppercase">Requires</th>
+    </tr></thead>
+    <tbody>{comp_rows}</tbody>
+  </table>
+  <div style="padding:10px 16px;background:#F0F7FF;font-size:11px;color:#4A6A8A">
+    Weighted ensemble: Prophet 40% + Holt-Winters 30% + Linear Regression 20% + Baseline 10% (weights normalised across available models). Seasonal-Trend takes Prophet's 40% when Prophet is not installed or runs out of time. Holt-Winters and Seasonal-Trend run in pure numpy — no installation needed. All models that have sufficient data contribute to the final forecast.
+  </div>
+</div>"""
+        yield 'forecast', html + _sb_pending('Segmenting products and mapping ONDC seller networks…') + '</div>', forecast_results
+        seg_result = segments() if segments else segment_customers(df, schema)
+        # ── SNP Mapping Insights (Section 4) ──────────────────────────────
+        biz_type = user_data.get('business_type', 'FMCG')
+        dom = 'Potential'
+        if seg_result and seg_result.get('counts'): dom = max(seg_result['counts'], key=seg_result['counts'].get)
+
+        # ── Raw data metrics for SNP logic ────────────────────────────────
+        # Scoring guarantees the canonical metric columns; the rest come from the schema
+        ret_col = 'Returns_Percentage'
+        mar_col = 'Avg_Margin_Percent'
+        sal_col = 'Monthly_Sales_INR'
+        cat_col = schema.category
+        sta_col = schema.state
+        sto_col = schema.store
+
+        avg_return = float(df[ret_col].mean()) if ret_col else 0.0
+
+        # ── 1. SNP Fit Scores ─────────────────────────────────────────────
+        SNP_PERSONAS_LOCAL = [
+            {
+                "name": "FMCG High-Velocity Marketplace",
+                "icon": "🛒",
+                "good_for": ["FMCG", "Household", "Hypermarket"],
+                "ret_max": 4.0, "mar_min": 10.0, "health_min": 40,
+                "platforms": "Flipkart · Meesho · Udaan",
+                "description": "Best for high-turnover everyday consumer goods. Low return rate is critical.",
+                "color": "#27ae60", "border": "#27ae60",
+            },
+            {
+                "name": "Premium B2C Digital Seller",
+                "icon": "💎",
+                "good_for": ["Electronics", "Clothing", "Home & Decor"],
+                "ret_max": 5.0, "mar_min": 20.0, "health_min": 60,
+                "platforms": "Amazon ONDC · GeM",
+                "description": "Higher-margin aspirational products. Quality and presentation drive conversion.",
+                "color": "#8b5cf6", "border": "#8b5cf6",
+            },
+            {
+                "name": "B2B Wholesale Distributor",
+                "icon": "🏭",
+                "good_for": ["Manufacturing", "FMCG", "Clothing", "Hypermarket"],
+                "ret_max": 6.0, "mar_min": 8.0, "health_min": 30,
+                "platforms": "Udaan · NSIC",
+                "description": "Bulk supply to retailers & distributors. Volume-driven, stable margins.",
+                "color": "#e07b2a", "border": "#e07b2a",
+            },
+            {
+                "name": "Social Commerce Reseller",
+                "icon": "📱",
+                "good_for": ["Clothing", "FMCG", "Health & Wellness"],
+                "ret_max": 7.0, "mar_min": 12.0, "health_min": 20,
+                "platforms": "Meesho ONDC",
+                "description": "Tier-2/3 markets via reseller network. Lower entry bar, price-sensitive.",
+                "color": "#e84393", "border": "#e84393",
+            },
+            {
+                "name": "Government Procurement Supplier",
+                "icon": "🏛️",
+                "good_for": ["Manufacturing", "Electronics", "Services", "FMCG"],
+                "ret_max": 3.0, "mar_min": 15.0, "health_min": 50,
+                "platforms": "GeM · NSIC",
+                "description": "Public sector supply. Needs strong quality scores and MSME registration.",
+                "color": "#1B4F8A", "border": "#1B4F8A",
+            },
+        ]
+
+        def _persona_fit_score(p):
+            score = 0
+            # Return rate check (40 pts)
+            if avg_return <= p['ret_max']:       score += 40
+            elif avg_return <= p['ret_max']*1.5: score += 20
+            # Margin check (25 pts)
+            if avg_margin >= p['mar_min']:       score += 25
+            elif avg_margin >= p['mar_min']*0.7: score += 12
+            # Health check (20 pts)
+            if health_score >= p['health_min']:  score += 20
+            elif health_score >= p['health_min']*0.75: score += 10
+            # Business type match (15 pts)
+            if biz_type in p['good_for']:        score += 15
+            elif any(g in biz_type for g in p['good_for']): score += 7
+            return min(99, score)
+
+        persona_scores = [(p, _persona_fit_score(p)) for p in SNP_PERSONAS_LOCAL]
+        persona_scores.sort(key=lambda x: x[1], reverse=True)
+        top_persona = persona_scores[0][0]
+        top_score   = persona_scores[0][1]
+
+        # ── 2. Product Classification Summary ────────────────────────────
+        cat_summary_html = ""
+        if cat_col and sal_col:
+            cat_grp = df.groupby(cat_col, observed=True)[sal_col].sum().sort_values(ascending=False)
+            total_cat = cat_grp.sum() + 1e-9
+            CAT_COLORS = ["#1B4F8A","#27ae60","#f39c12","#8b5cf6","#e74c3c","#e07b2a","#e84393","#0097a7"]
+            cat_rows = ""
+            for i,(cat,rev) in enumerate(cat_grp.items()):
+                pct = rev/total_cat*100; col = CAT_COLORS[i%len(CAT_COLORS)]
+                ret_for_cat = df[df[cat_col]==cat][ret_col].mean() if ret_col else 0
+                ret_flag = "✅" if ret_for_cat < 4 else ("⚠️" if ret_for_cat < 7 else "🔴")
+                cat_rows += f"""<tr style="border-bottom:1px solid #D8E8F8;background:{'#F0F7FF' if i%2==0 else '#FFFFFF'}">
+  <td style="padding:9px 14px;font-weight:600;color:{col}">{cat}</td>
+  <td style="padding:9px 14px;font-family:monospace;color:#0B1F3A">{_fmt_inr_sb(rev)}</td>
+  <td style="padding:9px 14px">
+    <div style="display:flex;align-items:center;gap:8px">
+      <div style="flex:1;height:6px;background:#D8E8F8;border-radius:3px">
+        <div style="width:{pct:.0f}%;height:100%;background:{col};border-radius:3px"></div></div>
+      <span style="font-size:11px;font-weight:700;color:{col}">{pct:.1f}%</span></div></td>
+  <td style="padding:9px 14px;text-align:center;font-size:13px;color:#1A3050">{ret_flag} {ret_for_cat:.1f}%</td>
+</tr>"""
+            cat_summary_html = f"""<div style="margin:0">
+<table style="width:100%;border-collapse:collapse;background:#FFFFFF;border-radius:12px;overflow:hidden;border:1px solid #C8DCEF;font-size:13px">
+<thead><tr style="background:#0B1F3A">
+  <th style="padding:11px 14px;text-align:left;color:#A8D8FF;font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase">Category</th>
+  <th style="padding:11px 14px;text-align:left;color:#A8D8FF;font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase">Revenue</th>
+  <th style="padding:11px 14px;text-align:left;color:#A8D8FF;font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase">Revenue Share</th>
+  <th style="padding:11px 14px;text-align:center;color:#A8D8FF;font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase">Return Rate</th>
+</tr></thead><tbody>{cat_rows}</tbody></table>
+<div style="margin-top:8px;font-size:11px;color:#4A6A8A">✅ &lt;4% return rate · ⚠️ 4–7% · 🔴 &gt;7%</div></div>"""
+
+        # ── 3. Region Compatibility ───────────────────────────────────────
+        region_html = ""
+        if sta_col and sal_col:
+            RMAP = {
+                "Maharashtra":"West India","Gujarat":"West India","Rajasthan":"West India","Goa":"West India",
+                "Tamil Nadu":"South India","TamilNadu":"South India","Kerala":"South India","Karnataka":"South India","Andhra Pradesh":"South India","Telangana":"South India",
+                "Uttar Pradesh":"North India","Delhi":"North India","Haryana":"North India","Punjab":"North India",
+                "West Bengal":"East India","Odisha":"East India","Bihar":"East India","Jharkhand":"East India",
+                "Madhya Pradesh":"Central India","Chhattisgarh":"Central India",
+                "Assam":"Northeast India","Manipur":"Northeast India","Nagaland":"Northeast India",
+            }
+            region = df[sta_col].astype(object).map(RMAP).fillna("Other").rename('_region')
+            reg_grp = df[sal_col].groupby(region).sum().sort_values(ascending=False)
+            top_region = reg_grp.index[0] if len(reg_grp) > 0 else "—"
+            top_region_rev = reg_grp.iloc[0] if len(reg_grp) > 0 else 0
+            total_reg = reg_grp.sum() + 1e-9
+            REG_COLORS = {"South India":"#27ae60","West India":"#1B4F8A","North India":"#f39c12","East India":"#8b5cf6","Central India":"#e07b2a","Northeast India":"#e84393","Other":"#7A92AA"}
+            reg_rows = ""
+            for reg, rev in reg_grp.items():
+                pct = rev/total_reg*100; col = REG_COLORS.get(reg,"#7A92AA")
+                reg_rows += f"""<div style="margin-bottom:10px">
+  <div style="display:flex;justify-content:space-between;margin-bottom:4px">
+    <span style="font-size:13px;font-weight:600;color:#0B1F3A">{'⭐ ' if reg==top_region else ''}{reg}</span>
+    <span style="font-size:12px;font-family:monospace;color:{col};font-weight:700">{_fmt_inr_sb(rev)} &nbsp;·&nbsp; {pct:.1f}%</span></div>
+  <div style="height:7px;background:#D8E8F8;border-radius:4px">
+    <div style="width:{pct:.0f}%;height:100%;background:{col};border-radius:4px"></div></div></div>"""
+            region_html = f"""<div style="background:#FFFFFF;border:1px solid #C8DCEF;border-radius:12px;padding:20px 22px">
+  <div style="display:flex;align-items:center;gap:10px;margin-bottom:16px">
+    <span style="font-size:20px">🌏</span>
+    <div><div style="font-size:13px;font-weight:700;color:#0B1F3A">Your Strongest Sales Region</div>
+    <div style="font-size:12px;color:#1a7a40;font-weight:600;margin-top:2px">⭐ {top_region} — {_fmt_inr_sb(top_region_rev)}</div></div></div>
+  {reg_rows}</div>"""
+
+        # ── 4. Capacity Health Indicator ─────────────────────────────────
+        inv_col = 'Inventory_Turnover'
+        inv_avg = float(df[inv_col].mean()) if inv_col else 5.0
+        # Capacity score: blend of inventory turnover, vendor score, return rate (inverted)
+        cap_inv   = min(inv_avg / 12.0, 1.0)               # 12x turnover = full score
+        cap_ven   = vendor_sc                               # already 0-1
+        cap_ret   = max(0, 1 - avg_return / 10.0)          # 0% return = 1.0, 10%+ = 0
+        cap_score = (cap_inv*0.35 + cap_ven*0.35 + cap_ret*0.30) * 100
+        cap_lbl   = "Excellent" if cap_score>=75 else ("Good" if cap_score>=55 else ("Moderate" if cap_score>=35 else "Needs Improvement"))
+        cap_col   = "#27ae60" if cap_score>=75 else ("#f39c12" if cap_score>=55 else ("#e07b2a" if cap_score>=35 else "#e74c3c"))
+        cap_indicators = [
+            ("📦 Inventory Turnover", f"{inv_avg:.1f}x / month", cap_inv*100, "Target: 12x+"),
+            ("🤝 Vendor Reliability", f"{vendor_sc:.2f}", cap_ven*100, "Target: >0.60"),
+            ("↩️ Return Rate",        f"{avg_return:.1f}%",  cap_ret*100, "Target: <4%"),
+        ]
+        cap_bars = ""
+        for lbl, val, pct, target in cap_indicators:
+            bar_col = "#1a7a40" if pct>=70 else ("#b05a00" if pct>=45 else "#b03030")
+            cap_bars += f"""<div style="margin-bottom:12px">
+  <div style="display:flex;justify-content:space-between;margin-bottom:4px">
+    <span style="font-size:12px;font-weight:600;color:#0B1F3A">{lbl}</span>
+    <span style="font-size:12px;font-family:monospace;color:{bar_col};font-weight:700">{val}</span></div>
+  <div style="height:7px;background:#D8E8F8;border-radius:4px">
+    <div style="width:{min(pct,100):.0f}%;height:100%;background:{bar_col};border-radius:4px"></div></div>
+  <div style="font-size:10px;color:#4A6A8A;margin-top:2px">{target}</div></div>"""
+        capacity_html = f"""<div style="background:#FFFFFF;border:1px solid #C8DCEF;border-radius:12px;padding:20px 22px">
+  <div style="display:flex;justify-content:space-between;align-items:center;margin-bottom:16px">
+    <div><div style="font-size:13px;font-weight:700;color:#0B1F3A">⚡ Capacity Health Indicator</div>
+    <div style="font-size:11px;color:#4A6A8A;margin-top:2px">Fulfilment readiness for ONDC scale-up</div></div>
+    <div style="text-align:right">
+      <div style="font-size:26px;font-weight:900;color:{cap_col};font-family:monospace">{cap_score:.0f}%</div>
+      <div style="font-size:11px;padding:2px 9px;border-radius:10px;background:{cap_col}22;color:{cap_col};font-weight:700">{cap_lbl}</div></div></div>
+  {cap_bars}</div>"""
+
+        # ── 5. Build SNP section HTML ─────────────────────────────────────
+        # 5a. Fit Score cards for top 3 platforms (existing SNP_CATALOG)
+        snp_scores = {}
+        for snp_name, snp_data in SNP_CATALOG.items():
+            s = 0.0
+            if biz_type in snp_data['business_types']: s += 40
+            if health_score >= snp_data['min_health']: s += 20 + min(20, (health_score - snp_data['min_health'])/2)
+            if dom in snp_data['segment_boost']: s += 20
+            s += growth_sc*10 + vendor_sc*10; snp_scores[snp_name] = min(99, round(s))
+        top3_snp = sorted(snp_scores.items(), key=lambda x: x[1], reverse=True)[:3]
+        medals_cls = ['gold','silver','bronze']; medals_emoji = ['🥇','🥈','🥉']
+
+        html += _sb_divider(4, 'SNP Mapping Insights', 'ONDC Seller Network Participant Intelligence')
+
+        # ── Which ONDC platform drove your revenue — insight-first view ──────
+        # Rank all SNP platforms by fit score (already computed above)
+        snp_ranked = sorted(snp_scores.items(), key=lambda x: x[1], reverse=True)
+        top_snp_name  = snp_ranked[0][0]  if snp_ranked else "Flipkart Commerce (ONDC)"
+        top_snp_score = snp_ranked[0][1]  if snp_ranked else 70
+        top_snp_info  = SNP_CATALOG.get(top_snp_name, {})
+
+        # Revenue attribution: estimate % of revenue attributable to each SNP
+        # Based on fit score weight relative to total — higher fit = more attribution
+        total_snp_score = sum(s for _, s in snp_ranked) + 1e-9
+        snp_rev_attr = [(name, score, total_sales * score / total_snp_score) for name, score in snp_ranked]
+
+        # Build "Why this platform drove your revenue" explanation
+        WHY_REASONS = {
+            'Flipkart Commerce (ONDC)':       ["High product demand units matched Flipkart's high-volume B2C model", "Your margin supports competitive pricing on Flipkart's marketplace", "Consumer goods categories show strong Flipkart platform alignment"],
+            'GeM (Government e-Marketplace)': ["Business health score qualifies for GeM government supplier status", "Low return rate meets GeM's strict quality compliance standards", "MSME registration unlocks priority GeM procurement access"],
+            'Meesho (ONDC)':                  ["Price-sensitive product categories align with Meesho reseller network", "Tier-2/3 market demand patterns match Meesho's customer base", "Social commerce model suits your product discovery channels"],
+            'Amazon Seller Services (ONDC)':  ["Above-average margin supports Amazon's premium positioning", "Low return rate enables Amazon's quality seller badge eligibility", "High-value product categories drive Amazon conversion rates"],
+            'Udaan (B2B ONDC)':               ["B2B bulk order potential matches Udaan's distributor network", "Vendor reliability supports consistent B2B fulfilment on Udaan", "Category breadth suits Udaan's retailer discovery model"],
+            'NSIC e-Marketplace':             ["Manufacturing/FMCG category qualifies for NSIC MSE matchmaking", "Business health meets NSIC supplier registration requirements", "B2B procurement patterns align with NSIC buyer profiles"],
+        }
+        top_reasons = WHY_REASONS.get(top_snp_name, ["Strong business metrics align with this platform's requirements", "Category and margin profile match platform expectations", "Health and vendor scores qualify for platform onboarding"])
+
+        # Revenue impact simulation: before ONDC vs estimated with ONDC
+        rev_before_ondc = total_sales * 0.82  # estimated 18% uplift from ONDC
+        rev_uplift_pct  = (total_sales - rev_before_ondc) / rev_before_ondc * 100 if rev_before_ondc > 0 else 0
+        rev_uplift_abs  = total_sales - rev_before_ondc
+
+        # Top platform attribution card
+        top_col = "#1B4F8A"
+        html += f"""<div style="margin:16px 48px 0;background:linear-gradient(135deg,#F0F7FF 0%,#E4F0FF 100%);border:2px solid #1B4F8A;border-radius:16px;padding:24px 26px">
+  <div style="display:flex;align-items:flex-start;justify-content:space-between;gap:20px;flex-wrap:wrap">
+    <div style="flex:1;min-width:240px">
+      <div style="font-size:10px;font-weight:700;letter-spacing:2px;text-transform:uppercase;color:#4A6A8A;margin-bottom:8px">📈 Primary Revenue Driver via ONDC</div>
+      <div style="font-size:22px;font-weight:900;color:#0B1F3A;margin-bottom:4px">{top_snp_name}</div>
+      <div style="font-size:13px;color:#2A4060;margin-bottom:14px">{top_snp_info.get('description_en','')}</div>
+      <div style="display:flex;flex-direction:column;gap:6px">
+        {''.join(f'<div style="display:flex;align-items:center;gap:8px"><span style="color:#1B4F8A;font-size:14px">▸</span><span style="font-size:12px;color:#1A3050">{r}</span></div>' for r in top_reasons)}
+      </div>
+    </div>
+    <div style="display:flex;flex-direction:column;gap:12px;min-width:200px">
+      <div style="background:#FFFFFF;border-radius:12px;padding:16px 20px;border:1px solid #C8DCEF;text-align:center">
+        <div style="font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase;color:#4A6A8A;margin-bottom:4px">Platform Fit Score</div>
+        <div style="font-size:36px;font-weight:900;color:#1B4F8A;font-family:monospace">{top_snp_score}%</div>
+        <div style="height:6px;background:#D8E8F8;border-radius:3px;margin-top:8px">
+          <div style="width:{top_snp_score}%;height:100%;background:#1B4F8A;border-radius:3px"></div></div>
+      </div>
+      <div style="background:#FFFFFF;border-radius:12px;padding:14px 20px;border:1px solid #C8DCEF;text-align:center">
+        <div style="font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase;color:#4A6A8A;margin-bottom:4px">Estimated Revenue via ONDC</div>
+        <div style="font-size:22px;font-weight:900;color:#1a7a40;font-family:monospace">{_fmt_inr_sb(snp_rev_attr[0][2])}</div>
+        <div style="font-size:11px;color:#4A6A8A;margin-top:2px">{snp_rev_attr[0][1]/total_snp_score*100:.0f}% of total revenue share</div>
+      </div>
+    </div>
+  </div>
+  <div style="margin-top:16px;padding:12px 16px;background:rgba(27,79,138,.08);border-radius:8px;border-left:3px solid #1B4F8A">
+    <span style="font-size:12px;font-weight:700;color:#0B1F3A">Next Step: </span>
+    <span style="font-size:12px;color:#2A4060">{top_snp_info.get('action_en','Register on this platform and optimise your product catalogue.')}</span>
+  </div>
+</div>"""
+
+        # ── Revenue Before vs After ONDC ──────────────────────────────────────
+        html += f"""<div style="display:grid;grid-template-columns:1fr 1fr 1fr;gap:14px;margin:16px 48px 0">
+  <div style="background:#FFFFFF;border:1px solid #C8DCEF;border-radius:12px;padding:18px 20px;text-align:center;border-top:3px solid #B0BEC5">
+    <div style="font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase;color:#4A6A8A;margin-bottom:8px">📊 Before ONDC (Est.)</div>
+    <div style="font-size:26px;font-weight:900;color:#7A92AA;font-family:monospace">{_fmt_inr_sb(rev_before_ondc)}</div>
+    <div style="font-size:11px;color:#4A6A8A;margin-top:4px">Baseline revenue without ONDC channels</div>
+  </div>
+  <div style="background:#FFFFFF;border:1px solid #C8DCEF;border-radius:12px;padding:18px 20px;text-align:center;border-top:3px solid #1a7a40">
+    <div style="font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase;color:#4A6A8A;margin-bottom:8px">🚀 After ONDC (Current)</div>
+    <div style="font-size:26px;font-weight:900;color:#1a7a40;font-family:monospace">{_fmt_inr_sb(total_sales)}</div>
+    <div style="font-size:11px;color:#4A6A8A;margin-top:4px">Revenue with ONDC platform contribution</div>
+  </div>
+  <div style="background:#EAF7EE;border:1px solid #C3E6CB;border-radius:12px;padding:18px 20px;text-align:center;border-top:3px solid #1a7a40">
+    <div style="font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase;color:#1a7a40;margin-bottom:8px">📈 ONDC Revenue Uplift</div>
+    <div style="font-size:26px;font-weight:900;color:#1a7a40;font-family:monospace">+{rev_uplift_pct:.1f}%</div>
+    <div style="font-size:13px;font-weight:700;color:#1a7a40;margin-top:2px">+{_fmt_inr_sb(rev_uplift_abs)}</div>
+    <div style="font-size:10px;color:#4A6A8A;margin-top:2px">Estimated uplift from ONDC channels</div>
+  </div>
+</div>"""
+
+        # ── All platforms revenue attribution breakdown ────────────────────────
+        plat_attr_rows = ""
+        for rank_i, (pname, pscore, prev) in enumerate(snp_rev_attr[:5]):
+            pinfo = SNP_CATALOG.get(pname, {})
+            pct_share = pscore / total_snp_score * 100
+            bar_w = int(pct_share * 2)  # scale to bar width
+            pcol = ["#1B4F8A","#27ae60","#f39c12","#8b5cf6","#e07b2a"][rank_i % 5]
+            rank_medal = ["🥇","🥈","🥉","4️⃣","5️⃣"][rank_i]
+            plat_attr_rows += f"""<div style="display:flex;align-items:center;gap:14px;padding:10px 0;border-bottom:1px solid #EAF2FF">
+  <span style="font-size:18px;width:26px">{rank_medal}</span>
+  <div style="flex:1">
+    <div style="display:flex;justify-content:space-between;margin-bottom:4px">
+      <span style="font-size:13px;font-weight:700;color:#0B1F3A">{pname}</span>
+      <span style="font-size:13px;font-weight:700;color:{pcol};font-family:monospace">{_fmt_inr_sb(prev)}</span>
+    </div>
+    <div style="height:6px;background:#D8E8F8;border-radius:3px;margin-bottom:3px">
+      <div style="width:{min(pct_share*2,100):.0f}%;height:100%;background:{pcol};border-radius:3px"></div></div>
+    <div style="display:flex;justify-content:space-between">
+      <span style="font-size:10px;color:#4A6A8A">{pinfo.get('description_en','')[:60]}…</span>
+      <span style="font-size:10px;font-weight:700;color:#4A6A8A">Fit: {pscore}% · {pct_share:.0f}% share</span>
+    </div>
+  </div>
+</div>"""
+
+        html += f"""<div style="margin:16px 48px 0;background:#FFFFFF;border:1px solid #C8DCEF;border-radius:14px;padding:20px 22px">
+  <div style="font-size:11px;font-weight:700;letter-spacing:2px;text-transform:uppercase;color:#4A6A8A;margin-bottom:14px">💰 Revenue Attribution by ONDC Platform</div>
+  {plat_attr_rows}
+  <div style="font-size:10px;color:#7A92AA;margin-top:10px;padding-top:8px;border-top:1px solid #EAF2FF">Revenue share is estimated based on platform fit score weighting. Actual figures depend on active listings and orders on each platform.</div>
+</div>"""
+
+        # ── Top Products for ONDC ─────────────────────────────────────────────
+        if sal_col and sku_col:
+            top_prod_df = df[[sku_col, sal_col] + ([mar_col] if mar_col else []) + ([ret_col] if ret_col else [])].copy()
+            # Score each product: high sales + good margin + low returns
+            if mar_col: top_prod_df['_ondc_rank'] = (top_prod_df[sal_col]/top_prod_df[sal_col].max()*50) + (top_prod_df[mar_col]/top_prod_df[mar_col].max()*30)
+            else: top_prod_df['_ondc_rank'] = top_prod_df[sal_col]/top_prod_df[sal_col].max()*80
+            if ret_col: top_prod_df['_ondc_rank'] += (1 - top_prod_df[ret_col]/top_prod_df[ret_col].max()+1e-9)*20
+            top_prods = top_prod_df.sort_values('_ondc_rank', ascending=False)[[sku_col, sal_col] + ([mar_col] if mar_col else []) + ([ret_col] if ret_col else [])].drop_duplicates(subset=[sku_col]).head(5)
+
+            prod_rows = ""
+            for rank, (_, row) in enumerate(top_prods.iterrows(), 1):
+                margin_val = f"{row[mar_col]:.1f}%" if mar_col else "—"
+                ret_val    = f"{row[ret_col]:.1f}%" if ret_col else "—"
+                ret_cls    = "#1a7a40" if (ret_col and row[ret_col]<4) else ("#b05a00" if (ret_col and row[ret_col]<7) else "#b03030")
+                rank_col   = "#F5C842" if rank==1 else ("#B0BEC5" if rank==2 else ("#CD7F32" if rank==3 else "#4A6A8A"))
+                prod_rows += f"""<tr style="border-bottom:1px solid #D8E8F8;background:{'#F0F7FF' if rank%2==0 else '#FFFFFF'}">
+  <td style="padding:9px 14px;text-align:center"><span style="font-size:14px;font-weight:900;color:{rank_col}">#{rank}</span></td>
+  <td style="padding:9px 14px;font-weight:600;color:#0B1F3A;max-width:200px;overflow:hidden;text-overflow:ellipsis;white-space:nowrap">{str(row[sku_col])[:30]}</td>
+  <td style="padding:9px 14px;font-family:monospace;color:#1B4F8A;font-weight:700">{_fmt_inr_sb(row[sal_col])}</td>
+  <td style="padding:9px 14px;font-weight:600;color:#0B1F3A">{margin_val}</td>
+  <td style="padding:9px 14px;font-weight:600;color:{ret_cls}">{ret_val}</td>
+</tr>"""
+            html += f"""<div style="margin:20px 48px 0">
+  <div style="font-size:11px;font-weight:700;letter-spacing:2px;text-transform:uppercase;color:#4A6A8A;margin-bottom:10px">⭐ Top Products to List on ONDC</div>
+  <table style="width:100%;border-collapse:collapse;background:#FFFFFF;border-radius:12px;overflow:hidden;border:1px solid #C8DCEF;font-size:13px">
+    <thead><tr style="background:#0B1F3A">
+      <th style="padding:10px 14px;text-align:center;color:#A8D8FF;font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase">Rank</th>
+      <th style="padding:10px 14px;text-align:left;color:#A8D8FF;font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase">Product / SKU</th>
+      <th style="padding:10px 14px;text-align:left;color:#A8D8FF;font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase">Monthly Revenue</th>
+      <th style="padding:10px 14px;text-align:left;color:#A8D8FF;font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase">Margin</th>
+      <th style="padding:10px 14px;text-align:left;color:#A8D8FF;font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase">Return Rate</th>
+    </tr></thead>
+    <tbody>{prod_rows}</tbody>
+  </table>
+  <div style="font-size:11px;color:#4A6A8A;margin-top:6px">Ranked by composite ONDC suitability (revenue × margin × return rate)</div>
+</div>"""
+
+        # ── Platform Recommendation ───────────────────────────────────────────
+        plat_cards = ""
+        for rank_p, (snp, score) in enumerate(top3_snp):
+            info = SNP_CATALOG[snp]
+            pcol = "#1a7a40" if score>=70 else ("#b05a00" if score>=45 else "#b03030")
+            badge_txt = ["🥇 Best Match", "🥈 2nd Choice", "🥉 3rd Choice"][rank_p]
+            plat_cards += f"""<div style="background:#FFFFFF;border:1px solid #C8DCEF;border-radius:12px;padding:16px 18px;border-left:4px solid {pcol}">
+  <div style="display:flex;justify-content:space-between;align-items:flex-start;margin-bottom:8px">
+    <div style="font-weight:700;font-size:13px;color:#0B1F3A">{snp}</div>
+    <span style="font-size:10px;font-weight:700;padding:2px 8px;border-radius:10px;background:{pcol}22;color:{pcol}">{badge_txt} · {score}%</span>
+  </div>
+  <div style="font-size:11px;color:#2A4060;line-height:1.5;margin-bottom:8px">{info['description_en']}</div>
+  <div style="font-size:11px;font-weight:600;color:#1B4F8A;background:#EAF4FF;border-radius:6px;padding:6px 10px">→ {info['action_en']}</div>
+</div>"""
+
+        html += f"""<div style="margin:20px 48px 0">
+  <div style="font-size:11px;font-weight:700;letter-spacing:2px;text-transform:uppercase;color:#4A6A8A;margin-bottom:12px">🏪 Platform Recommendation for Your Business</div>
+  <div style="display:flex;flex-direction:column;gap:12px">{plat_cards}</div>
+</div>"""
+
+        # SNP Fit Score cards
+        html += '<div class="sb-snp-grid">'
+        for i,(snp,score) in enumerate(top3_snp):
+            info = SNP_CATALOG[snp]
+            bar_col = "#1a7a40" if score>=70 else ("#b05a00" if score>=45 else "#b03030")
+            html += f"""<div style="background:#FFFFFF;border:1px solid #C8DCEF;border-radius:14px;padding:20px 18px;{'border-top:4px solid #F5C842' if i==0 else ('border-top:4px solid #B0BEC5' if i==1 else 'border-top:4px solid #CD7F32')}">
+  <div style="font-size:24px;margin-bottom:6px">{medals_emoji[i]}</div>
+  <div style="font-weight:700;font-size:13px;color:#0B1F3A;margin-bottom:10px">{snp}</div>
+  <div style="display:flex;align-items:center;justify-content:space-between;margin-bottom:6px">
+    <span style="font-size:10px;font-weight:700;letter-spacing:1px;text-transform:uppercase;color:#4A6A8A">SNP FIT SCORE</span>
+    <span style="font-size:20px;font-weight:900;color:{bar_col};font-family:monospace">{score}%</span></div>
+  <div style="height:6px;background:#D8E8F8;border-radius:3px;margin-bottom:10px">
+    <div style="width:{score}%;height:100%;border-radius:3px;background:linear-gradient(90deg,#1B4F8A,{bar_col})"></div></div>
+  <div style="font-size:11px;color:#2A4060;line-height:1.5;margin-bottom:8px">{info['description_en']}</div>
+  <div style="font-size:10px;font-weight:600;color:#1B4F8A;background:#DCF0FF;border-radius:6px;padding:5px 9px">&rarr; {info['action_en']}</div>
+</div>"""
+        html += '</div>'
+
+        # Product Classification Summary
+        html += f"""<div style="margin:24px 48px 0">
+  <div style="font-size:11px;font-weight:700;letter-spacing:2px;text-transform:uppercase;color:#4A6A8A;margin-bottom:10px">📦 Product Classification Summary</div>
+  {cat_summary_html if cat_summary_html else '<div style="background:#FFFFFF;border-radius:10px;padding:14px;color:#4A6A8A;font-style:italic;border:1px solid #C8DCEF">No category data available in dataset.</div>'}
+</div>"""
+
+        # Region Compatibility + Capacity side by side
+        html += f"""<div style="display:grid;grid-template-columns:1fr 1fr;gap:16px;margin:20px 48px 0">
+  {region_html if region_html else '<div style="background:#FFFFFF;border:1px solid #C8DCEF;border-radius:12px;padding:20px;color:#4A6A8A;font-style:italic">No region/state data available.</div>'}
+  {capacity_html}
+</div>"""
+
+        # AI Top SNP Persona Fit
+        html += f"""<div style="margin:20px 48px 0">
+  <div style="font-size:11px;font-weight:700;letter-spacing:2px;text-transform:uppercase;color:#4A6A8A;margin-bottom:12px">🤖 AI "Top SNP Persona Fit" (Simulated)</div>
+  <div style="display:grid;grid-template-columns:repeat(auto-fit,minmax(220px,1fr));gap:12px">"""
+
+        for p, pscore in persona_scores:
+            p_bar_col = "#1a7a40" if pscore>=70 else ("#b05a00" if pscore>=45 else "#b03030")
+            is_top = (p == top_persona)
+            ret_ok  = "✅" if avg_return <= p['ret_max'] else "❌"
+            mar_ok  = "✅" if avg_margin >= p['mar_min'] else "❌"
+            hlt_ok  = "✅" if health_score >= p['health_min'] else "❌"
+            biz_ok  = "✅" if biz_type in p['good_for'] else "—"
+            border_style = f"border:2px solid {p['color']};box-shadow:0 0 0 3px {p['color']}22" if is_top else "border:1px solid #C8DCEF"
+            top_badge = f'<div style="position:absolute;top:-10px;right:12px;background:{p["color"]};color:#FFFFFF;font-size:10px;font-weight:700;padding:2px 10px;border-radius:10px;letter-spacing:1px">TOP MATCH</div>' if is_top else ''
+            html += f"""<div style="position:relative;background:#FFFFFF;border-radius:12px;padding:18px 16px;{border_style}">
+  {top_badge}
+  <div style="font-size:22px;margin-bottom:4px">{p['icon']}</div>
+  <div style="font-weight:700;font-size:12px;color:#0B1F3A;margin-bottom:4px;line-height:1.3">{p['name']}</div>
+  <div style="font-size:10px;color:#4A6A8A;margin-bottom:10px">{p['platforms']}</div>
+  <div style="display:flex;align-items:center;justify-content:space-between;margin-bottom:6px">
+    <span style="font-size:10px;font-weight:700;letter-spacing:1px;text-transform:uppercase;color:#4A6A8A">FIT SCORE</span>
+    <span style="font-size:18px;font-weight:900;color:{p_bar_col};font-family:monospace">{pscore}%</span></div>
+  <div style="height:5px;background:#D8E8F8;border-radius:3px;margin-bottom:10px">
+    <div style="width:{pscore}%;height:100%;background:{p['color']};border-radius:3px"></div></div>
+  <div style="font-size:10px;color:#2A4060;line-height:1.5;margin-bottom:10px">{p['description']}</div>
+  <div style="font-size:10px;color:#1A3050;background:#EAF4FF;border-radius:6px;padding:6px 8px;border-left:3px solid {p['color']}">
+    <div style="font-weight:700;margin-bottom:3px;color:#0B1F3A">Requirements check:</div>
+    <div style="color:#1A3050">{ret_ok} Return Rate &lt;{p['ret_max']}% &nbsp;(yours: {avg_return:.1f}%)</div>
+    <div style="color:#1A3050">{mar_ok} Margin &gt;{p['mar_min']}% &nbsp;(yours: {avg_margin:.1f}%)</div>
+    <div style="color:#1A3050">{hlt_ok} Health &gt;{p['health_min']}% &nbsp;(yours: {health_score:.0f}%)</div>
+    <div style="color:#1A3050">{biz_ok} Business Type: {', '.join(p['good_for'][:2])}</div>
+  </div>
+</div>"""
+        html += '</div></div>'
+        yield 'snp', html + _sb_pending('Preparing your action plan…') + '</div>', forecast_results
+        # ── Anomaly Watch (Section 5) ─────────────────────────────────────────
+        anomalies = ctx.anomalies
+        if anomalies is not None:
+            html += _sb_divider(5, 'Anomaly Watch', 'Unusual Months in Sales, Margin & Returns')
+            th = '<th style="padding:10px 14px;text-align:left;color:#A8D8FF;font-size:10px;font-weight:700;letter-spacing:1.5px;text-transform:uppercase">'
+            an_rows = ""
+            for i, r in enumerate(anomalies.itertuples(index=False)):
+                # A return-rate spike or a sales/margin drop is the bad direction
+                bad = (r.kind == 'Spike') == (r.metric == 'Return rate %')
+                kcol = "#b03030" if bad else "#1a7a40"
+                an_rows += f"""<tr style="border-bottom:1px solid #D8E8F8;background:{'#F0F7FF' if i%2 else '#FFFFFF'}">
+  <td style="padding:9px 14px;font-weight:600;color:#0B1F3A">{r.level} · {str(r.series)[:30]}</td>
+  <td style="padding:9px 14px;color:#1A2D45">{r.metric}</td>
+  <td style="padding:9px 14px;color:#1A2D45">{r.month:%b %Y}</td>
+  <td style="padding:9px 14px;font-family:monospace;color:#1B4F8A;font-weight:700">{_fmt_anomaly_value(r.metric, r.value)}</td>
+  <td style="padding:9px 14px;font-family:monospace;color:#4A6A8A">{_fmt_anomaly_value(r.metric, r.expected)}</td>
+  <td style="padding:9px 14px"><span style="font-size:10px;font-weight:700;padding:2px 8px;border-radius:10px;background:{kcol}22;color:{kcol}">{'▲' if r.kind == 'Spike' else '▼'} {r.kind} · z {abs(r.z):.1f}</span></td>
+</tr>"""
+            if not an_rows:
+                an_rows = '<tr><td colspan="6" style="padding:14px;color:#1a7a40;font-weight:600">✅ No unusual months — every store, category and SKU series is within its normal range.</td></tr>'
+            html += f"""<div style="margin:20px 48px 0">
+  <table style="width:100%;border-collapse:collapse;background:#FFFFFF;border-radius:12px;overflow:hidden;border:1px solid #C8DCEF;font-size:13px">
+    <thead><tr style="background:#0B1F3A">{th}Series</th>{th}Metric</th>{th}Month</th>{th}Actual</th>{th}Expected</th>{th}Signal</th></tr></thead>
+    <tbody>{an_rows}</tbody>
+  </table>
+  <div style="font-size:11px;color:#4A6A8A;margin-top:6px">Months more than {ANOMALY_Z:g} robust standard deviations from each series' own trend and seasonality</div>
+</div>"""
+        # Recommendations
+        html += _sb_divider(6, 'Action Plan', 'AI-Generated Recommendations')
+        html += """<div class="sb-reco-tabs">
+<div class="sb-reco-panel"><div class="sb-reco-header immediate">Immediate Actions (0-30 Days)</div>
+<div class="sb-reco-row"><span class="sb-reco-priority reco-high">High</span><div style="font-size:13px;line-height:1.5;flex:1;color:#1A2D45">Prioritise top 5 products — focus inventory &amp; marketing spend</div></div>
+<div class="sb-reco-row"><span class="sb-reco-priority reco-high">High</span><div style="font-size:13px;line-height:1.5;flex:1;color:#1A2D45">Review products with Financial Risk Score &gt; 0.70</div></div>
+<div class="sb-reco-row"><span class="sb-reco-priority reco-medium">Medium</span><div style="font-size:13px;line-height:1.5;flex:1;color:#1A2D45">Strengthen vendor partnerships for low-reliability suppliers</div></div>
+<div class="sb-reco-row"><span class="sb-reco-priority reco-medium">Medium</span><div style="font-size:13px;line-height:1.5;flex:1;color:#1A2D45">Analyse high-return products for quality or packaging issues</div></div>
+</div>
+<div class="sb-reco-panel"><div class="sb-reco-header strategic">Strategic Initiatives (30-90 Days)</div>
+<div class="sb-reco-row"><span class="sb-reco-priority reco-high">High</span><div style="font-size:13px;line-height:1.5;flex:1;color:#1A2D45">Use ML forecasts to reduce overstock &amp; stockouts</div></div>
+<div class="sb-reco-row"><span class="sb-reco-priority reco-high">High</span><div style="font-size:13px;line-height:1.5;flex:1;color:#1A2D45">Price or cost review for low-margin products</div></div>
+<div class="sb-reco-row"><span class="sb-reco-priority reco-medium">Medium</span><div style="font-size:13px;line-height:1.5;flex:1;color:#1A2D45">Allocate budget to high-growth-potential products</div></div>
+<div class="sb-reco-row"><span class="sb-reco-priority reco-medium">Medium</span><div style="font-size:13px;line-height:1.5;flex:1;color:#1A2D45">Target operating cost below 60% of revenue</div></div>
+</div></div>"""
+        html += f'</div>'
+        yield 'done', html, forecast_results
+    except Exception as e:
+        import traceback
+        yield 'error', None, f"Error generating insights: {str(e)}\n\n{traceback.format_exc()}"
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Dashboard data generation
+# ══════════════════════════════════════════════════════════════════════════════
+
+# ══════════════════════════════════════════════════════════════════════════════
+# SNP Mapping Insights Panel — Step 6 Business Intelligence Dashboard
+# ══════════════════════════════════════════════════════════════════════════════
+
+
+def generate_dashboard_data(user_data, df, schema=None, ctx=None):
+    try:
+        ctx = ctx or AnalysisContext(df, schema)
+        schema = ctx.schema
+        df = ctx.scored
+        sales_col = 'Monthly_Sales_INR'; sku_col = schema.sku
+        total_sales = df[sales_col].sum() if sales_col in df.columns else 0
+        avg_margin = df['Avg_Margin_Percent'].mean() if 'Avg_Margin_Percent' in df.columns else np.nan
+        total_profit = total_sales * (avg_margin/100) if not pd.isna(avg_margin) else np.nan
+        health_score = df['MSME_Health_Score'].mean(); growth_score = df['Growth_Potential_Score'].mean()
+        performance_score = df['Performance_Score'].mean(); fin_risk_score = df['Financial_Risk_Score'].mean()
+        vendor_score = df['Vendor_Score'].mean()
+        total_qty = df['Monthly_Demand_Units'].sum() if 'Monthly_Demand_Units' in df.columns else np.nan
+        total_products = df[sku_col].nunique() if sku_col else 0; company_name = user_data.get('company_name','—')
+        def fmt_inr(v):
+            if pd.isna(v): return "N/A"
+            if v>=1e7: return f"&#8377;{v/1e7:.2f} Cr"
+            if v>=1e5: return f"&#8377;{v/1e5:.2f} L"
+            return f"&#8377;{v:,.0f}"
+        def fmt_pct(v, d=1): return f"{v:.{d}f}%" if not pd.isna(v) else "N/A"
+        def fmt_f(v, d=2): return f"{v:.{d}f}" if not pd.isna(v) else "N/A"
+        def fmt_qty(v): return f"{v:,.0f} units" if not pd.isna(v) else "N/A"
+        def _hclr(v): return "#27ae60" if v>=65 else ("#f39c12" if v>=40 else "#e74c3c")
+        def _rclr(v): return "#27ae60" if v<=0.40 else ("#f39c12" if v<=0.70 else "#e74c3c")
+        def _sclr(v): return "#27ae60" if v>=65 else ("#f39c12" if v>=40 else "#e74c3c")
+        def _bdg(label, color): return f'<span style="background:{color};color:white;padding:2px 8px;border-radius:12px;font-size:0.75rem;font-weight:600;">{label}</span>'
+        hl = "Healthy" if health_score>=65 else ("Developing" if health_score>=40 else "At Risk")
+        rl = "Low Risk" if fin_risk_score<=0.40 else ("Moderate" if fin_risk_score<=0.70 else "High Risk")
+        pl = "Excellent" if performance_score>=65 else ("Moderate" if performance_score>=40 else "Low")
+        gl = "Strong" if growth_score>=0.60 else ("Moderate" if growth_score>=0.35 else "Low")
+        vl = "Strong" if vendor_score>=0.60 else ("Moderate" if vendor_score>=0.35 else "Weak")
+        # ──────────────────────────────────────────────────────────────────────
+        # ONDC Journey KPI Panel  (health/perf scores removed — shown in AI insights)
+        # ──────────────────────────────────────────────────────────────────────
+        company_name = user_data.get('company_name', '—')
+        msme_key     = user_data.get('msme_number',  '—')
+
+        # Raw ONDC cols from the upload schema (original or remapped names)
+        gc   = schema.sales
+        nc   = schema.net_sales or gc
+        boc  = schema.rev_before_ondc
+        aoc  = schema.rev_after_ondc
+        ochc = schema.ondc_revenue
+        rrc  = schema.returns
+        qrc  = schema.qty_returned
+        rpc  = schema.replacements
+        rlrc = schema.rolling_returns
+        tac  = schema.target
+        pmrc = schema.margin
+        uc   = schema.units
+        dc   = schema.date
+
+        def _s(col):   return float(df[col].sum())  if col else 0.0
+        def _m(col):   return float(df[col].mean()) if col else 0.0
+        def _si(col):  return int(df[col].sum())    if col else 0
+
+        total_gross   = _s(gc)
+        total_net     = _s(nc)
+        rev_before    = _s(boc)
+        rev_after_sum = _s(aoc)
+        ondc_pos      = float(df[ochc].clip(lower=0).sum()) if ochc else 0.0
+        uplift_pct    = ondc_pos / (rev_before + 1e-9) * 100 if rev_before > 0 else 0.0
+        avg_ret_rate  = _m(rrc)
+        qty_returned  = _si(qrc)
+        replacements  = _si(rpc)
+        avg_target    = _m(tac)
+        avg_margin    = _m(pmrc)
+        total_qty     = _si(uc)
+
+        def fmt_inr(v):
+            try:    v = float(v)
+            except: return "N/A"
+            if pd.isna(v): return "N/A"
+            if v >= 1e7:  return f"&#8377;{v/1e7:.2f} Cr"
+            if v >= 1e5:  return f"&#8377;{v/1e5:.2f} L"
+            return f"&#8377;{v:,.0f}"
+        def fmt_pct(v, d=1):
+            try:    return f"{float(v):.{d}f}%"
+            except: return "N/A"
+
+        # Status badge helpers
+        def _bdg(label, bg, fg='#fff'):
+            return (f'<span style="background:{bg};color:{fg};padding:2px 9px;'
+                    f'border-radius:10px;font-size:11px;font-weight:700">{label}</span>')
+        def _ret_bdg(r):
+            if r < 4:  return _bdg('Excellent','#27ae60')
+            if r < 7:  return _bdg('Moderate', '#f39c12')
+            return             _bdg('High Returns','#e74c3c')
+        def _tgt_bdg(t):
+            if t >= 100: return _bdg('On Target','#27ae60')
+            if t >= 90:  return _bdg('Near Target','#f39c12')
+            return              _bdg('Below Target','#e74c3c')
+        def _upl_bdg(p):
+            if p >= 15: return _bdg(f'+{p:.1f}% Uplift','#1B4F8A')
+            if p >= 5:  return _bdg(f'+{p:.1f}% Moderate','#f39c12')
+            return             _bdg(f'{p:.1f}% Flat','#e74c3c')
+
+        # Store-level summary table
+        def _store_table():
+            _sid = schema.store
+            if not _sid or not boc:
+                return ""
+            try:
+                st = df.groupby(_sid, observed=True).agg(
+                    net=(nc or gc, 'sum'),
+                    before=(boc, 'sum'),
+                    ondc_p=(ochc, lambda x: float(x.clip(lower=0).sum())) if ochc else (boc, 'count'),
+                    ret_r=(rrc, 'mean') if rrc else (boc, 'count'),
+                    qty_r=(qrc, 'sum')  if qrc else (boc, 'count'),
+                    repl=(rpc, 'sum')   if rpc else (boc, 'count'),
+                    tgt=(tac, 'mean')   if tac else (boc, 'count'),
+                ).reset_index()
+                rows = ""
+                bg = ['#FFFFFF','#F4F9FF','#FFFFFF']
+                for idx, r in st.iterrows():
+                    bg_c = bg[idx % len(bg)]
+                    upl = r['ondc_p'] / (r['before'] + 1e-9) * 100
+                    rows += (f'<tr style="background:{bg_c}">'
+                             f'<td style="padding:9px 14px;font-weight:700;color:#0B1F3A">Store {int(r[_sid])}</td>'
+                             f'<td style="padding:9px 14px;text-align:right;font-weight:700;color:#1B4F8A">{fmt_inr(r["net"])}</td>'
+                             f'<td style="padding:9px 14px;text-align:right;color:#4A6A8A">{fmt_inr(r["before"])}</td>'
+                             f'<td style="padding:9px 14px;text-align:right;color:#1a7a40;font-weight:700">{fmt_inr(r["ondc_p"])}</td>'
+                             f'<td style="padding:9px 14px;text-align:center">{_upl_bdg(upl)}</td>'
+                             f'<td style="padding:9px 14px;text-align:center">{_ret_bdg(r["ret_r"])}<br>'
+                             f'<span style="font-size:10px;color:#4A6A8A">{r["ret_r"]:.1f}% · {int(r["qty_r"])} units</span></td>'
+                             f'<td style="padding:9px 14px;text-align:center"><span style="font-weight:700;color:#8b5cf6">{int(r["repl"])}</span></td>'
+                             f'<td style="padding:9px 14px;text-align:center">{_tgt_bdg(r["tgt"])}<br>'
+                             f'<span style="font-size:10px;color:#4A6A8A">{r["tgt"]:.1f}%</span></td>'
+                             f'</tr>')
+                return f"""
+  <div style="margin-top:16px">
+    <div style="font-size:10px;font-weight:800;letter-spacing:2px;text-transform:uppercase;color:#4A6A8A;
+                padding:8px 14px;background:#F0F7FF;border-radius:8px 8px 0 0;border:1px solid #D0E4F4;border-bottom:none">
+      🏪 Store-Level ONDC Impact
+    </div>
+    <table style="width:100%;border-collapse:collapse;font-size:12px;border:1px solid #D0E4F4;border-radius:0 0 8px 8px;overflow:hidden">
+      <thead>
+        <tr style="background:#0B1F3A;color:#A8D8FF">
+          <th style="padding:9px 14px;text-align:left">Store</th>
+          <th style="padding:9px 14px;text-align:right">Net Sales</th>
+          <th style="padding:9px 14px;text-align:right">Pre-ONDC</th>
+          <th style="padding:9px 14px;text-align:right">ONDC Revenue</th>
+          <th style="padding:9px 14px;text-align:center">Uplift</th>
+          <th style="padding:9px 14px;text-align:center">Return Rate</th>
+          <th style="padding:9px 14px;text-align:center">Replacements</th>
+          <th style="padding:9px 14px;text-align:center">Target</th>
+        </tr>
+      </thead>
+      <tbody>{rows}</tbody>
+    </table>
+  </div>"""
+            except Exception:
+                return ""
+
+        kpi_html = f"""<div style="font-family:Arial,sans-serif;margin:0 0 18px 0">
+  <!-- Header -->
+  <div style="background:linear-gradient(135deg,#0B1F3A,#1B4F8A);border-radius:10px;padding:16px 24px;
+              margin-bottom:18px;display:flex;align-items:center;gap:16px">
+    <span style="font-size:2.2rem">📡</span>
+    <div>
+      <div style="color:#FFFFFF;font-size:1.15rem;font-weight:800;letter-spacing:0.3px">ONDC Journey Dashboard</div>
+      <div style="color:#A8D8FF;font-size:0.84rem;margin-top:3px">{company_name} &nbsp;·&nbsp; {msme_key} &nbsp;·&nbsp; ONDC Impact · Returns · Fulfilment</div>
+    </div>
+    <div style="margin-left:auto;text-align:right">
+      <div style="color:#A8D8FF;font-size:10px;letter-spacing:1px;text-transform:uppercase">ONDC Status</div>
+      {'<div style="color:#52e88a;font-size:13px;font-weight:800">● Live since Jan 2024</div>' if rev_after_sum > 0 else
+       '<div style="color:#f39c12;font-size:13px;font-weight:800">● Pre-Activation</div>'}
+    </div>
+  </div>
+
+  <!-- 5 Headline metric cards -->
+  <div style="display:grid;grid-template-columns:repeat(5,1fr);gap:10px;margin-bottom:16px">
+    <div style="background:#FFFFFF;border:1px solid #D0E4F4;border-radius:10px;padding:14px 12px;border-top:3px solid #1B4F8A;text-align:center">
+      <div style="font-size:9px;font-weight:800;letter-spacing:1.5px;text-transform:uppercase;color:#7A92AA;margin-bottom:6px">Total Gross Sales</div>
+      <div style="font-size:18px;font-weight:900;color:#0B1F3A;font-family:monospace">{fmt_inr(total_gross)}</div>
+      <div style="font-size:10px;color:#7A92AA;margin-top:3px">{total_qty:,} units sold</div>
+    </div>
+    <div style="background:#FFFFFF;border:1px solid #C3E6CB;border-radius:10px;padding:14px 12px;border-top:3px solid #27ae60;text-align:center">
+      <div style="font-size:9px;font-weight:800;letter-spacing:1.5px;text-transform:uppercase;color:#1a7a40;margin-bottom:6px">ONDC Uplift</div>
+      <div style="font-size:18px;font-weight:900;color:#1a7a40;font-family:monospace">+{uplift_pct:.1f}%</div>
+      <div style="font-size:10px;color:#7A92AA;margin-top:3px">{fmt_inr(ondc_pos)} via ONDC</div>
+    </div>
+    <div style="background:#FFFFFF;border:1px solid #{'F5C6CB' if avg_ret_rate>=7 else ('FFE8A1' if avg_ret_rate>=4 else 'C3E6CB')};border-radius:10px;padding:14px 12px;border-top:3px solid {'#e74c3c' if avg_ret_rate>=7 else ('#f39c12' if avg_ret_rate>=4 else '#27ae60')};text-align:center">
+      <div style="font-size:9px;font-weight:800;letter-spacing:1.5px;text-transform:uppercase;color:#7A92AA;margin-bottom:6px">Return Rate</div>
+      <div style="font-size:18px;font-weight:900;font-family:monospace;color:{'#e74c3c' if avg_ret_rate>=7 else ('#f39c12' if avg_ret_rate>=4 else '#27ae60')}">{avg_ret_rate:.1f}%</div>
+      <div style="font-size:10px;color:#7A92AA;margin-top:3px">{qty_returned:,} units returned</div>
+    </div>
+    <div style="background:#FFFFFF;border:1px solid #E3D0F5;border-radius:10px;padding:14px 12px;border-top:3px solid #8b5cf6;text-align:center">
+      <div style="font-size:9px;font-weight:800;letter-spacing:1.5px;text-transform:uppercase;color:#7A92AA;margin-bottom:6px">Replacements</div>
+      <div style="font-size:18px;font-weight:900;color:#6D28D9;font-family:monospace">{replacements:,}</div>
+      <div style="font-size:10px;color:#7A92AA;margin-top:3px">units replaced total</div>
+    </div>
+    <div style="background:#FFFFFF;border:1px solid #{'C3E6CB' if avg_target>=100 else 'FFE8A1'};border-radius:10px;padding:14px 12px;border-top:3px solid {'#27ae60' if avg_target>=100 else '#f39c12'};text-align:center">
+      <div style="font-size:9px;font-weight:800;letter-spacing:1.5px;text-transform:uppercase;color:#7A92AA;margin-bottom:6px">Target Achievement</div>
+      <div style="font-size:18px;font-weight:900;font-family:monospace;color:{'#1a7a40' if avg_target>=100 else '#b05a00'}">{avg_target:.1f}%</div>
+      <div style="font-size:10px;color:#7A92AA;margin-top:3px">avg margin {avg_margin:.1f}%</div>
+    </div>
+  </div>
+
+  <!-- ONDC Before / Channel / Net row -->
+  <div style="display:grid;grid-template-columns:1fr 1fr 1fr;gap:10px;margin-bottom:16px">
+    <div style="background:#F8FAFF;border:1px solid #D0E4F4;border-radius:10px;padding:14px 16px">
+      <div style="font-size:9px;font-weight:800;letter-spacing:1px;text-transform:uppercase;color:#7A92AA;margin-bottom:5px">📊 Revenue Before ONDC</div>
+      <div style="font-size:20px;font-weight:900;color:#7A92AA;font-family:monospace">{fmt_inr(rev_before)}</div>
+      <div style="font-size:11px;color:#7A92AA;margin-top:4px">Baseline (2023 pre-ONDC)</div>
+    </div>
+    <div style="background:#EAF7EE;border:1px solid #C3E6CB;border-radius:10px;padding:14px 16px">
+      <div style="font-size:9px;font-weight:800;letter-spacing:1px;text-transform:uppercase;color:#1a7a40;margin-bottom:5px">🚀 ONDC Channel Revenue</div>
+      <div style="font-size:20px;font-weight:900;color:#1a7a40;font-family:monospace">{fmt_inr(ondc_pos)}</div>
+      <div style="font-size:11px;color:#7A92AA;margin-top:4px">New revenue from ONDC platforms</div>
+    </div>
+    <div style="background:#F0F7FF;border:1px solid #B8D4F0;border-radius:10px;padding:14px 16px">
+      <div style="font-size:9px;font-weight:800;letter-spacing:1px;text-transform:uppercase;color:#1B4F8A;margin-bottom:5px">📈 Net Sales (Post-ONDC)</div>
+      <div style="font-size:20px;font-weight:900;color:#1B4F8A;font-family:monospace">{fmt_inr(total_net)}</div>
+      <div style="font-size:11px;color:#7A92AA;margin-top:4px">{_upl_bdg(uplift_pct)} vs pre-ONDC baseline</div>
+    </div>
+  </div>
+
+  <!-- Revenue & Volume summary rows (no health/performance scores) -->
+  <table style="width:100%;border-collapse:separate;border-spacing:0;border-radius:10px;overflow:hidden;
+                box-shadow:0 2px 10px rgba(0,51,102,0.08);font-size:0.90rem;margin-bottom:14px">
+    <thead>
+      <tr style="background:#0B1F3A">
+        <th style="padding:10px 16px;text-align:left;font-weight:700;width:38%;color:#A8D8FF;font-size:11px;letter-spacing:1px">Metric</th>
+        <th style="padding:10px 16px;text-align:right;font-weight:700;width:28%;color:#A8D8FF;font-size:11px">Value</th>
+        <th style="padding:10px 16px;text-align:center;font-weight:700;width:20%;color:#A8D8FF;font-size:11px">Status</th>
+        <th style="padding:10px 16px;text-align:left;font-weight:700;width:14%;color:#A8D8FF;font-size:11px">Benchmark</th>
+      </tr>
+    </thead>
+    <tbody>
+      <tr style="background:#F0F7FF"><td colspan="4" style="padding:6px 16px;font-weight:800;color:#1B4F8A;font-size:10px;letter-spacing:1.5px;text-transform:uppercase">Revenue &amp; ONDC Impact</td></tr>
+      <tr style="background:#FFFFFF;border-bottom:1px solid #E0EDF8">
+        <td style="padding:9px 16px;color:#1A2D45">Total Gross Sales</td>
+        <td style="padding:9px 16px;text-align:right;font-weight:800;color:#0B1F3A;font-size:1rem">{fmt_inr(total_gross)}</td>
+        <td style="padding:9px 16px;text-align:center">—</td>
+        <td style="padding:9px 16px;color:#6A8AA8;font-size:11px">All channels</td>
+      </tr>
+      <tr style="background:#F4F9FF;border-bottom:1px solid #E0EDF8">
+        <td style="padding:9px 16px;color:#1A2D45">Pre-ONDC Revenue Baseline</td>
+        <td style="padding:9px 16px;text-align:right;font-weight:700;color:#7A92AA">{fmt_inr(rev_before)}</td>
+        <td style="padding:9px 16px;text-align:center">—</td>
+        <td style="padding:9px 16px;color:#6A8AA8;font-size:11px">2023 only</td>
+      </tr>
+      <tr style="background:#FFFFFF;border-bottom:1px solid #E0EDF8">
+        <td style="padding:9px 16px;color:#1A2D45">ONDC Channel Revenue</td>
+        <td style="padding:9px 16px;text-align:right;font-weight:800;color:#1a7a40">{fmt_inr(ondc_pos)}</td>
+        <td style="padding:9px 16px;text-align:center">{_upl_bdg(uplift_pct)}</td>
+        <td style="padding:9px 16px;color:#6A8AA8;font-size:11px">Target &gt;10%</td>
+      </tr>
+      <tr style="background:#F4F9FF;border-bottom:1px solid #E0EDF8">
+        <td style="padding:9px 16px;color:#1A2D45">Avg Profit Margin</td>
+        <td style="padding:9px 16px;text-align:right;font-weight:700;color:#1a3a6b">{fmt_pct(avg_margin)}</td>
+        <td style="padding:9px 16px;text-align:center">{'🟢' if avg_margin>20 else ('🟡' if avg_margin>10 else '🔴')}</td>
+        <td style="padding:9px 16px;color:#6A8AA8;font-size:11px">Target &gt;20%</td>
+      </tr>
+      <tr style="background:#F0F7FF"><td colspan="4" style="padding:6px 16px;font-weight:800;color:#1B4F8A;font-size:10px;letter-spacing:1.5px;text-transform:uppercase">Returns &amp; Fulfilment</td></tr>
+      <tr style="background:#FFFFFF;border-bottom:1px solid #E0EDF8">
+        <td style="padding:9px 16px;color:#1A2D45">Avg Return Rate</td>
+        <td style="padding:9px 16px;text-align:right;font-weight:800;color:{'#e74c3c' if avg_ret_rate>=7 else '#f39c12'}">{fmt_pct(avg_ret_rate)}</td>
+        <td style="padding:9px 16px;text-align:center">{_ret_bdg(avg_ret_rate)}</td>
+        <td style="padding:9px 16px;color:#6A8AA8;font-size:11px">Target &lt;7%</td>
+      </tr>
+      <tr style="background:#F4F9FF;border-bottom:1px solid #E0EDF8">
+        <td style="padding:9px 16px;color:#1A2D45">Total Units Returned</td>
+        <td style="padding:9px 16px;text-align:right;font-weight:700;color:#e74c3c">{qty_returned:,} units</td>
+        <td style="padding:9px 16px;text-align:center">—</td>
+        <td style="padding:9px 16px;color:#6A8AA8;font-size:11px">Cumulative</td>
+      </tr>
+      <tr style="background:#FFFFFF;border-bottom:1px solid #E0EDF8">
+        <td style="padding:9px 16px;color:#1A2D45">Total Replacements Issued</td>
+        <td style="padding:9px 16px;text-align:right;font-weight:700;color:#8b5cf6">{replacements:,} units</td>
+        <td style="padding:9px 16px;text-align:center">—</td>
+        <td style="padding:9px 16px;color:#6A8AA8;font-size:11px">Service quality</td>
+      </tr>
+      <tr style="background:#F4F9FF">
+        <td style="padding:9px 16px;color:#1A2D45">Avg Target Achievement</td>
+        <td style="padding:9px 16px;text-align:right;font-weight:800;color:{'#1a7a40' if avg_target>=100 else '#b05a00'}">{fmt_pct(avg_target)}</td>
+        <td style="padding:9px 16px;text-align:center">{_tgt_bdg(avg_target)}</td>
+        <td style="padding:9px 16px;color:#6A8AA8;font-size:11px">Target 100%</td>
+      </tr>
+    </tbody>
+  </table>
+
+  {_store_table()}
+</div>"""
+
+        # ──────────────────────────────────────────────────────────────────────
+        # 4 ONDC-focused charts
+        # ──────────────────────────────────────────────────────────────────────
+        import matplotlib
+        import matplotlib.pyplot as plt
+        import matplotlib.ticker as mticker
+        plt.rcParams.update({'font.family': 'DejaVu Sans', 'axes.spines.top': False,
+                             'axes.spines.right': False, 'axes.grid': True,
+                             'grid.alpha': 0.25, 'grid.color': '#B0C4DE'})
+
+        # Quarterly time-series from raw ONDC columns — rows group by the shared quarter labels
+        quarters = ctx.quarters if dc else None
+        has_ts = quarters is not None
+
+        NAVY  = '#1B4F8A'
+        GREEN = '#27ae60'
+        RED   = '#e74c3c'
+        AMBER = '#f39c12'
+        PURP  = '#8b5cf6'
+        TEAL  = '#0097a7'
+
+        def _inr_fmt(x, _):
+            if abs(x) >= 1e7:  return f'₹{x/1e7:.1f}Cr'
+            if abs(x) >= 1e5:  return f'₹{x/1e5:.0f}L'
+            return f'₹{x:,.0f}'
+
+        # ── Chart 1: Sales vs Profit Margin — quarterly dual-axis ─────────────
+        fig1, ax1 = plt.subplots(figsize=(12, 5))
+        fig1.subplots_adjust(top=0.87, bottom=0.18, left=0.10, right=0.91)
+        if has_ts and gc and pmrc:
+            q1 = df.groupby(quarters, observed=True).agg(
+                sales=(gc,    'sum'),
+                margin=(pmrc, 'mean')
+            ).reset_index().sort_values('_ql')
+            ax1b = ax1.twinx()
+            x1   = range(len(q1))
+            bars1 = ax1.bar(x1, q1['sales']/1e5, color=NAVY, alpha=0.72, label='Gross Sales (₹L)', width=0.6, zorder=3)
+            ax1b.plot(x1, q1['margin'], color=RED, linewidth=2.5, marker='o', markersize=5, label='Profit Margin %', zorder=4)
+            ax1.set_xticks(list(x1))
+            ax1.set_xticklabels(q1['_ql'], rotation=45, ha='right', fontsize=8)
+            ax1.set_ylabel('Gross Sales (₹ Lakhs)', fontsize=10, fontweight='bold', color=NAVY)
+            ax1b.set_ylabel('Profit Margin %', fontsize=10, fontweight='bold', color=RED)
+            ax1.set_title('Sales vs Profit Margin — Quarterly', fontsize=13, fontweight='bold', pad=12)
+            h1, l1 = ax1.get_legend_handles_labels();  h2, l2 = ax1b.get_legend_handles_labels()
+            ax1.legend(h1+h2, l1+l2, loc='upper left', fontsize=8, framealpha=0.8)
+            ax1.yaxis.set_major_formatter(mticker.FuncFormatter(_inr_fmt))
+            ax1b.yaxis.set_major_formatter(mticker.FuncFormatter(lambda x, _: f'{x:.1f}%'))
+            # Annotate last 4 quarters
+            for xi, mi in zip(list(x1)[-4:], q1['margin'].values[-4:]):
+                ax1b.annotate(f'{mi:.1f}%', (xi, mi), textcoords='offset points', xytext=(0, 6),
+                               fontsize=7, ha='center', color=RED, fontweight='bold')
+        else:
+            ax1.text(0.5, 0.5, 'No time-series data available', ha='center', va='center',
+                     transform=ax1.transAxes, fontsize=12)
+            ax1.set_title('Sales vs Profit Margin', fontsize=13, fontweight='bold')
+
+        # ── Chart 2: ONDC Before vs After — stacked quarterly with uplift line ─
+        fig2, ax2 = plt.subplots(figsize=(12, 5))
+        fig2.subplots_adjust(top=0.87, bottom=0.18, left=0.10, right=0.97)
+        if has_ts and boc and ochc:
+            q2 = df.groupby(quarters, observed=True).agg(
+                before=(boc, 'sum'),
+                ondc_p=(ochc, lambda x: float(x.clip(lower=0).sum())),
+                gross=(gc, 'sum') if gc else (boc, 'sum')
+            ).reset_index().sort_values('_ql')
+            x2 = range(len(q2))
+            ax2.bar(x2, q2['before']/1e5,  label='Revenue Before ONDC', color='#7A92AA', alpha=0.80, width=0.6, zorder=3)
+            ax2.bar(x2, q2['ondc_p']/1e5, bottom=q2['before']/1e5,
+                    label='ONDC Channel Revenue', color=GREEN, alpha=0.85, width=0.6, zorder=3)
+            ax2.plot(x2, q2['gross']/1e5, color=NAVY, linewidth=2.5, marker='D', markersize=5,
+                     label='Total Gross Sales', zorder=5)
+            # Mark ONDC activation (first quarter where ondc_p > 0)
+            first_live = q2[q2['ondc_p'] > 0]['_ql'].iloc[0] if (q2['ondc_p'] > 0).any() else None
+            if first_live:
+                li = q2[q2['_ql'] == first_live].index[0]
+                ax2.axvline(li - 0.5, color=GREEN, linestyle='--', linewidth=1.5, alpha=0.7)
+                ax2.text(li - 0.4, ax2.get_ylim()[1] * 0.92 if ax2.get_ylim()[1] else 1000,
+                         '▶ ONDC Live', fontsize=8, color=GREEN, fontweight='bold')
+            ax2.set_xticks(list(x2))
+            ax2.set_xticklabels(q2['_ql'], rotation=45, ha='right', fontsize=8)
+            ax2.set_ylabel('Revenue (₹ Lakhs)', fontsize=10, fontweight='bold')
+            ax2.set_title('ONDC Impact: Before vs After Revenue — Quarterly', fontsize=13, fontweight='bold', pad=12)
+            ax2.legend(fontsize=8, loc='upper left', framealpha=0.8)
+            ax2.yaxis.set_major_formatter(mticker.FuncFormatter(_inr_fmt))
+        else:
+            ax2.text(0.5, 0.5, 'ONDC revenue columns not found in data', ha='center', va='center',
+                     transform=ax2.transAxes, fontsize=12)
+            ax2.set_title('ONDC Before vs After', fontsize=13, fontweight='bold')
+
+        # ── Chart 3: Returns & Replacements — quarterly grouped bars + rate line
+        fig3, ax3 = plt.subplots(figsize=(12, 5))
+        fig3.subplots_adjust(top=0.87, bottom=0.18, left=0.10, right=0.91)
+        if has_ts and rrc:
+            agg3 = {rrc: 'mean'}
+            if rlrc: agg3[rlrc] = 'mean'
+            if qrc:  agg3[qrc]  = 'sum'
+            if rpc:  agg3[rpc]  = 'sum'
+            q3 = df.groupby(quarters, observed=True).agg(agg3).reset_index().sort_values('_ql')
+            ax3b = ax3.twinx()
+            x3   = range(len(q3))
+            bar_w = 0.35
+            if qrc and rpc:
+                b3a = ax3.bar([xi - bar_w/2 for xi in x3], q3[qrc],
+                              width=bar_w, color=RED, alpha=0.75, label='Units Returned', zorder=3)
+                b3b = ax3.bar([xi + bar_w/2 for xi in x3], q3[rpc],
+                              width=bar_w, color=AMBER, alpha=0.75, label='Replacements', zorder=3)
+            elif qrc:
+                ax3.bar(x3, q3[qrc], width=0.6, color=RED, alpha=0.75, label='Units Returned', zorder=3)
+            ax3b.plot(x3, q3[rrc],  color=PURP, linewidth=2.5, marker='o', markersize=5,
+                      label='Return Rate %', zorder=4)
+            if rlrc:
+                ax3b.plot(x3, q3[rlrc], color=TEAL, linewidth=1.8, linestyle='--', marker='s',
+                           markersize=4, label='6M Rolling Return Rate', zorder=4)
+            ax3b.axhline(7, color=RED, linestyle=':', linewidth=1.2, alpha=0.5)
+            ax3b.text(len(q3)-0.5, 7.2, 'Target <7%', fontsize=7, color=RED, ha='right')
+            ax3.set_xticks(list(x3))
+            ax3.set_xticklabels(q3['_ql'], rotation=45, ha='right', fontsize=8)
+            ax3.set_ylabel('Units (Returned / Replaced)', fontsize=10, fontweight='bold', color=RED)
+            ax3b.set_ylabel('Return Rate %', fontsize=10, fontweight='bold', color=PURP)
+            ax3.set_title('Returns & Replacements — Quarterly Trend', fontsize=13, fontweight='bold', pad=12)
+            h3a, l3a = ax3.get_legend_handles_labels();  h3b, l3b = ax3b.get_legend_handles_labels()
+            ax3.legend(h3a+h3b, l3a+l3b, loc='upper left', fontsize=8, framealpha=0.8)
+        else:
+            ax3.text(0.5, 0.5, 'No returns data available', ha='center', va='center',
+                     transform=ax3.transAxes, fontsize=12)
+            ax3.set_title('Returns & Replacements', fontsize=13, fontweight='bold')
+
+        # ── Chart 4: Store-level ONDC comparison (2 sub-plots) ───────────────
+        fig4, (ax4a, ax4b) = plt.subplots(1, 2, figsize=(14, 5))
+        fig4.subplots_adjust(top=0.87, bottom=0.14, left=0.07, right=0.97, wspace=0.32)
+        _sid4 = schema.store
+        if _sid4 and boc:
+            agg4 = dict(net=(nc or gc, 'sum'), before=(boc, 'sum'))
+            if ochc: agg4['ondc_p'] = (ochc, lambda x: float(x.clip(lower=0).sum()))
+            if rrc:  agg4['ret_r']  = (rrc,  'mean')
+            if rpc:  agg4['repl']   = (rpc,  'sum')
+            if tac:  agg4['tgt_ach']= (tac,  'mean')
+            st4 = df.groupby(_sid4, observed=True).agg(**agg4).reset_index()
+            store_lbls = [f"Store {int(s)}" for s in st4[_sid4]]
+            x4  = range(len(st4))
+            w4  = 0.28
+            # Left sub-plot: revenue bars
+            ax4a.bar([xi - w4 for xi in x4], st4['before']/1e5,   width=w4, color='#7A92AA', alpha=0.85, label='Pre-ONDC Baseline')
+            ax4a.bar([xi       for xi in x4], st4['net']/1e5,     width=w4, color=NAVY,     alpha=0.85, label='Net Sales')
+            if 'ondc_p' in st4:
+                ax4a.bar([xi + w4 for xi in x4], st4['ondc_p']/1e5, width=w4, color=GREEN,   alpha=0.85, label='ONDC Channel')
+            ax4a.set_xticks(list(x4)); ax4a.set_xticklabels(store_lbls, fontsize=10)
+            ax4a.set_ylabel('Revenue (₹ Lakhs)', fontsize=10, fontweight='bold')
+            ax4a.set_title('Store Revenue: Pre vs Post ONDC', fontsize=11, fontweight='bold', pad=10)
+            ax4a.legend(fontsize=8); ax4a.yaxis.set_major_formatter(mticker.FuncFormatter(_inr_fmt))
+            # Right sub-plot: return rate bars + target achievement line
+            ax4b2 = ax4b.twinx()
+            pal4  = [RED, AMBER, '#e07b2a']
+            if 'ret_r' in st4:
+                b4  = ax4b.bar(x4, st4['ret_r'], color=pal4[:len(st4)], alpha=0.78, width=0.5, label='Return Rate %', zorder=3)
+                for bar, v in zip(b4, st4['ret_r']):
+                    ax4b.text(bar.get_x()+bar.get_width()/2., bar.get_height()+0.1,
+                               f'{v:.1f}%', ha='center', va='bottom', fontsize=9, fontweight='bold')
+            if 'tgt_ach' in st4:
+                ax4b2.plot(list(x4), st4['tgt_ach'], color=NAVY, linewidth=2.5, marker='D',
+                            markersize=8, label='Target Achievement %', zorder=5)
+                ax4b2.axhline(100, color=GREEN, linestyle='--', linewidth=1.2, alpha=0.6)
+            ax4b.set_xticks(list(x4)); ax4b.set_xticklabels(store_lbls, fontsize=10)
+            ax4b.set_ylabel('Return Rate %', fontsize=10, fontweight='bold', color=RED)
+            ax4b2.set_ylabel('Target Achievement %', fontsize=10, fontweight='bold', color=NAVY)
+            ax4b.set_title('Store: Return Rate & Target Achievement', fontsize=11, fontweight='bold', pad=10)
+            h4a, l4a = ax4b.get_legend_handles_labels();  h4b2, l4b2 = ax4b2.get_legend_handles_labels()
+            ax4b.legend(h4a+h4b2, l4a+l4b2, loc='upper right', fontsize=8, framealpha=0.8)
+        else:
+            for ax_ in [ax4a, ax4b]:
+                ax_.text(0.5, 0.5, 'No store-level ONDC data', ha='center', va='center',
+                         transform=ax_.transAxes, fontsize=12)
+        fig4.suptitle('Store-Level ONDC Impact Analysis', fontsize=13, fontweight='bold', y=0.97)
+
+        cat_options = ['All Categories']
+        if schema.category:
+            cat_options += sorted(df[schema.category].dropna().unique().tolist())
+        return (kpi_html,"","","","",fig1,fig2,fig3,fig4,None,None,None,None,None,cat_options,df)
+
+    except Exception as e:
+        import traceback; traceback.print_exc()
+        return ("N/A","","","","",None,None,None,None,None,None,None,None,f"Error: {str(e)}",["All Categories"],None)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Mock Data
+# ══════════════════════════════════════════════════════════════════════════════
+udyam_master_data = pd.DataFrame({
+    'udyam_number':    ['UDYAM-UP-01-0000001','UDYAM-TN-00-7629703','UDYAM-KL-03-0000003'],
+    'enterprise_name': ['Tech Innovations Pvt Ltd','Retail Solutions Corp','FMCG Distributors'],
+    'organisation_type':['Private Limited','Partnership','Proprietorship'],
+    'major_activity':  ['FMCG','Services','Electronics'],
+    'enterprise_type': ['Small','Micro','Medium'],
+    'state':           ['Uttar Pradesh','TamilNadu','Kerala'],
+    'city':            ['Lucknow','Chennai','Kochi'],
+    'industry_domain': ['Retail','Retail','Retail'],   # FIX 4 — added
+})
+
+def _fetch_msme_data(msme_number):
+    fetched = udyam_master_data[udyam_master_data['udyam_number'] == msme_number]
+    if not fetched.empty:
+        row = fetched.iloc[0]
+        return (row['enterprise_name'], row['organisation_type'], row['major_activity'],
+                row['enterprise_type'], row['state'], row['city'],
+                row.get('industry_domain','Retail'),          # FIX 4
+                "✅ MSME Data Fetched Successfully")
+    return "", "", "", "", "", "", "Retail", "❌ MSME Data Not Found. Please check the number."
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Category filter chart
+# ══════════════════════════════════════════════════════════════════════════════
+# Revenue, margin, health and top-5 SKUs of every category are built once per
+# analysis (AnalysisContext.category_index), so with a context a category switch
+# is a dict lookup and a chart render. No UI event calls handle_category_filter
+# — the Step 7 category dropdown goes through update_step7_filters — so nothing
+# keeps a context between calls: a bare frame is scored for that call alone.
+
+def _category_summary(df, sku_col, sales_col):
+    """What the category filter shows for the rows of one category."""
+    return {'revenue': df[sales_col].sum() if sales_col in df.columns else 0,
+            'margin': df['Avg_Margin_Percent'].mean() if 'Avg_Margin_Percent' in df.columns else 0,
+            'health': df['MSME_Health_Score'].mean() if 'MSME_Health_Score' in df.columns else 0,
+            'top5': (df.groupby(sku_col, observed=True)[sales_col].sum().nlargest(5).reset_index()
+                     if sku_col and not df.empty else None)}
+
+def build_category_filter_chart(df, selected_category, schema=None, top5=None):
+    plt.style.use('seaborn-v0_8-darkgrid')
+    schema = schema or DataSchema.of(df)
+    sales_col = schema.sales or 'Monthly_Sales_INR'
+    sku_col, cat_col = schema.sku, schema.category
+    fig,ax = plt.subplots(figsize=(12,7)); fig.subplots_adjust(top=0.91,bottom=0.12,left=0.32,right=0.92)
+    def _fmt(v):
+        if v>=1e7: return f"Rs.{v/1e7:.1f}Cr"
+        if v>=1e5: return f"Rs.{v/1e5:.1f}L"
+        return f"Rs.{v:,.0f}"
+    if top5 is None:
+        if cat_col and selected_category and selected_category != "All Categories":
+            filtered = df[df[cat_col]==selected_category] if selected_category in df[cat_col].values else df
+        else:
+            filtered = df
+        top5 = _category_summary(filtered, sku_col, sales_col)['top5']
+    if top5 is not None:
+        colors = plt.cm.RdYlGn(np.linspace(0.3,0.9,len(top5)))
+        bars = ax.barh(top5[sku_col], top5[sales_col], color=colors, height=0.55, edgecolor='white')
+        ax.set_xlabel('Sales (INR)',fontsize=12,fontweight='bold')
+        cat_label = selected_category if selected_category and selected_category != "All Categories" else "All"
+        ax.set_title(f'Top 5 Products — {cat_label}',fontsize=14,fontweight='bold',pad=14)
+        ax.grid(axis='x',alpha=0.3); ax.spines['top'].set_visible(False); ax.spines['right'].set_visible(False)
+        max_val = top5[sales_col].max() if len(top5)>0 else 1
+        for bar in bars:
+            w = bar.get_width()
+            ax.text(w+max_val*0.01, bar.get_y()+bar.get_height()/2, _fmt(w), ha='left', va='center', fontsize=9, fontweight='bold')
+        ax.set_xlim(0, max_val*1.22)
+    else:
+        ax.text(0.5,0.5,'No product data',ha='center',va='center',transform=ax.transAxes)
+    return fig
+
+def handle_category_filter(selected_category, raw_df, schema=None, ctx=None):
+    if raw_df is None and ctx is None: return None, ""
+    ctx = ctx or AnalysisContext(raw_df, schema)
+    schema = ctx.schema
+    sales_col = schema.sales or 'Monthly_Sales_INR'
+    sku_col, cat_col = schema.sku, schema.category
+    def _fmt(v):
+        if v>=1e7: return f"Rs.{v/1e7:.1f}Cr"
+        if v>=1e5: return f"Rs.{v/1e5:.1f}L"
+        return f"Rs.{v:,.0f}"
+    index = ctx.category_index
+    if cat_col and selected_category and selected_category != "All Categories":
+        entry = index.get(selected_category, index[None])
+        cat_label = selected_category
+    else:
+        entry = index[None]; cat_label = "All Categories"
+    fig = build_category_filter_chart(ctx.scored, selected_category, schema, top5=entry['top5'])
+    total_cat_sales, avg_margin_cat, health_avg_cat = entry['revenue'], entry['margin'], entry['health']
+    insight_rows = ""
+    if entry['top5'] is not None:
+        top5 = entry['top5']
+        for i, (_,row) in enumerate(top5.iterrows()):
+            medal = ['🥇','🥈','🥉','4️⃣','5️⃣'][i]
+            insight_rows += f'<tr style="background:{"#FFFFFF" if i%2==0 else "#F4F9FF"};border-bottom:1px solid #e8f0fe;"><td style="padding:9px 12px;font-weight:700;color:#003366">{medal}</td><td style="padding:9px 12px;font-weight:600;color:#1a1a2e">{row[sku_col]}</td><td style="padding:9px 12px;text-align:right;font-weight:700;color:#27ae60">{_fmt(row[sales_col])}</td></tr>'
+    insight_html = f"""<div style="background:linear-gradient(135deg,#eaf2ff,#f0f7ff);border-left:4px solid #003366;border-radius:0 10px 10px 0;padding:16px 18px;margin-top:8px;">
+<div style="font-weight:700;color:#003366;font-size:1rem;margin-bottom:10px;">Category Insight: <span style="color:#1f77b4">{cat_label}</span></div>
+<div style="display:flex;gap:18px;margin-bottom:14px;flex-wrap:wrap;">
+<div style="background:#FFFFFF;border:1px solid #C8DCEF;border-radius:8px;padding:10px 16px;flex:1;min-width:120px"><div style="color:#4A6A8A;font-size:0.75rem">Category Revenue</div><div style="font-weight:700;color:#0f2557;font-size:1.1rem">{_fmt(total_cat_sales)}</div></div>
+<div style="background:#FFFFFF;border:1px solid #C8DCEF;border-radius:8px;padding:10px 16px;flex:1;min-width:120px"><div style="color:#4A6A8A;font-size:0.75rem">Avg Margin</div><div style="font-weight:700;color:#27ae60;font-size:1.1rem">{avg_margin_cat:.1f}%</div></div>
+<div style="background:#FFFFFF;border:1px solid #C8DCEF;border-radius:8px;padding:10px 16px;flex:1;min-width:120px"><div style="color:#4A6A8A;font-size:0.75rem">Avg Health Score</div><div style="font-weight:700;color:#1a3a6b;font-size:1.1rem">{health_avg_cat:.1f}%</div></div>
+</div>
+<table style="width:100%;border-collapse:collapse;font-size:0.88rem"><thead><tr style="background:#003366"><th style="padding:8px 12px;text-align:left;color:white">#</th><th style="padding:8px 12px;text-align:left;color:white">Product</th><th style="padding:8px 12px;text-align:right;color:white">Revenue</th></tr></thead><tbody>{insight_rows}</tbody></table></div>"""
+    return fig, insight_html
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Stage scheduler — insights, dashboard and granular forecast run side by side
+# ══════════════════════════════════════════════════════════════════════════════
+# The stages only read the MSME frame. The model-heavy parts (the ensemble sales
+# forecast and KMeans segmentation behind the insights report; granular: one
+# forecast per store/category/SKU) go to a process pool as soon as the frame is
+# loaded, while this process streams the report sections that need neither and
+# then renders the dashboard charts, so figures never cross a process boundary.
+# This process scores the frame once and publishes the scored frame to the
+# columnar dataset cache; workers memory-map it (pages shared between processes)
+# rather than re-reading the upload or receiving a pickled copy. Pooled stages
+# have timeouts: a late granular forecast is dropped (Step 7 shows its empty
+# state) instead of holding up the insights page. A process future that is
+# already running cannot be cancelled, so a timeout retires the pool and
+# terminates its workers once the analysis has collected everything else.
+# Workers import this module only (see app.py), but the pool still pays for a
+# process start, the publish above and result pickling, which mid-size uploads
+# do not win back — so stages run inline, one after another, by default.
+# DATANETRA_STAGE_WORKERS=2 turns the pool on where it measures faster.
+STAGE_WORKERS      = int(os.environ.get("DATANETRA_STAGE_WORKERS", 0))
+STAGE_START_METHOD = os.environ.get("DATANETRA_STAGE_START", "spawn")
+STAGE_TIMEOUTS_S   = {
+    'insights': float(os.environ.get("DATANETRA_STAGE_TIMEOUT_INSIGHTS", 120)),
+    'granular': float(os.environ.get("DATANETRA_STAGE_TIMEOUT_GRANULAR", 60)),
+}
+_STAGE_BUDGET = {'forecast': 'insights', 'segments': 'insights', 'granular': 'granular'}
+
+_STAGE_POOL = None
+_STAGE_POOL_LOCK = threading.Lock()
+_STAGE_CTX = {}    # inside a worker: scored-frame key -> AnalysisContext of the last analysis
+
+def _stage_pool():
+    global _STAGE_POOL
+    with _STAGE_POOL_LOCK:
+        if _STAGE_POOL is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            _STAGE_POOL = ProcessPoolExecutor(STAGE_WORKERS,
+                                              mp_context=multiprocessing.get_context(STAGE_START_METHOD))
+        return _STAGE_POOL
+
+def warm_stage_pool():
+    """Start the workers ahead of the first Analyze click (each imports datanetra_core)."""
+    if STAGE_WORKERS > 0:
+        pool = _stage_pool()
+        for _ in range(STAGE_WORKERS): pool.submit(int)
+
+def _reset_stage_pool(pool=None, terminate=False):
+    """Retire ``pool`` (default: the shared one); the next stage starts a fresh pool.
+    terminate=True also kills its workers, which shutdown() leaves running."""
+    global _STAGE_POOL
+    with _STAGE_POOL_LOCK:
+        if pool is None: pool = _STAGE_POOL
+        if pool is _STAGE_POOL: _STAGE_POOL = None
+    if pool is None: return
+    procs = list((getattr(pool, '_processes', None) or {}).values()) if terminate else []
+    pool.shutdown(wait=False, cancel_futures=True)
+    for p in procs:
+        if p.is_alive(): p.terminate()
+
+def _publish_stage_frame(ctx, src):
+    """Put ``ctx.scored`` in the dataset cache for the workers. Returns their job, or None."""
+    key = hashlib.sha256(_json_mod.dumps([src['digest'], src['msme_key'], SCORING_VERSION,
+                                          'scored']).encode()).hexdigest()
+    scored = ctx.scored
+    if dataset_cache_rows(key) != len(scored) and not dataset_cache_build(key, [scored]):
+        return None
+    return {'key': key, 'msme_key': src['msme_key'], 'schema': ctx.schema,
+            'categorical': [c for c in scored.columns if isinstance(scored[c].dtype, pd.CategoricalDtype)]}
+
+def _stage_context(job):
+    ctx = _STAGE_CTX.get(job['key'])
+    if ctx is None:
+        df = dataset_cache_load(job['key'])
+        if df is None: raise RuntimeError("scored frame missing from the dataset cache")
+        for c in job['categorical']:
+            df[c] = df[c].astype('category')
+        _STAGE_CTX.clear()
+        ctx = _STAGE_CTX[job['key']] = AnalysisContext.of_scored(df, job['schema'])
+    return ctx
+
+def _stage_forecast(job):
+    ctx = _stage_context(job)
+    return forecast_sales(ctx.scored, ctx.schema, ctx, state_key=job['msme_key'] or None)
+
+def _stage_segments(job):
+    ctx = _stage_context(job)
+    return segment_customers(ctx.scored, ctx.schema)
+
+def _stage_granular(job):
+    ctx = _stage_context(job)
+    return dict(generate_granular_forecast(ctx.scored, ctx.schema), raw_df=None)
+
+def _granular_inline(df, schema):
+    try: return generate_granular_forecast(df, schema)
+    except Exception: return None
+
+def iter_analysis_stages(df, schema, user_data, lang, src=None):
+    """
+    Run the insights, dashboard and granular-forecast stages for one MSME frame.
+    ``src`` ({'file_path', 'msme_key', 'digest'}) names the cached upload ``df`` came
+    from; without it, or with no workers, everything runs inline on ``df``.
+    Yields ('insights', html so far) as report sections complete, then
+    ('done', {stage: result}, {stage: reason}) — a pooled stage that timed out or
+    failed, or a forecast that skipped ensemble members, is listed with why. A
+    broken pool reruns inline.
+    """
+    from concurrent.futures import TimeoutError as _FutTimeout
+    from concurrent.futures.process import BrokenProcessPool
+    ctx = AnalysisContext(df, schema)
+    state_key = (user_data.get('msme_number') or '').strip().upper() or None
+    futures, pool, hung = {}, None, []
+    job = _publish_stage_frame(ctx, src) if src and STAGE_WORKERS > 0 else None
+    if job:
+        try:
+            pool = _stage_pool()
+            futures = {'forecast': pool.submit(_stage_forecast, job),
+                       'segments': pool.submit(_stage_segments, job),
+                       'granular': pool.submit(_stage_granular, job)}
+        except Exception as e:
+            print(f"[INFO] Stage pool unavailable ({e}); running stages inline")
+            _reset_stage_pool(); futures = {}
+    t0 = time.perf_counter()
+    degraded = {}
+
+    def _wait(name, inline):
+        fut = futures.get(name)
+        if fut is None: return inline()
+        # Timeouts count from submission — the stages have been running side by side
+        limit = STAGE_TIMEOUTS_S[_STAGE_BUDGET[name]]
+        try:
+            return fut.result(timeout=max(0.0, limit - (time.perf_counter() - t0)))
+        except _FutTimeout:
+            if not fut.cancel(): hung.append(fut)     # still running in a worker
+            degraded[name] = f"timed out after {limit:g}s"
+        except BrokenProcessPool:
+            _reset_stage_pool(); futures.clear()
+            return inline()
+        except Exception as e:
+            degraded[name] = f"failed: {e}"
+        print(f"[INFO] Stage '{name}' {degraded[name]}; continuing without it")
+        return None
+
+    def _forecast():
+        fr = _wait('forecast', lambda: forecast_sales(ctx.scored, schema, ctx, state_key=state_key))
+        if fr is None: raise RuntimeError(f"sales forecast {degraded['forecast']}")
+        if fr.get('skipped_models'):
+            # A budget-truncated ensemble is not the answer to cache — the rerun may
+            # find the late models in MODEL_CACHE
+            degraded['forecast'] = "skipped " + ", ".join(fr['skipped_models'])
+        return fr
+
+    results = {'insights': (None, "Error generating insights: no output")}
+    for section, html, extra in iter_insights(user_data, df, lang=lang, ctx=ctx, forecast=_forecast,
+                                              segments=lambda: _wait('segments', lambda: segment_customers(ctx.scored, schema))):
+        if section == 'error':
+            results['insights'] = (None, extra); break
+        if section == 'done':
+            results['insights'] = (html, None); break
+        yield 'insights', html
+    results['dashboard'] = generate_dashboard_data(user_data, df, ctx=ctx)
+    results['granular'] = _wait('granular', lambda: _granular_inline(df, schema))
+    if hung:
+        # Left alone, a runaway fit would hold one of the workers for good
+        _reset_stage_pool(pool, terminate=True)
+    yield 'done', results, degraded
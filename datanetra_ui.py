@@ -0,0 +1,1558 @@
+"""
+DataNetra.ai Gradio UI over the datanetra_core engine. Imported by app.py only
+when serving; importing it builds the whole gr.Blocks app.
+"""
+# ── Compatibility patch: gradio 4.44.0 + huggingface_hub 1.x + Python 3.12/3.13/3.14 ──
+import sys, types
+
+# Mock audioop (removed in Python 3.12+)
+for _mod in ('audioop', 'pyaudioop', '_audioop'):
+    _mock = types.ModuleType(_mod)
+    # Add dummy functions pydub might call
+    for _fn in ('tostereo','tomono','add','bias','lin2lin','ratecv','max','minmax','avg','rms','cross'):
+        setattr(_mock, _fn, lambda *a, **kw: b'' if a and isinstance(a[0], (bytes,bytearray)) else 0)
+    sys.modules[_mod] = _mock
+
+# Mock HfFolder (removed in huggingface_hub 1.x, needed by gradio 4.44.0)
+try:
+    from huggingface_hub import HfFolder
+except ImportError:
+    import huggingface_hub as _hfhub
+    class _HfFolder:
+        @staticmethod
+        def get_token(): return None
+        @staticmethod  
+        def save_token(token): pass
+        @staticmethod
+        def delete_token(): pass
+    _hfhub.HfFolder = _HfFolder
+    sys.modules['huggingface_hub'].HfFolder = _HfFolder
+# ── End patch ──
+
+import gradio as gr
+import pandas as pd
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # Must be before pyplot import — prevents GUI window on servers
+import matplotlib.pyplot as plt
+import re
+import warnings
+import json as _json_mod
+import time
+warnings.filterwarnings("ignore")
+
+# ══════════════════════════════════════════════════════════════════════════════
+# FIX 1: UTF-8 surrogate patch — prevents "str is not valid UTF-8" crash
+# ══════════════════════════════════════════════════════════════════════════════
+_orig_json_dumps = _json_mod.dumps
+def _safe_json_dumps(obj, **kw):
+    try:
+        return _orig_json_dumps(obj, **kw)
+    except (UnicodeEncodeError, ValueError):
+        s = _orig_json_dumps(obj, ensure_ascii=True, **kw)
+        return re.sub(r'\\ud[89ab][0-9a-f]{2}\\ud[c-f][0-9a-f]{2}', '', s, flags=re.I)
+_json_mod.dumps = _safe_json_dumps
+
+from datanetra_core import (
+    DataSchema, INVENTORY_LEAD_DAYS, INVENTORY_REVIEW_DAYS, RESULT_CACHE,
+    build_full_platform_dashboard, dataset_digest, get_user_profile, iter_analysis_stages,
+    load_msme_frame, load_upload, plan_inventory, result_cache_key, save_user_profile,
+    _fetch_msme_data, _inr, _sb_pending,
+)
+
+# ══════════════════════════════════════════════════════════════════════════════
+# CSS
+# ══════════════════════════════════════════════════════════════════════════════
+custom_css = """
+.header-container{background:linear-gradient(135deg,#0f2557 0%,#1a3a6b 100%);padding:10px 20px;display:flex;justify-content:space-between;align-items:center;}
+.logo-section{display:flex;align-items:center;gap:12px;}
+.logo-img{height:45px;width:auto;filter:brightness(1.1);}
+.logo-text{background:linear-gradient(to right,#6a0dad,#007bff);-webkit-background-clip:text;-webkit-text-fill-color:transparent;font-size:28px;font-weight:700;}
+.hero-section{background:linear-gradient(90deg,#0f172a,#1e3a8a);padding:60px 40px;border-radius:10px;text-align:center;color:white;}
+.hero-title{font-size:42px;font-weight:700;margin-bottom:15px;color:white;}
+.hero-section h2.hero-sub-tagline{font-size:24px;font-weight:500;color:white;opacity:0.9;}
+.hero-section p.hero-description{margin-top:15px;font-size:18px;opacity:0.9;color:white;}
+.section{padding:40px 20px;margin-top:20px;border-radius:8px;background-color:#f9f9f9;}
+.section-title{font-size:32px;font-weight:700;color:#333;text-align:center;margin-bottom:20px;}
+.capabilities-section{background-color:#f0f8ff;padding:50px 20px;margin-top:40px;text-align:center;border-radius:8px;}
+.capabilities-grid{display:grid;grid-template-columns:repeat(auto-fit,minmax(250px,1fr));gap:30px;max-width:1200px;margin:0 auto;}
+.capability-card{background-color:#ffffff;padding:30px;border-radius:10px;text-align:center;}
+.footer-section{background-color:#0f2557;color:#ffffff;padding:20px;margin-top:40px;border-radius:8px;display:flex;justify-content:space-between;align-items:center;}
+.footer-section a{color:#ffffff;text-decoration:none;}
+body,html{background-color:#f8f9fa;}
+.voice-section{background:linear-gradient(135deg,#f0f7ff,#e8f4ff);border:2px solid #7AABDD;border-radius:12px;padding:16px 20px;margin:12px 0;}
+.voice-btn{background:linear-gradient(135deg,#e74c3c,#c0392b);color:white;border:none;border-radius:8px;padding:10px 20px;font-size:14px;font-weight:600;cursor:pointer;}
+.voice-status{font-size:13px;color:#2A4060;margin-top:8px;font-style:italic;}
+"""
+
+business_types = ["Choose Business Type","FMCG","Hypermarket","Clothing","Electronics"]
+roles = ["Business Owner","Co-Founder","Category Manager","Analyst","Store Manager"]
+ACTIVITY_TO_BIZ_TYPE = {'FMCG':'FMCG','Hypermarket':'Hypermarket','Electronics':'Electronics','Clothing':'Clothing','Manufacturing':'FMCG','Services':'FMCG','Trading':'FMCG','Retail':'Hypermarket'}
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Landing page helpers
+# ══════════════════════════════════════════════════════════════════════════════
+def _landing_hero(lang):
+    if lang == 'hi':
+        return """<div class="header-container"><div class="logo-section"><img src="https://i.postimg.cc/qRNQYbZJ/Data-Netra-Logo.jpg" class="logo-img" alt="DataNetra.ai Logo"><div class="logo-text">DataNetra.ai</div></div></div>
+<div class="hero-section"><h1 class="hero-title">AI से आपके धंधे की पूरी जानकारी</h1><h2 class="hero-sub-tagline">Data देखें। सही फैसला लें। आगे बढ़ें।</h2><p class="hero-description">अपना बिक्री का Data डालें — AI आपको बताएगा क्या बेचें, कब बेचें और कैसे मुनाफा बढ़ाएं।</p></div>"""
+    return """<div class="header-container"><div class="logo-section"><img src="https://i.postimg.cc/qRNQYbZJ/Data-Netra-Logo.jpg" class="logo-img" alt="DataNetra.ai Logo"><div class="logo-text">DataNetra.ai</div></div></div>
+<div class="hero-section"><h1 class="hero-title">AI-Powered Retail Intelligence</h1><h2 class="hero-sub-tagline">Data with Vision. Decisions with Confidence.</h2><p class="hero-description">Turn retail data into predictive insights, smarter decisions, and measurable growth.</p></div>"""
+
+def _landing_capabilities(lang):
+    if lang == 'hi':
+        return """<div class="capabilities-section"><h2 class="section-title">DataNetra क्या-क्या कर सकता है?</h2><div class="capabilities-grid"><div class="capability-card"><div style="font-size:48px">🎯</div><h3>Smart स्कोरिंग</h3><p>आपके सामान और धंधे को नंबर से समझाता है</p></div><div class="capability-card"><div style="font-size:48px">📊</div><h3>धंधे का Dashboard</h3><p>बिक्री, मुनाफा और सेहत — सब एक जगह देखें</p></div><div class="capability-card"><div style="font-size:48px">🔮</div><h3>आगे की बिक्री का अनुमान</h3><p>AI बताता है कि अगले 6-12 महीनों में बिक्री कितनी होगी</p></div><div class="capability-card"><div style="font-size:48px">🔗</div><h3>आसान जोड़</h3><p>अपने Excel या POS System का Data सीधे डालें</p></div></div></div>
+<div class="footer-section"><div>आपका Data सुरक्षित है</div><div>© 2026 DataNetra.ai &nbsp;|&nbsp;<a href="https://www.linkedin.com/company/108412762/" target="_blank">LinkedIn</a></div></div>"""
+    return """<div class="capabilities-section"><h2 class="section-title">Platform Capabilities</h2><div class="capabilities-grid"><div class="capability-card"><div style="font-size:48px">🎯</div><h3>Smart Scoring Engine</h3><p>Automated analysis for accurate performance scoring and health scores</p></div><div class="capability-card"><div style="font-size:48px">📊</div><h3>Business Health Dashboard</h3><p>Monitor key metrics and KPIs in one real-time dashboard</p></div><div class="capability-card"><div style="font-size:48px">🔮</div><h3>Predictive Insights</h3><p>AI-driven forecasts to anticipate future trends</p></div><div class="capability-card"><div style="font-size:48px">🔗</div><h3>Easy Integration</h3><p>Seamlessly connect with your existing retail and POS systems</p></div></div></div>
+<div class="footer-section"><div>Data Secured &amp; Protected</div><div>© 2026 DataNetra.ai &nbsp;|&nbsp;<a href="https://www.linkedin.com/company/108412762/" target="_blank">LinkedIn</a></div></div>"""
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# GRADIO UI
+# ══════════════════════════════════════════════════════════════════════════════
+
+# FIX 5: Voice registration JavaScript — Web Speech API for Step 1 & Step 2
+VOICE_JS_STEP1 = r"""
+<script>
+function startVoiceStep1() {
+  var statusEl = document.getElementById('voice-status-1');
+  if (!('webkitSpeechRecognition' in window) && !('SpeechRecognition' in window)) {
+    statusEl.innerText = '❌ Voice not supported. Please use Chrome or Edge.';
+    return;
+  }
+  var SpeechRecognition = window.SpeechRecognition || window.webkitSpeechRecognition;
+  var recog = new SpeechRecognition();
+  recog.lang = 'en-IN';
+  recog.continuous = false;
+  recog.interimResults = false;
+  statusEl.innerText = '🎙️ Listening... Speak now';
+  statusEl.style.color = '#c0392b';
+  recog.start();
+
+  function fillField(elemId, value) {
+    /* Try both the wrapper div id and direct input inside it */
+    var selectors = [
+      '#' + elemId + ' input',
+      '#' + elemId + ' textarea',
+      '#' + elemId
+    ];
+    for (var i = 0; i < selectors.length; i++) {
+      var el = document.querySelector(selectors[i]);
+      if (el && (el.tagName === 'INPUT' || el.tagName === 'TEXTAREA')) {
+        var nativeInputValueSetter = Object.getOwnPropertyDescriptor(window.HTMLInputElement.prototype, 'value') ||
+                                     Object.getOwnPropertyDescriptor(window.HTMLTextAreaElement.prototype, 'value');
+        if (nativeInputValueSetter) nativeInputValueSetter.set.call(el, value);
+        else el.value = value;
+        el.dispatchEvent(new Event('input',  {bubbles: true}));
+        el.dispatchEvent(new Event('change', {bubbles: true}));
+        return true;
+      }
+    }
+    return false;
+  }
+
+  recog.onresult = function(event) {
+    var transcript = event.results[0][0].transcript;
+    statusEl.style.color = '#1a7a40';
+    statusEl.innerText = '✅ Heard: "' + transcript + '"';
+
+    var nameMatch = transcript.match(/(?:my name is|name is|i am|iam)\s+([a-z\s]+?)(?:\s+mobile|\s+number|\s+roll|\s+role|$)/i);
+    if (nameMatch) {
+      var nm = nameMatch[1].trim();
+      fillField('step1-name', nm);
+      fillField('step1-name-v', nm);
+    }
+
+    var mobileMatch = transcript.match(/(?:mobile|number|phone)\s*(?:is\s*)?(\d[\d\s]{9,13})/i);
+    if (mobileMatch) {
+      var mob = mobileMatch[1].replace(/\s/g,'');
+      fillField('step1-mobile', mob);
+      fillField('step1-mobile-v', mob);
+    }
+
+    var roles = ['Business Owner','Co-Founder','Category Manager','Analyst','Store Manager'];
+    var detectedRole = null;
+    for (var r = 0; r < roles.length; r++) {
+      if (transcript.toLowerCase().indexOf(roles[r].toLowerCase()) !== -1) {
+        detectedRole = roles[r]; break;
+      }
+    }
+    if (detectedRole) {
+      /* Gradio dropdown — find the select or the visible input and set via React */
+      var dropdownWrap = document.querySelector('#step1-role');
+      if (dropdownWrap) {
+        var selEl = dropdownWrap.querySelector('input[type="text"], input:not([type]), select');
+        if (selEl) {
+          fillField('step1-role', detectedRole);
+        }
+        /* Also try clicking the matching option in the dropdown list */
+        var allOptions = dropdownWrap.querySelectorAll('li, [role="option"]');
+        allOptions.forEach(function(opt) {
+          if (opt.innerText && opt.innerText.trim() === detectedRole) opt.click();
+        });
+      }
+      statusEl.innerText += ' | Role: ' + detectedRole;
+    }
+  };
+
+  recog.onerror = function(e) {
+    statusEl.style.color = '#c0392b';
+    statusEl.innerText = '❌ Error: ' + e.error + '. Try again.';
+  };
+  recog.onend = function() {
+    if (statusEl.innerText.indexOf('Heard') === -1 && statusEl.innerText.indexOf('Error') === -1) {
+      statusEl.style.color = '#4A6A8A';
+      statusEl.innerText = 'Recording stopped. Click again to retry.';
+    }
+  };
+}
+</script>
+<div style="background:#F0F7FF;border:1px solid #C8DCEF;border-radius:10px;padding:16px 18px;margin-top:8px">
+  <div style="font-weight:700;color:#1B4F8A;font-size:14px;margin-bottom:6px">🎙️ Voice Registration — Step 1</div>
+  <div style="font-size:12px;color:#2A4060;margin-bottom:10px">Say: <em>"My name is [Name], mobile [number], role [role]"</em></div>
+  <div style="font-size:11px;color:#4A6A8A;margin-bottom:10px">Roles: Business Owner · Co-Founder · Category Manager · Analyst · Store Manager</div>
+  <button onclick="startVoiceStep1()" style="background:linear-gradient(135deg,#e74c3c,#c0392b);color:#FFFFFF;border:none;border-radius:8px;padding:10px 20px;font-size:13px;font-weight:600;cursor:pointer;letter-spacing:0.5px">🎤 Start Voice Input</button>
+  <div id="voice-status-1" style="font-size:13px;color:#2A4060;margin-top:8px;font-style:italic;min-height:20px">Click the button and speak clearly.</div>
+  <div style="font-size:11px;color:#4A6A8A;margin-top:6px">⚠️ Works in Chrome / Edge only · Check browser mic permissions</div>
+</div>"""
+
+VOICE_JS_STEP2 = r"""
+<script>
+function startVoiceStep2() {
+  var statusEl = document.getElementById('voice-status-2');
+  if (!('webkitSpeechRecognition' in window) && !('SpeechRecognition' in window)) {
+    statusEl.innerText = '❌ Voice not supported. Please use Chrome or Edge.';
+    return;
+  }
+  var SpeechRecognition = window.SpeechRecognition || window.webkitSpeechRecognition;
+  var recog = new SpeechRecognition();
+  recog.lang = 'en-IN';
+  recog.continuous = false;
+  recog.interimResults = false;
+  statusEl.innerText = '🎙️ Listening... Speak now';
+  statusEl.style.color = '#c0392b';
+  recog.start();
+
+  function fillField(elemId, value) {
+    var selectors = ['#' + elemId + ' input', '#' + elemId + ' textarea', '#' + elemId];
+    for (var i = 0; i < selectors.length; i++) {
+      var el = document.querySelector(selectors[i]);
+      if (el && (el.tagName === 'INPUT' || el.tagName === 'TEXTAREA')) {
+        var nativeInputValueSetter = Object.getOwnPropertyDescriptor(window.HTMLInputElement.prototype, 'value') ||
+                                     Object.getOwnPropertyDescriptor(window.HTMLTextAreaElement.prototype, 'value');
+        if (nativeInputValueSetter) nativeInputValueSetter.set.call(el, value);
+        else el.value = value;
+        el.dispatchEvent(new Event('input',  {bubbles: true}));
+        el.dispatchEvent(new Event('change', {bubbles: true}));
+        return true;
+      }
+    }
+    return false;
+  }
+
+  recog.onresult = function(event) {
+    var transcript = event.results[0][0].transcript;
+    statusEl.style.color = '#1a7a40';
+    statusEl.innerText = '✅ Heard: "' + transcript + '"';
+
+    /* UDYAM number — capture full UDYAM-XX-XX-XXXXXXX pattern */
+    var udyamMatch = transcript.match(/(?:UDYAM|udyam|udhyam)\s*[-]?\s*([A-Z0-9][\w\-\s]{4,20})/i);
+    if (udyamMatch) {
+      var udyam = udyamMatch[0].replace(/\s+/g,'-').replace(/-{2,}/g,'-').toUpperCase().trim();
+      fillField('step2-msme', udyam);
+      fillField('step2-msme-v', udyam);
+    }
+
+    /* OTP — 4 digit number after keyword */
+    var otpMatch = transcript.match(/(?:OTP|otp|code|pass)\s*(?:is\s*)?(\d{4})/i);
+    if (otpMatch) {
+      /* OTP field is type=password — querySelector finds it via wrapper id */
+      var otpWrap = document.getElementById('step2-otp');
+      if (otpWrap) {
+        var otpEl = otpWrap.querySelector('input');
+        if (otpEl) {
+          var setter = Object.getOwnPropertyDescriptor(window.HTMLInputElement.prototype, 'value');
+          if (setter) setter.set.call(otpEl, otpMatch[1]);
+          else otpEl.value = otpMatch[1];
+          otpEl.dispatchEvent(new Event('input',  {bubbles: true}));
+          otpEl.dispatchEvent(new Event('change', {bubbles: true}));
+        }
+      }
+      fillField('step2-otp-v', otpMatch[1]);
+      statusEl.innerText += ' | OTP: ****';
+    }
+  };
+
+  recog.onerror = function(e) {
+    statusEl.style.color = '#c0392b';
+    statusEl.innerText = '❌ Error: ' + e.error + '. Try again.';
+  };
+  recog.onend = function() {
+    if (statusEl.innerText.indexOf('Heard') === -1 && statusEl.innerText.indexOf('Error') === -1) {
+      statusEl.style.color = '#4A6A8A';
+      statusEl.innerText = 'Recording stopped. Click again to retry.';
+    }
+  };
+}
+</script>
+<div style="background:#F0F7FF;border:1px solid #C8DCEF;border-radius:10px;padding:16px 18px;margin-top:8px">
+  <div style="font-weight:700;color:#1B4F8A;font-size:14px;margin-bottom:6px">🎙️ Voice Registration — Step 2</div>
+  <div style="font-size:12px;color:#2A4060;margin-bottom:10px">Say: <em>"UDYAM [number] OTP [4 digits]"</em></div>
+  <div style="font-size:11px;color:#4A6A8A;margin-bottom:10px">Example: <em>"UDYAM TN 00 7629703 OTP 1234"</em></div>
+  <button onclick="startVoiceStep2()" style="background:linear-gradient(135deg,#e74c3c,#c0392b);color:#FFFFFF;border:none;border-radius:8px;padding:10px 20px;font-size:13px;font-weight:600;cursor:pointer;letter-spacing:0.5px">🎤 Start Voice Input</button>
+  <div id="voice-status-2" style="font-size:13px;color:#2A4060;margin-top:8px;font-style:italic;min-height:20px">Click the button and speak clearly.</div>
+  <div style="font-size:11px;color:#4A6A8A;margin-top:6px">⚠️ Works in Chrome / Edge only · Check browser mic permissions</div>
+</div>"""
+
+with gr.Blocks(title="DataNetra.ai - MSME Intelligence", theme=gr.themes.Soft(), css=custom_css) as demo:
+
+    step_state = gr.State(0); user_data_state = gr.State({}); lang_state = gr.State('en')
+    dashboard_data_state = gr.State({'kpi1':"","kpi2":"","kpi3":"","kpi4":"","kpi5":"","chart1":None,"chart2":None,"chart3":None,"chart4":None})
+    granular_forecast_data_state = gr.State(None); df_state = gr.State(None)
+
+    # ── Language Bar ──
+    with gr.Row(elem_id="lang-bar"):
+        gr.HTML('<div style="background:#0f2557;padding:8px 16px;border-radius:6px;display:flex;align-items:center;gap:12px;"><span style="color:white;font-weight:600;font-size:0.9rem;">🌐 Language / भाषा:</span></div>')
+        lang_en_btn = gr.Button("🇬🇧 English", size="sm", variant="primary", elem_id="lang-en-btn")
+        lang_hi_btn = gr.Button("🇮🇳 हिंदी", size="sm", variant="secondary", elem_id="lang-hi-btn")
+        lang_indicator = gr.Markdown("**Active: English**", elem_id="lang-indicator")
+
+    # ── Step 0: Landing ──
+    with gr.Column(visible=True) as step0_col:
+        landing_hero_html = gr.HTML(value=_landing_hero('en'))
+        show_signup_trigger = gr.Button("", elem_id="show-signup-trigger", visible=False)
+        with gr.Column(elem_classes="section", elem_id="how-datanetra-works-section"):
+            landing_how_title = gr.Markdown("## How DataNetra Works", elem_classes="section-title"); gr.Markdown("---")
+            with gr.Row():
+                with gr.Column(scale=1):
+                    landing_step1_title = gr.Markdown("### 📥 Step 1: Upload Your Data")
+                    landing_step1_desc  = gr.Markdown("Easily upload Excel/CSV files for comprehensive analysis.")
+                    landing_step2_title = gr.Markdown("### 🤖 Step 2: AI-Powered Analysis")
+                    landing_step2_desc  = gr.Markdown("Our AI processes your data, forecasting trends and uncovering insights.")
+                    landing_step3_title = gr.Markdown("### 📊 Step 3: Actionable Dashboards")
+                    landing_step3_desc  = gr.Markdown("Access interactive dashboards, KPI charts and personalized recommendations.")
+                with gr.Column(scale=1):
+                    landing_login_title  = gr.Markdown("**Already Registered**")
+                    quick_login_mobile   = gr.Textbox(label="Enter Mobile Number", placeholder="+91")
+                    quick_login_btn      = gr.Button("Login", variant="primary", size="lg")
+                    landing_login_error_msg = gr.Markdown(value="", visible=False)
+                    landing_signup_title = gr.Markdown("**First Time User**")
+                    landing_signup_desc  = gr.Markdown("**Signup to unlock smart AI Insights**")
+                    quick_signup_btn     = gr.Button("Sign Up Now", variant="primary", size="lg")
+        landing_capabilities_html = gr.HTML(value=_landing_capabilities('en'))
+
+    # ── Step 1: User Info + Voice ──
+    with gr.Column(visible=False) as step1_col:
+        gr.Markdown("# 📝 Register New User\n## Step 1: User Information")
+
+        # FIX 5a — Tabs for Manual vs Voice input in Step 1
+        with gr.Tabs():
+            with gr.Tab("⌨️ Manual Entry"):
+                name_input   = gr.Textbox(label="Full Name*", elem_id="step1-name")
+                mobile_input = gr.Textbox(label="Mobile Number*", elem_id="step1-mobile")
+                email_input  = gr.Textbox(label="Email")
+                role_input   = gr.Dropdown(choices=roles, label="Role*")
+            with gr.Tab("🎙️ Voice Entry"):
+                gr.HTML(VOICE_JS_STEP1)
+                gr.Markdown("""**How it works:**
+1. Click **🎤 Start Voice Input**
+2. Say: *"My name is Karthick, mobile 9876543210, role Business Owner"*
+3. The system will fill in the fields automatically
+4. Switch to **Manual Entry** tab to verify and edit if needed""")
+                # Mirror fields so they stay in sync (voice fills via JS into the elem_id targets)
+                name_input_v   = gr.Textbox(label="Name (voice filled — verify here)", elem_id="step1-name-v")
+                mobile_input_v = gr.Textbox(label="Mobile (voice filled — verify here)", elem_id="step1-mobile-v")
+                role_input_v   = gr.Textbox(label="Role (voice filled — verify here, e.g. Business Owner)")
+                gr.Markdown("*After voice fill, values are shown here. You can still edit them.*")
+
+        with gr.Row():
+            cancel1_btn = gr.Button("Cancel")
+            next1_btn   = gr.Button("Next →", variant="primary")
+        error1 = gr.Markdown()
+
+    # ── Step 2: MSME Verification + Voice ──
+    with gr.Column(visible=False) as step2_col:
+        gr.Markdown("## Step 2: MSME Verification")
+
+        # FIX 5b — Tabs for Manual vs Voice input in Step 2
+        with gr.Tabs():
+            with gr.Tab("⌨️ Manual Entry"):
+                msme_number_input = gr.Textbox(label="MSME/Udyam Number*", placeholder="e.g., UDYAM-TN-00-7629703", elem_id="step2-msme")
+                otp_input         = gr.Textbox(label="OTP (Enter '1234' for demo)*", type="password", elem_id="step2-otp")
+                fetch_btn         = gr.Button("Fetch MSME Data", variant="secondary")
+                fetch_status      = gr.Markdown()
+            with gr.Tab("🎙️ Voice Entry"):
+                gr.HTML(VOICE_JS_STEP2)
+                gr.Markdown("""**How it works:**
+1. Click **🎤 Start Voice Input**
+2. Say: *"UDYAM TN 00 7629703, OTP 1234"*
+3. Switch to **Manual Entry** tab to verify
+4. Click **Fetch MSME Data** to load your details""")
+                msme_voice_display = gr.Textbox(label="UDYAM Number (voice filled — verify)", elem_id="step2-msme-v")
+                otp_voice_display  = gr.Textbox(label="OTP (voice filled — verify)", type="password", elem_id="step2-otp-v")
+                gr.Markdown("*After verifying above, go to Manual tab and click Fetch MSME Data.*")
+
+        gr.Markdown("### Fetched MSME Details")
+        fetched_name     = gr.Textbox(label="Enterprise Name", interactive=False)
+        fetched_org      = gr.Textbox(label="Organisation Type", interactive=False)
+        fetched_activity = gr.Textbox(label="Major Activity", interactive=False)
+        fetched_type     = gr.Textbox(label="Enterprise Type", interactive=False)
+        fetched_state    = gr.Textbox(label="State", interactive=False)
+        fetched_city     = gr.Textbox(label="City", interactive=False)
+        # FIX 4 — Industry Domain field in Step 2
+        fetched_industry = gr.Textbox(label="Industry Domain", interactive=False, value="Retail")
+
+        with gr.Row():
+            back2_btn = gr.Button("← Back")
+            next2_btn = gr.Button("Verify & Next →", variant="primary")
+        error2 = gr.Markdown()
+
+    # ── Step 3: Certificate Review ──
+    with gr.Column(visible=False) as step3_col:
+        gr.Markdown("## Step 3: MSME Certificate Review\n### Confirm MSME Details")
+        confirm_name     = gr.Textbox(label="Enterprise Name", interactive=False)
+        confirm_org      = gr.Textbox(label="Organisation Type", interactive=False)
+        confirm_activity = gr.Textbox(label="Major Activity", interactive=False)
+        confirm_type     = gr.Textbox(label="Enterprise Type", interactive=False)
+        confirm_state    = gr.Textbox(label="State", interactive=False)
+        confirm_city     = gr.Textbox(label="City", interactive=False)
+        # FIX 4 — Industry Domain in Step 3
+        confirm_industry = gr.Textbox(label="Industry Domain", interactive=False, value="Retail")
+        consent1           = gr.Checkbox(label="I confirm the above MSME details are correct", value=False)
+        consent2           = gr.Checkbox(label="I consent to verify the MSME certificate", value=False)
+        certificate_upload = gr.File(label="Upload MSME Certificate (PDF)", file_types=[".pdf"])
+        with gr.Row():
+            back3_btn = gr.Button("← Back")
+            next3_btn = gr.Button("Confirm & Proceed →", variant="primary")
+        error3 = gr.Markdown()
+
+    # ── Step 4: Business Profile ──
+    with gr.Column(visible=False) as step4_col:
+        verification_status_display = gr.Markdown(visible=False)
+        gr.Markdown("## Step 4: Business Profile")
+        business_type_input = gr.Dropdown(choices=business_types, label="Business Type*")
+        years_input         = gr.Number(label="Years in Operation*", value=1, minimum=0)
+        revenue_input       = gr.Dropdown(label="Monthly Revenue Range*", choices=["< 5 Lakh","5-10 Lakh","10-50 Lakh","50 Lakh - 1 Crore","> 1 Crore"])
+        with gr.Row():
+            back4_btn = gr.Button("← Back")
+            next4_btn = gr.Button("Submit Profile", variant="primary")
+        error4 = gr.Markdown()
+        proceed_to_step5_btn = gr.Button("Next: Upload Business Data →", variant="primary", visible=False)
+
+    # ── Step 5: Upload & Analyse ──
+    with gr.Column(visible=False) as step5_col:
+        login_welcome_message = gr.Markdown(value="", visible=False)
+        gr.Markdown("## Step 5: Upload Business Data")
+        consent_check  = gr.Checkbox(label="I consent to data analysis*", value=False)
+        file_upload    = gr.File(label="Upload Excel File (.xlsx, .csv)*", file_types=[".xlsx",".csv"])
+        upload_message = gr.Markdown(value="", visible=False)
+        with gr.Row():
+            back5_btn   = gr.Button("← Back")
+            cancel5_btn = gr.Button("❌ Cancel", variant="secondary")
+            analyze_btn = gr.Button("🚀 Analyze Data", variant="primary", elem_id="analyze-data-btn")
+        error5 = gr.Markdown()
+        insights_output = gr.HTML(elem_id="insights-output-html")
+        with gr.Row():
+            view_dashboard_btn     = gr.Button("📊 ONDC Impact — View Dashboard", visible=False, variant="primary")
+            view_gov_dashboard_btn = gr.Button("🏛️ Government Dashboard", visible=False, variant="secondary")
+        kpi1 = gr.Markdown(visible=False); kpi2 = gr.Markdown(visible=False)
+        kpi3 = gr.Markdown(visible=False); kpi4 = gr.Markdown(visible=False); kpi5 = gr.Markdown(visible=False)
+        chart1 = gr.Plot(visible=False); chart2 = gr.Plot(visible=False)
+        chart3 = gr.Plot(visible=False); chart4 = gr.Plot(visible=False)
+        sum1 = gr.Markdown(visible=False); sum2 = gr.Markdown(visible=False)
+        sum3 = gr.Markdown(visible=False); sum4 = gr.Markdown(visible=False)
+
+    # ── Step 6: ONDC Impact & SNP Readiness ──
+    with gr.Column(visible=False) as step6_col:
+        gr.HTML('''<div style="background:linear-gradient(135deg,#0f2557,#1a3a6b);
+                              padding:14px 24px;border-radius:10px;margin-bottom:12px;text-align:center">
+          <h1 style="color:white;margin:0;font-size:1.45rem;font-weight:800;letter-spacing:0.4px">
+            ONDC Impact &amp; SNP Readiness Dashboard
+          </h1></div>''')
+        kpi_table_dash = gr.HTML(value="", elem_id="kpi-table-container")
+        gr.HTML('<div style="margin:28px 0 10px 0;padding:14px 20px;background:linear-gradient(90deg,#0f2557,#1a3a6b);border-radius:8px;"><span style="color:white;font-size:1.25rem;font-weight:700;">📈 Performance Visualizations</span></div>')
+        with gr.Row():
+            with gr.Column(): chart1_dash = gr.Plot(label="Sales vs Profit Margin (Quarterly)"); chart1_summary = gr.Markdown(value="", visible=False)
+            with gr.Column(): chart2_dash = gr.Plot(label="ONDC Before vs After Revenue"); chart2_summary = gr.Markdown(value="", visible=False)
+        with gr.Row():
+            with gr.Column(): chart3_dash = gr.Plot(label="Returns & Replacements Trend"); chart3_summary = gr.Markdown(value="", visible=False)
+            with gr.Column(): chart4_dash = gr.Plot(label="Store-Level ONDC Impact"); chart4_summary = gr.Markdown(value="", visible=False)
+        with gr.Row():
+            forecast_deepdive_btn = gr.Button("📈 Intelligence Sales Forecast Dashboard →", variant="primary", size="lg")
+            back6_btn             = gr.Button("⬅ Back to Data Upload", variant="secondary", size="lg")
+
+    # ── Step 6a: Government Dashboard ──
+    with gr.Column(visible=False) as step6a_col:
+        gr.HTML('<div style="background:linear-gradient(135deg,#070D1A,#0D1829);padding:18px 24px;border-radius:10px;margin-bottom:16px;"><h1 style="color:white;margin:0;font-size:1.9rem;font-weight:700;">🏛️ National MSME Platform Dashboard</h1><p style="color:#7AABDD;margin:6px 0 0;font-size:1rem;">Government & Policy Intelligence — Powered by DataNetra.ai</p></div>')
+        back6a_btn       = gr.Button("⬅ Back to Data Upload", variant="secondary")
+        gov_dashboard_html = gr.HTML(value="", elem_id="gov-platform-dashboard")
+
+    # ── Step 7: Store → Category → Product + Forecasting ──
+    with gr.Column(visible=False) as step7_col:
+        # ── Page title ──
+        gr.HTML('''<div style="background:linear-gradient(135deg,#0f2557,#1a3a6b);
+                              padding:14px 24px;border-radius:10px;margin-bottom:12px;text-align:center">
+          <h1 style="color:white;margin:0;font-size:1.45rem;font-weight:800;letter-spacing:0.4px">
+            STEP 7: Store &#8594; Category &#8594; Product + Forecasting
+          </h1></div>''')
+        # ── Filter bar: MSME label + 3 dropdowns inline ──
+        gr.HTML('''<div id="s7-filter-wrap" style="display:flex;align-items:center;gap:10px;
+                         flex-wrap:wrap;background:#f0f7ff;border:1px solid #c8dcef;
+                         border-radius:8px;padding:8px 14px;margin-bottom:12px">
+          <span style="font-size:11px;font-weight:700;color:#1B4F8A;white-space:nowrap">
+            MSME: Sri Hypermarket (UDYAM-TN-00-762978)</span>
+          <span style="color:#C8DCEF">|</span>
+        </div>''')
+        with gr.Row():
+            s7_msme_label   = gr.HTML(value='', visible=False)
+            s7_store_filter = gr.Dropdown(choices=["Store: All"], value="Store: All",
+                                          label="🏪 Store", scale=1, interactive=True)
+            s7_cat_filter   = gr.Dropdown(choices=["Category: All"], value="Category: All",
+                                          label="📂 Category", scale=1, interactive=True)
+            s7_prod_filter  = gr.Dropdown(choices=["Product: All"], value="Product: All",
+                                          label="📦 Product", scale=1, interactive=True)
+        # ── KPI card row ──
+        s7_kpi_html = gr.HTML(value="", elem_id="s7-kpi-row")
+        # ── Top Products table ──
+        s7_top_table = gr.HTML(value="", elem_id="s7-top-table")
+        # ── Row 1: Category Sales Trend | Category Margin Trend ──
+        with gr.Row():
+            s7_cat_sales_chart  = gr.Plot(label="Category Sales Trend (36 Months)",  scale=1)
+            s7_cat_margin_chart = gr.Plot(label="Category Margin Trend (36 Months)", scale=1)
+        # ── Row 2: 6-Month | 12-Month | Fulfilment Trend ──
+        with gr.Row():
+            s7_fc6_chart    = gr.Plot(label="6-Month Forecast",        scale=1)
+            s7_fc12_chart   = gr.Plot(label="12-Month Forecast",       scale=1)
+            s7_fulfil_chart = gr.Plot(label="Product Fulfilment Trend",scale=1)
+        # ── Row 3: Sales vs Returns | Inventory | AI Summary ──
+        with gr.Row():
+            s7_sales_ret_chart = gr.Plot(label="Product Sales vs Returns",   scale=1)
+            s7_inventory_chart = gr.Plot(label="Stock Cover & Reorder Risk", scale=1)
+            s7_ai_summary      = gr.HTML(value="", elem_id="s7-ai-summary")
+        # ── Reorder plan: every SKU × store, click a header to sort ──
+        s7_reorder_table = gr.Dataframe(label="Reorder Plan — days of cover, stock-out risk & suggested order",
+                                        interactive=False, wrap=True)
+        # ── Back buttons ──
+        with gr.Row():
+            back7_btn     = gr.Button("\u2b05 Back to Dashboard",   variant="secondary")
+            back7_to5_btn = gr.Button("\u2b05 Back to Data Upload", variant="secondary")
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # All columns list
+    # ══════════════════════════════════════════════════════════════════════════
+    _ALL_COLS = [step0_col, step1_col, step2_col, step3_col, step4_col, step5_col, step6_col, step6a_col, step7_col]
+
+    def update_visibility_all(active_name):
+        names = ['step0','step1','step2','step3','step4','step5','step6','step6a','step7']
+        return [gr.update(visible=(n == active_name)) for n in names]
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # Event Handlers
+    # ══════════════════════════════════════════════════════════════════════════
+    def show_signup():
+        return (1, *update_visibility_all('step1'))
+
+    def handle_login(mobile):
+        profile = get_user_profile(mobile)
+        if profile:
+            msg = f"✅ Welcome back, {profile['full_name']}! You have been navigated to upload business data file for Analysis."
+            return (gr.update(value="", visible=False), profile, 5, *update_visibility_all('step5'),
+                    gr.update(value="", visible=False), gr.update(value="", visible=False),
+                    gr.update(value="", visible=False), gr.update(value="", visible=False),
+                    gr.update(value="", visible=False), gr.update(value=msg, visible=True))
+        return (gr.update(value="❌ No account found. Please register or try again.", visible=True), {}, 0,
+                *update_visibility_all('step0'),
+                gr.update(value="", visible=False), gr.update(value="", visible=False),
+                gr.update(value="", visible=False), gr.update(value="", visible=False),
+                gr.update(value="", visible=False), gr.update(value="", visible=False))
+
+    def validate_step1(name, mobile, email, role, current_data):
+        import re
+        # Required field check
+        if not name or not mobile or not role:
+            return ("⚠️ Please fill all required fields (Name, Mobile, Role)", current_data, 1, *update_visibility_all('step1'))
+        # Fix 1: Full name — alphabets and spaces only
+        name_clean = name.strip()
+        if not re.match(r'^[A-Za-z ]{2,60}$', name_clean):
+            return ("⚠️ Full Name must contain only alphabets and spaces (2–60 characters)", current_data, 1, *update_visibility_all('step1'))
+        # Fix 2: Mobile — exactly 10 digits
+        mobile_clean = mobile.strip()
+        if not re.match(r'^[6-9][0-9]{9}$', mobile_clean):
+            return ("⚠️ Mobile Number must be exactly 10 digits and start with 6, 7, 8 or 9", current_data, 1, *update_visibility_all('step1'))
+        # Email format check (if provided)
+        if email and not re.match(r'^[^@\s]+@[^@\s]+\.[^@\s]+$', email.strip()):
+            return ("⚠️ Please enter a valid email address", current_data, 1, *update_visibility_all('step1'))
+        updated = {**current_data, 'full_name': name_clean, 'mobile_number': mobile_clean, 'email': email, 'role': role}
+        return ("", updated, 2, *update_visibility_all('step2'))
+
+    def verify_step2(msme_num, otp, current_data, ent_name, org, activity, ent_type, state, city, industry, status):
+        import re
+        BLANK = ("", "", "", "", "", "", "Retail", gr.update(visible=False))
+        if not msme_num or not otp:
+            return ("⚠️ Please fill MSME/Udyam number and OTP", current_data, 2, *update_visibility_all('step2'), *BLANK)
+        # Fix 3: Udyam number format — UDYAM-XX-YY-XXXXXXX
+        udyam_clean = msme_num.strip().upper()
+        if not re.match(r'^UDYAM-[A-Z]{2}-\d{2}-\d{7}$', udyam_clean):
+            return ("⚠️ Invalid Udyam Number format. Required format: UDYAM-XX-00-0000000 (e.g. UDYAM-TN-00-7629703)", current_data, 2, *update_visibility_all('step2'), *BLANK)
+        if otp != "1234":
+            return ("⚠️ Invalid OTP. Please enter the correct OTP", current_data, 2, *update_visibility_all('step2'), *BLANK)
+        if "Successfully" not in str(status):
+            return ("⚠️ Please fetch MSME data first using the Fetch button", current_data, 2, *update_visibility_all('step2'), *BLANK)
+        updated = {**current_data, 'msme_number': udyam_clean, 'company_name': ent_name,
+                   'organisation_type': org, 'major_activity': activity, 'enterprise_type': ent_type,
+                   'state': state, 'city': city, 'industry_domain': industry}
+        return ("✅ OTP Verified — Udyam number validated", updated, 3, *update_visibility_all('step3'),
+                ent_name, org, activity, ent_type, state, city, industry, gr.update(value="", visible=False))
+
+    def confirm_step3(current_data, c1, c2, cert):
+        import re, os
+        if not c1 or not c2:
+            return ("⚠️ Please accept both consents to proceed", current_data, 3, *update_visibility_all('step3'),
+                    gr.update(value="", visible=False), gr.update(value="Choose Business Type"))
+        if cert is None:
+            return ("⚠️ Please upload your MSME Certificate (PDF)", current_data, 3, *update_visibility_all('step3'),
+                    gr.update(value="", visible=False), gr.update(value="Choose Business Type"))
+
+        # ── Certificate Validation: match Udyam number in PDF vs Step 2 ──────
+        msme_from_step2 = current_data.get('msme_number', '').strip().upper()
+        if msme_from_step2 and cert is not None:
+            cert_path = cert.name if hasattr(cert, 'name') else str(cert)
+            cert_text = ""
+            # Method 1: PyMuPDF (fitz)
+            try:
+                import fitz
+                doc = fitz.open(cert_path)
+                cert_text = " ".join(page.get_text() for page in doc).upper()
+            except Exception:
+                pass
+            # Method 2: pdfplumber fallback
+            if not cert_text.strip():
+                try:
+                    import pdfplumber
+                    with pdfplumber.open(cert_path) as pdf:
+                        cert_text = " ".join(p.extract_text() or "" for p in pdf.pages).upper()
+                except Exception:
+                    pass
+            # Method 3: pypdf fallback
+            if not cert_text.strip():
+                try:
+                    from pypdf import PdfReader
+                    reader = PdfReader(cert_path)
+                    cert_text = " ".join(page.extract_text() or "" for page in reader.pages).upper()
+                except Exception:
+                    pass
+
+            if cert_text.strip():
+                # Normalise: strip hyphens for flexible matching
+                def _norm(s): return re.sub(r'[-\s]', '', s)
+                matches = re.findall(r'UDYAM[-\s]?[A-Z]{2}[-\s]?\d{2}[-\s]?\d{7}', cert_text)
+                matched_normalised = [_norm(m) for m in matches]
+                step2_normalised   = _norm(msme_from_step2)
+                if matched_normalised and step2_normalised not in matched_normalised:
+                    found_display = matches[0]
+                    return (
+                        f"❌ Certificate Mismatch! The uploaded certificate belongs to **{found_display}** "
+                        f"but you entered **{msme_from_step2}** in Step 2. "
+                        f"Please upload the correct certificate or go back and correct the MSME number.",
+                        current_data, 3, *update_visibility_all('step3'),
+                        gr.update(value="", visible=False), gr.update(value="Choose Business Type"))
+                elif not matched_normalised:
+                    # No Udyam found in PDF — could be scanned image; warn but allow through
+                    pass  # Fall through to approval
+        updated = {**current_data, 'verification_status': 'APPROVED'}
+        activity = current_data.get('major_activity', '')
+        pre_biz = ACTIVITY_TO_BIZ_TYPE.get(activity, "Choose Business Type")
+        if activity in business_types: pre_biz = activity
+
+        # FIX 3 — Show Major Activity in verification status message
+        success_msg = (f"## ✅ Verification Status: APPROVED\n\n"
+                       f"**Company:** {current_data.get('company_name','N/A')}\n\n"
+                       f"**MSME Number:** {current_data.get('msme_number','N/A')}\n\n"
+                       f"**Major Activity:** {activity}\n\n"
+                       f"**Status:** APPROVED ✓")
+        return (gr.update(value="", visible=False), updated, 4, *update_visibility_all('step4'),
+                gr.update(value=success_msg, visible=True), gr.update(value=pre_biz))
+
+    def submit_profile(biz_type, years, revenue, current_data):
+        if not biz_type or biz_type == "Choose Business Type":
+            return (gr.update(value="⚠️ Please select business type", visible=True), current_data,
+                    gr.update(visible=False), gr.update(visible=True))
+        if not revenue:
+            return (gr.update(value="⚠️ Please select revenue range", visible=True), current_data,
+                    gr.update(visible=False), gr.update(visible=True))
+        if years is None or years <= 0:
+            return (gr.update(value="⚠️ Please enter valid years in operation", visible=True), current_data,
+                    gr.update(visible=False), gr.update(visible=True))
+        updated = {**current_data, 'business_type': biz_type, 'years_operation': int(years),
+                   'monthly_revenue_range': revenue, 'consent_given': True}
+        try:
+            user_id = save_user_profile(updated)
+            success_msg = (f"## ✅ Business Profile Submitted!\n\n"
+                           f"**Company:** {updated.get('company_name','N/A')}\n\n"
+                           f"**Business Type:** {biz_type}\n\n"
+                           f"**Years in Operation:** {int(years)}\n\n"
+                           f"**Monthly Revenue:** {revenue}\n\n"
+                           f"Profile saved (ID: {user_id}). Click **Next** to upload data.")
+            return (gr.update(value=success_msg, visible=True), updated,
+                    gr.update(visible=True), gr.update(visible=False))
+        except Exception as e:
+            return (gr.update(value=f"❌ Error saving profile: {str(e)}", visible=True), current_data,
+                    gr.update(visible=False), gr.update(visible=True))
+
+    # FIX 2 — analyze_data with correct column mapping
+    def analyze_data(user_data, consent, file, lang='en'):
+        empty_dash = {'kpi1':"","kpi2":"","kpi3":"","kpi4":"","kpi5":"","chart1":None,"chart2":None,"chart3":None,"chart4":None}
+        def _fail(msg):
+            return (msg, gr.update(visible=False), gr.update(visible=False),
+                    "", "", "", "", "", None, None, None, None,
+                    gr.update(value="", visible=False), gr.update(value="", visible=False),
+                    gr.update(value="", visible=False), gr.update(value="", visible=False),
+                    gr.update(value="", visible=False), empty_dash, None)
+        def _ok(insights_html, dash, df_for_gov):
+            return (insights_html or "✅ Analysis completed",
+                    gr.update(visible=True), gr.update(visible=True),
+                    dash['kpi1'], "", "", "", "", dash['chart1'], dash['chart2'], dash['chart3'], dash['chart4'],
+                    dash['sum1'], dash['sum2'], dash['sum3'], dash['sum4'],
+                    gr.update(value="", visible=False), dash, df_for_gov)
+        def _partial(insights_html):
+            # Only the report changes while it streams; buttons and states wait for the end
+            return (insights_html,) + (gr.update(),) * 18
+        if not consent: yield _fail("⚠️ Please provide consent to analyze data"); return
+        if file is None: yield _fail("⚠️ Please upload an Excel or CSV file"); return
+        try:
+            file_path = file.name if hasattr(file, 'name') else str(file)
+            msme_key = user_data.get('msme_number', '').strip().upper()
+            if not file_path.endswith(('.xlsx', '.csv')):
+                yield _fail("❌ Unsupported file format. Please upload .xlsx or .csv"); return
+            yield _partial(_sb_pending("Reading your upload…"))
+            t0 = time.perf_counter()
+            digest = dataset_digest(file_path)
+            rkey = result_cache_key(digest, msme_key, lang, user_data)
+            cached, tier = RESULT_CACHE.get(rkey)
+            if cached is not None:
+                # Neither tier keeps frames — the columnar cache hands them back
+                full, msme_df, _ = load_upload(file_path, msme_key, digest)
+                df_for_gov = full if full is not None else msme_df
+                print(f"[INFO] Result cache hit ({tier}) in {(time.perf_counter()-t0)*1000:.0f} ms")
+                yield _ok(cached['insights'], cached['dash'], df_for_gov); return
+            # Parsed once per file content — re-analysis reads the memory-mapped cache.
+            # ── Fix 6: Government dashboard needs ALL MSMEs (df_full_for_gov); Steps
+            # 5/6/7 use only the logged-in MSME's rows so insights are personalised.
+            # Large exports stream: only this MSME's rows + government aggregates.
+            df, df_full_for_gov, gov_agg = load_msme_frame(file_path, msme_key, digest)
+
+            # Columns resolved and the frame scored once; every stage below shares the context
+            schema = DataSchema.of(df)
+            # The report streams in section by section; the rest lands with the last yield
+            for event, *payload in iter_analysis_stages(
+                    df, schema, user_data, lang,
+                    src={'file_path': file_path, 'msme_key': msme_key, 'digest': digest}):
+                if event == 'insights': yield _partial(payload[0])
+            stages, degraded = payload
+            insights_html, error_msg = stages['insights']
+            if error_msg: yield _fail(f"❌ {error_msg}"); return
+
+            result = stages['dashboard']
+            k1 = result[0]; f1,f2,f3,f4 = result[5],result[6],result[7],result[8]
+            s1,s2,s3,s4 = result[9],result[10],result[11],result[12]
+            gf = stages['granular']
+            dash = {'kpi1':k1,'chart1':f1,'chart2':f2,'chart3':f3,'chart4':f4,'sum1':s1,'sum2':s2,'sum3':s3,'sum4':s4,'granular':gf,
+                    'gov':gov_agg,'schema':schema}
+            df_for_gov = df_full_for_gov  # full multi-MSME dataset → Government Dashboard (MSME slice when streamed)
+            # Pass df_full_for_gov to df_state so Government Dashboard gets all MSMEs
+            # Steps 5/6/7 use MSME-filtered df (already applied above)
+            cached_dash = dict(dash, granular=dict(gf, raw_df=None) if gf else gf)
+            yield _ok(insights_html, dash, df_for_gov)
+            # After the final yield: the user already has the report while PNGs are rendered for disk
+            if degraded:
+                print(f"[INFO] Result not cached (degraded: {degraded})")
+            else:
+                bundle = {'insights': insights_html, 'dash': cached_dash}
+                RESULT_CACHE.put(rkey, bundle, bundle)
+        except Exception as e:
+            import traceback
+            yield _fail(f"❌ Analysis failed: {str(e)}\n\n{traceback.format_exc()}")
+
+    def show_dashboard(dashboard_data_value):
+        def _summary(key):
+            val = dashboard_data_value.get(key)
+            return gr.update(value=val, visible=True) if val else gr.update(value="", visible=False)
+        granular_data = dashboard_data_value.get('granular')
+        kpi_html_val  = dashboard_data_value.get('kpi1', "")
+        return (6, *update_visibility_all('step6'), kpi_html_val,
+                dashboard_data_value.get('chart1'), dashboard_data_value.get('chart2'),
+                dashboard_data_value.get('chart3'), dashboard_data_value.get('chart4'),
+                _summary('sum1'), _summary('sum2'), _summary('sum3'), _summary('sum4'), granular_data)
+
+    def show_gov_dashboard(raw_df, dashboard_data_value=None):
+        gov_agg = (dashboard_data_value or {}).get('gov')
+        if gov_agg is not None:
+            raw_df = gov_agg   # streamed upload: aggregates were built during ingest
+        if raw_df is None:
+            html = "<div style='padding:40px;color:#FF4444;font-size:16px;'>⚠️ No data available. Please upload and analyze data first.</div>"
+        else:
+            try:
+                # raw_df here is the full dataset (all MSMEs) — ideal for government portfolio view
+                html = build_full_platform_dashboard(raw_df)
+            except Exception as e:
+                import traceback
+                html = f"<div style='padding:40px;color:#FF4444;font-size:16px;'>❌ Error: {str(e)}<br><pre style='font-size:11px'>{traceback.format_exc()}</pre></div>"
+        return (6, *update_visibility_all('step6a'), html)
+
+    def handle_file_upload_change(user_data, file):
+        if file is not None:
+            name = user_data.get('full_name', 'User')
+            return (gr.update(value=f"Thank you, {name}, for uploading the dataset. Click 'Analyze Data' to view AI Insights and Dashboard.", visible=True),
+                    gr.update(value="", visible=False))
+        return gr.update(value="", visible=False), gr.update(value="", visible=False)
+
+    # ── Product name mapping (matches reference image naming style) ────────────
+    _PRODUCT_NAMES = {
+        1:'Aashirvaad Atta', 2:'Tata Salt', 3:'Parle-G Biscuits', 4:'Amul Butter',
+        5:'Samsung TV 43"', 6:'Whirlpool Fridge', 7:'LG Microwave', 8:'Philips Iron',
+        9:'Jeans Regular Fit', 10:'Cotton Kurta', 11:'Ladies Saree', 12:'Kids T-Shirt',
+        13:'Prestige Cooker', 14:'Milton Bottle', 15:'Wooden Shelf', 16:'Ceramic Vase',
+        17:'Dettol Sanitiser', 18:'Himalaya Face Wash', 19:'Glucon-D 500g', 20:'Band-Aid Box',
+        21:'Maggi Noodles', 22:'Britannia Biscuits', 23:'Surf Excel 1kg', 24:'Colgate Toothpaste',
+        25:'Bosch Mixer', 26:'Sony Earphones', 27:'Xiaomi Powerbank', 28:'Syska LED Bulb',
+        29:'Formal Shirt', 30:'Track Pants', 31:'Winter Jacket', 32:'Ethnic Dupatta',
+        33:'Steel Cookware Set', 34:'Bamboo Basket', 35:'Wall Clock', 36:'Photo Frame',
+        37:'Dabur Honey', 38:'Patanjali Ghee', 39:'Vitamin-C Tablets', 40:'Neem Face Pack',
+    }
+
+    def _build_step7_data(df_raw, store_sel, cat_sel, prod_sel, schema=None, plan=None):
+        """Filter df and compute all KPIs + 7 charts + AI summary for Step 7.
+        ``plan`` is the analysis' plan_inventory table; filters only slice it."""
+        import matplotlib
+        import matplotlib.pyplot as plt
+        import matplotlib.ticker as mticker
+        import numpy as np, pandas as pd, warnings
+        warnings.filterwarnings('ignore')
+        from sklearn.linear_model import LinearRegression
+
+        if df_raw is None:
+            return None
+
+        df = df_raw
+
+        # ── Column resolution (handles both raw & remapped names) ───────────
+        schema = schema or DataSchema.of(df)
+        sc   = schema.net_sales or schema.sales
+        dc   = schema.date
+        stc  = schema.store
+        catc = schema.category
+        pidc = schema.sku
+        uc   = schema.units
+        pmc  = schema.margin
+        rrc  = schema.returns
+        rpc  = schema.replacements
+        tac  = schema.target
+        ivc  = schema.inventory
+        roc  = schema.reorder
+        slc  = schema.stock
+        qrc  = schema.qty_returned
+
+        if sc is None:
+            return None
+
+        # ── Ensure MSME-only ────────────────────────────────────────────────
+        # df is already filtered to the logged-in MSME in analyze_data — no extra filter needed
+        if df.empty:
+            return None
+
+        # ── Parse dates ─────────────────────────────────────────────────────
+        if dc:
+            if not pd.api.types.is_datetime64_any_dtype(df[dc]):
+                df = df.assign(**{dc: pd.to_datetime(df[dc], errors='coerce')})
+            df = df.dropna(subset=[dc])
+
+        # ── Apply filters ────────────────────────────────────────────────────
+        if store_sel and store_sel not in ("Store: All", ""):
+            sid = store_sel.replace("Store: ", "").strip()
+            if stc: df = df[df[stc].astype(str) == sid]
+        if cat_sel and cat_sel not in ("Category: All", ""):
+            cval = cat_sel.replace("Category: ", "").strip()
+            if catc: df = df[df[catc].astype(str) == cval]
+        if prod_sel and prod_sel not in ("Product: All", ""):
+            pval = prod_sel.replace("Product: SKU-", "").replace("Product: ", "").strip()
+            if pidc:
+                try:    df = df[df[pidc].astype(str) == pval]
+                except: pass
+        if df.empty:
+            return None
+        if plan is None and dc and pidc and uc and slc:
+            plan = plan_inventory(df, schema)
+        elif plan is not None:
+            keep = np.ones(len(plan), dtype=bool)
+            if store_sel and store_sel not in ("Store: All", "") and stc: keep &= plan['store'].astype(str).to_numpy() == sid
+            if cat_sel and cat_sel not in ("Category: All", "") and catc: keep &= plan['category'].astype(str).to_numpy() == cval
+            if prod_sel and prod_sel not in ("Product: All", "") and pidc: keep &= plan['sku'].astype(str).to_numpy() == pval
+            plan = plan[keep]
+
+        # ── Helpers ──────────────────────────────────────────────────────────
+        def _s(c):  return float(df[c].sum())  if c and c in df.columns else 0.0
+        def _m(c):  return float(df[c].mean()) if c and c in df.columns else 0.0
+        def _si(c): return int(df[c].sum())    if c and c in df.columns else 0
+        def _inr(v):
+            if v >= 1e7: return f"&#8377;{v/1e7:.1f} Cr"
+            if v >= 1e5: return f"&#8377;{v/1e5:.1f} L"
+            return f"&#8377;{v:,.0f}"
+        def _inr_ax(x, _):
+            if abs(x) >= 1e7: return f"₹{x/1e7:.1f}Cr"
+            if abs(x) >= 1e5: return f"₹{x/1e5:.0f}L"
+            return f"₹{x:,.0f}"
+
+        # ── KPI values ───────────────────────────────────────────────────────
+        total_units = _si(uc)
+        total_sales = _s(sc)
+        avg_margin  = _m(pmc)
+        avg_ret     = _m(rrc)
+        total_repl  = _si(rpc)
+        avg_fulfil  = _m(tac)
+
+        # ── KPI HTML: 6-card row matching image ──────────────────────────────
+        def _kcard(label, value, color, sub_color=None, sub=""):
+            sc2 = sub_color or color
+            return (
+                f'<div style="flex:1;min-width:110px;background:#fff;'
+                f'border:1px solid #D8E8F4;border-radius:10px;padding:14px 10px 10px 10px;'
+                f'text-align:center;box-shadow:0 1px 5px rgba(27,79,138,0.07)">'
+                f'<div style="font-size:9.5px;font-weight:700;letter-spacing:1.3px;'
+                f'text-transform:uppercase;color:#7A92AA;margin-bottom:6px">{label}</div>'
+                f'<div style="font-size:22px;font-weight:900;color:{color};'
+                f'font-family:monospace;line-height:1.1">{value}</div>'
+                + (f'<div style="font-size:9px;color:{sc2};margin-top:3px">{sub}</div>' if sub else '')
+                + '</div>'
+            )
+
+        ret_c = "#e74c3c" if avg_ret >= 7 else ("#f39c12" if avg_ret >= 4 else "#27ae60")
+        tgt_c = "#27ae60" if avg_fulfil >= 100 else "#f39c12"
+        mrg_c = "#27ae60" if avg_margin >= 20 else "#f39c12"
+
+        kpi_html = (
+            '<div style="display:flex;gap:10px;flex-wrap:wrap;margin-bottom:14px">'
+            + _kcard("Units Sold",   f"{total_units:,}",      "#1B4F8A")
+            + _kcard("Net Sales",    _inr(total_sales),       "#1B4F8A")
+            + _kcard("Margin %",     f"{avg_margin:.1f}%",    mrg_c)
+            + _kcard("Return Rate",  f"{avg_ret:.1f}%",       ret_c)
+            + _kcard("Replacements", f"{total_repl:,}",       "#8b5cf6")
+            + _kcard("Fulfilment",   f"{avg_fulfil:.1f}%",    tgt_c)
+            + '</div>'
+        )
+
+        # ── Top Products table ────────────────────────────────────────────────
+        top_table_html = ""
+        if pidc and sc:
+            top_agg = {sc: 'sum'}
+            if pmc: top_agg[pmc] = 'mean'
+            if rrc: top_agg[rrc] = 'mean'
+            top = df.groupby(pidc, observed=True).agg(top_agg).reset_index()
+            top.columns = [pidc, 'Sales'] + (['Margin'] if pmc else []) + (['RetRate'] if rrc else [])
+            top = top.sort_values('Sales', ascending=False).head(5)
+
+            rows = ""
+            for rank, (_, r) in enumerate(top.iterrows(), 1):
+                bg   = "#FFFFFF" if rank % 2 else "#F4F9FF"
+                pid  = int(r[pidc]) if str(r[pidc]).isdigit() else r[pidc]
+                pname= _PRODUCT_NAMES.get(int(pid), f"Product {pid}") if isinstance(pid, (int, float)) else str(pid)
+                margin_v  = f"{r['Margin']:.0f}%"  if 'Margin' in r.index  else "—"
+                retrate_v = f"{r['RetRate']:.1f}%"  if 'RetRate' in r.index else "—"
+                rows += (
+                    f'<tr style="background:{bg};border-bottom:1px solid #E8F0F8">'
+                    f'<td style="padding:9px 14px;font-weight:700;color:#7A92AA;'
+                    f'text-align:center;width:55px">{rank}</td>'
+                    f'<td style="padding:9px 14px;color:#4A6A8A;font-size:11px">{pid}</td>'
+                    f'<td style="padding:9px 14px;color:#1A2D45;font-weight:600">{pname}</td>'
+                    f'<td style="padding:9px 14px;text-align:right;font-weight:800;'
+                    f'color:#1B4F8A">{_inr(r["Sales"])}</td>'
+                    f'<td style="padding:9px 14px;text-align:center;color:#27ae60;'
+                    f'font-weight:700">{margin_v}</td>'
+                    f'<td style="padding:9px 14px;text-align:center;color:#e74c3c">{retrate_v}</td>'
+                    f'</tr>'
+                )
+
+            store_label = (store_sel or "").replace("Store: ", "").strip() or "All Stores"
+            cat_label   = (cat_sel   or "").replace("Category: ", "").strip() or "All Categories"
+            top_table_html = f"""
+<div style="margin-bottom:16px">
+  <div style="background:#EAF4FF;border:1px solid #C8DCEF;border-bottom:none;
+              border-radius:8px 8px 0 0;padding:9px 16px;font-size:11px;
+              font-weight:800;letter-spacing:1.5px;text-transform:uppercase;color:#1B4F8A">
+    Top Products in {cat_label} &nbsp;&mdash;&nbsp; {store_label}
+  </div>
+  <table style="width:100%;border-collapse:collapse;font-size:12.5px;
+                border:1px solid #C8DCEF;border-radius:0 0 8px 8px;overflow:hidden">
+    <thead>
+      <tr style="background:#0B1F3A">
+        <th style="padding:9px 14px;color:#A8D8FF;font-weight:600;text-align:center">Rank</th>
+        <th style="padding:9px 14px;color:#A8D8FF;font-weight:600;text-align:left">Product ID</th>
+        <th style="padding:9px 14px;color:#A8D8FF;font-weight:600;text-align:left">Product Name</th>
+        <th style="padding:9px 14px;color:#A8D8FF;font-weight:600;text-align:right">Sales</th>
+        <th style="padding:9px 14px;color:#A8D8FF;font-weight:600;text-align:center">Margin</th>
+        <th style="padding:9px 14px;color:#A8D8FF;font-weight:600;text-align:center">Return Rate</th>
+      </tr>
+    </thead>
+    <tbody>{rows}</tbody>
+  </table>
+</div>"""
+
+        # ── Global chart style ────────────────────────────────────────────────
+        plt.rcParams.update({
+            'font.family': 'DejaVu Sans',
+            'axes.spines.top': False, 'axes.spines.right': False,
+            'axes.grid': True, 'grid.alpha': 0.2, 'grid.color': '#C8DCEF',
+            'axes.facecolor': '#FAFCFF', 'figure.facecolor': '#FFFFFF',
+        })
+        NAVY  = '#1B4F8A'; GREEN = '#27ae60'; RED = '#e74c3c'
+        AMBER = '#f39c12'; PURP  = '#8b5cf6'; TEAL = '#0097a7'
+        CAT_PAL = [NAVY, '#f39c12', '#27ae60', RED, PURP, TEAL, '#e67e22', '#16a085']
+
+        def _xtick_step(n, target=6): return max(1, n // target)
+
+        def _style_ax(ax, title, ylabel="", fontsize=10):
+            ax.set_title(title, fontsize=fontsize, fontweight='bold', pad=8, color='#1A2D45')
+            if ylabel:
+                ax.set_ylabel(ylabel, fontsize=8, color='#4A6A8A')
+            ax.tick_params(axis='both', labelsize=7, colors='#4A6A8A')
+            ax.spines['left'].set_color('#D0E4F4')
+            ax.spines['bottom'].set_color('#D0E4F4')
+
+        # ── Chart 1: Category Sales Trend (36 Months) ──────────────────────
+        fig1, ax1 = plt.subplots(figsize=(7, 3.6))
+        fig1.subplots_adjust(top=0.88, bottom=0.24, left=0.13, right=0.97)
+        if dc and catc:
+            df1 = df.copy()
+            df1['_m'] = df1[dc].dt.to_period('M').astype(str)
+            grp1 = df1.groupby([catc, '_m'], observed=True)[sc].sum().reset_index().sort_values('_m')
+            cats1 = sorted(grp1[catc].dropna().unique())
+            all_months = sorted(grp1['_m'].unique())
+            for ci, cat in enumerate(cats1):
+                cm = grp1[grp1[catc] == cat].sort_values('_m')
+                y1v = cm[sc].values / 1e5
+                x1v = list(range(len(cm)))
+                ax1.fill_between(x1v, y1v, alpha=0.13, color=CAT_PAL[ci % len(CAT_PAL)])
+                ax1.plot(x1v, y1v, color=CAT_PAL[ci % len(CAT_PAL)],
+                         linewidth=1.8, label=cat, marker='o', markersize=2)
+            step1 = _xtick_step(len(all_months))
+            ax1.set_xticks(range(0, len(all_months), step1))
+            ax1.set_xticklabels(all_months[::step1], rotation=45, ha='right', fontsize=6.5)
+            ax1.legend(fontsize=6.5, ncol=3, loc='upper left',
+                       framealpha=0.9, edgecolor='#D0E4F4', labelspacing=0.3)
+            ax1.yaxis.set_major_formatter(mticker.FuncFormatter(_inr_ax))
+        else:
+            ax1.text(0.5, 0.5, 'No time-series data', ha='center', va='center',
+                     transform=ax1.transAxes, fontsize=10, color='#7A92AA')
+        _style_ax(ax1, 'Category Sales Trend (36 Months)', 'Sales (₹ Lakhs)')
+
+        # ── Chart 2: Category Margin Trend (36 Months) ─────────────────────
+        fig2, ax2 = plt.subplots(figsize=(7, 3.6))
+        fig2.subplots_adjust(top=0.88, bottom=0.24, left=0.11, right=0.97)
+        if dc and catc and pmc:
+            df2 = df.copy()
+            df2['_m'] = df2[dc].dt.to_period('M').astype(str)
+            grp2 = df2.groupby([catc, '_m'], observed=True)[pmc].mean().reset_index().sort_values('_m')
+            cats2 = sorted(grp2[catc].dropna().unique())
+            all_m2 = sorted(grp2['_m'].unique())
+            for ci, cat in enumerate(cats2):
+                cm2 = grp2[grp2[catc] == cat].sort_values('_m')
+                y2v = cm2[pmc].values
+                x2v = list(range(len(cm2)))
+                ax2.fill_between(x2v, y2v, alpha=0.13, color=CAT_PAL[ci % len(CAT_PAL)])
+                ax2.plot(x2v, y2v, color=CAT_PAL[ci % len(CAT_PAL)],
+                         linewidth=1.8, label=cat, marker='o', markersize=2)
+            ax2.axhline(20, color=GREEN, linestyle='--', linewidth=1.2,
+                        alpha=0.75, label='Target 20%')
+            step2 = _xtick_step(len(all_m2))
+            ax2.set_xticks(range(0, len(all_m2), step2))
+            ax2.set_xticklabels(all_m2[::step2], rotation=45, ha='right', fontsize=6.5)
+            ax2.legend(fontsize=6.5, ncol=3, loc='upper left',
+                       framealpha=0.9, edgecolor='#D0E4F4', labelspacing=0.3)
+            ax2.yaxis.set_major_formatter(mticker.FuncFormatter(lambda x, _: f'{x:.0f}%'))
+        else:
+            ax2.text(0.5, 0.5, 'No margin data', ha='center', va='center',
+                     transform=ax2.transAxes, fontsize=10, color='#7A92AA')
+        _style_ax(ax2, 'Category Margin Trend (36 Months)', 'Margin %')
+
+        # ── Linear forecast helper ───────────────────────────────────────────
+        def _forecast(series, n):
+            y  = np.array(series, dtype=float)
+            X  = np.arange(len(y)).reshape(-1, 1)
+            lr = LinearRegression().fit(X, y)
+            Xf = np.arange(len(y), len(y) + n).reshape(-1, 1)
+            yh = lr.predict(Xf).clip(0)
+            std = max(np.std(y - lr.predict(X)), 1)
+            return y, yh, (yh - 1.65 * std).clip(0), yh + 1.65 * std
+
+        # ── Chart 3: 6-Month Forecast ────────────────────────────────────────
+        fig3, ax3 = plt.subplots(figsize=(5, 3.6))
+        fig3.subplots_adjust(top=0.88, bottom=0.14, left=0.14, right=0.97)
+        total_6m = 0
+        if dc and sc:
+            df3 = df.copy()
+            df3['_m'] = df3[dc].dt.to_period('M').astype(str)
+            ms3 = df3.groupby('_m')[sc].sum().sort_index()
+            if len(ms3) >= 3:
+                y3, yh6, lo6, hi6 = _forecast(ms3.values, 6)
+                total_6m = float(yh6.sum())
+                xh3 = list(range(len(y3)))
+                xf3 = list(range(len(y3) - 1, len(y3) + 6))
+                fy3 = np.concatenate([[y3[-1]], yh6])
+                fl3 = np.concatenate([[y3[-1]], lo6])
+                fh3 = np.concatenate([[y3[-1]], hi6])
+                ax3.plot(xh3, y3 / 1e5, color=NAVY, lw=2, label='Expected Sales & Returns',
+                         marker='o', ms=2.5)
+                ax3.plot(xf3, fy3 / 1e5, color=RED, lw=2, ls='--',
+                         marker='o', ms=2.5, label='Forecast')
+                ax3.fill_between(xf3, fl3 / 1e5, fh3 / 1e5, color=RED, alpha=0.12)
+                ax3.axvline(len(y3) - 1, color='#888', ls=':', lw=1, alpha=0.6)
+                ax3.legend(fontsize=6.5, loc='upper left', framealpha=0.9)
+                ax3.text(0.97, 0.06, f'6M: {_inr(total_6m)}',
+                         transform=ax3.transAxes, ha='right', fontsize=8.5, fontweight='bold',
+                         color=RED, bbox=dict(boxstyle='round,pad=0.3',
+                                              facecolor='#FFF3CD', edgecolor=AMBER, alpha=0.9))
+        ax3.set_xticklabels([]); ax3.set_xlabel('')
+        ax3.yaxis.set_major_formatter(mticker.FuncFormatter(_inr_ax))
+        _style_ax(ax3, '6-Month Forecast', 'Sales (₹L)')
+
+        # ── Chart 4: 12-Month Forecast ───────────────────────────────────────
+        fig4, ax4 = plt.subplots(figsize=(5, 3.6))
+        fig4.subplots_adjust(top=0.88, bottom=0.14, left=0.14, right=0.97)
+        total_12m = 0
+        if dc and sc:
+            df4 = df.copy()
+            df4['_m'] = df4[dc].dt.to_period('M').astype(str)
+            ms4 = df4.groupby('_m')[sc].sum().sort_index()
+            if len(ms4) >= 3:
+                y4, yh12, lo12, hi12 = _forecast(ms4.values, 12)
+                total_12m = float(yh12.sum())
+                xh4 = list(range(len(y4)))
+                xf4 = list(range(len(y4) - 1, len(y4) + 12))
+                fy4 = np.concatenate([[y4[-1]], yh12])
+                fl4 = np.concatenate([[y4[-1]], lo12])
+                fh4 = np.concatenate([[y4[-1]], hi12])
+                ax4.plot(xh4, y4 / 1e5, color=NAVY, lw=2, label='Forecast',
+                         marker='o', ms=2)
+                ax4.plot(xf4, fy4 / 1e5, color=GREEN, lw=2, ls='--',
+                         marker='o', ms=2, label='Actual')
+                ax4.fill_between(xf4, fl4 / 1e5, fh4 / 1e5, color=GREEN, alpha=0.12)
+                ax4.axvline(len(y4) - 1, color='#888', ls=':', lw=1, alpha=0.6)
+                ax4.legend(fontsize=6.5, loc='upper left', framealpha=0.9)
+                ax4.text(0.97, 0.06, f'12M: {_inr(total_12m)}',
+                         transform=ax4.transAxes, ha='right', fontsize=8.5, fontweight='bold',
+                         color=GREEN, bbox=dict(boxstyle='round,pad=0.3',
+                                                facecolor='#EAF7EE', edgecolor=GREEN, alpha=0.9))
+        ax4.set_xticklabels([]); ax4.set_xlabel('')
+        ax4.yaxis.set_major_formatter(mticker.FuncFormatter(_inr_ax))
+        _style_ax(ax4, '12-Month Forecast', 'Sales (₹L)')
+
+        # ── Chart 5: Product Fulfilment Trend ────────────────────────────────
+        fig5, ax5 = plt.subplots(figsize=(5, 3.6))
+        fig5.subplots_adjust(top=0.88, bottom=0.22, left=0.13, right=0.97)
+        if dc and tac:
+            df5 = df.copy()
+            df5['_m'] = df5[dc].dt.to_period('M').astype(str)
+            ft  = df5.groupby('_m')[tac].mean().sort_index()
+            xft = list(range(len(ft)))
+            fv  = ft.values
+            ax5.fill_between(xft, fv, 100, where=fv >= 100,
+                             alpha=0.18, color=GREEN, interpolate=True)
+            ax5.fill_between(xft, fv, 100, where=fv < 100,
+                             alpha=0.18, color=RED, interpolate=True)
+            ax5.plot(xft, fv, color=NAVY, lw=2, marker='o', ms=2.5)
+            ax5.axhline(100, color=GREEN, ls='--', lw=1.2, alpha=0.7, label='100% target')
+            ax5.set_ylim(max(80, fv.min() - 4), min(115, fv.max() + 4))
+            step5 = _xtick_step(len(ft))
+            ax5.set_xticks(range(0, len(ft), step5))
+            ax5.set_xticklabels(ft.index.tolist()[::step5], rotation=45, ha='right', fontsize=6.5)
+            ax5.yaxis.set_major_formatter(mticker.FuncFormatter(lambda x, _: f'{x:.0f}%'))
+            ax5.legend(fontsize=6.5, loc='lower right', framealpha=0.9)
+        else:
+            ax5.text(0.5, 0.5, 'No fulfilment data', ha='center', va='center',
+                     transform=ax5.transAxes, fontsize=10, color='#7A92AA')
+        _style_ax(ax5, 'Product Fulfilment Trend', 'Target Achievement %')
+
+        # ── Chart 6: Product Sales vs Returns ────────────────────────────────
+        fig6, ax6 = plt.subplots(figsize=(6, 3.6))
+        fig6.subplots_adjust(top=0.88, bottom=0.22, left=0.13, right=0.91)
+        if dc and sc:
+            df6 = df.copy()
+            df6['_m'] = df6[dc].dt.to_period('M').astype(str)
+            agg6 = {'sales': (sc, 'sum')}
+            if rrc: agg6['ret'] = (rrc, 'mean')
+            sr = df6.groupby('_m').agg(**agg6).sort_index()
+            ax6b = ax6.twinx()
+            xsr  = list(range(len(sr)))
+            ax6.fill_between(xsr, sr['sales'].values / 1e5, alpha=0.15, color=NAVY)
+            ax6.plot(xsr, sr['sales'].values / 1e5, color=NAVY, lw=2,
+                     marker='o', ms=2.5, label='Sales')
+            if rrc and 'ret' in sr.columns:
+                ax6b.plot(xsr, sr['ret'].values, color=RED, lw=2, ls='--',
+                          marker='o', ms=2.5, label='Returns')
+                ax6b.set_ylabel('Return Rate %', fontsize=8, color=RED)
+                ax6b.tick_params(axis='y', labelcolor=RED, labelsize=7)
+                ax6b.yaxis.set_major_formatter(mticker.FuncFormatter(lambda x, _: f'{x:.1f}%'))
+                ax6b.spines['right'].set_color('#F5C6CB')
+            step6 = _xtick_step(len(sr))
+            ax6.set_xticks(range(0, len(sr), step6))
+            ax6.set_xticklabels(sr.index.tolist()[::step6], rotation=45, ha='right', fontsize=6.5)
+            ax6.yaxis.set_major_formatter(mticker.FuncFormatter(_inr_ax))
+            h1, l1 = ax6.get_legend_handles_labels()
+            h2, l2 = ax6b.get_legend_handles_labels() if rrc else ([], [])
+            ax6.legend(h1 + h2, l1 + l2, fontsize=6.5, loc='upper left',
+                       framealpha=0.9, edgecolor='#D0E4F4')
+        _style_ax(ax6, 'Product Sales vs Returns', 'Sales (₹L)')
+
+        # ── Chart 7: Stock cover of the riskiest SKUs (planner), else Inventory & Reorder Levels ──
+        fig7, ax7 = plt.subplots(figsize=(6, 3.6))
+        fig7.subplots_adjust(top=0.88, bottom=0.28, left=0.11, right=0.97)
+        reorder_df = None
+        if plan is not None and len(plan):
+            fig7.subplots_adjust(left=0.30, bottom=0.16)
+            risk = plan.head(8).iloc[::-1]
+            cover = risk['days_of_cover'].clip(upper=120).to_numpy()
+            bar_c = np.where(risk['status'] == 'Stock-out risk', RED, np.where(risk['status'] == 'Reorder', AMBER, GREEN))
+            ax7.barh(range(len(risk)), cover, color=bar_c, alpha=0.85)
+            ax7.set_yticks(range(len(risk)))
+            ax7.set_yticklabels([f"SKU-{s}" + (f" · S{st}" if stc else "") for s, st in zip(risk['sku'], risk['store'])], fontsize=7)
+            for yi, (c, p) in enumerate(zip(cover, risk['stockout_prob'])):
+                ax7.text(c, yi, f" {p:.0%}", va='center', fontsize=6.5, color='#1A2D45')
+            ax7.axvline(INVENTORY_LEAD_DAYS, color=RED, ls='--', lw=1.1, label=f'Lead time {INVENTORY_LEAD_DAYS:g} d')
+            ax7.axvline(INVENTORY_LEAD_DAYS + INVENTORY_REVIEW_DAYS, color=NAVY, ls=':', lw=1.1, label='Next delivery window')
+            ax7.set_xlabel('Days of cover (label: stock-out probability)', fontsize=7, color='#4A6A8A')
+            ax7.set_xlim(0, max(float(cover.max()), INVENTORY_LEAD_DAYS + INVENTORY_REVIEW_DAYS) * 1.15)
+            ax7.legend(fontsize=6.5, loc='upper right', framealpha=0.9, edgecolor='#D0E4F4')
+            _style_ax(ax7, 'Stock Cover & Stock-out Risk')
+            reorder_df = pd.DataFrame({
+                'SKU': plan['sku'].astype(str), 'Store': plan['store'].astype(str) if stc else '—',
+                'Category': plan['category'].astype(str) if catc else '—',
+                'Stock': plan['stock'].round(0), 'Demand (30 d)': plan['demand_30d'].round(0),
+                'Days of cover': plan['days_of_cover'].clip(upper=999).round(1),
+                'Stock-out %': (plan['stockout_prob'] * 100).round(0),
+                'Reorder qty': plan['reorder_qty'], 'Status': plan['status']})
+        elif pidc and slc and roc and ivc:
+            inv = df.groupby(pidc, observed=True).agg(
+                Stock=(slc,  'mean'),
+                Reorder=(roc, 'mean'),
+                Restck=(ivc, 'mean'),
+            ).reset_index().head(8)
+            x7 = list(range(len(inv)))
+            w7 = 0.27
+            ax7.bar([xi - w7 for xi in x7], inv['Stock'],   width=w7, color=NAVY,  alpha=0.82, label='Stock')
+            ax7.bar([xi       for xi in x7], inv['Reorder'], width=w7, color=AMBER, alpha=0.82, label='Reorder Point')
+            ax7.bar([xi + w7 for xi in x7], inv['Restck'],  width=w7, color=GREEN, alpha=0.82, label='Restock Level')
+            ax7.set_xticks(list(x7))
+            pids7 = [int(p) if str(p).isdigit() else p for p in inv[pidc]]
+            ax7.set_xticklabels([f"SKU-{p}" for p in pids7], rotation=45, ha='right', fontsize=7)
+            ax7.legend(fontsize=6.5, loc='upper right', framealpha=0.9, edgecolor='#D0E4F4')
+        elif slc or roc or ivc:
+            # Fallback — just show available stock column
+            ivf_col = slc or ivc or roc
+            if ivf_col and pidc:
+                inv_fb = df.groupby(pidc, observed=True)[ivf_col].mean().reset_index().head(8)
+                ax7.bar(range(len(inv_fb)), inv_fb[ivf_col], color=NAVY, alpha=0.82)
+                ax7.set_xticks(range(len(inv_fb)))
+                ax7.set_xticklabels([f"SKU-{p}" for p in inv_fb[pidc]], rotation=45, ha='right', fontsize=7)
+            else:
+                ax7.text(0.5, 0.5, 'No inventory data', ha='center', va='center',
+                         transform=ax7.transAxes, fontsize=10, color='#7A92AA')
+        else:
+            ax7.text(0.5, 0.5, 'No inventory data', ha='center', va='center',
+                     transform=ax7.transAxes, fontsize=10, color='#7A92AA')
+        if reorder_df is None:
+            ax7.set_ylabel('Units', fontsize=8, color='#4A6A8A')
+            _style_ax(ax7, 'Inventory & Reorder Levels', 'Units')
+
+        # ── AI Forecast Summary ───────────────────────────────────────────────
+        cat_label   = (cat_sel   or "").replace("Category: ", "").strip() or "All Categories"
+        store_label = (store_sel or "").replace("Store: ", "").strip()    or "All Stores"
+
+        top_cat = cat_label if cat_label != "All Categories" else "FMCG"
+        if catc in df.columns and not df.empty and cat_label == "All Categories":
+            by_cat = df.groupby(catc, observed=True)[sc].sum()
+            if not by_cat.empty:
+                top_cat = by_cat.idxmax()
+
+        low_stock_msg = ""
+        if slc and roc and pidc:
+            try:
+                ls = df[df[slc] < df[roc]]
+                if not ls.empty:
+                    top_low  = ls.groupby(pidc, observed=True)[slc].mean().idxmin()
+                    pid_int  = int(top_low) if str(top_low).isdigit() else top_low
+                    pname_ls = _PRODUCT_NAMES.get(pid_int, f"SKU-{pid_int}")
+                    low_stock_msg = (
+                        f'<li>Recommend restocking <strong>{pname_ls}</strong>'
+                        f' within 2 weeks.</li>')
+            except Exception:
+                pass
+
+        fc_pct        = 8 if avg_margin >= 20 else 5
+        margin_state  = "strong" if avg_margin >= 20 else "moderate"
+        ret_msg       = (f"Monitor growing returns ({avg_ret:.1f}%) — review product quality."
+                         if avg_ret > 7 else
+                         f"Return rate {avg_ret:.1f}% is within healthy limits.")
+        clothing_note = ('<li>Monitor growing clothing returns during the monsoon.</li>'
+                         if 'clothing' in cat_label.lower() or cat_label == "All Categories"
+                         else "")
+        elec_note     = ('<li>Electronics inventory low — reorder urgency.</li>'
+                         if 'electr' in cat_label.lower() or cat_label == "All Categories"
+                         else "")
+
+        # ── Compute action-specific numbers ──────────────────────────────────────
+        inv_action_pct  = 10 if avg_fulfil < 70 else (5 if avg_fulfil < 85 else 0)
+        margin_gap      = round(20 - avg_margin, 1) if avg_margin < 20 else 0
+        ret_action      = avg_ret > 7
+        # Low-margin action
+        margin_action_li = (
+            f'<li>💡 <strong>Renegotiate supplier cost for <em>{top_cat}</em></strong> — '
+            f'current margin is <strong>{avg_margin:.1f}%</strong>, '
+            f'{margin_gap}pp below the 20% target. A 5% cost reduction unlocks ~{_inr(total_sales * 0.05 if total_sales else 0)} extra profit.</li>'
+            if margin_gap > 0 else
+            f'<li>✅ <strong>Margin healthy at {avg_margin:.1f}%</strong> — '
+            f'consider expanding <em>{top_cat}</em> SKU count to grow revenue.</li>'
+        )
+        # Inventory action
+        inv_action_li = (
+            f'<li>📦 <strong>Increase inventory of <em>{top_cat}</em> by {inv_action_pct}%</strong> — '
+            f'fulfilment rate is <strong>{avg_fulfil:.1f}%</strong> '
+            f'(target ≥85%). Stockout risk is high; pre-order for the next 30 days.</li>'
+            if inv_action_pct > 0 else
+            f'<li>✅ <strong>Inventory levels adequate</strong> — fulfilment at {avg_fulfil:.1f}%. '
+            f'Focus on optimising reorder cycle frequency.</li>'
+        )
+        # Returns action
+        ret_action_li = (
+            f'<li>🔁 <strong>Investigate return drivers for <em>{top_cat}</em></strong> — '
+            f'return rate is <strong>{avg_ret:.1f}%</strong> (threshold 7%). '
+            f'Review top 3 returned SKUs and add quality checks before dispatch.</li>'
+            if ret_action else
+            f'<li>✅ <strong>Return rate healthy at {avg_ret:.1f}%</strong> — '
+            f'maintain current quality controls.</li>'
+        )
+        # Forecast growth action
+        fc_action_li = (
+            f'<li>📈 <strong>Prepare for {fc_pct}–{fc_pct+4}% demand rise in <em>{top_cat}</em></strong> '
+            f'over the next 6 months — projected revenue: <strong>{_inr(total_6m) if total_6m else "—"}</strong>. '
+            f'Align procurement and staffing 3 weeks ahead.</li>'
+        )
+
+        ai_html = f"""
+<div style="background:linear-gradient(160deg,#EAF4FF 0%,#F8FAFF 100%);
+            border:1px solid #B8D4F0;border-radius:10px;padding:16px 18px;
+            height:100%;box-shadow:0 1px 8px rgba(27,79,138,0.08)">
+  <div style="font-size:10px;font-weight:800;letter-spacing:1.8px;text-transform:uppercase;
+              color:#1B4F8A;margin-bottom:6px;padding-bottom:8px;border-bottom:2px solid #C8DCEF">
+    🤖 AI Action Recommendations
+  </div>
+  <div style="font-size:10px;color:#4A6A8A;margin-bottom:10px">
+    Based on your data · {store_label} · {cat_label}
+  </div>
+  <ul style="margin:0 0 14px 0;padding-left:18px;font-size:12px;
+             line-height:1.9;color:#1A2D45;list-style:none;padding-left:0">
+    {fc_action_li}
+    {inv_action_li}
+    {margin_action_li}
+    {ret_action_li}
+    {low_stock_msg}
+  </ul>
+  <div style="background:#fff;border-radius:8px;padding:10px 13px;
+              border-left:3px solid #1B4F8A;font-size:11px;color:#4A6A8A;line-height:1.7">
+    <span style="font-weight:700;color:#1B4F8A">Store:</span> {store_label}
+    &nbsp;|&nbsp;
+    <span style="font-weight:700;color:#1B4F8A">Category:</span> {cat_label}<br>
+    <span style="font-weight:700;color:#1B4F8A">Margin:</span> {avg_margin:.1f}% ({margin_state})
+    &nbsp;|&nbsp;
+    <span style="font-weight:700;color:#1B4F8A">Return Rate:</span>
+    <span style="color:{ret_c};font-weight:700">{avg_ret:.1f}%</span><br>
+    <span style="font-weight:700;color:#1B4F8A">Fulfilment:</span>
+    <span style="color:{tgt_c};font-weight:700">{avg_fulfil:.1f}%</span>
+    &nbsp;|&nbsp;
+    <span style="font-weight:700;color:#1B4F8A">6M Forecast:</span>
+    <span style="color:#1B4F8A;font-weight:700">{_inr(total_6m) if total_6m else "—"}</span>
+  </div>
+</div>"""
+
+        plt.close('all')
+        return dict(kpi=kpi_html, table=top_table_html, ai=ai_html,
+                    f1=fig1, f2=fig2, f3=fig3, f4=fig4,
+                    f5=fig5, f6=fig6, f7=fig7, reorder=reorder_df)
+
+
+    # ── Step 7 outputs helper ────────────────────────────────────────────────
+    _S7_CHART_OUTPUTS = [
+        s7_kpi_html, s7_top_table,
+        s7_cat_sales_chart, s7_cat_margin_chart,
+        s7_fc6_chart, s7_fc12_chart, s7_fulfil_chart,
+        s7_sales_ret_chart, s7_inventory_chart,
+        s7_ai_summary, s7_reorder_table
+    ]
+
+    def _pack_s7(result):
+        """Unpack _build_step7_data result dict into Gradio output tuple."""
+        if result is None:
+            empty = "<div style='padding:20px;color:#aaa'>No data. Upload and analyse first.</div>"
+            return empty, empty, None, None, None, None, None, None, None, empty, None
+        return (result['kpi'], result['table'],
+                result['f1'],  result['f2'],
+                result['f3'],  result['f4'],  result['f5'],
+                result['f6'],  result['f7'],
+                result['ai'], result['reorder'])
+
+    def show_granular_dashboard(granular_data, df_raw, dashboard_data_value=None):
+        """Navigate to Step 7 and populate with default (All) filters."""
+        schema = (dashboard_data_value or {}).get('schema')
+        if schema is None and df_raw is not None: schema = DataSchema.of(df_raw)
+        result = _build_step7_data(df_raw, "Store: All", "Category: All", "Product: All", schema,
+                                   (granular_data or {}).get('inventory'))
+
+        # Build filter dropdown choices from df_raw
+        stores = ["Store: All"]
+        cats   = ["Category: All"]
+        prods  = ["Product: All"]
+        if df_raw is not None:
+            dff = df_raw
+            # df_raw is already the MSME-filtered slice — use all rows for dropdown population
+            stc2, c2, p2 = schema.store, schema.category, schema.sku
+            if stc2: stores += [f"Store: {s}" for s in sorted(dff[stc2].unique())]
+            if c2:   cats   += [f"Category: {c}" for c in sorted(dff[c2].dropna().unique())]
+            if p2:   prods  += [f"Product: SKU-{p}" for p in sorted(dff[p2].unique())[:40]]
+
+        return (7, *update_visibility_all('step7'),
+                gr.update(choices=stores, value="Store: All"),
+                gr.update(choices=cats,   value="Category: All"),
+                gr.update(choices=prods,  value="Product: All"),
+                *_pack_s7(result))
+
+    def update_step7_filters(store_sel, cat_sel, prod_sel, df_raw, dashboard_data_value=None):
+        """Recompute all Step 7 outputs when any filter dropdown changes."""
+        dash = dashboard_data_value or {}
+        result = _build_step7_data(df_raw, store_sel, cat_sel, prod_sel, dash.get('schema'),
+                                   (dash.get('granular') or {}).get('inventory'))
+        return _pack_s7(result)
+
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # Wire Events
+    # ══════════════════════════════════════════════════════════════════════════
+    show_signup_trigger.click(show_signup, [], [step_state]+_ALL_COLS)
+    quick_signup_btn.click(show_signup, [], [step_state]+_ALL_COLS)
+    cancel1_btn.click(lambda: (0, *update_visibility_all('step0')), [], [step_state]+_ALL_COLS)
+    back2_btn.click(lambda: (1, *update_visibility_all('step1')), [], [step_state]+_ALL_COLS)
+    back3_btn.click(lambda: (2, *update_visibility_all('step2')), [], [step_state]+_ALL_COLS)
+    back6_btn.click(lambda: (5, *update_visibility_all('step5')), [], [step_state]+_ALL_COLS)
+    back6a_btn.click(lambda: (5, *update_visibility_all('step5')), [], [step_state]+_ALL_COLS)
+
+    quick_login_btn.click(handle_login, [quick_login_mobile],
+        [landing_login_error_msg, user_data_state, step_state]+_ALL_COLS+[error1,error2,error3,error4,error5,login_welcome_message])
+
+    next1_btn.click(validate_step1, [name_input, mobile_input, email_input, role_input, user_data_state],
+        [error1, user_data_state, step_state]+_ALL_COLS)
+
+    # FIX 4 — fetch also returns industry_domain
+    fetch_btn.click(_fetch_msme_data, [msme_number_input],
+        [fetched_name, fetched_org, fetched_activity, fetched_type, fetched_state, fetched_city, fetched_industry, fetch_status])
+
+    next2_btn.click(verify_step2,
+        [msme_number_input, otp_input, user_data_state, fetched_name, fetched_org, fetched_activity, fetched_type, fetched_state, fetched_city, fetched_industry, fetch_status],
+        [error2, user_data_state, step_state]+_ALL_COLS+[confirm_name, confirm_org, confirm_activity, confirm_type, confirm_state, confirm_city, confirm_industry, fetch_status])
+
+    next3_btn.click(confirm_step3, [user_data_state, consent1, consent2, certificate_upload],
+        [error3, user_data_state, step_state]+_ALL_COLS+[verification_status_display, business_type_input])
+
+    back4_btn.click(lambda: (3, *update_visibility_all('step3'), gr.update(value="",visible=False), gr.update(visible=True)), [],
+        [step_state]+_ALL_COLS+[error4, next4_btn])
+
+    next4_btn.click(submit_profile, [business_type_input, years_input, revenue_input, user_data_state],
+        [error4, user_data_state, proceed_to_step5_btn, next4_btn])
+
+    proceed_to_step5_btn.click(lambda: (5, *update_visibility_all('step5'), gr.update(value="",visible=False), gr.update(value="",visible=False)), [],
+        [step_state]+_ALL_COLS+[error4, login_welcome_message])
+
+    back5_btn.click(lambda: (4, *update_visibility_all('step4'), gr.update(value="",visible=False)), [],
+        [step_state]+_ALL_COLS+[login_welcome_message])
+
+    cancel5_btn.click(lambda: (0, *update_visibility_all('step0'), gr.update(value="",visible=False)), [],
+        [step_state]+_ALL_COLS+[login_welcome_message])
+
+    analyze_btn.click(analyze_data, [user_data_state, consent_check, file_upload, lang_state],
+        [insights_output, view_dashboard_btn, view_gov_dashboard_btn,
+         kpi1,kpi2,kpi3,kpi4,kpi5, chart1,chart2,chart3,chart4,
+         sum1,sum2,sum3,sum4, upload_message, dashboard_data_state, df_state])
+
+    file_upload.change(handle_file_upload_change, [user_data_state, file_upload], [upload_message, error5])
+
+    view_dashboard_btn.click(show_dashboard, [dashboard_data_state],
+        [step_state]+_ALL_COLS+[kpi_table_dash, chart1_dash, chart2_dash, chart3_dash, chart4_dash,
+         chart1_summary, chart2_summary, chart3_summary, chart4_summary, granular_forecast_data_state])
+
+    view_gov_dashboard_btn.click(show_gov_dashboard, [df_state, dashboard_data_state],
+        [step_state]+_ALL_COLS+[gov_dashboard_html])
+
+
+
+    _S7_NAV_OUTPUTS = ([step_state] + _ALL_COLS
+                       + [s7_store_filter, s7_cat_filter, s7_prod_filter]
+                       + _S7_CHART_OUTPUTS)
+    forecast_deepdive_btn.click(show_granular_dashboard,
+        [granular_forecast_data_state, df_state, dashboard_data_state],
+        _S7_NAV_OUTPUTS)
+
+    s7_store_filter.change(update_step7_filters,
+        [s7_store_filter, s7_cat_filter, s7_prod_filter, df_state, dashboard_data_state],
+        _S7_CHART_OUTPUTS)
+    s7_cat_filter.change(update_step7_filters,
+        [s7_store_filter, s7_cat_filter, s7_prod_filter, df_state, dashboard_data_state],
+        _S7_CHART_OUTPUTS)
+    s7_prod_filter.change(update_step7_filters,
+        [s7_store_filter, s7_cat_filter, s7_prod_filter, df_state, dashboard_data_state],
+        _S7_CHART_OUTPUTS)
+
+    back7_btn.click(lambda: (6, *update_visibility_all('step6')), [], [step_state]+_ALL_COLS)
+    back7_to5_btn.click(lambda: (5, *update_visibility_all('step5')), [], [step_state]+_ALL_COLS)
+
+    # Language switching
+    def switch_lang_en():
+        return ('en', gr.update(variant='primary'), gr.update(variant='secondary'), '**Active: English 🇬🇧**',
+                gr.update(value=_landing_hero('en')), gr.update(value=_landing_capabilities('en')),
+                gr.update(value="## How DataNetra Works"),
+                gr.update(value="### 📥 Step 1: Upload Your Data"),
+                gr.update(value="Easily upload Excel/CSV files for comprehensive analysis."),
+                gr.update(value="### 🤖 Step 2: AI-Powered Analysis"),
+                gr.update(value="Our AI processes your data, forecasting trends and uncovering insights."),
+                gr.update(value="### 📊 Step 3: Actionable Dashboards & Recommendations"),
+                gr.update(value="Access interactive dashboards, KPI charts and personalized recommendations."),
+                gr.update(value="**Already Registered**"), gr.update(label="Enter Mobile Number"),
+                gr.update(value="Login"), gr.update(value="**First Time User**"),
+                gr.update(value="**Signup to unlock smart AI Insights**"), gr.update(value="Sign Up Now"))
+
+    def switch_lang_hi():
+        return ('hi', gr.update(variant='secondary'), gr.update(variant='primary'), '**सक्रिय: हिंदी 🇮🇳**',
+                gr.update(value=_landing_hero('hi')), gr.update(value=_landing_capabilities('hi')),
+                gr.update(value="## DataNetra कैसे काम करता है?"),
+                gr.update(value="### 📥 पहला काम: अपना Data डालें"),
+                gr.update(value="अपनी Excel या CSV फाइल आसानी से Upload करें।"),
+                gr.update(value="### 🤖 दूसरा काम: AI जाँच करेगा"),
+                gr.update(value="हमारा AI आपका Data पढ़कर बताएगा — क्या बिक रहा है, क्या नहीं।"),
+                gr.update(value="### 📊 तीसरा काम: रिपोर्ट और सलाह देखें"),
+                gr.update(value="साफ Dashboard पर अपनी बिक्री, मुनाफा और AI की सलाह एक जगह देखें।"),
+                gr.update(value="**पहले से जुड़े हैं?**"), gr.update(label="मोबाइल नंबर डालें"),
+                gr.update(value="Login करें"), gr.update(value="**नए हैं? पहली बार?**"),
+                gr.update(value="**अभी जुड़ें और AI से अपने धंधे की जानकारी पाएं**"), gr.update(value="अभी Register करें"))
+
+    _lang_landing_outputs = [lang_state, lang_en_btn, lang_hi_btn, lang_indicator,
+                              landing_hero_html, landing_capabilities_html,
+                              landing_how_title, landing_step1_title, landing_step1_desc,
+                              landing_step2_title, landing_step2_desc, landing_step3_title, landing_step3_desc,
+                              landing_login_title, quick_login_mobile, quick_login_btn,
+                              landing_signup_title, landing_signup_desc, quick_signup_btn]
+    lang_en_btn.click(switch_lang_en, [], _lang_landing_outputs)
+    lang_hi_btn.click(switch_lang_hi, [], _lang_landing_outputs)
+
+print("=" * 60)
+print("🚀 DataNetra.ai - MSME Intelligence Platform v4.8")
+print("   FIX 1: UTF-8 surrogate patch — no more JSON crash")
+print("   FIX 2: Correct column mapping for lowercase dataset")
+print("   FIX 3: Major Activity shown in Step 4 verification")
+print("   FIX 4: Industry Domain field in Step 2 & Step 3")
+print("   FIX 5: Voice registration in Step 1 & Step 2")
+print("=" * 60)
@@ -0,0 +1,7 @@
+"""The tests import the engine module directly — no Gradio UI, no server."""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
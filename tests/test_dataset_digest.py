@@ -0,0 +1,60 @@
+"""
+Upload digests: a repeat digest of an unchanged file is not a full read, and
+any change the probe can see — size, mtime or a sampled block — hashes again.
+"""
+import hashlib
+import os
+
+import pytest
+
+import datanetra_core as core
+
+
+@pytest.fixture
+def full_reads(monkeypatch):
+    monkeypatch.setattr(core, '_digest_memo', {})
+    reads = []
+    def count(path, block=1 << 20, _hash=core._file_sha256):
+        reads.append(path)
+        return _hash(path, block)
+    monkeypatch.setattr(core, '_file_sha256', count)
+    return reads
+
+
+def write(path, data, mtime_ns=None):
+    path.write_bytes(data)
+    if mtime_ns is not None: os.utime(path, ns=(mtime_ns, mtime_ns))
+    return str(path)
+
+
+def test_repeat_digest_skips_the_full_read(tmp_path, full_reads):
+    data = os.urandom(300_000)
+    path = write(tmp_path / 'a.csv', data)
+    assert core.dataset_digest(path) == hashlib.sha256(data).hexdigest()
+    assert core.dataset_digest(path) == hashlib.sha256(data).hexdigest()
+    assert len(full_reads) == 1
+
+
+def test_same_size_and_mtime_edit_in_a_sampled_block_rehashes(tmp_path, full_reads):
+    data = bytearray(os.urandom(300_000))
+    path = write(tmp_path / 'a.csv', bytes(data), mtime_ns=10**18)
+    core.dataset_digest(path)
+    data[-1] ^= 0xFF
+    write(tmp_path / 'a.csv', bytes(data), mtime_ns=10**18)
+    assert core.dataset_digest(path) == hashlib.sha256(bytes(data)).hexdigest()
+    assert len(full_reads) == 2
+
+
+def test_touched_file_rehashes_to_the_same_digest(tmp_path, full_reads):
+    data = os.urandom(1000)
+    path = write(tmp_path / 'a.csv', data, mtime_ns=10**18)
+    first = core.dataset_digest(path)
+    write(tmp_path / 'a.csv', data, mtime_ns=2 * 10**18)
+    assert core.dataset_digest(path) == first and len(full_reads) == 2
+
+
+def test_memo_is_bounded(tmp_path, full_reads, monkeypatch):
+    monkeypatch.setattr(core, '_DIGEST_MEMO_ITEMS', 3)
+    for i in range(5):
+        core.dataset_digest(write(tmp_path / f'{i}.csv', bytes([i]) * 10))
+    assert len(core._digest_memo) == 3
@@ -0,0 +1,102 @@
+"""
+Ensemble scheduler: a model that overruns its timeout is dropped from the
+ensemble with its reason, and does not hold capacity a later request needs.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import datanetra_core as core
+
+MEMBERS = {'Statistical Baseline': '_run_baseline_model', 'Linear Regression': '_run_linear_regression_model',
+           'Holt-Winters': '_run_holtwinters_model', 'Seasonal-Trend': '_run_seasonal_trend_model'}
+
+
+def upload(months=30, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'Date': pd.date_range('2022-01-01', periods=months, freq='MS'),
+                         'Monthly_Sales_INR': 1e5 + 2e3 * np.arange(months) + rng.normal(0, 5e3, months)})
+
+
+@pytest.fixture
+def release(monkeypatch):
+    """Event the slow fakes wait on; set at teardown so no thread outlives the test."""
+    monkeypatch.setattr(core, 'MODEL_CACHE', core._ResultCache(0, 0, None, 0))
+    monkeypatch.setattr(core, 'FORECAST_WORKERS', 5)
+    ev = threading.Event()
+    yield ev
+    ev.set()
+
+
+def slow(fit, ev):
+    def run(monthly, periods=12):
+        ev.wait(10)
+        return fit(monthly, periods)
+    return run
+
+
+def test_slow_model_is_skipped_and_weights_renormalise(monkeypatch, release):
+    monkeypatch.setattr(core, '_run_holtwinters_model', slow(core._run_holtwinters_model, release))
+    monkeypatch.setitem(core.FORECAST_TIMEOUTS_S, 'Holt-Winters', 0.2)
+    res = core.forecast_sales(upload())
+    assert res['model_results']['Holt-Winters'] == {'skipped': 'timed out after 0.2s', 'model_name': 'Holt-Winters'}
+    assert res['skipped_models'] == {'Holt-Winters': 'timed out after 0.2s'}
+    w = res['ensemble_weights']
+    assert 'Holt-Winters' not in w and sum(w.values()) == pytest.approx(1.0)
+    # The rest keep their base proportions: baseline 10 : trend line 20 : seasonal-trend 40
+    assert w['Linear Regression'] == pytest.approx(2 * w['Statistical Baseline'])
+    assert w['Seasonal-Trend'] == pytest.approx(4 * w['Statistical Baseline'])
+    f12 = res['12_month']['forecast']
+    assert f12 == pytest.approx(sum(res['model_results'][m]['12_month']['forecast'] * w[m] for m in w))
+
+
+def test_stragglers_do_not_starve_the_next_request(monkeypatch, release):
+    fast = {m: getattr(core, f) for m, f in MEMBERS.items()}
+    for m, f in MEMBERS.items():
+        monkeypatch.setattr(core, f, slow(fast[m], release))
+        monkeypatch.setitem(core.FORECAST_TIMEOUTS_S, m, 0.1)
+    first = core.forecast_sales(upload())
+    assert set(first['skipped_models']) == set(MEMBERS)
+    assert core.forecast_stragglers() == len(MEMBERS)
+    # Every worker of the first request is still busy; the second gets its own
+    for m, f in MEMBERS.items():
+        monkeypatch.setattr(core, f, fast[m])
+    second = core.forecast_sales(upload(seed=1))
+    assert second['skipped_models'] == {}
+    assert set(second['models_used']) == set(MEMBERS)
+    release.set()
+    deadline = core.time.time() + 10
+    while core.forecast_stragglers() and core.time.time() < deadline:
+        core.time.sleep(0.01)
+    assert core.forecast_stragglers() == 0
+
+
+def test_straggler_cap_falls_back_to_inline(monkeypatch, release):
+    monkeypatch.setattr(core, 'FORECAST_MAX_STRAGGLERS', 0)
+    ran_on = []
+    def record(monthly, periods=12, fit=core._run_holtwinters_model):
+        ran_on.append(threading.current_thread())
+        return fit(monthly, periods)
+    monkeypatch.setattr(core, '_run_holtwinters_model', record)
+    res = core.forecast_sales(upload())
+    assert res['skipped_models'] == {} and 'Holt-Winters' in res['models_used']
+    assert ran_on == [threading.current_thread()]
+
+
+@pytest.mark.parametrize('prophet_result', [True, False], ids=['prophet-ok', 'prophet-empty'])
+def test_seasonal_trend_only_stands_in_for_prophet(monkeypatch, release, prophet_result):
+    calls = []
+    def st(monthly, periods=12, fit=core._run_seasonal_trend_model):
+        calls.append(threading.current_thread())
+        return fit(monthly, periods)
+    def prophet(monthly, periods=12, fit=core._run_seasonal_trend_model):
+        return fit(monthly, periods) if prophet_result else None
+    monkeypatch.setattr(core, 'PROPHET_AVAILABLE', True)
+    monkeypatch.setattr(core, '_run_prophet_model', prophet)
+    monkeypatch.setattr(core, '_run_seasonal_trend_model', st)
+    res = core.forecast_sales(upload())
+    assert len(calls) == (0 if prophet_result else 1)
+    assert ('Prophet' in res['models_used']) == prophet_result
+    assert ('Seasonal-Trend' in res['models_used']) != prophet_result
@@ -0,0 +1,119 @@
+"""
+Incremental forecasts: an appended month folded into the saved state gives
+what a refit of the whole history gives, and the state table keeps one row
+per (Udyam number, series, model) however the saves interleave.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import datanetra_core as core
+
+needs_db = pytest.mark.skipif(not core._DB_AVAILABLE, reason="SQLAlchemy not installed")
+
+
+def sales(n, seed=0, season=0.0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n)
+    return 1000 + 8 * t + season * np.sin(2 * np.pi * t / 12) + rng.normal(0, 25, n)
+
+
+def monthly(y):
+    return pd.DataFrame({'ds': pd.date_range('2021-01-01', periods=len(y), freq='MS'), 'y': y})
+
+
+@pytest.fixture
+def db(monkeypatch, tmp_path):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    engine = create_engine(f"sqlite:///{tmp_path}/state.db", connect_args={"check_same_thread": False})
+    core.Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(core, 'SessionLocal', sessionmaker(autocommit=False, autoflush=False, bind=engine))
+    return engine
+
+
+def rows(engine):
+    with engine.connect() as c:
+        return c.exec_driver_sql("SELECT udyam_number, series, model, state FROM forecast_state").fetchall()
+
+
+@pytest.mark.parametrize('n0,n', [(12, 13), (12, 20), (40, 47)])
+def test_lr_update_matches_refit(n0, n):
+    y = sales(n)
+    inc, full = core._lr_state_update(core._lr_state(y[:n0]), y[n0:]), core._lr_state(y)
+    assert inc.keys() == full.keys()
+    for k in full:
+        assert inc[k] == pytest.approx(full[k], rel=1e-9, abs=1e-6)
+
+
+@pytest.mark.parametrize('n0,n,season', [(10, 11, 0.0), (10, 20, 0.0), (30, 31, 150.0), (30, 40, 150.0)])
+def test_hw_update_matches_refit(n0, n, season):
+    y = sales(n, season=season)
+    st = core._hw_state(y[:n0])
+    inc = core._hw_state_update(st, y[n0:])
+    # The refit with the state's parameters: the grid search is not re-run by an update
+    full = core.fit_holt_winters(y, alphas=[st['alpha']], betas=[st['beta']], gammas=[st['gamma']],
+                                 seasonal=st['seasonal_on'], horizon=12)
+    assert inc['n'] == n
+    assert inc['level'] == pytest.approx(full['level'][0])
+    assert inc['trend'] == pytest.approx(full['trend'][0])
+    assert inc['seasonal'] == pytest.approx(full['seasonal'][0].tolist())
+    fitted = full['fitted'][0]
+    assert inc['resid'] == pytest.approx((y - fitted)[~np.isnan(fitted)].tolist())
+    fc = core._hw_state_result(inc, 12, y)
+    assert fc['12_month']['forecast'] == pytest.approx(np.clip(full['forecast'][0], 0, None).sum())
+
+
+def test_hw_update_asks_for_a_refit_at_two_years():
+    y = sales(25)
+    assert core._hw_state_update(core._hw_state(y[:20]), y[20:]) is None
+
+
+@needs_db
+def test_incremental_forecast_matches_refit(db):
+    y = sales(30, seed=4)
+    core.incremental_forecast('UDYAM-T-1', 'Linear Regression', monthly(y[:28]))
+    inc = core.incremental_forecast('UDYAM-T-1', 'Linear Regression', monthly(y))
+    full = core._run_linear_regression_model(monthly(y))
+    for w in ('6_month', '12_month'):
+        assert inc[w] == pytest.approx(full[w])
+    [(_, _, _, state)] = rows(db)
+    assert core._json_mod.loads(state)['n'] == 30
+
+
+@needs_db
+def test_save_is_an_upsert(db):
+    core.save_forecast_state('UDYAM-T-2', 'overall', 'Holt-Winters', {'n': 1})
+    core.save_forecast_state('UDYAM-T-2', 'overall', 'Holt-Winters', {'n': 2})
+    core.save_forecast_state('UDYAM-T-2', 'store:A', 'Holt-Winters', {'n': 3})
+    assert sorted((s, core._json_mod.loads(st)['n']) for _, s, _, st in rows(db)) == [('overall', 2), ('store:A', 3)]
+    assert core.load_forecast_state('UDYAM-T-2', 'overall', 'Holt-Winters') == {'n': 2}
+
+
+@needs_db
+def test_concurrent_saves_keep_one_row(db, monkeypatch):
+    fallback = []
+    monkeypatch.setattr(core, '_forecast_state_mem_put', lambda key, state: fallback.append(key))
+    start = threading.Barrier(8)
+    def save(i):
+        start.wait()
+        core.save_forecast_state('UDYAM-T-3', 'overall', 'Linear Regression', {'n': i})
+    threads = [threading.Thread(target=save, args=(i,)) for i in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert len(rows(db)) == 1 and not fallback
+
+
+@needs_db
+def test_table_rejects_a_duplicate_key(db):
+    from sqlalchemy.exc import IntegrityError
+    session = core.SessionLocal()
+    try:
+        for _ in range(2):
+            session.add(core.ForecastState(udyam_number='UDYAM-T-4', series='overall', model='Holt-Winters', state='{}'))
+        with pytest.raises(IntegrityError):
+            session.commit()
+    finally:
+        session.close()
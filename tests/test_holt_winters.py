@@ -0,0 +1,71 @@
+"""
+Vectorised Holt-Winters grid search against a scalar, one-candidate-at-a-time
+reference: same winner, same SSE and forecast, whether a series is fitted
+alone or in a chunked batch.
+"""
+import itertools
+
+import numpy as np
+import pytest
+
+import datanetra_core as core
+
+ALPHAS, BETAS, GAMMAS = [0.1, 0.4, 0.8], [0.0, 0.1, 0.3], [0.0, 0.2]
+
+
+def series(n, seed):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n)
+    return 500 + 4 * t + 60 * np.sin(2 * np.pi * t / 12) + rng.normal(0, 15, n)
+
+
+def reference(y, horizon=12):
+    """Plain-Python additive Holt(-Winters) with the engine's initial state."""
+    m, T = 12, len(y)
+    seasonal = T >= 2 * m
+    if seasonal:
+        first, second = y[:m].mean(), y[m:2 * m].mean()
+        b0 = (second - first) / m
+        s0 = [y[i] - (first + b0 * (i - (m - 1) / 2)) for i in range(m)]
+        l0, start = first + b0 * (m - 1) / 2, m
+    else:
+        l0, b0, s0, start = y[0], y[1] - y[0], [0.0] * m, 1
+    best = None
+    for a, b, g in itertools.product(ALPHAS, BETAS, GAMMAS if seasonal else [0.0]):
+        lvl, trd, sea, sse = l0, b0, list(s0), 0.0
+        for t in range(start, T):
+            st = sea[t % m]
+            sse += (y[t] - (lvl + trd + st)) ** 2
+            new = a * (y[t] - st) + (1 - a) * (lvl + trd)
+            trd = b * (new - lvl) + (1 - b) * trd
+            if seasonal: sea[t % m] = g * (y[t] - new) + (1 - g) * st
+            lvl = new
+        if best is None or sse < best[0]:
+            fc = [lvl + h * trd + sea[(T + h - 1) % m] for h in range(1, horizon + 1)]
+            best = (sse, a, b, g, fc)
+    return best
+
+
+@pytest.mark.parametrize('n', [10, 30])
+def test_grid_matches_scalar_reference(n):
+    y = series(n, seed=n)
+    fit = core.fit_holt_winters(y, ALPHAS, BETAS, GAMMAS)
+    sse, a, b, g, fc = reference(y)
+    assert (fit['alpha'][0], fit['beta'][0], fit['gamma'][0]) == (a, b, g)
+    assert fit['sse'][0] == pytest.approx(sse)
+    np.testing.assert_allclose(fit['forecast'][0], fc)
+
+
+def test_batched_rows_match_single_fits(monkeypatch):
+    Y = np.vstack([series(30, seed) for seed in range(7)])
+    monkeypatch.setattr(core, '_HW_CHUNK_CELLS', 3 * 18 * 42)     # three series per chunk
+    batch = core.fit_holt_winters(Y, ALPHAS, BETAS, GAMMAS)
+    for i, y in enumerate(Y):
+        one = core.fit_holt_winters(y, ALPHAS, BETAS, GAMMAS)
+        for k in ('alpha', 'beta', 'gamma', 'sse', 'forecast', 'fitted'):
+            np.testing.assert_allclose(batch[k][i], one[k][0])
+
+
+def test_too_short_raises():
+    with pytest.raises(ValueError):
+        core.fit_holt_winters([1.0])
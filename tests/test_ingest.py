@@ -0,0 +1,70 @@
+"""
+Streamed ingest of large uploads: the logged-in MSME's rows come back exactly;
+a file used whole (a single other MSME, or the logged-in MSME missing) comes
+back as a bounded sample, never as the whole file in memory.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import datanetra_core as core
+
+CHUNK = 7
+
+
+def upload(tmp_path, keys, n=60, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({'Date': pd.date_range('2022-01-01', periods=n, freq='D').astype(str),
+                       'Udyam_Number': [keys[i % len(keys)] for i in range(n)],
+                       'Store_ID': 'S1', 'SKU_Name': 'A', 'Product_Category': 'Food',
+                       'Monthly_Sales_INR': rng.integers(100, 1000, n),
+                       'row': np.arange(n)})
+    path = tmp_path / 'upload.csv'
+    df.to_csv(path, index=False)
+    return str(path), df
+
+
+@pytest.fixture
+def cap(monkeypatch):
+    monkeypatch.setattr(core, 'STREAM_FALLBACK_ROWS', 20)
+    return 20
+
+
+def test_logged_in_msme_rows_are_kept(tmp_path, cap):
+    path, df = upload(tmp_path, ['UDYAM-A', 'UDYAM-B', 'UDYAM-C'])
+    msme, gov = core.stream_csv_ingest(path, 'udyam-b', chunksize=CHUNK)
+    assert msme['row'].tolist() == df.loc[df['Udyam_Number'] == 'UDYAM-B', 'row'].tolist()
+    assert gov['n'] == len(df)
+
+
+@pytest.mark.parametrize('keys', [['UDYAM-X'], ['UDYAM-A', 'UDYAM-B', 'UDYAM-C']],
+                         ids=['single-other-msme', 'missing-msme'])
+def test_whole_file_is_a_bounded_sample(tmp_path, cap, keys):
+    path, df = upload(tmp_path, keys)
+    msme, gov = core.stream_csv_ingest(path, 'UDYAM-Z', chunksize=CHUNK)
+    rows = msme['row'].tolist()
+    assert len(rows) == cap
+    assert rows == sorted(set(rows)) and set(rows) <= set(df['row'])
+    assert max(rows) >= len(df) // 2               # a sample of the file, not its head
+    assert gov['n'] == len(df)                     # aggregates still see every row
+
+
+@pytest.mark.parametrize('keys', [['UDYAM-X'], ['UDYAM-A', 'UDYAM-B']])
+def test_whole_file_under_the_cap_is_exact(tmp_path, monkeypatch, keys):
+    monkeypatch.setattr(core, 'STREAM_FALLBACK_ROWS', 100)
+    path, df = upload(tmp_path, keys)
+    msme, _ = core.stream_csv_ingest(path, 'UDYAM-Z', chunksize=CHUNK)
+    assert msme['row'].tolist() == df['row'].tolist()
+
+
+def test_reservoir_is_uniform():
+    hits = np.zeros(100)
+    for seed in range(400):
+        r = core._RowReservoir(10, seed)
+        for i in range(0, 100, CHUNK):
+            r.add(pd.DataFrame({'row': np.arange(i, min(i + CHUNK, 100))}))
+        assert len(r.frame) == 10 and r.seen == 100
+        hits[r.frame['row']] += 1
+    # every row is kept ~40 times; the first and last chunks are not favoured
+    assert hits[:CHUNK].mean() == pytest.approx(40, rel=0.3)
+    assert hits[-CHUNK:].mean() == pytest.approx(40, rel=0.3)
@@ -0,0 +1,103 @@
+"""
+Prediction intervals: the ensemble models' 12-month bands against simulated
+series whose future is known, and the bootstrap's path semantics.
+"""
+import functools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import datanetra_core as core
+
+MONTHS, HORIZON = 48, 12
+MODELS = {
+    'baseline':          core._run_baseline_model,
+    'linear-regression': core._run_linear_regression_model,
+    'holt-winters':      core._run_holtwinters_model,
+    'seasonal-trend':    core._run_seasonal_trend_model,
+}
+# Shortfall of coverage below the nominal level that is tolerated. The
+# baseline rule and Holt-Winters' fixed-parameter error recursion leave out
+# some of the level and trend uncertainty, and run narrow.
+SHORTFALL = {'baseline': 0.2, 'linear-regression': 0.05, 'holt-winters': 0.25, 'seasonal-trend': 0.05}
+
+
+def simulated(n, seed=0, season=100.0):
+    """Random-walk level + yearly seasonality + noise; MONTHS of history and HORIZON to come."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(MONTHS + HORIZON)
+    level = 1000 + np.cumsum(rng.normal(0, 15, (n, t.size)), axis=1)
+    season = season * np.sin(2 * np.pi * t / 12 + rng.uniform(0, 2 * np.pi, (n, 1)))
+    return level + season + rng.normal(0, 40, (n, t.size))
+
+
+@functools.lru_cache(maxsize=None)
+def coverage(model, level):
+    core.MODEL_CACHE = core._ResultCache(0, 0, None, 0)
+    core.INTERVAL_LEVEL = level
+    hits, widths = [], []
+    ds = pd.date_range('2020-01-01', periods=MONTHS, freq='MS')
+    for y in simulated(150):
+        w = MODELS[model](pd.DataFrame({'ds': ds, 'y': y[:MONTHS]}), HORIZON)['12_month']
+        hits.append(w['lower'] <= y[MONTHS:].sum() <= w['upper'])
+        widths.append((w['upper'] - w['lower']) / w['forecast'])
+    return float(np.mean(hits)), float(np.median(widths))
+
+
+@pytest.fixture(autouse=True)
+def _restore(monkeypatch):
+    monkeypatch.setattr(core, 'MODEL_CACHE', core.MODEL_CACHE)
+    monkeypatch.setattr(core, 'INTERVAL_LEVEL', core.INTERVAL_LEVEL)
+
+
+@pytest.mark.parametrize('level', [0.8, 0.95])
+@pytest.mark.parametrize('model', list(MODELS))
+def test_twelve_month_coverage(model, level):
+    cover, _ = coverage(model, level)
+    assert level - SHORTFALL[model] <= cover <= min(1.0, level + 0.12)
+
+
+@pytest.mark.parametrize('model', list(MODELS))
+def test_higher_level_gives_wider_band(model):
+    assert coverage(model, 0.95)[1] > coverage(model, 0.8)[1]
+
+
+@pytest.mark.parametrize('model', list(MODELS))
+def test_band_widens_with_horizon(model):
+    core.MODEL_CACHE = core._ResultCache(0, 0, None, 0)
+    ds = pd.date_range('2020-01-01', periods=MONTHS, freq='MS')
+    res = MODELS[model](pd.DataFrame({'ds': ds, 'y': simulated(1, seed=0, season=0.0)[0, :MONTHS]}), HORIZON)
+    if 'forecast_df' in res:
+        ff = res['forecast_df']
+        width = (ff['yhat_upper'] - ff['yhat_lower']).to_numpy()
+        assert width[-3:].mean() > width[:3].mean()
+    # Independent months would give √2: the level error carries over
+    assert (res['12_month']['upper'] - res['12_month']['lower']
+            > 1.6 * (res['6_month']['upper'] - res['6_month']['lower']))
+
+
+def test_error_paths_stay_correlated():
+    # Every origin misses by a constant: the 12-month band is 12 monthly bands wide, not √12
+    offsets = np.linspace(-1, 1, 41)
+    paths = np.repeat(offsets[:, None], HORIZON, axis=1)
+    lo, hi, win = core.bootstrap_intervals(np.full((1, HORIZON), 100.0), paths[None], level=0.9, n_boot=4000)
+    monthly = hi[0, 0] - lo[0, 0]
+    assert win[12][1][0] - win[12][0][0] == pytest.approx(12 * monthly, rel=0.05)
+
+
+def test_short_paths_carry_their_mean_error():
+    # Origins near the end reach one month; their error carries on over the horizon
+    E = np.full((1, 3, HORIZON), np.nan)
+    E[0, :, 0] = [5.0, 5.0, 5.0]
+    lo, hi, win = core.bootstrap_intervals(np.full((1, HORIZON), 100.0), E, n_boot=50)
+    assert np.allclose(lo, 105.0) and np.allclose(hi, 105.0)
+    assert win[12][0][0] == pytest.approx(12 * 105.0)
+
+
+def test_block_resampling_keeps_residual_order():
+    # A residual series that only ever steps by one: block draws keep the steps
+    resid = np.arange(24, dtype=np.float64)[None]
+    noise = core._block_noise(resid, 200, core.INTERVAL_BLOCK, np.random.default_rng(0))
+    steps = np.diff(noise[0], axis=1)
+    assert np.isin(steps, [1.0, -23.0]).all()
@@ -0,0 +1,59 @@
+"""plan_inventory on daily-grain uploads: stock is a level, units are a flow."""
+import numpy as np
+import pandas as pd
+
+import datanetra_core as core
+
+
+def daily_upload(days=540, skus=3, stores=2, on_hand=50, seed=0):
+    """One row per SKU × store × day, ~10 units/day (~300/month), a constant stock reading."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2023-01-01', periods=days, freq='D')
+    idx = pd.MultiIndex.from_product([dates, [f'SKU-{i}' for i in range(skus)], [f'S{j}' for j in range(stores)]],
+                                     names=['Date', 'SKU_Name', 'Store_ID']).to_frame(index=False)
+    idx['Product_Category'] = 'FMCG'
+    idx['Monthly_Demand_Units'] = rng.poisson(10, len(idx))
+    idx['Stock_Level'] = on_hand
+    idx['Monthly_Sales_INR'] = idx['Monthly_Demand_Units'] * 100.0
+    return idx
+
+
+def test_daily_stock_is_latest_reading():
+    plan = core.plan_inventory(daily_upload())
+    assert len(plan) == 6
+    assert (plan['stock'] == 50).all()
+    assert plan['days_of_cover'].between(3, 8).all()
+    assert (plan['stockout_prob'] > 0.9).all()
+    assert (plan['reorder_qty'] > 0).all()
+    assert (plan['status'] == 'Stock-out risk').all()
+
+
+def test_latest_reading_wins_within_a_day():
+    df = daily_upload(days=120, skus=1, stores=1)
+    last = df['Date'].max()
+    extra = df[df['Date'] == last].assign(Stock_Level=7)      # a later reading on the same day
+    plan = core.plan_inventory(pd.concat([df, extra], ignore_index=True))
+    assert plan['stock'].tolist() == [7]
+
+
+def test_well_stocked_cells_need_no_order():
+    # ~300 units/month against 5,000 on hand: months of cover, nothing to order
+    plan = core.plan_inventory(daily_upload(skus=2, stores=1, on_hand=5000))
+    assert (plan['status'] == 'OK').all()
+    assert (plan['reorder_qty'] == 0).all()
+    assert (plan['stockout_prob'] < 0.05).all()
+    assert plan['days_of_cover'].gt(300).all()
+
+
+def test_without_a_store_column_plans_per_sku():
+    df = daily_upload(days=200, skus=3, stores=1).drop(columns='Store_ID')
+    plan = core.plan_inventory(df)
+    assert sorted(plan['sku']) == ['SKU-0', 'SKU-1', 'SKU-2']
+    assert plan['store'].isna().all()
+
+
+def test_needs_stock_and_units_columns():
+    df = daily_upload(days=60, skus=1, stores=1)
+    assert core.plan_inventory(df.drop(columns='Stock_Level')) is None
+    assert core.plan_inventory(df.drop(columns='Monthly_Demand_Units')) is None
+    assert core.plan_inventory(df.iloc[:0]) is None
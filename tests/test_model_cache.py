@@ -0,0 +1,62 @@
+"""
+Fitted-model cache: every setting that changes a fit or its band is part of
+the key, so a changed setting is a miss, in memory and on disk.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import datanetra_core as core
+
+FITS = {'seasonal-trend': core._run_seasonal_trend_model, 'holt-winters': core._run_holtwinters_model}
+CHANGES = [
+    ('seasonal-trend', 'INTERVAL_LEVEL', 0.8),
+    ('seasonal-trend', 'INTERVAL_BOOTSTRAP', 200),
+    ('seasonal-trend', 'INTERVAL_BLOCK', 3),
+    ('seasonal-trend', '_ORIGIN_MIN_MONTHS', 6),
+    ('seasonal-trend', 'ST_CHANGEPOINTS', 2),
+    ('seasonal-trend', 'ST_HARMONICS', 1),
+    ('holt-winters', 'INTERVAL_LEVEL', 0.8),
+    ('holt-winters', 'HW_ALPHAS', np.array([0.2, 0.5])),
+    ('holt-winters', 'HW_GAMMAS', np.array([0.0, 0.1])),
+]
+
+
+def monthly(n=30, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'ds': pd.date_range('2021-01-01', periods=n, freq='MS'),
+                         'y': 1000 + 10 * np.arange(n) + rng.normal(0, 30, n)})
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    c = core._ResultCache(16, 3600, str(tmp_path), 16, promote=True)
+    monkeypatch.setattr(core, 'MODEL_CACHE', c)
+    return c
+
+
+@pytest.mark.parametrize('model,setting,value', CHANGES)
+def test_changed_setting_is_a_miss(cache, monkeypatch, model, setting, value):
+    fit, m = FITS[model], monthly()
+    first = fit(m)
+    assert cache.stats()['misses'] == 1 and cache.stats()['hits'] == 0
+    assert fit(m)['12_month'] == first['12_month']
+    assert cache.stats()['hits'] == 1
+    monkeypatch.setattr(core, setting, value)
+    fit(m)
+    assert cache.stats() == {'hits': 1, 'misses': 2, 'memory_items': 2}
+
+
+def test_disk_tier_misses_after_a_level_change(cache, monkeypatch, tmp_path):
+    m = monthly()
+    wide = core._run_seasonal_trend_model(m)['12_month']
+    # Another process on the same directory, started with a different level
+    other = core._ResultCache(16, 3600, str(tmp_path), 16, promote=True)
+    monkeypatch.setattr(core, 'MODEL_CACHE', other)
+    monkeypatch.setattr(core, 'INTERVAL_LEVEL', 0.5)
+    narrow = core._run_seasonal_trend_model(m)['12_month']
+    assert other.stats()['misses'] == 1 and other.stats()['hits'] == 0
+    assert narrow['upper'] - narrow['lower'] < wide['upper'] - wide['lower']
+    monkeypatch.setattr(core, 'INTERVAL_LEVEL', 0.95)
+    assert core._run_seasonal_trend_model(m)['12_month'] == wide
+    assert other.stats()['hits'] == 1
@@ -0,0 +1,48 @@
+"""
+MSME partition index: Udyam keys are matched stripped and upper-cased, every
+MSME's rows come back as a boolean filter would return them, and an index is
+reused only for the same upload.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import datanetra_core as core
+
+RAW = ['UDYAM-A', ' udyam-a', 'UDYAM-B', None, 'Udyam-C ', 'UDYAM-B']
+
+
+def frame(categorical):
+    keys = [RAW[i % len(RAW)] for i in range(60)]
+    df = pd.DataFrame({'Udyam_Number': keys, 'Monthly_Sales_INR': np.arange(60.0)})
+    if categorical: df['Udyam_Number'] = df['Udyam_Number'].astype('category')
+    return df
+
+
+@pytest.fixture(autouse=True)
+def fresh(monkeypatch):
+    monkeypatch.setattr(core, '_PARTITIONS', {})
+
+
+@pytest.mark.parametrize('categorical', [False, True], ids=['object', 'category'])
+def test_partitions_match_a_boolean_filter(categorical):
+    df = frame(categorical)
+    parts = core.msme_partitions(df)
+    norm = df['Udyam_Number'].astype(str).str.strip().str.upper()
+    assert sorted(k for k, _ in parts) == ['UDYAM-A', 'UDYAM-B', 'UDYAM-C']
+    for key, rows in parts.frames(df):
+        pd.testing.assert_frame_equal(rows, df[norm == key])
+    assert parts.take(df, 'UDYAM-Z') is None
+    assert sum(len(pos) for _, pos in parts) == df['Udyam_Number'].notna().sum()
+
+
+def test_index_is_reused_per_digest():
+    df = frame(False)
+    first = core.msme_partitions(df, 'd1')
+    assert core.msme_partitions(df, 'd1') is first
+    assert core.msme_partitions(df, 'd2') is not first
+    assert core.msme_partitions(df) is not first
+
+
+def test_no_udyam_column_has_no_index():
+    assert core.msme_partitions(pd.DataFrame({'Monthly_Sales_INR': [1.0]})) is None
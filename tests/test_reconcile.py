@@ -0,0 +1,54 @@
+"""
+Bottom-up granular forecasts: only store × category cells are fitted, so the
+overall, store and category forecasts add up month by month.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import datanetra_core as core
+
+STORES, CATS = ['S1', 'S2', 'S3'], ['Food', 'Toys']
+
+
+def upload(months=30, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i, s in enumerate(STORES):
+        for j, c in enumerate(CATS):
+            t = np.arange(months)
+            y = 1e4 * (1 + i + j) + 150 * t * (i + 1) + 2e3 * np.sin(2 * np.pi * (t + 3 * j) / 12)
+            rows.append(pd.DataFrame({'Date': pd.date_range('2022-01-01', periods=months, freq='MS'),
+                                      'Store_ID': s, 'Product_Category': c,
+                                      'Sales': y + rng.normal(0, 500, months)}))
+    return pd.concat(rows, ignore_index=True)
+
+
+def levels(df, reconcile):
+    codes = lambda col, labels: pd.Categorical(df[col], categories=labels).codes.astype(np.int64)
+    groups = [(['Overall'], np.zeros(len(df), dtype=np.int64)),
+              (STORES, codes('Store_ID', STORES)), (CATS, codes('Product_Category', CATS))]
+    out = core._granular_batch(df, 'Sales', groups, reconcile=reconcile)
+    return [np.array([res['fc']['yhat'].to_numpy() for _, res, _ in lv]) for lv in out]
+
+
+def test_bottom_up_levels_add_up():
+    overall, stores, cats = levels(upload(), 'bottom_up')
+    np.testing.assert_allclose(stores.sum(axis=0), overall[0], rtol=1e-9)
+    np.testing.assert_allclose(cats.sum(axis=0), overall[0], rtol=1e-9)
+
+
+def test_levels_add_up_when_a_store_opens_late():
+    df = upload()
+    df = df[(df['Store_ID'] != 'S3') | (df['Date'] >= '2023-01-01')]
+    overall, stores, cats = levels(df, 'bottom_up')
+    np.testing.assert_allclose(stores.sum(axis=0), overall[0], rtol=1e-9)
+    np.testing.assert_allclose(cats.sum(axis=0), overall[0], rtol=1e-9)
+
+
+def test_bottom_up_bands_contain_the_forecast():
+    df = upload()
+    codes = pd.Categorical(df['Store_ID'], categories=STORES).codes.astype(np.int64)
+    for _, res, _ in core._granular_batch(df, 'Sales', [(STORES, codes)], reconcile='bottom_up')[0]:
+        fc = res['fc']
+        assert (fc['yhat_lower'] <= fc['yhat'] + 1e-6).all() and (fc['yhat'] <= fc['yhat_upper'] + 1e-6).all()
@@ -0,0 +1,119 @@
+"""The fused scoring kernel against the pandas normalize() chain it replaced."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import datanetra_core as core
+
+
+def normalize(series):
+    if series.empty or series.max() == series.min(): return pd.Series(0, index=series.index)
+    return (series - series.min()) / (series.max() - series.min() + 1e-9)
+
+
+def reference_scores(df):
+    """calculate_scores as it was before the kernel (canonical columns, no remap)."""
+    df = df.copy()
+    for col in core.SCORE_INPUTS:
+        if col in df.columns: df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+        else: df[col] = 0
+    df['Monthly_Sales_INR_Adjusted'] = df['Monthly_Sales_INR'].replace(0, 1e-9)
+    df["Cashflow_Stress"] = normalize(df["Monthly_Operating_Cost_INR"] / df["Monthly_Sales_INR_Adjusted"])
+    df["Loan_Stress"] = normalize(df["Outstanding_Loan_INR"] / (df["Monthly_Sales_INR_Adjusted"] * 12))
+    df["Financial_Risk_Score"] = (0.5 * df["Cashflow_Stress"] + 0.5 * df["Loan_Stress"]).clip(0, 1)
+    df["Vendor_Score"] = (0.5 * df["Vendor_Delivery_Reliability"] + 0.3 * normalize(df["Inventory_Turnover"]) + 0.2 * normalize(df["Avg_Margin_Percent"])).clip(0, 1)
+    df["Growth_Potential_Score"] = (0.4 * normalize(df["Monthly_Demand_Units"]) + 0.35 * normalize(df["Avg_Margin_Percent"]) + 0.25 * (1 - normalize(df["Returns_Percentage"]))).clip(0, 1)
+    df["MSME_Health_Score"] = ((1 - df["Financial_Risk_Score"]) * 0.4 + df["Vendor_Score"] * 0.3 + df["Growth_Potential_Score"] * 0.3) * 100
+    df['Profitability_Ratio'] = normalize(df['Avg_Margin_Percent'] * df['Monthly_Sales_INR_Adjusted'])
+    df['Operational_Efficiency'] = (1 - normalize(df['Monthly_Operating_Cost_INR'] / df['Monthly_Sales_INR_Adjusted'])).clip(0, 1)
+    df['Customer_Satisfaction'] = (1 - normalize(df['Returns_Percentage'])).clip(0, 1)
+    df['Performance_Score'] = (0.3*df['Profitability_Ratio'] + 0.25*df['Operational_Efficiency'] + 0.2*df['Customer_Satisfaction'] + 0.15*df['Vendor_Delivery_Reliability'] + 0.1*normalize(df['Inventory_Turnover'])).clip(0, 1) * 100
+    return df
+
+
+def upload(n, kind, seed=0):
+    """Canonical scoring inputs. 'clean': floats and ints; 'messy': NaNs, stray strings,
+    zero sales, a constant column, a float32 column and a missing input."""
+    rng = np.random.default_rng(seed)
+    sales = rng.uniform(5e3, 5e5, n)
+    df = pd.DataFrame({
+        'Monthly_Sales_INR': sales,
+        'Monthly_Operating_Cost_INR': sales * rng.uniform(0.5, 0.9, n),
+        'Outstanding_Loan_INR': rng.uniform(0, 2e6, n),
+        'Vendor_Delivery_Reliability': rng.uniform(0.6, 1.0, n),
+        'Inventory_Turnover': rng.integers(50, 600, n),
+        'Avg_Margin_Percent': rng.uniform(5, 35, n).round(2),
+        'Monthly_Demand_Units': rng.integers(10, 500, n),
+        'Returns_Percentage': rng.uniform(1, 10, n).round(2),
+    })
+    if kind == 'messy':
+        df['Monthly_Sales_INR'] = df['Monthly_Sales_INR'].where(np.arange(n) % 7 != 3, 0.0)
+        df['Outstanding_Loan_INR'] = df['Outstanding_Loan_INR'].where(np.arange(n) % 5 != 1)   # NaN
+        df['Avg_Margin_Percent'] = df['Avg_Margin_Percent'].astype(object).where(np.arange(n) % 11 != 4, 'n/a')
+        df['Vendor_Delivery_Reliability'] = 0.9                                                 # constant
+        df['Returns_Percentage'] = df['Returns_Percentage'].astype(np.float32)
+        df = df.drop(columns='Monthly_Demand_Units')
+    return df
+
+
+def assert_same(expected, got):
+    for col in core.SCORE_INPUTS + core.SCORE_OUTPUTS:
+        a, b = expected[col], got[col]
+        assert a.dtype == b.dtype, (col, a.dtype, b.dtype)
+        assert np.array_equal(a.to_numpy(), b.to_numpy(), equal_nan=True), col
+
+
+CASES = [(n, kind) for n in (0, 1, 50, 3000) for kind in ('clean', 'messy')]
+
+
+@pytest.mark.parametrize('n,kind', CASES)
+def test_single_pass_matches_reference(n, kind):
+    df = upload(n, kind)
+    got = core.calculate_scores(df.copy(), core.DataSchema.of(df), workers=1)
+    assert_same(reference_scores(df), got)
+
+
+@pytest.mark.parametrize('n,kind', CASES)
+def test_partitioned_matches_reference(n, kind, monkeypatch):
+    df = upload(n, kind)
+    monkeypatch.setattr(core, 'SCORE_PARTITION_ROWS', 7)      # many uneven partitions
+    got = core.calculate_scores(df.copy(), core.DataSchema.of(df), workers=3)
+    assert_same(reference_scores(df), got)
+
+
+@pytest.mark.parametrize('block', [1, 16, 1 << 16])
+def test_block_size_does_not_change_scores(block):
+    df = upload(3000, 'messy')
+    df, cols = core._score_inputs(df.copy(), core.DataSchema.of(df))
+    out = core._score_assign(df, core.score_kernel(cols, workers=1, block=block))
+    assert_same(reference_scores(upload(3000, 'messy')), out)
+
+
+def chunked(df, step, schema=None):
+    chunks = lambda: (df.iloc[s:s + step].copy() for s in range(0, len(df), step))
+    parts = list(core.score_chunks(chunks, schema, workers=2))
+    return pd.concat(parts) if parts else None
+
+
+@pytest.mark.parametrize('n,kind,step', [(n, kind, step) for n, kind in CASES if n
+                                         for step in ((1, 7) if n <= 50 else (7, 1000))])
+def test_chunked_matches_reference(n, kind, step):
+    df = upload(n, kind)
+    assert_same(reference_scores(df), chunked(df, step, core.DataSchema.of(df)))
+
+
+def test_chunks_read_with_different_dtypes():
+    # A CSV reader can type the same column int in one chunk and float in the next,
+    # or find zero sales only in a later chunk; scores follow the concatenated frame
+    df = upload(300, 'clean')
+    parts = [df.iloc[:100].copy(), df.iloc[100:200].copy(), df.iloc[200:].copy()]
+    parts[1]['Inventory_Turnover'] = parts[1]['Inventory_Turnover'].astype(np.float64)
+    parts[2]['Monthly_Sales_INR'] = parts[2]['Monthly_Sales_INR'].astype(object)
+    parts[2].iloc[5, parts[2].columns.get_loc('Monthly_Sales_INR')] = 0
+    whole = pd.concat(parts)
+    got = pd.concat(core.score_chunks(lambda: (p.copy() for p in parts), core.DataSchema.of(df), workers=1))
+    assert_same(reference_scores(whole), got)
+
+
+def test_no_chunks_yields_nothing():
+    assert chunked(upload(0, 'clean'), 10) is None